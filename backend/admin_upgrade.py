@@ -24,6 +24,8 @@ def upgrade_user(email: str, plan: str):
             user.subscription_status = "active"
             
         db.commit()
+        from core.user_cache import user_cache
+        user_cache.invalidate(user.id)
         print(f"✅ User {user.email} upgraded to {user.plan}.")
         
     except Exception as e:
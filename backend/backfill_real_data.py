@@ -125,6 +125,10 @@ def main():
                 # Don't crash, just continue
                 continue
 
+    # 5. Agregados de rendimiento (los inserts directos no los actualizan)
+    from core.performance_stats import rebuild
+    rebuild(db)
+
     db.close()
     print(f"--- Backfill Complete. Total Real Signals: {total_signals} ---")
 
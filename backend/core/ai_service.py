@@ -4,7 +4,10 @@ import os
 import requests
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
-import google.generativeai as genai
+from core.lazy_imports import lazy_module
+
+# ~0.9 s de import: solo al usar Gemini
+genai = lazy_module("google.generativeai")
 
 # === ABSTRACTION LAYER ===
 
@@ -158,11 +161,57 @@ class GeminiProvider(AIProvider):
             return f"Gemini Analysis Error: {str(e)}"
 
 
+# === FAKE IMPLEMENTATION (tests / desarrollo sin claves) ===
+
+class FakeProvider(AIProvider):
+    """
+    Proveedor local determinista (AI_PROVIDER=fake): misma entrada, misma
+    respuesta, sin red ni coste. AI_FAKE_LATENCY_MS simula la espera del
+    proveedor real; `calls` cuenta las llamadas (tests de caché y coalescing).
+    """
+    calls = 0
+
+    def __init__(self):
+        self.latency = int(os.getenv("AI_FAKE_LATENCY_MS", "0")) / 1000.0
+
+    def _reply(self, text: str, system_instruction: str = None) -> str:
+        import hashlib
+        import time
+        FakeProvider.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha1(f"{system_instruction or ''}\n{text}".encode("utf-8")).hexdigest()[:12]
+        return digest
+
+    def chat(self, messages: List[Dict[str, str]], system_instruction: str = None) -> str:
+        digest = self._reply(messages[-1]["content"] if messages else "", system_instruction)
+        return f"[fake:{digest}] Respuesta simulada ({len(messages)} mensajes)."
+
+    def generate_analysis(self, prompt: str, system_instruction: str = None) -> str:
+        digest = self._reply(prompt, system_instruction)
+        return (
+            "#ANALYSIS_START\n"
+            f"#CTXT#\nAnálisis simulado [fake:{digest}].\n"
+            "#TA#\nSin datos reales.\n#PLAN#\nN/A\n#INSIGHT#\nN/A\n#PARAMS#\nN/A\n"
+            "#ANALYSIS_END"
+        )
+
+
+# Prefijos con los que los proveedores devuelven errores como texto
+ERROR_PREFIXES = ("Error:", "DeepSeek Error", "DeepSeek Connection Error", "Gemini Error",
+                  "Gemini Analysis Error", "Gemini & DeepSeek Failed")
+
+
+def is_error_response(text: Optional[str]) -> bool:
+    """True si el texto es un error del proveedor (no debe cachearse)."""
+    return not text or text.startswith(ERROR_PREFIXES)
+
+
 # === FACTORY ===
 
 def get_ai_service() -> AIProvider:
     """
-    Retorna el proveedor configurado en .env (AI_PROVIDER).
+    Retorna el proveedor configurado en .env (AI_PROVIDER: auto|deepseek|gemini|fake).
     Default: 'gemini' (Si hay key), sino 'deepseek'.
     """
     # Preferencia del usuario
@@ -171,6 +220,8 @@ def get_ai_service() -> AIProvider:
     gemini_key = os.getenv("GEMINI_API_KEY")
     deepseek_key = os.getenv("DEEPSEEK_API_KEY")
     
+    if provider == "fake":
+        return FakeProvider()
     if provider == "gemini":
         return GeminiProvider()
     elif provider == "deepseek":
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 from datetime import datetime
 import asyncio
 
@@ -14,6 +14,10 @@ from indicators.market import get_market_data # Re-export if needed or used dire
 
 from fastapi import HTTPException
 
+# Versión de la plantilla del prompt PRO: forma parte de la clave de la caché
+# de respuestas LLM (core/llm_cache.py). Subirla al cambiar el prompt.
+PRO_PROMPT_VERSION = "pro-v1"
+
 def _build_lite_from_market(token: str, timeframe: str, market: Dict[str, Any]) -> Tuple[LiteSignal, Dict[str, Any]]:
     """
     Aplica la lógica LITE v2 sobre los datos de mercado y devuelve:
@@ -215,16 +219,39 @@ async def _build_pro_markdown(
     req: ProReq,
     lite: LiteSignal,
     indicators: Dict[str, Any],
-    brain: Dict[str, str],
+    brain: Union[Dict[str, str], Callable[[], Dict[str, str]]],
+    candle_ts: Optional[int] = None,
 ) -> str:
     """
     Construye un prompt y delega en Gemini Flash para el análisis PRO.
+
+    La respuesta se cachea por (token, tf, candle_ts = última vela cerrada,
+    PRO_PROMPT_VERSION, hash del snapshot de mercado + mensaje del usuario)
+    hasta el cierre de la siguiente vela, y las peticiones idénticas
+    simultáneas comparten una sola llamada al proveedor (core/llm_cache.py).
+    El contexto RAG no entra en la clave (sus fragmentos se eligen al azar
+    en cada llamada); `brain` puede ser una función para cargarlo solo si
+    hay que llamar al proveedor.
     """
+    from core.llm_cache import AnalysisKey, llm_cache, snapshot_hash
+    from fastapi.concurrency import run_in_threadpool
+
     # 1. Extract context
     token_up = lite.token
     tf = lite.timeframe
     user_msg = (req.user_message or "").strip()
 
+    key = AnalysisKey(
+        kind="pro", token=token_up, timeframe=tf, candle_ts=candle_ts,
+        template_version=PRO_PROMPT_VERSION,
+        snapshot_hash=snapshot_hash(indicators, lite.model_dump(exclude={"timestamp"}), user_msg),
+    )
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    if callable(brain):
+        brain = await run_in_threadpool(brain)
+
     rsi = indicators.get("rsi", "N/D")
     trend = indicators.get("trend", "NEUTRAL")
     ema21 = indicators.get("ema21", "N/D")
@@ -300,11 +327,9 @@ SL: {lite.sl}
 #ANALYSIS_END
 """
 
-    # 3. Offload blocking LLM call to threadpool (using ai_service)
-    from fastapi.concurrency import run_in_threadpool
-    
+    # 3. Blocking LLM call in threadpool (using ai_service), cached + coalesced
     def _generate_safe():
         service = get_ai_service()
         return service.generate_analysis(prompt, system_instruction=system_instruction)
 
-    return await run_in_threadpool(_generate_safe)
+    return await llm_cache.get_or_generate_async(key, _generate_safe)
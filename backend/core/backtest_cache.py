@@ -0,0 +1,225 @@
+# backend/core/backtest_cache.py
+"""
+Caché de resultados de backtest direccionada por contenido.
+
+Clave = hash de:
+- versión de la estrategia (sha256 del fichero fuente + config),
+- parámetros del run (símbolo, timeframe, capital inicial),
+- rango EXACTO de velas: primer/último timestamp + checksum de los datos.
+
+Cada run pide "las últimas N velas", así que con cada vela nueva la ventana
+se desplaza y el primer timestamp (parte de prefix_id) cambiaba: el prefijo
+no se reutilizaba nunca. Por eso BacktestEngine:
+- alinea el inicio de la ventana a una rejilla fija (align_window,
+  BACKTEST_WINDOW_ALIGN_H, por defecto el día UTC): los runs dentro del
+  mismo periodo comparten inicio y solo se extienden por la derecha;
+- guarda el checkpoint en la última vela CERRADA (last_closed_index): la
+  vela en curso cambia entre runs y rompería el checksum del prefijo.
+
+Cada entrada guarda el ESTADO final del walk-forward (capital, posición
+abierta, trades, curva), no solo la respuesta. Eso permite:
+- Hit exacto: devolver el resultado sin recalcular nada.
+- Prefijo: si un run nuevo extiende por la derecha un rango cacheado (mismo
+  inicio, mismas velas hasta el último ts cacheado) y la estrategia es causal,
+  BacktestEngine reanuda desde el checkpoint y solo procesa las velas nuevas.
+
+Almacenamiento en disco (JSON por entrada) con LRU por mtime y tope de
+tamaño total (BACKTEST_CACHE_MAX_MB).
+"""
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("BACKTEST_CACHE_DIR", os.path.join(BASE_DIR, "data", "backtest_cache"))
+MAX_BYTES = int(os.getenv("BACKTEST_CACHE_MAX_MB", "200")) * 1024 * 1024
+ENABLED = os.getenv("BACKTEST_CACHE", "1") != "0"
+WINDOW_ALIGN_MS = int(float(os.getenv("BACKTEST_WINDOW_ALIGN_H", "24")) * 3_600_000)
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _sha(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def strategy_version(strategy) -> str:
+    """Hash del código fuente de la estrategia + su config."""
+    try:
+        source_file = inspect.getsourcefile(type(strategy))
+        with open(source_file, "rb") as f:
+            source_hash = _sha(f.read())
+    except Exception:
+        source_hash = type(strategy).__qualname__
+    config = json.dumps(getattr(strategy, "config", None), sort_keys=True, default=str)
+    return _sha(f"{source_hash}|{config}".encode("utf-8"))[:24]
+
+
+def data_checksum(df, upto: Optional[int] = None) -> str:
+    """Checksum de las velas df[:upto+1] (todas si upto es None)."""
+    cols = [c for c in OHLCV_COLUMNS if c in df.columns]
+    arr = df[cols].to_numpy(dtype=np.float64)
+    if upto is not None:
+        arr = arr[:upto + 1]
+    return _sha(np.ascontiguousarray(arr).tobytes())
+
+
+def align_window(timestamps, tf_ms: int, align_ms: int = WINDOW_ALIGN_MS) -> int:
+    """
+    Índice de la primera vela en o tras el siguiente múltiplo de la rejilla
+    (max(align_ms, tf_ms)) desde timestamps[0]. Recortar ahí la ventana hace
+    que su inicio no cambie con cada vela nueva.
+    """
+    grid = max(int(align_ms), int(tf_ms))
+    if grid <= 0 or len(timestamps) == 0:
+        return 0
+    first = int(timestamps[0])
+    start = -(-first // grid) * grid  # techo al múltiplo de la rejilla
+    return int(np.searchsorted(timestamps, start))
+
+
+def last_closed_index(timestamps, tf_ms: int, now_ms: Optional[int] = None) -> int:
+    """Índice de la última vela cerrada (ts + tf <= ahora); -1 si ninguna."""
+    import time
+    now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+    return int(np.searchsorted(timestamps, now_ms - int(tf_ms), side="right")) - 1
+
+
+def prefix_id(strategy, strategy_id: str, symbol: str, timeframe: str,
+              initial_capital: float, first_ts: int) -> str:
+    """Identidad de un run salvo por su final (para reutilizar prefijos)."""
+    raw = json.dumps({
+        "strategy": strategy_id,
+        "version": strategy_version(strategy),
+        "symbol": symbol.upper(),
+        "timeframe": timeframe,
+        "capital": float(initial_capital),
+        "first_ts": int(first_ts),
+    }, sort_keys=True)
+    return _sha(raw.encode("utf-8"))[:32]
+
+
+def _json_default(o):
+    if hasattr(o, "item"):
+        return o.item()
+    return str(o)
+
+
+class BacktestResultCache:
+    """
+    Caché en disco con LRU (mtime) y tope de bytes.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES, enabled: bool = ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "prefix_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, pid: str, last_ts: int, checksum: str) -> str:
+        return os.path.join(self.directory, f"{pid}-{int(last_ts)}-{checksum[:16]}.json")
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # LRU touch
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def get(self, pid: str, last_ts: int, checksum: str) -> Optional[Dict[str, Any]]:
+        """Hit exacto: mismo prefijo, mismo último ts y mismos datos."""
+        if not self.enabled:
+            return None
+        entry = self._read(self._path(pid, last_ts, checksum))
+        if entry and entry.get("data_checksum") == checksum:
+            self.stats["hits"] += 1
+            return entry
+        self.stats["misses"] += 1
+        return None
+
+    def find_prefix(self, pid: str, df, timestamps) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Busca el checkpoint más largo cuyo rango sea prefijo de df.
+        Devuelve (índice de la última vela cacheada en df, entrada) o None.
+        """
+        if not self.enabled:
+            return None
+        candidates = []
+        for path in glob.glob(os.path.join(self.directory, f"{pid}-*.json")):
+            try:
+                _, ts_str, short_sum = os.path.basename(path)[:-5].split("-")
+                candidates.append((int(ts_str), short_sum, path))
+            except ValueError:
+                continue
+
+        for last_ts, short_sum, path in sorted(candidates, reverse=True):
+            idx = int(np.searchsorted(timestamps, last_ts))
+            if idx >= len(timestamps) - 1 or timestamps[idx] != last_ts:
+                continue  # no está dentro (o no extiende) el rango nuevo
+            checksum = data_checksum(df, upto=idx)
+            if checksum[:16] != short_sum:
+                continue
+            entry = self._read(path)
+            if entry and entry.get("data_checksum") == checksum:
+                self.stats["prefix_hits"] += 1
+                return idx, entry
+        return None
+
+    def put(self, pid: str, last_ts: int, checksum: str, entry: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        entry = dict(entry, prefix_id=pid, last_ts=int(last_ts), data_checksum=checksum)
+        path = self._path(pid, last_ts, checksum)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, default=_json_default, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[BACKTEST CACHE] ⚠️ Write failed: {e}")
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = []
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                try:
+                    st = os.stat(path)
+                    files.append((st.st_mtime, st.st_size, path))
+                except OSError:
+                    continue
+            total = sum(f[1] for f in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self.stats["evictions"] += 1
+                except OSError:
+                    pass
+
+    def clear(self) -> int:
+        removed = 0
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+result_cache = BacktestResultCache()
@@ -1,51 +1,61 @@
 
-import pandas as pd
-import importlib
-import inspect
+import math
+import numpy as np
 import sys
 import os
 import traceback
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 
 # Add root to path to find 'strategies'
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.market_data_api import get_ohlcv_data
+from core.monte_carlo import run_monte_carlo
+from core.curve_downsample import shape_curve
+from core.backtest_cache import (
+    result_cache, prefix_id, data_checksum, align_window, last_closed_index, WINDOW_ALIGN_MS
+)
+from core.lazy_imports import lazy_module
+
+pd = lazy_module("pandas")  # al primer backtest, no al importar main
+
+PROGRESS_EVERY_BARS = 50
+
+
+class BacktestCancelled(Exception):
+    """Lanzada desde el callback de progreso para abortar un run en curso."""
+
 
 class BacktestEngine:
     """
     Motor de simulación histórica para validar estrategias.
     """
     
-    def __init__(self, initial_capital: float = 1000.0):
+    def __init__(self, initial_capital: float = 1000.0, cache=result_cache):
         self.initial_capital = initial_capital
         self.strategies = {}
+        self.cache = cache
         
     def load_strategy(self, strategy_id: str):
         """
-        Carga una estrategia por su ID (nombre del archivo).
+        Carga una estrategia por su ID (nombre del archivo o id de metadata).
+
+        Instancia nueva del registry (sin estado compartido con el
+        scheduler); el módulo solo se recarga con STRATEGY_DEV_RELOAD=1.
         """
         try:
-            module_name = f"strategies.{strategy_id}"
-            if module_name in sys.modules:
-                module = importlib.reload(sys.modules[module_name])
-            else:
-                module = importlib.import_module(module_name)
-                
-            found_class = None
-            for name, obj in inspect.getmembers(module):
-                if inspect.isclass(obj) and obj.__module__ == module_name:
-                    if hasattr(obj, 'generate_signals') and hasattr(obj, 'metadata'):
-                        found_class = obj
-                        break
-            
-            if found_class:
-                self.strategies[strategy_id] = found_class()
-                print(f"[Backtest] Estrategia cargada: {strategy_id}")
-            else:
+            from strategies.registry import get_registry, STRATEGY_DEV_RELOAD
+
+            registry = get_registry()
+            if STRATEGY_DEV_RELOAD:
+                registry.reload(strategy_id)
+            strategy = registry.create(strategy_id)
+            if strategy is None:
                 raise Exception(f"No se encontró clase compatible en {strategy_id}")
-            
+            self.strategies[strategy_id] = strategy
+            print(f"[Backtest] Estrategia cargada: {strategy_id}")
+
         except Exception as e:
             print(f"[Backtest] Error cargando estrategia {strategy_id}: {e}")
             raise e
@@ -55,20 +65,97 @@ class BacktestEngine:
             traceback.print_exc()
             raise e
 
-    def _safe_float(self, val):
-        import math
+    @staticmethod
+    def _safe_float(val):
+        # Se llama 4 veces por vela: sin import ni try/except genérico por llamada
         try:
             f = float(val)
-            if math.isnan(f) or math.isinf(f):
-                return 0.0
-            return f
-        except:
+        except (TypeError, ValueError):
             return 0.0
+        return f if math.isfinite(f) else 0.0
+
+    def _build_results(
+        self,
+        state: Dict[str, Any],
+        monte_carlo: Optional[Dict[str, Any]] = None,
+        curve_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Métricas + respuesta a partir del estado final del walk-forward."""
+        trades = state["trades"]
+        equity_curve = state["curve"]
+        current_capital = state["capital"]
+
+        wins = [t for t in trades if t['pnl'] > 0]
+        win_rate = (len(wins) / len(trades) * 100) if trades else 0
+        
+        final_buy_hold = equity_curve[-1]['buy_hold_equity'] if equity_curve else self.initial_capital
+        
+        results = {
+            "metrics": {
+                "initial_capital": round(self._safe_float(self.initial_capital), 2),
+                "final_capital": round(self._safe_float(current_capital), 2),
+                "total_pnl": round(self._safe_float(current_capital - self.initial_capital), 2),
+                "buy_hold_pnl": round(self._safe_float(final_buy_hold - self.initial_capital), 2),
+                "total_trades": int(len(trades)),
+                "win_rate": round(self._safe_float(win_rate), 1),
+                "best_trade": round(self._safe_float(max([t['pnl'] for t in trades]) if trades else 0), 2),
+                "worst_trade": round(self._safe_float(min([t['pnl'] for t in trades]) if trades else 0), 2),
+            },
+            "trades": trades[-50:],
+            "curve": equity_curve,
+            "curve_points": len(equity_curve),
+        }
+
+        if curve_options is not None:
+            # Downsampling solo en la respuesta: la caché guarda la curva completa
+            results["curve"] = shape_curve(equity_curve, y_key="strategy_equity", **curve_options)
 
-    def run(self, strategy_id: str, symbol: str, timeframe: str = "1h", days: int = 30) -> Dict[str, Any]:
+        if monte_carlo is not None:
+            results["monte_carlo"] = run_monte_carlo(
+                state["trade_returns"],
+                initial_capital=self.initial_capital,
+                **monte_carlo
+            )
+
+        return results
+
+    @staticmethod
+    def _timeframe_ms(timeframe: str, candles_per_day: int) -> int:
+        from core.indicator_snapshots import timeframe_ms
+        try:
+            return timeframe_ms(timeframe)
+        except ValueError:
+            return 86_400_000 // candles_per_day
+
+    def run(
+        self,
+        strategy_id: str,
+        symbol: str,
+        timeframe: str = "1h",
+        days: int = 30,
+        monte_carlo: Optional[Dict[str, Any]] = None,
+        progress: Optional[Callable[[int, int, int], None]] = None,
+        use_cache: bool = True,
+        curve_options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Ejecuta el backtest Walk-Forward.
         Recorre vela a vela simulando que "hoy es t".
+
+        monte_carlo: si se indica (kwargs de core.monte_carlo.run_monte_carlo,
+        p.ej. {"simulations": 1000, "method": "shuffle"}), añade la sección
+        "monte_carlo" calculada sobre TODOS los trades del run.
+
+        progress: callback(bars_done, bars_total, trades_so_far) llamado cada
+        PROGRESS_EVERY_BARS velas. Puede lanzar BacktestCancelled para abortar.
+
+        use_cache: consulta/guarda en core.backtest_cache (hit exacto por rango
+        de velas, o reanudación desde un prefijo cacheado si la estrategia es
+        causal).
+
+        curve_options: kwargs de core.curve_downsample.shape_curve
+        (max_points, method "lttb"|"minmax", curve_format "rows"|"columns").
+        None = curva completa, un punto por vela.
         """
         try:
             self.load_strategy(strategy_id)
@@ -85,6 +172,12 @@ class BacktestEngine:
             limit = days * candles_per_day
             
             limit += 50 
+
+            cache = self.cache if (use_cache and self.cache is not None) else None
+            tf_ms = self._timeframe_ms(timeframe, candles_per_day)
+            if cache:
+                # Velas extra: la ventana se recorta al inicio de la rejilla (align_window)
+                limit += max(WINDOW_ALIGN_MS, tf_ms) // tf_ms
             # Removed arbitrary 1000 cap to support long backtests with pagination
             # limit = min(limit, 1000)
     
@@ -101,19 +194,65 @@ class BacktestEngine:
             if "timestamp" in df.columns:
                 df["timestamp_dt"] = pd.to_datetime(df["timestamp"], unit="ms")
             
-            trades = []
-            equity_curve = [] # List of {time, strategy_equity, buy_hold_equity, price}
-            
-            current_capital = self.initial_capital
-            initial_price = df.iloc[50]['open'] # Start price after warmup
-            buy_hold_amount = self.initial_capital / initial_price
-            
-            active_position = None
             warmup = 50
+
+            # --- Caché por contenido (rango exacto de velas) ---
+            start_i = warmup
+            checkpoint = None
+            closed_idx = -1
+            if cache:
+                # Inicio alineado a la rejilla: el mismo en todos los runs del periodo
+                offset = align_window(df["timestamp"].to_numpy(dtype=np.int64), tf_ms)
+                if len(df) - offset >= 60:
+                    df = df.iloc[offset:].reset_index(drop=True)
+                timestamps = df["timestamp"].to_numpy(dtype=np.int64)
+                closed_idx = last_closed_index(timestamps, tf_ms)
+                pid = prefix_id(strategy, strategy_id, symbol, timeframe, self.initial_capital, timestamps[0])
+                last_ts = int(timestamps[-1])
+                checksum = data_checksum(df)
+
+                cached = cache.get(pid, last_ts, checksum)
+                if cached:
+                    print(f"[Backtest] ⚡ Cache hit: {strategy_id} {symbol} {timeframe}")
+                    state = cached["state"]
+                    if progress:
+                        progress(len(df) - warmup, len(df) - warmup, len(state["trades"]))
+                    return self._build_results(state, monte_carlo, curve_options)
+
+                if getattr(strategy, "causal", True):
+                    found = cache.find_prefix(pid, df, timestamps)
+                    if found:
+                        idx, entry = found
+                        checkpoint = entry["state"]
+                        start_i = idx + 1
+                        print(f"[Backtest] ⚡ Reusing cached prefix: {start_i - warmup}/{len(df) - warmup} bars")
+
+            total_bars = len(df) - warmup
+
+            if checkpoint:
+                trades = list(checkpoint["trades"])
+                trade_returns = list(checkpoint["trade_returns"])
+                equity_curve = list(checkpoint["curve"])
+                current_capital = checkpoint["capital"]
+                buy_hold_amount = checkpoint["buy_hold_amount"]
+                active_position = checkpoint["active_position"]
+            else:
+                trades = []
+                trade_returns = [] # Retorno fraccional por trade (para Monte Carlo)
+                equity_curve = [] # List of {time, strategy_equity, buy_hold_equity, price}
+
+                current_capital = self.initial_capital
+                initial_price = df.iloc[warmup]['open'] # Start price after warmup
+                buy_hold_amount = self.initial_capital / initial_price
+
+                active_position = None
             
-            print(f"[Backtest] Running loop from {warmup} to {len(df)}")
-            
-            for i in range(warmup, len(df)):
+            print(f"[Backtest] Running loop from {start_i} to {len(df)}")
+
+            for i in range(start_i, len(df)):
+                if progress and (i - warmup) % PROGRESS_EVERY_BARS == 0:
+                    progress(i - warmup, total_bars, len(trades))
+
                 current_candle = df.iloc[i]
                 current_time = current_candle['time']
                 current_ts_val = current_candle['timestamp']
@@ -160,6 +299,8 @@ class BacktestEngine:
                         fees = 0.0 
                         net_pnl = pnl_raw - fees
                         
+                        if current_capital > 0:
+                            trade_returns.append(net_pnl / current_capital)
                         current_capital += net_pnl
                         
                         trades.append({
@@ -242,26 +383,34 @@ class BacktestEngine:
                     })
                 except Exception as e:
                     print(f"[Backtest Warning] Error adding curve point at {i}: {e}")
+
+                if cache and i == closed_idx:
+                    # Checkpoint en la última vela cerrada (la siguiente aún puede cambiar)
+                    cache.put(pid, int(timestamps[i]), data_checksum(df, upto=i), {"state": {
+                        "trades": list(trades),
+                        "trade_returns": list(trade_returns),
+                        "curve": list(equity_curve),
+                        "capital": current_capital,
+                        "buy_hold_amount": buy_hold_amount,
+                        "active_position": dict(active_position) if active_position else None,
+                    }})
     
-            wins = [t for t in trades if t['pnl'] > 0]
-            win_rate = (len(wins) / len(trades) * 100) if trades else 0
-            
-            final_buy_hold = equity_curve[-1]['buy_hold_equity'] if equity_curve else self.initial_capital
-            
-            return {
-                "metrics": {
-                    "initial_capital": round(self._safe_float(self.initial_capital), 2),
-                    "final_capital": round(self._safe_float(current_capital), 2),
-                    "total_pnl": round(self._safe_float(current_capital - self.initial_capital), 2),
-                    "buy_hold_pnl": round(self._safe_float(final_buy_hold - self.initial_capital), 2),
-                    "total_trades": int(len(trades)),
-                    "win_rate": round(self._safe_float(win_rate), 1),
-                    "best_trade": round(self._safe_float(max([t['pnl'] for t in trades]) if trades else 0), 2),
-                    "worst_trade": round(self._safe_float(min([t['pnl'] for t in trades]) if trades else 0), 2),
-                },
-                "trades": trades[-50:],
-                "curve": equity_curve 
+            state = {
+                "trades": trades,
+                "trade_returns": trade_returns,
+                "curve": equity_curve,
+                "capital": current_capital,
+                "buy_hold_amount": buy_hold_amount,
+                "active_position": active_position,
             }
+
+            if progress:
+                progress(total_bars, total_bars, len(trades))
+
+            return self._build_results(state, monte_carlo, curve_options)
+        except BacktestCancelled:
+            print(f"[Backtest] Cancelado: {strategy_id} {symbol}")
+            raise
         except Exception as e:
             print("[Backtest Critical Error]:")
             traceback.print_exc()
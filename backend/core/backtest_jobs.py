@@ -0,0 +1,221 @@
+# backend/core/backtest_jobs.py
+"""
+Cola de jobs de backtest (asíncrona, fuera del request).
+
+POST /backtest/run ejecutaba BacktestEngine.run dentro del request: un run
+largo (15m / 180 días) bloqueaba un worker y podía chocar con el timeout del
+proxy. Aquí:
+
+- submit() devuelve un job_id al instante; el trabajo corre en un
+  ProcessPoolExecutor acotado (BACKTEST_WORKERS) con cola máxima
+  (BACKTEST_MAX_PENDING).
+- El progreso (velas procesadas, trades) lo publica el worker en un dict
+  compartido (multiprocessing.Manager) y se lee por polling o SSE.
+- Los resultados se guardan en memoria con retención (BACKTEST_JOB_TTL).
+- cancel() cancela jobs en cola o marca el flag que aborta el run en curso.
+- Submissions idénticas (mismos parámetros) se deduplican al job en cola o
+  en curso. Un job terminado no se reutiliza: sus datos pueden haber quedado
+  viejos, y repetir el run es barato gracias a core.backtest_cache (hit o
+  prefijo).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from typing import Any, Dict, Optional, Tuple
+
+MAX_WORKERS = int(os.getenv("BACKTEST_WORKERS", "2"))
+MAX_PENDING = int(os.getenv("BACKTEST_MAX_PENDING", "20"))
+JOB_TTL_SECONDS = int(os.getenv("BACKTEST_JOB_TTL", "3600"))
+
+ACTIVE_STATES = ("queued", "running", "cancelling")
+DEDUPE_STATES = ("queued", "running")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def job_key(params: Dict[str, Any]) -> str:
+    """Hash estable de los parámetros del backtest (para deduplicar)."""
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _run_job(job_id: str, params: Dict[str, Any], progress_store, cancel_store) -> Dict[str, Any]:
+    """Se ejecuta en el proceso worker."""
+    from core.backtest_engine import BacktestEngine, BacktestCancelled
+
+    def progress(done: int, total: int, trades: int):
+        progress_store[job_id] = {"bars_done": done, "bars_total": total, "trades": trades}
+        if cancel_store.get(job_id):
+            raise BacktestCancelled()
+
+    engine = BacktestEngine(initial_capital=params["initial_capital"])
+    return engine.run(
+        strategy_id=params["strategy_id"],
+        symbol=params["token"],
+        timeframe=params["timeframe"],
+        days=params["days"],
+        monte_carlo=params.get("monte_carlo"),
+        progress=progress,
+        curve_options=params.get("curve"),
+    )
+
+
+class BacktestJobManager:
+    """
+    Gestor de jobs de backtest (uno por proceso API).
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING,
+                 ttl_seconds: int = JOB_TTL_SECONDS):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.RLock()  # los done-callbacks pueden dispararse con el lock tomado
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._cancel = None
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            import multiprocessing
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+            self._cancel = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            print(f"[BACKTEST JOBS] Pool started ({self.max_workers} workers)")
+
+    def submit(self, params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Encola un backtest. Devuelve (snapshot_del_job, deduplicado).
+        """
+        key = job_key(params)
+        with self._lock:
+            self._prune()
+
+            existing_id = self._by_key.get(key)
+            if existing_id:
+                existing = self._jobs.get(existing_id)
+                if existing and existing["status"] in DEDUPE_STATES:
+                    return self._snapshot(existing), True
+
+            pending = sum(1 for j in self._jobs.values() if j["status"] in ACTIVE_STATES)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Backtest queue full ({pending} jobs)")
+
+            self._ensure_pool()
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "key": key,
+                "status": "queued",
+                "params": params,
+                "created_at": time.time(),
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "future": None,
+            }
+            self._jobs[job_id] = job
+            self._by_key[key] = job_id
+            self._cancel[job_id] = False
+
+            future = self._pool.submit(_run_job, job_id, params, self._progress, self._cancel)
+            job["future"] = future
+            future.add_done_callback(lambda f, jid=job_id: self._on_done(jid, f))
+            return self._snapshot(job), False
+
+    def _on_done(self, job_id: str, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job["finished_at"] = time.time()
+            try:
+                job["result"] = future.result()
+                job["status"] = "done"
+            except CancelledError:
+                job["status"] = "cancelled"
+            except Exception as e:
+                if type(e).__name__ == "BacktestCancelled":
+                    job["status"] = "cancelled"
+                else:
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+            self._cancel.pop(job_id, None)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            return self._snapshot(job, include_result=include_result)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            if job["status"] in ACTIVE_STATES:
+                if job["future"] is not None and job["future"].cancel():
+                    job["status"] = "cancelled"
+                    job["finished_at"] = time.time()
+                else:
+                    # Ya corriendo: el worker lo verá en el próximo callback de progreso
+                    self._cancel[job_id] = True
+                    job["status"] = "cancelling"
+            return self._snapshot(job, include_result=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for j in self._jobs.values():
+                by_status[j["status"]] = by_status.get(j["status"], 0) + 1
+            return {"workers": self.max_workers, "max_pending": self.max_pending, "jobs": by_status}
+
+    # --- internos (con lock tomado) ---
+
+    def _snapshot(self, job: Dict[str, Any], include_result: bool = True) -> Dict[str, Any]:
+        status = job["status"]
+        progress = self._progress.get(job["id"]) if self._progress is not None else None
+        if status == "queued" and progress:
+            status = job["status"] = "running"
+
+        snap = {
+            "job_id": job["id"],
+            "status": status,
+            "progress": progress or {"bars_done": 0, "bars_total": None, "trades": 0},
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"],
+            "params": job["params"],
+        }
+        if job["error"]:
+            snap["error"] = job["error"]
+        if include_result and job["result"] is not None:
+            snap["result"] = job["result"]
+        return snap
+
+    def _prune(self):
+        now = time.time()
+        expired = [
+            jid for jid, j in self._jobs.items()
+            if j["finished_at"] and now - j["finished_at"] > self.ttl_seconds
+        ]
+        for jid in expired:
+            job = self._jobs.pop(jid)
+            if self._by_key.get(job["key"]) == jid:
+                del self._by_key[job["key"]]
+            if self._progress is not None:
+                self._progress.pop(jid, None)
+
+
+job_manager = BacktestJobManager()
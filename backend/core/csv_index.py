@@ -0,0 +1,345 @@
+# backend/core/csv_index.py
+"""
+Lector indexado de los CSV legacy de señales (logs/{MODE}/{token}.csv y
+logs/EVALUATED/{token}.evaluated.csv).
+
+Antes, el evaluador (cada ciclo), el fallback de /logs/{mode}/{token} y el
+de /stats/summary parseaban cada CSV entero con csv.DictReader para
+quedarse con unas pocas filas o un conteo. Ahora get_index(path, keys)
+mantiene un índice por fichero:
+
+- offset en bytes de cada fila y, por cada columna clave (timestamps), su
+  valor en µs epoch UTC (MISSING si vacío o ilegible);
+- se guarda junto al CSV en <fichero>.idx (npz sin comprimir, escrito con
+  tmp + rename) para que otro proceso no tenga que re-escanear;
+- es append-aware: en cada acceso solo se parsean los bytes añadidos desde
+  la última vez (el CSV solo crece). Si el fichero encoge o cambian la
+  cabecera o la última fila indexada, se reconstruye.
+
+Consultas sin parsear el fichero entero:
+- tail(n) / latest(n, key): últimas filas (seek al offset y lectura hasta
+  el final) o las n más recientes por clave si el fichero no está ordenado;
+- since(ts, key) / count_since(ts, key): búsqueda binaria si la columna
+  está ordenada, máscara sobre el array si no;
+- contains(key, ts): "¿está evaluado este signal_ts?" contra un set en
+  memoria que crece con el fichero;
+- rows_at(posiciones): lee solo esas filas (rangos contiguos de una vez).
+
+Las filas se separan respetando comillas (una rationale con saltos de
+línea sigue siendo una fila) y una última línea sin \\n se ignora hasta que
+se complete.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+MISSING = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+TsLike = Union[str, datetime, None]
+
+
+def ts_key(value: TsLike) -> int:
+    """Timestamp ISO (con o sin Z / offset) o datetime → µs epoch UTC (MISSING si no se puede)."""
+    if value is None:
+        return MISSING
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        s = value.strip()
+        if not s:
+            return MISSING
+        if s.endswith("Z"):
+            s = s[:-1]  # UTC explícito: naive directamente (más rápido que astimezone)
+        try:
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            try:
+                dt = datetime.strptime(s, "%d/%m/%Y %H:%M:%S")  # CSVs editados a mano
+            except ValueError:
+                return MISSING
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // _US
+
+
+def _crc(data: bytes) -> int:
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+class CSVIndex:
+    """Índice de un CSV con cabecera. Usar get_index() (una instancia por fichero)."""
+
+    def __init__(self, path: str, keys: Sequence[str] = ("timestamp",)):
+        self.path = str(path)
+        self.keys = tuple(keys)
+        self._lock = threading.RLock()
+        self._sets: Dict[str, Set[int]] = {}
+        self._reset()
+        self._load_sidecar()
+
+    # --- Estado ---
+
+    def _reset(self) -> None:
+        self.fieldnames: List[str] = []
+        self.header_end = 0
+        self.header_crc = 0
+        self.size = 0  # bytes indexados (fin de la última fila completa)
+        self.last_crc = 0  # crc de la última fila indexada
+        self._mtime = None
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros((0, len(self.keys)), dtype=np.int64)
+        self.sorted = {k: True for k in self.keys}
+        self._sets.clear()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.offsets)
+
+    @property
+    def sidecar(self) -> str:
+        return self.path + INDEX_SUFFIX
+
+    def _load_sidecar(self) -> None:
+        try:
+            with np.load(self.sidecar, allow_pickle=False) as npz:
+                meta = json.loads(str(npz["meta"]))
+                if meta.get("version") != INDEX_VERSION or tuple(meta.get("keys", ())) != self.keys:
+                    return
+                self.fieldnames = meta["fieldnames"]
+                self.header_end = meta["header_end"]
+                self.header_crc = meta["header_crc"]
+                self.size = meta["size"]
+                self.last_crc = meta["last_crc"]
+                self.offsets = npz["offsets"]
+                self.values = npz["values"]
+                self.sorted = {k: bool(v) for k, v in meta["sorted"].items()}
+        except (OSError, ValueError, KeyError):
+            self._reset()
+
+    def _save_sidecar(self) -> None:
+        meta = {
+            "version": INDEX_VERSION, "keys": list(self.keys), "fieldnames": self.fieldnames,
+            "header_end": self.header_end, "header_crc": self.header_crc, "size": self.size,
+            "last_crc": self.last_crc, "sorted": self.sorted,
+        }
+        tmp = f"{self.sidecar}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, offsets=self.offsets, values=self.values, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, self.sidecar)
+        except OSError as e:
+            print(f"[CSV INDEX] ⚠️ No se pudo guardar {self.sidecar}: {e}")
+
+    # --- Mantenimiento ---
+
+    def _still_valid(self, f, file_size: int) -> bool:
+        """El CSV solo creció desde la última indexación (misma cabecera y última fila)."""
+        if not self.header_end or file_size < self.size:
+            return False
+        f.seek(0)
+        if _crc(f.read(self.header_end)) != self.header_crc:
+            return False
+        if len(self.offsets):
+            last = int(self.offsets[-1])
+            f.seek(last)
+            if _crc(f.read(self.size - last)) != self.last_crc:
+                return False
+        return True
+
+    def refresh(self) -> bool:
+        """Indexa lo añadido desde la última vez. False si el fichero no existe."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return False
+            if st.st_size == self.size and st.st_mtime_ns == self._mtime:
+                return True
+            with open(self.path, "rb") as f:
+                if not self._still_valid(f, st.st_size):
+                    self._reset()
+                grown = self._scan(f)
+            self._mtime = st.st_mtime_ns
+            if grown:
+                self._save_sidecar()
+            return True
+
+    def _records(self, f, start: int) -> Iterable[Tuple[int, bytes]]:
+        """(offset, bytes) de cada fila completa desde `start` (respeta comillas)."""
+        f.seek(start)
+        rec_start = pos = start
+        quotes = 0
+        buf: List[bytes] = []
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # fila a medio escribir
+            pos += len(line)
+            quotes += line.count(b'"')
+            buf.append(line)
+            if quotes % 2:
+                continue
+            yield rec_start, b"".join(buf)
+            buf, quotes, rec_start = [], 0, pos
+
+    def _scan(self, f) -> bool:
+        """Indexa las filas completas desde self.size. True si avanzó."""
+        if not self.header_end:
+            header = next((r for r in self._records(f, 0) if r[1].strip()), None)
+            if header is None:
+                return False
+            off, raw = header
+            self.fieldnames = next(csv.reader([raw.decode("utf-8-sig")]), [])
+            self.header_end = self.size = off + len(raw)
+            f.seek(0)
+            self.header_crc = _crc(f.read(self.header_end))
+
+        cols = [self.fieldnames.index(k) if k in self.fieldnames else None for k in self.keys]
+        max_col = max((c for c in cols if c is not None), default=0)
+        new_offsets: List[int] = []
+        new_values: List[List[int]] = []
+        end = self.size
+        last_raw = None
+        for off, raw in self._records(f, self.size):
+            end = off + len(raw)
+            if not raw.strip():
+                continue
+            last_raw = raw
+            if b'"' in raw:
+                row = next(csv.reader([raw.decode("utf-8", errors="replace")]), [])
+            else:  # caso común: sin comillas, basta con partir las primeras columnas
+                row = raw.rstrip(b"\r\n").decode("utf-8", errors="replace").split(",", max_col + 1)
+            new_offsets.append(off)
+            new_values.append([ts_key(row[c]) if c is not None and c < len(row) else MISSING for c in cols])
+        grown = end != self.size
+        self.size = end
+        if not new_offsets:
+            return grown
+        self.last_crc = _crc(last_raw)
+
+        added = np.array(new_values, dtype=np.int64).reshape(-1, len(self.keys))
+        for j, k in enumerate(self.keys):
+            col = added[:, j]
+            col = col[col != MISSING]
+            prev = self.values[:, j][self.values[:, j] != MISSING]
+            if len(prev) and len(col):
+                self.sorted[k] = self.sorted[k] and col[0] >= prev[-1]
+            self.sorted[k] = bool(self.sorted[k] and (np.diff(col) >= 0).all())
+            if k in self._sets:
+                self._sets[k].update(added[:, j].tolist())
+        self.offsets = np.concatenate([self.offsets, np.array(new_offsets, dtype=np.int64)])
+        self.values = np.concatenate([self.values, added])
+        return True
+
+    # --- Lectura ---
+
+    def column(self, key: str) -> np.ndarray:
+        """Valores (µs epoch, MISSING si falta) de una columna clave, por fila."""
+        self.refresh()
+        return self.values[:, self.keys.index(key)]
+
+    def _read_range(self, f, start: int, stop: int) -> List[Dict[str, str]]:
+        """Filas [start, stop) del índice (contiguas: una sola lectura)."""
+        begin = int(self.offsets[start])
+        end = int(self.offsets[stop]) if stop < len(self.offsets) else self.size
+        f.seek(begin)
+        text = f.read(end - begin).decode("utf-8", errors="replace")
+        return list(csv.DictReader(io.StringIO(text, newline=""), fieldnames=self.fieldnames))
+
+    def rows_at(self, positions: Iterable[int]) -> List[Dict[str, str]]:
+        """Filas en esas posiciones (en el orden dado), leyendo solo sus bytes."""
+        positions = [int(p) for p in positions]
+        if not positions:
+            return []
+        rows: List[Dict[str, str]] = []
+        with self._lock, open(self.path, "rb") as f:
+            ordered = sorted(set(positions))
+            by_pos: Dict[int, Dict[str, str]] = {}
+            i = 0
+            while i < len(ordered):
+                j = i
+                while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1:
+                    j += 1
+                for p, row in zip(range(ordered[i], ordered[j] + 1), self._read_range(f, ordered[i], ordered[j] + 1)):
+                    by_pos[p] = row
+                i = j + 1
+        rows = [by_pos[p] for p in positions if p in by_pos]
+        return rows
+
+    def tail(self, n: int) -> List[Dict[str, str]]:
+        """Últimas n filas en orden del fichero."""
+        self.refresh()
+        total = len(self.offsets)
+        if n <= 0 or not total:
+            return []
+        with self._lock, open(self.path, "rb") as f:
+            return self._read_range(f, max(total - n, 0), total)
+
+    def rows(self) -> List[Dict[str, str]]:
+        """Todas las filas (equivale a list(csv.DictReader(f)))."""
+        return self.tail(len(self))
+
+    def latest(self, n: int, key: Optional[str] = None) -> List[Dict[str, str]]:
+        """Las n filas más recientes por `key` (la primera clave por defecto), de más nueva a más vieja."""
+        key = key or self.keys[0]
+        col = self.column(key)
+        if self.sorted[key]:
+            return self.tail(n)[::-1]
+        order = np.argsort(col, kind="stable")[::-1][:n]
+        return self.rows_at(order.tolist())
+
+    def _since_positions(self, ts: TsLike, key: Optional[str]) -> np.ndarray:
+        key = key or self.keys[0]
+        col = self.column(key)
+        bound = ts_key(ts)
+        if self.sorted[key] and not (col == MISSING).any():
+            return np.arange(np.searchsorted(col, bound, side="left"), len(col))
+        return np.flatnonzero(col >= bound)
+
+    def since(self, ts: TsLike, key: Optional[str] = None) -> List[Dict[str, str]]:
+        """Filas con key >= ts, en orden del fichero."""
+        return self.rows_at(self._since_positions(ts, key).tolist())
+
+    def count_since(self, ts: TsLike, key: Optional[str] = None) -> int:
+        return int(len(self._since_positions(ts, key)))
+
+    def key_set(self, key: str) -> Set[int]:
+        """Set (µs epoch) de una columna clave; se amplía en cada refresh."""
+        with self._lock:
+            col = self.column(key)
+            if key not in self._sets:
+                self._sets[key] = set(col.tolist())
+            return self._sets[key]
+
+    def contains(self, key: str, ts: TsLike) -> bool:
+        """¿Hay alguna fila con ese valor en la columna `key`?"""
+        k = ts_key(ts)
+        return k != MISSING and k in self.key_set(key)
+
+
+_indexes: Dict[Tuple[str, Tuple[str, ...]], CSVIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path, keys: Sequence[str] = ("timestamp",)) -> CSVIndex:
+    """Índice (compartido en el proceso) de un CSV, al día con el fichero."""
+    key = (os.path.abspath(str(path)), tuple(keys))
+    with _indexes_lock:
+        idx = _indexes.get(key)
+        if idx is None:
+            idx = _indexes[key] = CSVIndex(key[0], key[1])
+    idx.refresh()
+    return idx
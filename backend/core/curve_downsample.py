@@ -0,0 +1,148 @@
+# backend/core/curve_downsample.py
+"""
+Downsampling y formato compacto de curvas de equity.
+
+BacktestEngine genera un punto por vela: 180 días en 15m son ~17k dicts,
+muchos más de los que el gráfico puede pintar. Aquí se reduce la curva a un
+número de puntos pedido conservando su forma:
+
+- "lttb":   Largest-Triangle-Three-Buckets sobre la serie principal
+            (strategy_equity por defecto). Buena fidelidad visual.
+- "minmax": por bucket conserva el mínimo y el máximo de CADA serie
+            numérica, así ningún pico/valle (drawdown) desaparece. Necesita
+            al menos 2 + 2·series puntos; con menos se usa LTTB.
+
+El primer y el último punto se conservan siempre y nunca se devuelven más
+de max_points. En la API el downsampling es opt-in (max_points en la
+petición); sin él la curva va completa. to_columnar() convierte la
+lista de dicts en {campo: [valores]} (arrays por campo), que evita repetir
+las claves en cada punto del JSON.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+CURVE_FORMATS = ("rows", "columns")
+
+DEFAULT_MAX_POINTS = 1000
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Índices seleccionados por LTTB (incluye primero y último)."""
+    n = len(y)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    # Buckets interiores: [1, n-1) repartido en n_out-2 tramos
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges[1:] = np.maximum(edges[1:], edges[:-1] + 1)
+    edges = np.minimum(edges, n - 1)
+    counts = np.maximum(np.diff(edges), 1)
+    # Media de cada bucket, precalculada (el LTTB usa la del bucket siguiente)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        ax, ay, cx, cy = x[a], y[a], next_x[b], next_y[b]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax())
+        out[b + 1] = a
+    return out
+
+
+def minmax_indices(columns: Sequence[np.ndarray], n_out: int) -> np.ndarray:
+    """Índices de min y max por bucket de cada serie (unión, ordenada, <= n_out)."""
+    n = len(columns[0])
+    if n_out >= n:
+        return np.arange(n)
+    per_bucket = 2 * len(columns)
+    n_buckets = (n_out - 2) // per_bucket
+    if n_buckets < 1:
+        # No cabe ni un bucket con min y max de cada serie: LTTB sobre la primera
+        return lttb_indices(np.arange(n, dtype=np.float64), columns[0], n_out)
+
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    picked = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        for col in columns:
+            seg = col[lo:hi]
+            picked.append(lo + int(seg.argmin()))
+            picked.append(lo + int(seg.argmax()))
+    return np.unique(np.asarray(picked, dtype=np.int64))
+
+
+def _numeric_keys(point: Dict[str, Any], exclude: Sequence[str]) -> List[str]:
+    return [
+        k for k, v in point.items()
+        if k not in exclude and isinstance(v, (int, float)) and not isinstance(v, bool)
+    ]
+
+
+def downsample_curve(
+    curve: List[Dict[str, Any]],
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    method: str = "lttb",
+    y_key: Optional[str] = None,
+    x_key: str = "timestamp",
+) -> List[Dict[str, Any]]:
+    """
+    Reduce la curva a como mucho max_points puntos (None/0 = sin límite).
+
+    y_key: serie que guía LTTB (por defecto la primera numérica que no sea x).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método de downsampling no soportado: {method}")
+    if not curve or not max_points or len(curve) <= max_points:
+        return curve
+
+    max_points = max(int(max_points), MIN_POINTS)
+    n = len(curve)
+    if x_key in curve[0]:
+        x = np.fromiter((p[x_key] for p in curve), dtype=np.float64, count=n)
+    else:
+        x = np.arange(n, dtype=np.float64)
+
+    keys = _numeric_keys(curve[0], exclude=(x_key,))
+    if not keys:
+        idx = np.linspace(0, n - 1, max_points).astype(np.int64)
+    elif method == "lttb":
+        y_key = y_key if y_key in keys else keys[0]
+        y = np.fromiter((p[y_key] for p in curve), dtype=np.float64, count=n)
+        idx = lttb_indices(x, y, max_points)
+    else:
+        cols = [np.fromiter((p[k] for p in curve), dtype=np.float64, count=n) for k in keys]
+        idx = minmax_indices(cols, max_points)
+
+    return [curve[i] for i in idx]
+
+
+def to_columnar(curve: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Lista de puntos -> {campo: [valores]} (mismo orden)."""
+    if not curve:
+        return {}
+    return {k: [p.get(k) for p in curve] for k in curve[0].keys()}
+
+
+def shape_curve(
+    curve: List[Dict[str, Any]],
+    max_points: Optional[int] = DEFAULT_MAX_POINTS,
+    method: str = "lttb",
+    curve_format: str = "rows",
+    y_key: Optional[str] = None,
+):
+    """Downsampling + formato (rows | columns) en un paso."""
+    if curve_format not in CURVE_FORMATS:
+        raise ValueError(f"Formato de curva no soportado: {curve_format}")
+    reduced = downsample_curve(curve, max_points, method, y_key=y_key)
+    return to_columnar(reduced) if curve_format == "columns" else reduced
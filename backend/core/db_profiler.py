@@ -0,0 +1,297 @@
+# backend/core/db_profiler.py
+"""
+Instrumentación de consultas SQL sobre `engine` (async) y `engine_sync`.
+
+add_process_time_header solo daba el tiempo total de la petición; no había
+forma de saber qué endpoint lanzaba qué consultas ni cuántas. Con
+instrument(engine) (lo llama database.py para los dos engines):
+
+- Por petición (contextvar abierta por el middleware): nº de consultas y
+  tiempo acumulado en DB. También cuenta las consultas hechas en el
+  threadpool (rutas def), que heredan el contexto.
+- Huella (fingerprint) de cada sentencia: SQL normalizado sin literales ni
+  listas IN expandidas; agregados globales por huella (count/total/max).
+- Slow-query log: sentencias por encima de DB_SLOW_QUERY_MS (últimas
+  SLOW_LOG_SIZE, con la ruta que las lanzó).
+- Espera al sacar una conexión del pool (checkout): histograma por engine.
+- Detección de N+1 (por defecto solo con SQLite, es decir en desarrollo): la
+  misma huella SELECT DB_NPLUSONE_THRESHOLD veces o más en una petición.
+
+Se consulta en GET /admin/diagnostics/db y, con DB_PROFILE_HEADERS=1, en
+las cabeceras X-DB-Queries / X-DB-Time / Server-Timing de cada respuesta.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+DB_PROFILING = os.getenv("DB_PROFILING", "1") == "1"
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_PROFILE_HEADERS = os.getenv("DB_PROFILE_HEADERS", "0") == "1"
+DB_NPLUSONE_THRESHOLD = int(os.getenv("DB_NPLUSONE_THRESHOLD", "10"))
+
+SLOW_LOG_SIZE = 100
+NPLUSONE_LOG_SIZE = 50
+MAX_FINGERPRINTS = 500
+# Límites superiores (ms) de los cubos del histograma de espera del pool
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_lock = threading.Lock()
+_fingerprints: Dict[str, Dict[str, Any]] = {}
+_slow_log: deque = deque(maxlen=SLOW_LOG_SIZE)
+_nplusone_log: deque = deque(maxlen=NPLUSONE_LOG_SIZE)
+_pool_wait: Dict[str, Dict[str, Any]] = {}
+_engines: Dict[str, Any] = {}
+_totals = {"queries": 0, "db_ms": 0.0, "slow": 0, "untracked_fingerprints": 0}
+_nplusone_enabled: Dict[str, bool] = {}
+
+
+# === Huellas ===
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"(?:\$\d+|%\([^)]+\)s|%s|(?<!:):\w+|\?)")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+
+
+def normalize(statement: str) -> str:
+    """SQL sin literales ni parámetros, con IN (...) y VALUES (...),(...) colapsados."""
+    s = _WS.sub(" ", statement).strip()
+    s = _STRING.sub("?", s)
+    s = _PARAMS.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("IN (?)", s)
+    s = _VALUES_LIST.sub(r"\1", s)
+    return s
+
+
+@lru_cache(maxsize=2048)  # las sentencias compiladas se repiten literalmente
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """(id corto, SQL normalizado) de una sentencia."""
+    norm = normalize(statement)
+    return hashlib.sha1(norm.encode()).hexdigest()[:12], norm
+
+
+# === Estado por petición ===
+
+class RequestDBStats:
+    __slots__ = ("label", "queries", "db_ms", "by_fingerprint", "_lock")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.queries = 0
+        self.db_ms = 0.0
+        self.by_fingerprint: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, fp: str, ms: float):
+        with self._lock:
+            self.queries += 1
+            self.db_ms += ms
+            self.by_fingerprint[fp] += 1
+
+
+_current: ContextVar[Optional[RequestDBStats]] = ContextVar("db_request_stats", default=None)
+
+
+@contextmanager
+def request_scope(label: str) -> Iterator[RequestDBStats]:
+    """Abre el contador de consultas de una petición (o de un job)."""
+    stats = RequestDBStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        _check_nplusone(stats)
+
+
+def current() -> Optional[RequestDBStats]:
+    return _current.get()
+
+
+def response_headers(stats: RequestDBStats) -> Dict[str, str]:
+    return {
+        "X-DB-Queries": str(stats.queries),
+        "X-DB-Time": f"{stats.db_ms:.1f}",
+        "Server-Timing": f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries"',
+    }
+
+
+def _check_nplusone(stats: RequestDBStats) -> None:
+    if stats.queries < DB_NPLUSONE_THRESHOLD or not any(_nplusone_enabled.values()):
+        return
+    for fp, n in stats.by_fingerprint.items():
+        if n < DB_NPLUSONE_THRESHOLD:
+            continue
+        info = _fingerprints.get(fp)
+        sql = info["sql"] if info else "?"
+        if not sql.upper().startswith("SELECT"):
+            continue
+        _nplusone_log.append({"at": time.time(), "request": stats.label, "fingerprint": fp,
+                              "count": n, "sql": sql[:300]})
+        print(f"[DB N+1] ⚠️ {stats.label}: {n}x {fp} {sql[:160]}")
+
+
+# === Registro de consultas ===
+
+def _record(engine_name: str, statement: str, ms: float) -> None:
+    fp, norm = fingerprint(statement)
+    req = _current.get()
+    with _lock:
+        _totals["queries"] += 1
+        _totals["db_ms"] += ms
+        info = _fingerprints.get(fp)
+        if info is None:
+            if len(_fingerprints) >= MAX_FINGERPRINTS:
+                _totals["untracked_fingerprints"] += 1
+            else:
+                info = _fingerprints[fp] = {"sql": norm, "engine": engine_name,
+                                            "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        if info is not None:
+            info["count"] += 1
+            info["total_ms"] += ms
+            info["max_ms"] = max(info["max_ms"], ms)
+        if ms >= DB_SLOW_QUERY_MS:
+            _totals["slow"] += 1
+            _slow_log.append({"at": time.time(), "engine": engine_name, "ms": round(ms, 1),
+                              "fingerprint": fp, "sql": norm[:500],
+                              "request": req.label if req else None})
+    if req is not None:
+        req.add(fp, ms)
+    if ms >= DB_SLOW_QUERY_MS:
+        print(f"[DB SLOW] 🐢 {ms:.0f}ms {fp} ({req.label if req else '-'}) {norm[:160]}")
+
+
+def _record_pool_wait(engine_name: str, ms: float) -> None:
+    with _lock:
+        h = _pool_wait[engine_name]
+        h["count"] += 1
+        h["total_ms"] += ms
+        h["max_ms"] = max(h["max_ms"], ms)
+        for i, bound in enumerate(POOL_WAIT_BUCKETS_MS):
+            if ms <= bound:
+                h["buckets"][i] += 1
+                break
+        else:
+            h["buckets"][-1] += 1
+
+
+def instrument(engine, name: str, nplusone: Optional[bool] = None) -> None:
+    """
+    Engancha los eventos de consulta y el checkout del pool de un engine
+    síncrono (para el async: engine.sync_engine). Idempotente.
+    """
+    if not DB_PROFILING or name in _engines:
+        return
+    from sqlalchemy import event
+
+    _engines[name] = engine
+    _nplusone_enabled[name] = ("sqlite" in engine.dialect.name) if nplusone is None else nplusone
+    _pool_wait[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                        "buckets": [0] * (len(POOL_WAIT_BUCKETS_MS) + 1)}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_profiler_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_profiler_t0")
+        if starts:
+            _record(name, statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        starts = exception_context.connection.info.get("_profiler_t0") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    _instrument_pool(engine.pool, name)
+
+    # engine.dispose() sustituye el pool por uno nuevo (pool.recreate()), que no
+    # conserva el envoltorio de _do_get: se vuelve a instrumentar
+    @event.listens_for(engine, "engine_disposed")
+    def _disposed(disposed_engine):
+        _instrument_pool(disposed_engine.pool, name)
+
+
+def _instrument_pool(pool, name: str) -> None:
+    """El pool no tiene evento "antes de checkout": se mide envolviendo _do_get."""
+    do_get = getattr(pool, "_do_get", None)
+    if do_get is None or getattr(do_get, "_profiled", False):
+        return
+
+    def _timed_do_get():
+        t0 = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            _record_pool_wait(name, (time.perf_counter() - t0) * 1000)
+    _timed_do_get._profiled = True
+    pool._do_get = _timed_do_get
+
+
+# === Diagnóstico ===
+
+def snapshot(top: int = 20) -> Dict[str, Any]:
+    """Estado agregado para /admin/diagnostics/db."""
+    with _lock:
+        fps = [{"fingerprint": fp, **info, "total_ms": round(info["total_ms"], 1),
+                "max_ms": round(info["max_ms"], 1),
+                "avg_ms": round(info["total_ms"] / info["count"], 2) if info["count"] else 0.0}
+               for fp, info in _fingerprints.items()]
+        pool_wait = {
+            name: {
+                "count": h["count"],
+                "avg_ms": round(h["total_ms"] / h["count"], 2) if h["count"] else 0.0,
+                "max_ms": round(h["max_ms"], 1),
+                "histogram_ms": {
+                    **{f"<={b}": n for b, n in zip(POOL_WAIT_BUCKETS_MS, h["buckets"])},
+                    f">{POOL_WAIT_BUCKETS_MS[-1]}": h["buckets"][-1],
+                },
+            }
+            for name, h in _pool_wait.items()
+        }
+        totals = dict(_totals, db_ms=round(_totals["db_ms"], 1))
+        slow = list(_slow_log)[::-1]
+        nplusone = list(_nplusone_log)[::-1]
+
+    pools = {}
+    for name, engine in _engines.items():
+        try:
+            pools[name] = engine.pool.status()
+        except Exception:
+            pools[name] = None
+
+    return {
+        "enabled": DB_PROFILING,
+        "slow_query_ms": DB_SLOW_QUERY_MS,
+        "nplusone_threshold": DB_NPLUSONE_THRESHOLD,
+        "totals": totals,
+        "top_by_total_time": sorted(fps, key=lambda f: f["total_ms"], reverse=True)[:top],
+        "top_by_count": sorted(fps, key=lambda f: f["count"], reverse=True)[:top],
+        "slow_queries": slow,
+        "nplusone": nplusone,
+        "pool_checkout_wait": pool_wait,
+        "pool_status": pools,
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _fingerprints.clear()
+        _slow_log.clear()
+        _nplusone_log.clear()
+        for h in _pool_wait.values():
+            h.update(count=0, total_ms=0.0, max_ms=0.0, buckets=[0] * (len(POOL_WAIT_BUCKETS_MS) + 1))
+        _totals.update(queries=0, db_ms=0.0, slow=0, untracked_fingerprints=0)
@@ -2,8 +2,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from models_db import User, DailyUsage
+from models_db import User
+from core.quota import quota
 
 # === 1. CONFIGURATION & DATA ===
 
@@ -218,34 +218,11 @@ def check_and_increment_quota(db: Session, user: User, feature: str):
             }
         )
         
-    today_str = datetime.utcnow().strftime("%Y-%m-%d")
-    
-    # 1. Atomic DB Get/Create
-    # We try to find the record first
-    usage = db.query(DailyUsage).filter(
-        DailyUsage.user_id == user.id,
-        DailyUsage.feature == feature,
-        DailyUsage.date == today_str
-    ).with_for_update().first()
-    
-    if not usage:
-        try:
-            usage = DailyUsage(user_id=user.id, feature=feature, date=today_str, count=0)
-            db.add(usage)
-            db.commit()
-            db.refresh(usage)
-            # Re-lock
-            usage = db.query(DailyUsage).filter(DailyUsage.id == usage.id).with_for_update().first()
-        except IntegrityError:
-            db.rollback()
-            usage = db.query(DailyUsage).filter(
-                DailyUsage.user_id == user.id,
-                DailyUsage.feature == feature,
-                DailyUsage.date == today_str
-            ).with_for_update().first()
+    # 1. Atomic check + increment (core/quota.py: un upsert o Redis)
+    allowed, used = quota.consume(db, user.id, feature, limit)
 
     # 2. Check Limit
-    if usage.count >= limit:
+    if not allowed:
         raise HTTPException(
             status_code=429,
             detail={
@@ -253,20 +230,16 @@ def check_and_increment_quota(db: Session, user: User, feature: str):
                 "message": f"You have reached your daily limit of {limit} for {feature}.",
                 "tier": plan,
                 "limit": limit,
-                "used": usage.count,
+                "used": used,
                 "reset_at": "00:00 UTC",
                 "upgrade_required": plan != "PRO" # Suggest upgrade if not Pro
             }
         )
 
-    # 3. Increment
-    usage.count += 1
-    db.commit()
-    
     return {
-        "used": usage.count,
+        "used": used,
         "limit": limit,
-        "remaining": limit - usage.count
+        "remaining": limit - used
     }
 
 
@@ -275,15 +248,9 @@ def get_user_entitlements(db: Session, user: User):
     Retorna estado completo para UI.
     """
     plan = (user.plan or "FREE").upper()
-    today_str = datetime.utcnow().strftime("%Y-%m-%d")
-    
-    # Get usage from DB
-    usages = db.query(DailyUsage).filter(
-        DailyUsage.user_id == user.id,
-        DailyUsage.date == today_str
-    ).all()
-    
-    usage_map = {u.feature: u.count for u in usages}
+
+    # Same counters as check_and_increment_quota (cache / Redis, DB on miss)
+    usage_map = quota.usage(db, user.id, ("ai_analysis", "advisor_chat"))
     limits = QUOTAS.get(plan, QUOTAS["FREE"])
     
     return {
@@ -0,0 +1,128 @@
+# backend/core/fast_json.py
+"""
+Serialización JSON rápida para las respuestas grandes (curvas y trades de
+backtest, /market/ohlcv con hasta 1000 velas, /logs/{mode}/{token},
+listados de /admin).
+
+Antes FastAPI pasaba cada respuesta por jsonable_encoder (recorre y copia
+todo el árbol en Python, objeto a objeto) y luego por json.dumps. Ahora:
+
+- dumps(): orjson (en C) con soporte nativo de datetime, dataclasses y
+  arrays/escalares NumPy (OPT_SERIALIZE_NUMPY), sin copia previa. Lo que
+  orjson no conoce pasa por _default: modelos pydantic, objetos ORM (sus
+  atributos cargados, como hacía jsonable_encoder), set, Decimal, Enum.
+  NaN/Infinity salen como null (json.dumps con allow_nan=False fallaba).
+  Sin orjson instalado se usa json.dumps con el mismo _default.
+- FastJSONResponse: JSONResponse que renderiza con dumps(). Devolverla
+  desde el endpoint evita jsonable_encoder.
+- StreamingJSONResponse / json_list_response(): listas largas (>=
+  JSON_STREAM_MIN_ITEMS elementos) se envían como un array JSON por trozos
+  de JSON_STREAM_BATCH elementos en vez de construir el cuerpo entero.
+- Compresión: GZipMiddleware en main.py para cuerpos de más de
+  GZIP_MIN_BYTES (no toca text/event-stream).
+
+Benchmark: python tools/benchmark_json.py
+"""
+
+import decimal
+import enum
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from starlette.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+    print("[JSON] ℹ️ orjson not installed. Using stdlib json.")
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+JSON_STREAM_MIN_ITEMS = int(os.getenv("JSON_STREAM_MIN_ITEMS", "500"))
+JSON_STREAM_BATCH = int(os.getenv("JSON_STREAM_BATCH", "200"))
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if hasattr(obj, "model_dump"):  # pydantic v2
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "dict") and hasattr(obj, "__fields__"):  # pydantic v1
+        return obj.dict()
+    if hasattr(obj, "_sa_instance_state"):  # objeto ORM: atributos cargados
+        return {k: v for k, v in vars(obj).items() if not k.startswith("_sa")}
+    if hasattr(obj, "isoformat"):  # date/time, pandas.Timestamp
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON compacto en UTF-8 (bytes)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def iter_json_array(items: Iterable[Any], batch: int = JSON_STREAM_BATCH,
+                    envelope: Optional[Dict[str, Any]] = None, key: str = "items") -> Iterator[bytes]:
+    """
+    Array JSON por trozos. Con `envelope` el array va en envelope[key]:
+    {"total": 10, ..., "items": [...]}.
+    """
+    if envelope:
+        head = dumps({k: v for k, v in envelope.items() if k != key})
+        yield head[:-1] + (b"," if len(head) > 2 else b"") + dumps(key) + b":["
+    else:
+        yield b"["
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= batch:
+            body = dumps(chunk)[1:-1]
+            yield body if first else b"," + body
+            first = False
+            chunk = []
+    if chunk:
+        body = dumps(chunk)[1:-1]
+        yield body if first else b"," + body
+    yield b"]}" if envelope else b"]"
+
+
+class StreamingJSONResponse(StreamingResponse):
+    def __init__(self, items: Iterable[Any], envelope: Optional[Dict[str, Any]] = None,
+                 key: str = "items", **kwargs):
+        kwargs.setdefault("media_type", "application/json")
+        super().__init__(iter_json_array(items, envelope=envelope, key=key), **kwargs)
+
+
+def json_list_response(items: Sequence[Any], envelope: Optional[Dict[str, Any]] = None,
+                       key: str = "items", headers: Optional[Dict[str, str]] = None):
+    """FastJSONResponse, o StreamingJSONResponse si la lista es larga."""
+    if len(items) >= JSON_STREAM_MIN_ITEMS:
+        return StreamingJSONResponse(items, envelope=envelope, key=key, headers=headers)
+    content = {**envelope, key: items} if envelope else items
+    return FastJSONResponse(content, headers=headers)
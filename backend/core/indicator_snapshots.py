@@ -0,0 +1,437 @@
+# backend/core/indicator_snapshots.py
+"""
+Snapshot precalculado de los últimos indicadores por (token, timeframe).
+
+Cada /analyze/lite (y /analyze/pro, el chat del advisor y, a través de
+/analyze/lite, el bot de Telegram) llamaba a get_market_data(token, tf,
+limit=300..1000): descargaba cientos de velas, montaba un DataFrame y
+calculaba EMA21/50, RSI, MACD y ATR con `ta` sobre toda la ventana solo
+para leer la última fila. Ahora:
+
+- IndicatorState guarda el estado recursivo de los indicadores tras la
+  última vela CERRADA (EMAs, medias de Wilder del RSI, señal MACD, ATR).
+  step() lo avanza una vela en O(1) con las mismas fórmulas que `ta`
+  (ewm adjust=False, RSI/ATR de Wilder), así que los valores coinciden con
+  get_market_data sobre la misma ventana.
+- refresh() pide solo las velas nuevas (limit pequeño), consolida las que
+  han cerrado y calcula el snapshot aplicando la vela en curso sin
+  consolidarla (mismo "último valor" que antes: la vela abierta). Si hay un
+  hueco o no hay estado, arranca con SNAPSHOT_WARMUP velas.
+- El snapshot vive en memoria y se refleja en la tabla indicator_snapshots
+  (valores + estado): otros workers lo leen con una consulta por PK y tras
+  un reinicio se retoma sin recalentar.
+- run_refresh_loop() (tarea en main.startup) refresca los pares vigilados
+  (SNAPSHOT_WATCH + los pedidos en las últimas SNAPSHOT_IDLE_S) cada
+  SNAPSHOT_REFRESH_S, adelantándose al cierre de la siguiente vela.
+
+latest(token, tf) devuelve el dict de mercado de siempre (price, rsi,
+ema21, ema50, macd, macd_hist, atr, trend). Si el snapshot tiene más de
+SNAPSHOT_MAX_AGE_S se refresca bajo demanda y, si eso falla, se vuelve a
+get_market_data. Estadísticas en GET /system/indicator-snapshots.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "1") == "1"
+SNAPSHOT_MAX_AGE_S = float(os.getenv("SNAPSHOT_MAX_AGE_S", "60"))
+SNAPSHOT_REFRESH_S = float(os.getenv("SNAPSHOT_REFRESH_S", "30"))
+SNAPSHOT_WARMUP = int(os.getenv("SNAPSHOT_WARMUP", "300"))
+SNAPSHOT_IDLE_S = float(os.getenv("SNAPSHOT_IDLE_S", "21600"))
+SNAPSHOT_WATCH = os.getenv("SNAPSHOT_WATCH", "BTC:1h,ETH:1h,SOL:1h")
+
+# Periodos de get_market_data (indicators/market.py)
+EMA_FAST, EMA_SLOW = 21, 50
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+# Primera vela con todos los indicadores definidos (dropna de get_market_data)
+MIN_CANDLES = MACD_SLOW + MACD_SIGNAL - 1
+
+Key = Tuple[str, str]
+_TF_UNITS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    m = re.fullmatch(r"(\d+)([mhdw])", timeframe.strip().lower())
+    if not m:
+        raise ValueError(f"Timeframe no soportado: {timeframe}")
+    return int(m.group(1)) * _TF_UNITS[m.group(2)]
+
+
+def _key(token: str, timeframe: str) -> Key:
+    return token.upper().replace("USDT", "").replace("-", "").replace("/", ""), timeframe.lower()
+
+
+def _ema(prev: float, value: float, span: int) -> float:
+    alpha = 2.0 / (span + 1)
+    return prev + alpha * (value - prev)
+
+
+@dataclass(frozen=True)
+class IndicatorState:
+    """Estado recursivo tras la vela `ts` (apertura, ms)."""
+    ts: int
+    n: int
+    close: float
+    ema_fast: float
+    ema_slow: float
+    macd_fast: float
+    macd_slow: float
+    macd_signal: Optional[float]
+    rsi_gain: float
+    rsi_loss: float
+    atr: float  # suma de rangos verdaderos mientras n < ATR_WINDOW
+
+    @classmethod
+    def first(cls, candle: Dict[str, Any]) -> "IndicatorState":
+        c = float(candle["close"])
+        return cls(
+            ts=int(candle["timestamp"]), n=1, close=c,
+            ema_fast=c, ema_slow=c, macd_fast=c, macd_slow=c, macd_signal=None,
+            rsi_gain=0.0, rsi_loss=0.0,
+            atr=float(candle["high"]) - float(candle["low"]),
+        )
+
+    def step(self, candle: Dict[str, Any]) -> "IndicatorState":
+        """Estado tras añadir una vela (no modifica self)."""
+        high, low, c = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        n = self.n + 1
+
+        macd_fast = _ema(self.macd_fast, c, MACD_FAST)
+        macd_slow = _ema(self.macd_slow, c, MACD_SLOW)
+        macd_signal = self.macd_signal
+        if n >= MACD_SLOW:
+            macd = macd_fast - macd_slow
+            macd_signal = macd if macd_signal is None else _ema(macd_signal, macd, MACD_SIGNAL)
+
+        diff = c - self.close
+        a = 1.0 / RSI_WINDOW
+        rsi_gain = self.rsi_gain + a * (max(diff, 0.0) - self.rsi_gain)
+        rsi_loss = self.rsi_loss + a * (max(-diff, 0.0) - self.rsi_loss)
+
+        tr = max(high - low, abs(high - self.close), abs(low - self.close))
+        if n < ATR_WINDOW:
+            atr = self.atr + tr
+        elif n == ATR_WINDOW:
+            atr = (self.atr + tr) / ATR_WINDOW
+        else:
+            atr = (self.atr * (ATR_WINDOW - 1) + tr) / ATR_WINDOW
+
+        return replace(
+            self, ts=int(candle["timestamp"]), n=n, close=c,
+            ema_fast=_ema(self.ema_fast, c, EMA_FAST), ema_slow=_ema(self.ema_slow, c, EMA_SLOW),
+            macd_fast=macd_fast, macd_slow=macd_slow, macd_signal=macd_signal,
+            rsi_gain=rsi_gain, rsi_loss=rsi_loss, atr=atr,
+        )
+
+    def market(self) -> Optional[Dict[str, Any]]:
+        """Dict de mercado de get_market_data, o None sin velas suficientes."""
+        if self.n < MIN_CANDLES or self.macd_signal is None:
+            return None
+        macd = self.macd_fast - self.macd_slow
+        if self.rsi_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + self.rsi_gain / self.rsi_loss)
+        return {
+            "price": self.close,
+            "rsi": round(rsi, 2),
+            "ema21": self.ema_fast,
+            "ema50": self.ema_slow,
+            "macd": macd,
+            "macd_hist": macd - self.macd_signal,
+            "atr": self.atr,
+            "trend": "BULLISH" if self.close > self.ema_slow else "BEARISH",
+        }
+
+
+def build_state(candles: List[Dict[str, Any]]) -> Optional[IndicatorState]:
+    """Estado inicial recorriendo la ventana completa (arranque / hueco)."""
+    state = None
+    for candle in candles:
+        state = IndicatorState.first(candle) if state is None else state.step(candle)
+    return state
+
+
+class IndicatorSnapshots:
+    """Snapshots por (token, timeframe) en memoria, con espejo en la DB."""
+
+    def __init__(self, max_age: float = SNAPSHOT_MAX_AGE_S, warmup: int = SNAPSHOT_WARMUP,
+                 mirror: bool = True):
+        self.max_age = max_age
+        self.warmup = warmup
+        self.mirror = mirror
+        self._states: Dict[Key, IndicatorState] = {}   # última vela cerrada
+        self._snapshots: Dict[Key, Dict[str, Any]] = {}
+        self._watch: Dict[Key, float] = {}             # último uso (monotonic)
+        self._key_locks: Dict[Key, threading.RLock] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "mirror_hits": 0, "refreshes": 0, "bootstraps": 0,
+                       "candles_applied": 0, "fallbacks": 0, "errors": 0}
+        for item in filter(None, (s.strip() for s in SNAPSHOT_WATCH.split(","))):
+            token, _, tf = item.partition(":")
+            self._watch[_key(token, tf or "1h")] = float("inf")  # fijos: no caducan
+
+    # --- Lectura ---
+
+    def get(self, token: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """Snapshot fresco (memoria o espejo en DB) o None. No descarga nada."""
+        key = _key(token, timeframe)
+        self._touch(key)
+        snap = self._snapshots.get(key)
+        if snap is not None and time.time() - snap["updated_at"] <= self.max_age:
+            self._stats["hits"] += 1
+            return snap["market"]
+        snap = self._read_mirror(key)
+        if snap is not None and time.time() - snap["updated_at"] <= self.max_age:
+            self._stats["mirror_hits"] += 1
+            return snap["market"]
+        return None
+
+    def latest(self, token: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """Snapshot fresco; si no, se calcula bajo demanda (y en último caso get_market_data)."""
+        if SNAPSHOT_ENABLED:
+            market = self.get(token, timeframe)
+            if market is not None:
+                return market
+            try:
+                market = self.refresh(token, timeframe)
+                if market is not None:
+                    return market
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"[SNAPSHOT] ⚠️ {token}/{timeframe} refresh failed: {e}")
+        self._stats["fallbacks"] += 1
+        from indicators.market import get_market_data
+        _, market = get_market_data(token, timeframe, limit=SNAPSHOT_WARMUP)
+        return market
+
+    def closed(self, token: str, timeframe: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        (apertura de la última vela CERRADA, dict de mercado sobre ella), sin la
+        vela en curso: base estable durante toda la vela (caché de análisis LLM).
+        """
+        if self.latest(token, timeframe) is None:
+            return None
+        state = self._states.get(_key(token, timeframe))
+        market = state.market() if state is not None else None
+        return (state.ts, market) if market is not None else None
+
+    # --- Actualización ---
+
+    def refresh(self, token: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        """Consolida las velas cerradas nuevas y recalcula el snapshot."""
+        from core.market_data_api import get_ohlcv_data
+
+        key = _key(token, timeframe)
+        tf_ms = timeframe_ms(key[1])
+        with self._key_lock(key):
+            now_ms = int(time.time() * 1000)
+            state = self._states.get(key)
+            # Cierre: solo vela en curso + las que hayan cerrado desde el estado
+            missing = (now_ms - state.ts) // tf_ms if state is not None else None
+            if state is None or missing > self.warmup // 2:
+                candles = get_ohlcv_data(key[0], key[1], limit=self.warmup)
+                state = None
+            else:
+                candles = get_ohlcv_data(key[0], key[1], limit=int(missing) + 2)
+            if not candles:
+                return None
+            candles = sorted(candles, key=lambda c: c["timestamp"])
+
+            closed = [c for c in candles if c["timestamp"] + tf_ms <= now_ms]
+            live = candles[-1] if candles[-1]["timestamp"] + tf_ms > now_ms else None
+            if state is not None and closed and closed[0]["timestamp"] > state.ts + tf_ms:
+                # Hueco entre el estado y las velas recibidas: recalentar
+                return self._bootstrap(key, token, timeframe)
+            if state is None:
+                if not closed:
+                    return None
+                state = build_state(closed)
+                self._stats["bootstraps"] += 1
+                applied = len(closed)
+            else:
+                applied = 0
+                for candle in closed:
+                    if candle["timestamp"] > state.ts:
+                        state = state.step(candle)
+                        applied += 1
+            self._stats["candles_applied"] += applied
+            self._stats["refreshes"] += 1
+
+            view = state.step(live) if live is not None and live["timestamp"] > state.ts else state
+            market = view.market()
+            self._states[key] = state
+            if market is None:
+                return None
+            snap = {"market": market, "candle_ts": view.ts, "updated_at": time.time()}
+            self._snapshots[key] = snap
+        self._write_mirror(key, snap, state)
+        return market
+
+    def _bootstrap(self, key: Key, token: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        self._states.pop(key, None)
+        return self.refresh(token, timeframe)
+
+    def refresh_all(self) -> int:
+        """Refresca los pares vigilados (los no pedidos en SNAPSHOT_IDLE_S se olvidan)."""
+        now = time.monotonic()
+        with self._lock:
+            for key, last in list(self._watch.items()):
+                if now - last > SNAPSHOT_IDLE_S:
+                    self._watch.pop(key)
+            keys = list(self._watch)
+        done = 0
+        for token, tf in keys:
+            try:
+                if self.refresh(token, tf) is not None:
+                    done += 1
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"[SNAPSHOT] ⚠️ {token}/{tf} refresh failed: {e}")
+        return done
+
+    def seconds_to_next_close(self, default: float = SNAPSHOT_REFRESH_S) -> float:
+        """Hasta el cierre de la próxima vela vigilada (+1 s de margen), acotado a default."""
+        now_ms = time.time() * 1000
+        wait = default
+        for _, tf in list(self._watch):
+            try:
+                tf_ms = timeframe_ms(tf)
+            except ValueError:
+                continue
+            wait = min(wait, (tf_ms - now_ms % tf_ms) / 1000 + 1)
+        return max(wait, 1.0)
+
+    async def run_refresh_loop(self) -> None:
+        """Tarea de fondo (main.startup): carga el espejo y refresca en cada cierre."""
+        from fastapi.concurrency import run_in_threadpool
+
+        await run_in_threadpool(self.load_mirror)
+        print(f"[SNAPSHOT] 🚀 Refresh loop started ({len(self._watch)} pairs watched)")
+        while True:
+            try:
+                await run_in_threadpool(self.refresh_all)
+            except Exception as e:
+                print(f"[SNAPSHOT] ⚠️ Refresh loop error: {e}")
+            await asyncio.sleep(self.seconds_to_next_close())
+
+    def _touch(self, key: Key) -> None:
+        with self._lock:
+            if self._watch.get(key) != float("inf"):
+                self._watch[key] = time.monotonic()
+
+    def _key_lock(self, key: Key) -> threading.RLock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+
+    # --- Espejo en la DB (tabla indicator_snapshots) ---
+
+    def _read_mirror(self, key: Key) -> Optional[Dict[str, Any]]:
+        if not self.mirror:
+            return None
+        try:
+            from database import SessionLocal
+            from models_db import IndicatorSnapshot
+            db = SessionLocal()
+            try:
+                row = db.query(IndicatorSnapshot).filter(
+                    IndicatorSnapshot.token == key[0], IndicatorSnapshot.timeframe == key[1]
+                ).first()
+            finally:
+                db.close()
+        except Exception:
+            return None
+        if row is None:
+            return None
+        return self._adopt(key, row)
+
+    def _adopt(self, key: Key, row) -> Optional[Dict[str, Any]]:
+        """Toma el snapshot y el estado de una fila si es más reciente que los propios."""
+        try:
+            snap = {"market": json.loads(row.values_json), "candle_ts": row.candle_ts,
+                    "updated_at": row.updated_at.timestamp() if row.updated_at else 0.0}
+            state = IndicatorState(**json.loads(row.state_json))
+        except (TypeError, ValueError):
+            return None
+        current = self._snapshots.get(key)
+        if current is None or snap["updated_at"] > current["updated_at"]:
+            self._snapshots[key] = snap
+            old = self._states.get(key)
+            if old is None or state.ts >= old.ts:
+                self._states[key] = state
+        return snap
+
+    def load_mirror(self) -> int:
+        """Retoma los estados guardados (arranque): sin recalentar desde el exchange."""
+        if not self.mirror:
+            return 0
+        try:
+            from database import SessionLocal
+            from models_db import IndicatorSnapshot
+            db = SessionLocal()
+            try:
+                rows = db.query(IndicatorSnapshot).all()
+            finally:
+                db.close()
+        except Exception as e:
+            print(f"[SNAPSHOT] ⚠️ Mirror load skipped: {e}")
+            return 0
+        for row in rows:
+            self._adopt((row.token, row.timeframe), row)
+        return len(rows)
+
+    def _write_mirror(self, key: Key, snap: Dict[str, Any], state: IndicatorState) -> None:
+        if not self.mirror:
+            return
+        try:
+            from database import SessionLocal
+            from models_db import IndicatorSnapshot
+            values = {
+                "token": key[0], "timeframe": key[1], "candle_ts": snap["candle_ts"],
+                "values_json": json.dumps(snap["market"]), "state_json": json.dumps(asdict(state)),
+                "updated_at": datetime.fromtimestamp(snap["updated_at"]),
+            }
+            db = SessionLocal()
+            try:
+                row = db.query(IndicatorSnapshot).filter(
+                    IndicatorSnapshot.token == key[0], IndicatorSnapshot.timeframe == key[1]
+                ).first()
+                if row is None:
+                    db.add(IndicatorSnapshot(**values))
+                else:
+                    for k, v in values.items():
+                        setattr(row, k, v)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"[SNAPSHOT] ⚠️ Mirror write failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "enabled": SNAPSHOT_ENABLED,
+            "max_age_s": self.max_age,
+            "watched": [f"{t}:{tf}" for t, tf in self._watch],
+            "snapshots": {
+                f"{t}:{tf}": {"candle_ts": s["candle_ts"], "age_s": round(now - s["updated_at"], 1)}
+                for (t, tf), s in self._snapshots.items()
+            },
+            **self._stats,
+        }
+
+
+indicator_snapshots = IndicatorSnapshots()
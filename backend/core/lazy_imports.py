@@ -0,0 +1,97 @@
+# backend/core/lazy_imports.py
+"""
+Imports diferidos y perfil de arranque.
+
+`import main` cargaba pandas, ccxt (todos los exchanges), ta,
+google.generativeai... aunque el proceso solo fuera a contestar /health:
+unos 3 s por worker en cada redeploy. lazy_module("ccxt") devuelve un proxy
+que importa el módulo real en el primer acceso a un atributo
+(ccxt.binance, pd.DataFrame...); el código que lo usa no cambia y después
+del primer uso el coste es un getattr.
+
+Cada carga diferida queda registrada (ms, quién la provocó primero) junto
+con las fases de arranque marcadas con mark_phase(); todo sale en
+GET /system/startup. El presupuesto de importación lo vigila
+test_startup_profile.py (falla si `import main` vuelve a cargar alguno de
+HEAVY_MODULES o pasa de IMPORT_BUDGET_MS).
+"""
+
+import importlib
+import sys
+import time
+import traceback
+import types
+from typing import Any, Dict, List
+
+# Dependencias que no deben cargarse al importar main (solo al usarlas)
+HEAVY_MODULES = ("pandas", "ccxt", "ta", "pandas_ta", "google.generativeai", "pywebpush")
+
+_PROCESS_T0 = time.perf_counter()
+_lazy_loads: Dict[str, Dict[str, Any]] = {}
+_phases: List[Dict[str, Any]] = []
+
+
+class LazyModule(types.ModuleType):
+    """Proxy de un módulo que se importa al primer acceso a un atributo."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            name = self.__name__
+            t0 = time.perf_counter()
+            already = name in sys.modules
+            module = importlib.import_module(name)
+            if not already:
+                caller = next(
+                    (f"{f.filename.rsplit('/', 1)[-1]}:{f.lineno}" for f in reversed(traceback.extract_stack()[:-2])
+                     if not f.filename.endswith("lazy_imports.py")),
+                    "?",
+                )
+                _lazy_loads[name] = {
+                    "ms": round((time.perf_counter() - t0) * 1000, 1),
+                    "at_s": round(time.perf_counter() - _PROCESS_T0, 2),
+                    "first_use": caller,
+                }
+            self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """`pd = lazy_module("pandas")` en lugar de `import pandas as pd`."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+# === Perfil de arranque ===
+
+def mark_phase(name: str, started: float) -> None:
+    """Registra una fase de arranque que empezó en `started` (time.perf_counter())."""
+    now = time.perf_counter()
+    _phases.append({
+        "phase": name,
+        "ms": round((now - started) * 1000, 1),
+        "at_s": round(now - _PROCESS_T0, 2),
+    })
+
+
+def startup_report() -> Dict[str, Any]:
+    return {
+        "phases": list(_phases),
+        "lazy_loads": dict(_lazy_loads),
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
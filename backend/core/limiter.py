@@ -1,7 +1,95 @@
-from slowapi import Limiter
+import os
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from slowapi import Limiter as _SlowAPILimiter
 from slowapi.util import get_remote_address
 
+from core.rate_limit import GCRARateLimiter, LocalGCRAStore, RedisGCRAStore
+
+# Store compartido entre workers: "redis" (REDIS_URL de core.cache) o "memory".
+# Por defecto redis si hay REDIS_URL.
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "").lower()
+
+
+class Limiter(_SlowAPILimiter):
+    """slowapi con la estrategia GCRA de core/rate_limit.py (local o Redis)."""
+
+    def __init__(self, *args, gcra: Optional[GCRARateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._limiter = gcra or _build_gcra()
+
+    @property
+    def gcra(self) -> GCRARateLimiter:
+        return self._limiter
+
+
+def _build_gcra() -> GCRARateLimiter:
+    local = LocalGCRAStore()
+    redis_client = None
+    if RATE_LIMIT_STORAGE != "memory":
+        from core.cache import cache
+        redis_client = getattr(cache, "redis_client", None)
+        if RATE_LIMIT_STORAGE == "redis" and redis_client is None:
+            print("[RATE LIMIT] ⚠️ RATE_LIMIT_STORAGE=redis but no REDIS_URL. Using memory.")
+    if redis_client is None:
+        return GCRARateLimiter(local)
+    print("[RATE LIMIT] ✅ Shared GCRA store on Redis")
+    return GCRARateLimiter(RedisGCRAStore(redis_client), fallback=local)
+
+
+# === Claves ===
+
+@lru_cache(maxsize=4096)
+def _token_subject(token: str) -> Optional[str]:
+    """`sub` del JWT, sin consultar la DB (la validez real la comprueba get_current_user)."""
+    from jose import JWTError, jwt
+    from core.security import SECRET_KEY, ALGORITHM
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def rate_limit_key(request) -> str:
+    """user:<email> con un Bearer válido; si no, ip:<cliente>."""
+    auth = request.headers.get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        subject = _token_subject(auth[7:].strip())
+        if subject:
+            return f"user:{subject}"
+    return f"ip:{get_remote_address(request)}"
+
+
+def _plan_for_key(key: str) -> str:
+    """
+    Plan del usuario de la clave, sin tocar la DB: slowapi evalúa el límite
+    después de las dependencias de la ruta, así que get_current_user ya dejó
+    el principal en user_cache. Si no está (ruta sin auth, caché invalidada
+    entre medias), FREE.
+    """
+    if not key.startswith("user:"):
+        return "FREE"
+    from core.user_cache import user_cache
+    principal = user_cache.get(key[5:])
+    if principal is None:
+        return "FREE"
+    return (principal.plan or "FREE").upper()
+
+
+def plan_limit(burst: str, per_plan: Optional[Dict[str, str]] = None) -> Callable[[str], str]:
+    """
+    Ráfaga por plan para @limiter.limit: per_plan[plan] o `burst` por defecto.
+    Solo ráfagas cortas; el tope DIARIO por plan (entitlements.QUOTAS) lo
+    aplica core/quota.py, que es la fuente de verdad del uso.
+    """
+    per_plan = {k.upper(): v for k, v in (per_plan or {}).items()}
+
+    def provider(key: str) -> str:
+        return per_plan.get(_plan_for_key(key), burst) if per_plan else burst
+    return provider
+
+
 # Initialize Limiter
-# Using In-Memory fallback if no storage uri is provided
-# key_func=get_remote_address uses the client IP
-limiter = Limiter(key_func=get_remote_address)
+# key_func: usuario autenticado (por email del token) o IP del cliente
+limiter = Limiter(key_func=rate_limit_key)
@@ -0,0 +1,432 @@
+# backend/core/live_stream.py
+"""
+Stream en vivo (Server-Sent Events) de señales, evaluaciones y precios.
+
+SignalsPage y ScannerPage consultaban /logs/recent cada 15 s,
+NotificationCenter cada 15 s, DashboardHome cada 30 s y MainLayout
+/market/summary cada 60 s, por cada pestaña abierta: la carga era
+clientes × frecuencia de sondeo. Ahora un único productor por worker
+(LiveStreamHub, tarea asyncio que arranca con el primer suscriptor y se
+para con el último):
+
+- Cada STREAM_POLL_MS consulta las señales con id > último visto y las
+  evaluaciones con id > último visto (dos SELECT por índice de PK, haya 1 o
+  1000 clientes). El scheduler corre en otro proceso, así que la DB es la
+  fuente común; wake() adelanta la consulta cuando la señal o la evaluación
+  se crea en este proceso (signal_writer, evaluador en segundo plano).
+- Cada STREAM_TICKER_S pide get_market_summary() de la watchlist y emite
+  `ticker` solo si cambió.
+- Reparte los eventos a las colas de los suscriptores filtrando por usuario
+  (sus señales + las del sistema, como /logs/recent) y por mode/token.
+
+Ids de evento "<signal_id>-<evaluation_id>": el cursor de la DB tras ese
+evento, válido en cualquier worker y tras un reinicio. Con Last-Event-ID se
+reenvía lo posterior desde el buffer en memoria (STREAM_BUFFER eventos) o,
+si es más antiguo, desde la DB (hasta STREAM_REPLAY_MAX por tipo). Un
+suscriptor lento cuya cola (STREAM_QUEUE) se llena se desconecta: el
+EventSource reconecta con su Last-Event-ID y recupera lo perdido.
+
+Autenticación: EventSource no envía cabeceras y el JWT en la URL acaba en
+logs de acceso, historial y Referer. El cliente pide antes un ticket
+(POST /stream/ticket, autenticado con Bearer): aleatorio, de un solo uso y
+válido STREAM_TICKET_TTL_S segundos (StreamTickets; en Redis si hay
+REDIS_URL, para que cualquier worker pueda canjearlo).
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+STREAM_POLL_INTERVAL = int(os.getenv("STREAM_POLL_MS", "2000")) / 1000.0
+STREAM_TICKER_INTERVAL = float(os.getenv("STREAM_TICKER_S", "30"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT_S", "15"))
+STREAM_BUFFER = int(os.getenv("STREAM_BUFFER", "1000"))
+STREAM_QUEUE = int(os.getenv("STREAM_QUEUE", "500"))
+STREAM_REPLAY_MAX = int(os.getenv("STREAM_REPLAY_MAX", "200"))
+STREAM_TICKET_TTL = int(os.getenv("STREAM_TICKET_TTL_S", "30"))
+POLL_BATCH = 500
+
+Cursor = Tuple[int, int]  # (último signal.id, último signal_evaluations.id)
+
+
+def format_cursor(cursor: Cursor) -> str:
+    return f"{cursor[0]}-{cursor[1]}"
+
+
+def parse_cursor(value: Optional[str]) -> Optional[Cursor]:
+    if not value:
+        return None
+    try:
+        sig, ev = value.split("-", 1)
+        return int(sig), int(ev)
+    except ValueError:
+        return None
+
+
+@dataclass
+class StreamEvent:
+    kind: str  # signal | evaluation | ticker
+    data: Dict[str, Any]
+    cursor: Optional[Cursor] = None  # None: no avanza el cursor (ticker)
+    user_id: Optional[int] = None  # None: visible para todos
+    mode: Optional[str] = None
+    token: Optional[str] = None
+    _encoded: Optional[str] = field(default=None, repr=False)
+
+    def encode(self) -> str:
+        """Trama SSE (serializada una vez para todos los suscriptores)."""
+        if self._encoded is None:
+            head = f"id: {format_cursor(self.cursor)}\n" if self.cursor else ""
+            self._encoded = f"{head}event: {self.kind}\ndata: {json.dumps(self.data, default=str)}\n\n"
+        return self._encoded
+
+
+@dataclass(eq=False)
+class Subscriber:
+    user_id: Optional[int]
+    modes: Optional[Set[str]] = None
+    tokens: Optional[Set[str]] = None
+    queue: "asyncio.Queue[Optional[StreamEvent]]" = field(default_factory=lambda: asyncio.Queue(maxsize=STREAM_QUEUE))
+    dropped: bool = False
+
+    def wants(self, ev: StreamEvent) -> bool:
+        if ev.kind == "ticker":
+            return True
+        if ev.user_id is not None and ev.user_id != self.user_id:
+            return False
+        if self.modes and ev.mode not in self.modes:
+            return False
+        if self.tokens and ev.token not in self.tokens:
+            return False
+        return True
+
+
+# === Filas -> eventos ===
+
+def _signal_event(sig) -> StreamEvent:
+    return StreamEvent(
+        kind="signal",
+        data={
+            "id": sig.id,
+            "timestamp": sig.timestamp.isoformat() if sig.timestamp else None,
+            "token": sig.token or "UNKNOWN",
+            "timeframe": sig.timeframe or "1h",
+            "direction": sig.direction or "neutral",
+            "entry": sig.entry or 0.0,
+            "tp": sig.tp or 0.0,
+            "sl": sig.sl or 0.0,
+            "confidence": sig.confidence or 0.0,
+            "source": sig.source or sig.strategy_id or "System",
+            "mode": sig.mode or "LITE",
+            "status": "OPEN",
+            "pnl": None,
+        },
+        user_id=sig.user_id, mode=sig.mode, token=sig.token,
+    )
+
+
+def _evaluation_event(ev, sig) -> StreamEvent:
+    return StreamEvent(
+        kind="evaluation",
+        data={
+            "signal_id": ev.signal_id,
+            "status": ev.result,
+            "pnl": ev.pnl_r,
+            "exit_price": ev.exit_price,
+            "evaluated_at": ev.evaluated_at.isoformat() if ev.evaluated_at else None,
+            "token": sig.token,
+            "mode": sig.mode,
+        },
+        user_id=sig.user_id, mode=sig.mode, token=sig.token,
+    )
+
+
+def _with_cursors(signals: List[StreamEvent], sig_ids: List[int],
+                  evals: List[StreamEvent], eval_ids: List[int], start: Cursor) -> List[StreamEvent]:
+    """Primero las señales, luego las evaluaciones; cada una con el cursor tras ella."""
+    sig_cur, ev_cur = start
+    out = []
+    for ev, sid in zip(signals, sig_ids):
+        sig_cur = max(sig_cur, sid)
+        ev.cursor = (sig_cur, ev_cur)
+        out.append(ev)
+    for ev, eid in zip(evals, eval_ids):
+        ev_cur = max(ev_cur, eid)
+        ev.cursor = (sig_cur, ev_cur)
+        out.append(ev)
+    return out
+
+
+def read_events(after: Cursor, limit: int = POLL_BATCH,
+                user_id: Optional[int] = None) -> Tuple[List[StreamEvent], Cursor]:
+    """
+    Señales y evaluaciones posteriores a `after` (consulta síncrona, para el
+    threadpool). Con user_id solo las visibles para ese usuario (replay).
+    """
+    from sqlalchemy import or_
+    from database import SessionLocal
+    from models_db import Signal, SignalEvaluation
+
+    db = SessionLocal()
+    try:
+        q = db.query(Signal).filter(Signal.id > after[0])
+        if user_id is not None:
+            q = q.filter(or_(Signal.user_id == user_id, Signal.user_id.is_(None)))
+        signals = q.order_by(Signal.id).limit(limit).all()
+
+        q = (db.query(SignalEvaluation, Signal)
+             .join(Signal, Signal.id == SignalEvaluation.signal_id)
+             .filter(SignalEvaluation.id > after[1]))
+        if user_id is not None:
+            q = q.filter(or_(Signal.user_id == user_id, Signal.user_id.is_(None)))
+        evals = q.order_by(SignalEvaluation.id).limit(limit).all()
+
+        events = _with_cursors([_signal_event(s) for s in signals], [s.id for s in signals],
+                               [_evaluation_event(e, s) for e, s in evals], [e.id for e, _ in evals],
+                               after)
+    finally:
+        db.close()
+    return events, (events[-1].cursor if events else after)
+
+
+def current_cursor() -> Cursor:
+    from sqlalchemy import func
+    from database import SessionLocal
+    from models_db import Signal, SignalEvaluation
+
+    db = SessionLocal()
+    try:
+        return (db.query(func.max(Signal.id)).scalar() or 0,
+                db.query(func.max(SignalEvaluation.id)).scalar() or 0)
+    finally:
+        db.close()
+
+
+# === Hub ===
+
+class LiveStreamHub:
+    def __init__(self, poll_interval: float = STREAM_POLL_INTERVAL,
+                 ticker_interval: float = STREAM_TICKER_INTERVAL, buffer_size: int = STREAM_BUFFER):
+        self.poll_interval = poll_interval
+        self.ticker_interval = ticker_interval
+        self._subscribers: Set[Subscriber] = set()
+        self._buffer: Deque[StreamEvent] = deque(maxlen=buffer_size)
+        self._cursor: Optional[Cursor] = None
+        self._buffer_floor: Optional[Cursor] = None  # cursor justo antes del evento más antiguo del buffer
+        self._ticker: Optional[StreamEvent] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stats = {"polls": 0, "events": 0, "delivered": 0, "dropped_subscribers": 0,
+                       "replays_buffer": 0, "replays_db": 0, "errors": 0}
+
+    # --- Suscripción ---
+
+    async def subscribe(self, user_id: Optional[int], modes: Optional[Set[str]] = None,
+                        tokens: Optional[Set[str]] = None,
+                        last_event_id: Optional[str] = None) -> Tuple[Subscriber, List[StreamEvent], Cursor]:
+        """Alta + eventos a reenviar (Last-Event-ID) + cursor actual (para el evento hello)."""
+        from fastapi.concurrency import run_in_threadpool
+
+        await self._ensure_started()
+        sub = Subscriber(user_id=user_id, modes=modes, tokens=tokens)
+        self._subscribers.add(sub)
+        start = self._cursor  # todo lo posterior llega por la cola
+
+        backlog: List[StreamEvent] = []
+        resume = parse_cursor(last_event_id)
+        if resume is not None:
+            floor = self._buffer_floor
+            if floor is not None and resume[0] >= floor[0] and resume[1] >= floor[1]:
+                self._stats["replays_buffer"] += 1
+                backlog = [ev for ev in self._buffer if self._after(ev, resume)]
+            else:
+                self._stats["replays_db"] += 1
+                backlog, _ = await run_in_threadpool(read_events, resume, STREAM_REPLAY_MAX, user_id)
+                truncated = (sum(ev.kind == "signal" for ev in backlog) >= STREAM_REPLAY_MAX
+                             or sum(ev.kind == "evaluation" for ev in backlog) >= STREAM_REPLAY_MAX)
+                backlog = [ev for ev in backlog if not self._after(ev, start)]
+                if truncated:
+                    # Hueco mayor que el replay: el cliente debe recargar por REST
+                    backlog.insert(0, StreamEvent(kind="resync", data={"reason": "gap too large"}))
+            backlog = [ev for ev in backlog if ev.kind == "resync" or sub.wants(ev)]
+        if self._ticker is not None:
+            backlog.append(self._ticker)
+        return sub, backlog, start
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    @staticmethod
+    def _after(ev: StreamEvent, cursor: Cursor) -> bool:
+        if ev.cursor is None:
+            return False
+        return ev.cursor[0] > cursor[0] if ev.kind == "signal" else ev.cursor[1] > cursor[1]
+
+    # --- Productor ---
+
+    async def _ensure_started(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        from fastapi.concurrency import run_in_threadpool
+
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        # Tras un periodo sin suscriptores se parte del estado actual de la DB
+        self._cursor = await run_in_threadpool(current_cursor)
+        self._buffer.clear()
+        self._buffer_floor = self._cursor
+        self._task = asyncio.create_task(self._run())
+        print(f"[STREAM] ✅ Producer started at cursor {format_cursor(self._cursor)}")
+
+    def wake(self) -> None:
+        """Adelanta la siguiente consulta (desde cualquier hilo). No-op sin suscriptores."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or not self._subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # loop cerrado
+
+    async def _run(self) -> None:
+        from fastapi.concurrency import run_in_threadpool
+
+        # Los precios van en su propia tarea: una llamada lenta al exchange no retrasa las señales
+        ticker_task = asyncio.create_task(self._run_ticker())
+        try:
+            while self._subscribers:
+                try:
+                    events, cursor = await run_in_threadpool(read_events, self._cursor)
+                    self._stats["polls"] += 1
+                    self._cursor = cursor
+                    for ev in events:
+                        self.publish(ev)
+                    if len(events) >= POLL_BATCH:
+                        continue  # atrasados: seguir sin esperar
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    print(f"[STREAM] ⚠️ Producer error: {e}")
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            ticker_task.cancel()
+        print("[STREAM] ℹ️ No subscribers, producer stopped")
+
+    async def _run_ticker(self) -> None:
+        from fastapi.concurrency import run_in_threadpool
+
+        while True:
+            ticker = await run_in_threadpool(self._read_ticker)
+            if ticker is not None and (self._ticker is None or ticker.data != self._ticker.data):
+                self._ticker = ticker
+                self.publish(ticker)
+            await asyncio.sleep(self.ticker_interval)
+
+    @staticmethod
+    def _read_ticker() -> Optional[StreamEvent]:
+        from core.market_data_api import get_market_summary, DEFAULT_WATCHLIST
+        try:
+            prices = get_market_summary(DEFAULT_WATCHLIST)
+        except Exception as e:
+            print(f"[STREAM] ⚠️ Ticker error: {e}")
+            return None
+        return StreamEvent(kind="ticker", data={"prices": prices}) if prices else None
+
+    def publish(self, ev: StreamEvent) -> None:
+        """Reparte un evento (desde el loop). Los suscriptores con la cola llena se desconectan."""
+        self._stats["events"] += 1
+        if ev.cursor is not None:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._buffer_floor = self._buffer[0].cursor
+            self._buffer.append(ev)
+        for sub in list(self._subscribers):
+            if sub.dropped or not sub.wants(ev):
+                continue
+            try:
+                sub.queue.put_nowait(ev)
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                sub.dropped = True
+                self._subscribers.discard(sub)
+                self._stats["dropped_subscribers"] += 1
+
+    # --- Diagnóstico ---
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, subscribers=len(self._subscribers),
+                    running=self._task is not None and not self._task.done(),
+                    cursor=format_cursor(self._cursor) if self._cursor else None,
+                    buffered=len(self._buffer), poll_interval_ms=int(self.poll_interval * 1000))
+
+
+live_stream = LiveStreamHub()
+
+
+class StreamTickets:
+    """
+    Tickets de un solo uso para abrir /stream/events sin el JWT en la URL.
+    Guardan el email del usuario; canjearlo lo borra (GETDEL en Redis).
+    """
+
+    PREFIX = "stream-ticket:"
+
+    def __init__(self, ttl: int = STREAM_TICKET_TTL, redis_client: Any = "auto"):
+        self.ttl = ttl
+        self._redis = redis_client
+        self._local: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._redis == "auto":
+            from core.cache import cache
+            self._redis = cache.redis_client
+        return self._redis
+
+    def issue(self, email: str) -> str:
+        ticket = secrets.token_urlsafe(32)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(self.PREFIX + ticket, email, ex=self.ttl)
+                return ticket
+            except Exception as e:
+                print(f"[STREAM] ⚠️ Redis ticket store failed, using memory: {e}")
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp) in self._local.items() if exp <= now]:
+                del self._local[key]
+            self._local[ticket] = (email, now + self.ttl)
+        return ticket
+
+    def redeem(self, ticket: Optional[str]) -> Optional[str]:
+        """Email del ticket o None (desconocido, caducado o ya usado)."""
+        if not ticket:
+            return None
+        with self._lock:
+            entry = self._local.pop(ticket, None)
+        if entry is not None:
+            return entry[0] if entry[1] > time.time() else None
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            value = client.getdel(self.PREFIX + ticket)
+        except Exception as e:
+            print(f"[STREAM] ⚠️ Redis ticket redeem failed: {e}")
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value or None
+
+
+stream_tickets = StreamTickets()
@@ -0,0 +1,265 @@
+# backend/core/llm_cache.py
+"""
+Caché de respuestas LLM (análisis PRO y advisor) con coalescing.
+
+/analyze/pro y el advisor llamaban a DeepSeek/Gemini (core.ai_service) en
+cada petición, con un requests.post bloqueante de hasta 30 s: el mismo
+prompt para el mismo token, timeframe y vela cerrada se pagaba y se
+esperaba una y otra vez. Ahora:
+
+- AnalysisKey = (kind, token, timeframe, apertura de la última vela
+  cerrada, versión de la plantilla del prompt, hash del snapshot). En PRO
+  el hash cubre los indicadores de la vela cerrada, la señal LITE (sin
+  timestamp) y el mensaje del usuario; el contexto RAG no entra en la clave
+  y solo se carga en un fallo de caché. En el advisor cubre el prompt
+  completo. Cambiar la plantilla obliga a subir su versión
+  (PRO_PROMPT_VERSION en core/analysis_logic.py).
+- TTL hasta el cierre de la siguiente vela (acotado entre
+  LLM_CACHE_MIN_TTL_S y LLM_CACHE_MAX_TTL_S): con vela nueva la clave
+  cambia de todos modos.
+- L1 en memoria por worker (LRU de LLM_CACHE_SIZE) y, con REDIS_URL,
+  compartida vía core.cache entre workers.
+- Coalescing: peticiones idénticas concurrentes en el mismo worker esperan
+  la llamada en curso en lugar de lanzar otra (get_or_generate_async para
+  endpoints async, get_or_generate para los síncronos).
+- Los errores del proveedor (ai_service.is_error_response) no se guardan.
+
+Aciertos, llamadas ahorradas y segundos de espera ahorrados en
+GET /system/llm-cache. Para tests: AI_PROVIDER=fake (ai_service.FakeProvider).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2000"))
+LLM_CACHE_MIN_TTL_S = int(os.getenv("LLM_CACHE_MIN_TTL_S", "60"))
+LLM_CACHE_MAX_TTL_S = int(os.getenv("LLM_CACHE_MAX_TTL_S", "86400"))
+LLM_COALESCE_TIMEOUT_S = float(os.getenv("LLM_COALESCE_TIMEOUT_S", "90"))
+
+
+def snapshot_hash(*parts: Any) -> str:
+    """Hash estable de las entradas del prompt (dicts, textos, listas)."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=10).hexdigest()
+
+
+def last_closed_ts(timeframe: Optional[str], now: Optional[float] = None) -> Optional[int]:
+    """Apertura (ms) de la última vela cerrada según el reloj; None si no hay timeframe."""
+    if not timeframe:
+        return None
+    from core.indicator_snapshots import timeframe_ms
+    try:
+        tf_ms = timeframe_ms(timeframe)
+    except ValueError:
+        return None
+    now_ms = int((time.time() if now is None else now) * 1000)
+    return now_ms - now_ms % tf_ms - tf_ms
+
+
+@dataclass(frozen=True)
+class AnalysisKey:
+    kind: str                 # "pro" | "advisor"
+    token: str
+    timeframe: str
+    candle_ts: Optional[int]  # apertura de la última vela cerrada (ms)
+    template_version: str
+    snapshot_hash: str
+
+    def cache_key(self) -> str:
+        return (f"llm:{self.kind}:{self.token.upper()}:{self.timeframe}:{self.candle_ts}:"
+                f"{self.template_version}:{self.snapshot_hash}")
+
+    def ttl(self, now: Optional[float] = None) -> int:
+        """Segundos hasta el cierre de la siguiente vela (la que está en curso)."""
+        if self.candle_ts is None:
+            return LLM_CACHE_MIN_TTL_S
+        from core.indicator_snapshots import timeframe_ms
+        try:
+            tf_ms = timeframe_ms(self.timeframe)
+        except ValueError:
+            return LLM_CACHE_MIN_TTL_S
+        now_ms = (time.time() if now is None else now) * 1000
+        remaining = (self.candle_ts + 2 * tf_ms - now_ms) / 1000
+        return int(min(max(remaining, LLM_CACHE_MIN_TTL_S), LLM_CACHE_MAX_TTL_S))
+
+
+class _Call:
+    """Llamada en curso (coalescing de los caminos síncronos)."""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, enabled: bool = LLM_CACHE_ENABLED):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()  # valor, expira, ms
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Call] = {}
+        self._inflight_async: Dict[str, "asyncio.Future"] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # --- Almacenamiento ---
+
+    def _shared(self):
+        from core.cache import cache
+        return cache if cache.redis_client else None
+
+    def get(self, key: AnalysisKey) -> Optional[str]:
+        ck = key.cache_key()
+        with self._lock:
+            entry = self._local.get(ck)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._local.move_to_end(ck)
+                    self._count(key.kind, "hits")
+                    self._count(key.kind, "saved_s", entry[2] / 1000)
+                    return entry[0]
+                del self._local[ck]
+        shared = self._shared()
+        if shared is not None:
+            data = shared.get(ck)
+            if data:
+                self._put_local(ck, data["text"], time.time() + key.ttl(), data.get("ms", 0.0))
+                self._count(key.kind, "shared_hits")
+                self._count(key.kind, "saved_s", data.get("ms", 0.0) / 1000)
+                return data["text"]
+        return None
+
+    def put(self, key: AnalysisKey, text: str, gen_ms: float = 0.0) -> None:
+        ttl = key.ttl()
+        ck = key.cache_key()
+        self._put_local(ck, text, time.time() + ttl, gen_ms)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(ck, {"text": text, "ms": gen_ms}, ttl=ttl)
+        self._count(key.kind, "stores")
+
+    def _put_local(self, ck: str, text: str, expires: float, gen_ms: float) -> None:
+        with self._lock:
+            self._local[ck] = (text, expires, gen_ms)
+            self._local.move_to_end(ck)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    # --- Generación con coalescing ---
+
+    def _generate(self, key: AnalysisKey, generate: Callable[[], str]) -> str:
+        from core.ai_service import is_error_response
+        t0 = time.perf_counter()
+        self._count(key.kind, "upstream_calls")
+        text = generate()
+        gen_ms = (time.perf_counter() - t0) * 1000
+        self._count(key.kind, "upstream_s", gen_ms / 1000)
+        if is_error_response(text):
+            self._count(key.kind, "errors")
+        else:
+            self.put(key, text, gen_ms)
+        return text
+
+    def get_or_generate(self, key: AnalysisKey, generate: Callable[[], str]) -> str:
+        """Síncrono (endpoints def): caché → llamada en curso → proveedor."""
+        if not self.enabled:
+            return generate()
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        ck = key.cache_key()
+        with self._lock:
+            call = self._inflight.get(ck)
+            leader = call is None
+            if leader:
+                call = self._inflight[ck] = _Call()
+        if not leader:
+            self._count(key.kind, "coalesced")
+            if call.event.wait(LLM_COALESCE_TIMEOUT_S):
+                if call.error is not None:
+                    raise call.error
+                return call.value
+            return self._generate(key, generate)  # líder colgado: llamada propia
+
+        self._count(key.kind, "misses")
+        try:
+            call.value = self._generate(key, generate)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(ck, None)
+            call.event.set()
+
+    async def get_or_generate_async(self, key: AnalysisKey, generate: Callable[[], str]) -> str:
+        """Async (endpoints async): `generate` es bloqueante y va al threadpool."""
+        from fastapi.concurrency import run_in_threadpool
+
+        if not self.enabled:
+            return await run_in_threadpool(generate)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        ck = key.cache_key()
+        future = self._inflight_async.get(ck)
+        if future is not None:
+            self._count(key.kind, "coalesced")
+            return await asyncio.wait_for(asyncio.shield(future), LLM_COALESCE_TIMEOUT_S)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_async[ck] = future
+        self._count(key.kind, "misses")
+        try:
+            text = await run_in_threadpool(self._generate, key, generate)
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # marcada como recuperada si no había nadie esperando
+            raise
+        finally:
+            self._inflight_async.pop(ck, None)
+
+    # --- Métricas ---
+
+    def _count(self, kind: str, name: str, amount: float = 1) -> None:
+        bucket = self._stats.setdefault(kind, {})
+        bucket[name] = bucket.get(name, 0) + amount
+
+    def stats(self) -> Dict[str, Any]:
+        kinds = {}
+        for kind, s in self._stats.items():
+            hits = s.get("hits", 0) + s.get("shared_hits", 0)
+            served = hits + s.get("coalesced", 0)
+            total = served + s.get("misses", 0)
+            kinds[kind] = {
+                **{k: round(v, 2) if isinstance(v, float) else v for k, v in s.items()},
+                "hit_rate": round(hits / total, 3) if total else None,
+                # Peticiones que no llegaron al proveedor (aciertos + coalescidas)
+                "calls_saved_rate": round(served / total, 3) if total else None,
+            }
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._local),
+            "max_entries": self.max_entries,
+            "shared": self._shared() is not None,
+            "inflight": len(self._inflight) + len(self._inflight_async),
+            "kinds": kinds,
+        }
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+
+
+llm_cache = LLMResponseCache()
@@ -4,12 +4,18 @@
 Módulo para obtener datos de mercado en tiempo real.
 Refactorizado para usar CCXT (Binance) para consistencia con Trading Lab.
 """
-import ccxt
+from core.lazy_imports import lazy_module
 import time
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from core.cache import cache  # Importar Cache
 
+# Importa todos los exchanges (~0.6 s): se carga en la primera descarga
+ccxt = lazy_module("ccxt")
+
+# Watchlist por defecto de /market/summary y del evento ticker del stream
+DEFAULT_WATCHLIST = ["BTC", "ETH", "SOL", "XRP", "BNB", "DOGE", "ADA", "AVAX", "DOT", "LINK"]
+
 def get_ohlcv_data(
     symbol: str,
     timeframe: str = "30m",
@@ -85,13 +91,22 @@ def get_ohlcv_data(
 # ... (generate_mock_ohlcv stays same) ...
 
 
+def summary_cache_key(symbols: List[str]) -> str:
+    # Clave estable entre procesos (hash() de str cambia en cada worker)
+    return "market:summary:" + "-".join(sorted({s.upper() for s in symbols}))
+
+
+def summary_stamp_key(symbols: List[str]) -> str:
+    """Sello de la última descarga del resumen (versión de /market/summary)."""
+    return summary_cache_key(symbols) + ":stamp"
+
+
 def get_market_summary(symbols: List[str]) -> List[Dict[str, Any]]:
     """
     Obtiene precio y cambio 24h para múltiples símbolos.
     """
     # 1. Cache Check (Strict)
-    s_key = "-".join(sorted(symbols))
-    cache_key = f"market:summary:{hash(s_key)}"
+    cache_key = summary_cache_key(symbols)
     cached = cache.get(cache_key)
     if cached:
         return cached
@@ -133,6 +148,7 @@ def get_market_summary(symbols: List[str]) -> List[Dict[str, Any]]:
         # 3. Set Cache: 10s TTL - increased slightly to reduce spam
         if summary:
             cache.set(cache_key, summary, ttl=10)
+            cache.set(summary_stamp_key(symbols), time.time(), ttl=10)
             
         return summary
 
@@ -0,0 +1,159 @@
+# backend/core/monte_carlo.py
+"""
+Análisis de robustez Monte Carlo sobre el log de trades de un backtest.
+
+Toma la serie de retornos por trade (fracción, 0.02 = +2%) y genera miles de
+remuestreos como UNA matriz 2-D de NumPy (simulaciones x trades):
+
+- "bootstrap": muestreo con reemplazo (varía la composición de trades).
+- "shuffle":   permutación del orden (misma composición, distinta secuencia).
+
+Sobre esa matriz se calculan las distribuciones de equity final, max drawdown
+y riesgo de ruina sin bucles Python por simulación. Para acotar memoria, las
+simulaciones se procesan en bloques (chunks) según un presupuesto en bytes.
+
+Lo usan:
+- BacktestEngine.run (sección opcional "monte_carlo" de /backtest/run)
+- trading_lab/monte_carlo.py (CLI sobre los logs de trading_lab/engine.py)
+"""
+
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+METHODS = ("bootstrap", "shuffle")
+
+DEFAULT_SIMULATIONS = 1000
+MAX_SIMULATIONS = 20000
+DEFAULT_RUIN_DRAWDOWN = 0.5             # Ruina = perder el 50% desde máximos
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # Presupuesto de memoria por chunk
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Matrices de 8 bytes vivas a la vez por chunk: índices int64 del bootstrap,
+# retornos, equity y running max / dd
+_ARRAYS_PER_CHUNK = 4
+
+
+def _chunk_rows(n_trades: int, max_bytes: int) -> int:
+    """Número de simulaciones por bloque que caben en el presupuesto."""
+    row_bytes = max(n_trades, 1) * 8 * _ARRAYS_PER_CHUNK
+    return max(1, int(max_bytes // row_bytes))
+
+
+def resample_returns(
+    returns: np.ndarray,
+    simulations: int,
+    method: str = "bootstrap",
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Genera la matriz (simulations, n_trades) de retornos remuestreados.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método Monte Carlo no soportado: {method}")
+    rng = rng or np.random.default_rng()
+    n = len(returns)
+
+    if method == "bootstrap":
+        idx = rng.integers(0, n, size=(simulations, n))
+        return returns[idx]
+
+    # shuffle: permutación independiente por fila
+    return rng.permuted(np.broadcast_to(returns, (simulations, n)), axis=1)
+
+
+def _path_stats(matrix: np.ndarray, ruin_drawdown: float):
+    """
+    Equity final (múltiplo del capital), max drawdown (fracción negativa) y
+    flag de ruina por fila. Todo vectorizado a lo largo del eje de trades.
+    """
+    equity = np.cumprod(1.0 + matrix, axis=1)
+    final = equity[:, -1].copy()
+
+    # El capital inicial (1.0) cuenta como primer máximo
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 1.0, out=peak)
+    np.divide(equity, peak, out=peak)
+    peak -= 1.0
+    max_dd = peak.min(axis=1)
+
+    ruined = max_dd <= -abs(ruin_drawdown)
+    return final, max_dd, ruined
+
+
+def _distribution(values: np.ndarray, scale: float = 1.0, digits: int = 2) -> Dict[str, float]:
+    pct = np.percentile(values, PERCENTILES)
+    out = {f"p{p}": round(float(v) * scale, digits) for p, v in zip(PERCENTILES, pct)}
+    out["mean"] = round(float(values.mean()) * scale, digits)
+    out["min"] = round(float(values.min()) * scale, digits)
+    out["max"] = round(float(values.max()) * scale, digits)
+    return out
+
+
+def run_monte_carlo(
+    returns: Sequence[float],
+    simulations: int = DEFAULT_SIMULATIONS,
+    method: str = "bootstrap",
+    initial_capital: float = 1.0,
+    ruin_drawdown: float = DEFAULT_RUIN_DRAWDOWN,
+    seed: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Dict[str, Any]:
+    """
+    Ejecuta el análisis Monte Carlo sobre una serie de retornos por trade.
+
+    Args:
+        returns: Retornos por trade en fracción (0.015 = +1.5%)
+        simulations: Número de remuestreos (acotado a MAX_SIMULATIONS)
+        method: "bootstrap" o "shuffle"
+        initial_capital: Capital para expresar la equity final en unidades
+        ruin_drawdown: Drawdown (fracción) a partir del cual se cuenta ruina
+        seed: Semilla para reproducibilidad
+        max_bytes: Presupuesto de memoria por bloque de simulaciones
+
+    Returns:
+        Dict con distribuciones de equity final, drawdown y riesgo de ruina.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[np.isfinite(r)]
+    # Un trade no puede perder más que todo el capital: con r < -1 el producto
+    # acumulado cambiaría de signo. En -1 la equity queda en 0 (ruina) hasta el final.
+    r = np.maximum(r, -1.0)
+    simulations = int(min(max(simulations, 1), MAX_SIMULATIONS))
+
+    if r.size == 0:
+        return {
+            "method": method,
+            "simulations": 0,
+            "trades": 0,
+            "final_equity": {},
+            "max_drawdown_pct": {},
+            "risk_of_ruin": 0.0,
+            "prob_loss": 0.0,
+        }
+
+    rng = np.random.default_rng(seed)
+    rows = _chunk_rows(r.size, max_bytes)
+
+    finals = np.empty(simulations)
+    drawdowns = np.empty(simulations)
+    ruined = np.empty(simulations, dtype=bool)
+
+    for start in range(0, simulations, rows):
+        stop = min(start + rows, simulations)
+        matrix = resample_returns(r, stop - start, method, rng)
+        finals[start:stop], drawdowns[start:stop], ruined[start:stop] = _path_stats(matrix, ruin_drawdown)
+
+    return {
+        "method": method,
+        "simulations": simulations,
+        "trades": int(r.size),
+        "chunk_size": rows,
+        "ruin_drawdown_pct": round(abs(ruin_drawdown) * 100.0, 2),
+        "final_equity": _distribution(finals, scale=initial_capital),
+        "max_drawdown_pct": _distribution(drawdowns, scale=100.0),
+        "risk_of_ruin": round(float(ruined.mean()), 4),
+        "prob_loss": round(float((finals < 1.0).mean()), 4),
+    }
+
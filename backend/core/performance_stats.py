@@ -0,0 +1,280 @@
+# backend/core/performance_stats.py
+"""
+Agregados de rendimiento por source y por strategy_id (tabla
+performance_stats), mantenidos de forma incremental.
+
+Antes, /strategies/marketplace lanzaba dos COUNT por persona sobre
+signals ⨝ signal_evaluations y los evaluadores recontaban TODO el histórico
+de la estrategia tras cada lote. Ahora:
+
+- record_signals(db, rows):      +total_signals y last_signal_at
+- record_evaluations(db, items): +evaluated / wins / losses / breakeven / pnl_r
+
+se llaman con la MISMA sesión que inserta la señal o la evaluación, antes del
+commit, y aplican los deltas con un upsert atómico por lote
+(ON CONFLICT (scope, key) DO UPDATE SET x = x + excluded.x).
+
+Las evaluaciones se insertan con insert_evaluations(db, rows, sources):
+signal_evaluator y evaluated_logger pueden evaluar la misma señal a la vez,
+así que el INSERT es ON CONFLICT (signal_id) DO NOTHING ... RETURNING y solo
+las filas realmente insertadas suman en las estadísticas.
+
+rebuild(db) recalcula la tabla entera con dos GROUP BY por scope (backfills,
+seeds, migraciones) más los agregados de las señales archivadas
+(core/signal_archive.py): python tools/rebuild_performance_stats.py
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SCOPES = ("source", "strategy")
+
+# Los evaluadores usan dos vocabularios: WIN/LOSS/BE (core/signal_evaluator)
+# y hit-tp/hit-sl/open/neutral (evaluated_logger)
+WIN_RESULTS = ("WIN", "hit-tp")
+LOSS_RESULTS = ("LOSS", "hit-sl")
+BE_RESULTS = ("BE",)
+
+COUNTERS = ("total_signals", "evaluated", "wins", "losses", "breakeven", "pnl_r_sum")
+
+StatsKey = Tuple[str, str]
+
+
+def _empty() -> Dict[str, Any]:
+    d: Dict[str, Any] = {c: 0 for c in COUNTERS}
+    d["pnl_r_sum"] = 0.0
+    d["last_signal_at"] = None
+    return d
+
+
+def _keys(source: Optional[str], strategy_id: Optional[str]) -> List[StatsKey]:
+    keys = []
+    if source:
+        keys.append(("source", source))
+    if strategy_id:
+        keys.append(("strategy", strategy_id))
+    return keys
+
+
+def signal_deltas(rows: Iterable[Dict[str, Any]]) -> Dict[StatsKey, Dict[str, Any]]:
+    """Deltas de una tanda de señales nuevas (dicts con source/strategy_id/timestamp)."""
+    deltas: Dict[StatsKey, Dict[str, Any]] = {}
+    for row in rows:
+        ts = row.get("timestamp")
+        for k in _keys(row.get("source"), row.get("strategy_id")):
+            d = deltas.setdefault(k, _empty())
+            d["total_signals"] += 1
+            if ts is not None and (d["last_signal_at"] is None or ts > d["last_signal_at"]):
+                d["last_signal_at"] = ts
+    return deltas
+
+
+def evaluation_deltas(items: Iterable[Tuple[Optional[str], Optional[str], Optional[str], Optional[float]]]
+                      ) -> Dict[StatsKey, Dict[str, Any]]:
+    """Deltas de evaluaciones nuevas: items = (source, strategy_id, result, pnl_r)."""
+    deltas: Dict[StatsKey, Dict[str, Any]] = {}
+    for source, strategy_id, result, pnl_r in items:
+        for k in _keys(source, strategy_id):
+            d = deltas.setdefault(k, _empty())
+            d["evaluated"] += 1
+            d["wins"] += result in WIN_RESULTS
+            d["losses"] += result in LOSS_RESULTS
+            d["breakeven"] += result in BE_RESULTS
+            d["pnl_r_sum"] += float(pnl_r or 0.0)
+    return deltas
+
+
+def apply_deltas(db, deltas: Dict[StatsKey, Dict[str, Any]]) -> None:
+    """
+    Suma los deltas en performance_stats dentro de la transacción de `db`
+    (no hace commit).
+    """
+    if not deltas:
+        return
+    from sqlalchemy import case
+    from models_db import PerformanceStats
+
+    now = datetime.utcnow()
+    # Orden estable: evita interbloqueos entre transacciones concurrentes
+    values = [
+        {"scope": scope, "key": key, **deltas[(scope, key)], "updated_at": now}
+        for scope, key in sorted(deltas)
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        t = PerformanceStats.__table__
+        stmt = dialect_insert(t).values(values)
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scope", "key"],
+            set_={
+                **{c: t.c[c] + ex[c] for c in COUNTERS},
+                "last_signal_at": case(
+                    (t.c.last_signal_at.is_(None), ex.last_signal_at),
+                    (ex.last_signal_at > t.c.last_signal_at, ex.last_signal_at),
+                    else_=t.c.last_signal_at,
+                ),
+                "updated_at": ex.updated_at,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # Otros motores: lectura de las filas afectadas + update por ORM
+    existing = {
+        (s.scope, s.key): s
+        for s in db.query(PerformanceStats).filter(
+            PerformanceStats.key.in_([k for _, k in deltas])
+        ).with_for_update()
+    }
+    for v in values:
+        row = existing.get((v["scope"], v["key"]))
+        if row is None:
+            db.add(PerformanceStats(**v))
+            continue
+        for c in COUNTERS:
+            setattr(row, c, (getattr(row, c) or 0) + v[c])
+        if v["last_signal_at"] and (row.last_signal_at is None or v["last_signal_at"] > row.last_signal_at):
+            row.last_signal_at = v["last_signal_at"]
+        row.updated_at = now
+
+
+def record_signals(db, rows: Iterable[Dict[str, Any]]) -> None:
+    apply_deltas(db, signal_deltas(rows))
+
+
+def record_evaluations(db, items: Iterable[Tuple[Optional[str], Optional[str], Optional[str], Optional[float]]]) -> None:
+    apply_deltas(db, evaluation_deltas(items))
+
+
+EVAL_UNIQUE_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_signal_evaluations_signal_id "
+    "ON signal_evaluations (signal_id)"
+)
+# Evaluaciones duplicadas de antes del índice único: se queda la primera
+EVAL_DEDUPE_DDL = (
+    "DELETE FROM signal_evaluations WHERE id IN ("
+    " SELECT d.id FROM signal_evaluations d JOIN signal_evaluations o"
+    " ON o.signal_id = d.signal_id AND o.id < d.id)"
+)
+
+
+def insert_evaluations(db, rows: Sequence[Dict[str, Any]],
+                       sources: Dict[int, Tuple[Optional[str], Optional[str]]]) -> int:
+    """
+    Inserta evaluaciones (dicts de signal_evaluations) saltando las señales
+    que ya tienen una, y suma en performance_stats SOLO las insertadas.
+    sources: signal_id -> (source, strategy_id). No hace commit.
+    Devuelve el número de filas insertadas.
+    """
+    if not rows:
+        return 0
+    from sqlalchemy import insert, select
+    from models_db import SignalEvaluation
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        from core.signal_writer import _chunks
+        inserted_ids = set()
+        for chunk in _chunks(list(rows), dialect):
+            stmt = (
+                dialect_insert(SignalEvaluation)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=["signal_id"])
+                .returning(SignalEvaluation.signal_id)
+            )
+            inserted_ids.update(db.execute(stmt).scalars().all())
+        inserted = [r for r in rows if r["signal_id"] in inserted_ids]
+    else:
+        # Otros motores: señales ya evaluadas + executemany del resto
+        existing = set(db.execute(
+            select(SignalEvaluation.signal_id).where(SignalEvaluation.signal_id.in_([r["signal_id"] for r in rows]))
+        ).scalars().all())
+        inserted = [r for r in rows if r["signal_id"] not in existing]
+        if inserted:
+            db.execute(insert(SignalEvaluation), inserted)
+
+    record_evaluations(db, [
+        (*sources.get(r["signal_id"], (None, None)), r.get("result"), r.get("pnl_r")) for r in inserted
+    ])
+    return len(inserted)
+
+
+def rebuild(db) -> int:
+    """
+    Recalcula performance_stats desde signals + signal_evaluations (y el
+    archivo frío) y hace commit. Devuelve el número de filas escritas.
+    """
+    from sqlalchemy import case, func
+    from models_db import PerformanceStats, Signal, SignalEvaluation
+
+    def _flag(results: Sequence[str]):
+        return func.sum(case((SignalEvaluation.result.in_(results), 1), else_=0))
+
+    stats: Dict[StatsKey, Dict[str, Any]] = {}
+    for scope, col in (("source", Signal.source), ("strategy", Signal.strategy_id)):
+        for key, total, last in (
+            db.query(col, func.count(Signal.id), func.max(Signal.timestamp))
+            .filter(col.isnot(None), col != "")
+            .group_by(col)
+        ):
+            d = stats.setdefault((scope, key), _empty())
+            d["total_signals"] = total
+            d["last_signal_at"] = last
+
+        for key, evaluated, wins, losses, be, pnl in (
+            db.query(col, func.count(SignalEvaluation.id), _flag(WIN_RESULTS), _flag(LOSS_RESULTS),
+                     _flag(BE_RESULTS), func.coalesce(func.sum(SignalEvaluation.pnl_r), 0.0))
+            .join(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+            .filter(col.isnot(None), col != "")
+            .group_by(col)
+        ):
+            d = stats.setdefault((scope, key), _empty())
+            d.update(evaluated=evaluated, wins=wins or 0, losses=losses or 0,
+                     breakeven=be or 0, pnl_r_sum=float(pnl or 0.0))
+
+    # Señales movidas al archivo: ya no están en la DB pero siguen contando
+    from core.signal_archive import aggregate_deltas
+    for k, delta in aggregate_deltas().items():
+        d = stats.setdefault(k, _empty())
+        for c in COUNTERS:
+            d[c] += delta.get(c, 0)
+        last = delta.get("last_signal_at")
+        if last is not None and (d["last_signal_at"] is None or last > d["last_signal_at"]):
+            d["last_signal_at"] = last
+
+    now = datetime.utcnow()
+    db.query(PerformanceStats).delete(synchronize_session=False)
+    db.bulk_insert_mappings(PerformanceStats, [
+        {"scope": scope, "key": key, **d, "updated_at": now} for (scope, key), d in stats.items()
+    ])
+    db.commit()
+    return len(stats)
+
+
+def ensure_built(db) -> bool:
+    """Reconstruye si la tabla está vacía pero ya hay señales (primer arranque tras migrar)."""
+    from models_db import PerformanceStats, Signal
+
+    if db.query(PerformanceStats.id).first() is not None:
+        return False
+    if db.query(Signal.id).first() is None:
+        return False
+    n = rebuild(db)
+    print(f"[STATS] performance_stats reconstruida ({n} filas)")
+    return True
+
+
+def get_stats(db, scope: str, keys: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """{key: PerformanceStats} de un scope con una Session síncrona (ver core.repository)."""
+    from core.repository import get_performance_stats, run_sync
+    return run_sync(get_performance_stats, db, scope, keys)
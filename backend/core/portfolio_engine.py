@@ -0,0 +1,298 @@
+# backend/core/portfolio_engine.py
+"""
+Backtester multi-activo con capital compartido.
+
+A diferencia de BacktestEngine (un símbolo, todo el capital en cada trade),
+este motor:
+
+1. Alinea varias "patas" (persona = símbolo + timeframe + estrategia) en un
+   único eje temporal (unión de timestamps; las velas de TF mayores solo
+   existen en su cierre, el precio de marcado se arrastra con ffill).
+2. Calcula las señales de cada pata de forma vectorizada con
+   Strategy.signal_frame(df) (sin walk-forward vela a vela).
+3. Avanza TODOS los activos a la vez con arrays (T x N): salidas SL/TP,
+   entradas con límite de posiciones y tamaño fijo sobre equity, y
+   mark-to-market de la cartera.
+
+Reporta equity y exposición de cartera, drawdown con contribución por
+activo y correlación de PnL entre activos.
+"""
+
+import time
+import traceback
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.market_data_api import get_ohlcv_data
+
+CANDLES_PER_DAY = {"15m": 96, "30m": 48, "1h": 24, "4h": 6, "1d": 1}
+WARMUP_CANDLES = 250  # EMA200 + margen
+
+
+def _resolve_strategy(strategy_id: str):
+    from strategies.registry import get_registry
+
+    # Instancia propia: el backtest no debe tocar el estado de la del scheduler
+    strategy = get_registry().create(strategy_id)
+    if strategy is None:
+        raise ValueError(f"Estrategia no encontrada: {strategy_id}")
+    return strategy
+
+
+def load_ohlcv_frame(symbol: str, timeframe: str, days: int) -> pd.DataFrame:
+    """Descarga OHLCV (con warmup) como DataFrame indexado por timestamp (ms)."""
+    limit = days * CANDLES_PER_DAY.get(timeframe, 24) + WARMUP_CANDLES
+    ohlcv = get_ohlcv_data(symbol, timeframe, limit=limit)
+    if not ohlcv:
+        raise ValueError(f"Sin datos para {symbol} {timeframe}")
+    df = pd.DataFrame(ohlcv)
+    return df.set_index("timestamp")[["open", "high", "low", "close"]].astype(float)
+
+
+class PortfolioBacktestEngine:
+    """
+    Motor de simulación de cartera con capital compartido.
+    """
+
+    def __init__(
+        self,
+        initial_capital: float = 10000.0,
+        max_positions: int = 3,
+        position_size_pct: float = 0.25,
+    ):
+        self.initial_capital = initial_capital
+        self.max_positions = max(1, int(max_positions))
+        self.position_size_pct = min(max(position_size_pct, 0.0), 1.0)
+
+    # ---------- Preparación ----------
+
+    def build_leg(self, leg_id: str, symbol: str, timeframe: str, strategy, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calcula las señales vectorizadas de una pata.
+        df: OHLCV indexado por timestamp en ms (int).
+        """
+        frame_input = df.copy()
+        frame_input.index = pd.to_datetime(frame_input.index, unit="ms")
+        signals = strategy.signal_frame(frame_input)
+        if signals is None:
+            raise ValueError(f"{strategy.metadata().id} no soporta backtest vectorizado (signal_frame)")
+        signals.index = df.index
+        return {"id": leg_id, "symbol": symbol.upper(), "timeframe": timeframe, "df": df, "signals": signals}
+
+    def _align(self, legs: List[Dict[str, Any]], start_ts: Optional[int]) -> Dict[str, np.ndarray]:
+        axis = np.unique(np.concatenate([leg["df"].index.to_numpy(dtype=np.int64) for leg in legs]))
+        if start_ts is not None:
+            axis = axis[axis >= start_ts]
+
+        def matrix(getter):
+            return np.column_stack([
+                getter(leg).reindex(axis).to_numpy(dtype=np.float64) for leg in legs
+            ])
+
+        out = {"ts": axis}
+        for col in ("open", "high", "low", "close"):
+            out[col] = matrix(lambda leg, c=col: leg["df"][c])
+        for col in ("entry", "tp", "sl", "confidence"):
+            out[col] = matrix(lambda leg, c=col: leg["signals"][c])
+        out["direction"] = np.nan_to_num(matrix(lambda leg: leg["signals"]["direction"])).astype(np.int8)
+        out["has_bar"] = ~np.isnan(out["close"])
+        out["mark"] = pd.DataFrame(out["close"]).ffill().to_numpy()
+        return out
+
+    # ---------- Simulación ----------
+
+    def run(self, legs: List[Dict[str, Any]], start_ts: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Simula la cartera sobre las patas ya preparadas con build_leg().
+        start_ts: primer timestamp (ms) operable; lo anterior es warmup.
+        """
+        a = self._align(legs, start_ts)
+        T, N = a["close"].shape
+        if T == 0:
+            raise ValueError("Sin velas en el rango solicitado")
+
+        has_bar, mark = a["has_bar"], a["mark"]
+        high, low = a["high"], a["low"]
+
+        side = np.zeros(N, dtype=np.int8)     # +1 long / -1 short / 0 flat
+        entry = np.zeros(N)
+        sl = np.zeros(N)
+        tp = np.zeros(N)
+        qty = np.zeros(N)
+        notional = np.zeros(N)
+        entry_idx = np.zeros(N, dtype=np.int64)
+        realized = np.zeros(N)                # PnL realizado acumulado por activo
+        cash = self.initial_capital
+
+        equity = np.empty(T)
+        exposure = np.empty(T)
+        asset_pnl = np.empty((T, N))          # PnL (realizado + flotante) por activo
+        trades = []
+
+        for t in range(T):
+            bar = has_bar[t]
+
+            # --- A. Salidas (SL primero, como BacktestEngine) ---
+            open_now = (side != 0) & bar
+            if open_now.any():
+                is_long = side > 0
+                sl_hit = open_now & np.where(is_long, low[t] <= sl, high[t] >= sl)
+                tp_hit = open_now & ~sl_hit & np.where(is_long, high[t] >= tp, low[t] <= tp)
+                closing = sl_hit | tp_hit
+                if closing.any():
+                    exit_px = np.where(sl_hit, sl, tp)
+                    pnl = np.where(closing, (exit_px - entry) * qty * side, 0.0)
+                    cash += float((notional * closing).sum() + pnl.sum())
+                    realized += pnl
+                    for n in np.flatnonzero(closing):
+                        trades.append({
+                            "id": len(trades) + 1,
+                            "leg": legs[n]["id"],
+                            "symbol": legs[n]["symbol"],
+                            "type": "LONG" if side[n] > 0 else "SHORT",
+                            "entry_ts": int(a["ts"][entry_idx[n]]),
+                            "exit_ts": int(a["ts"][t]),
+                            "entry": float(entry[n]),
+                            "exit": float(exit_px[n]),
+                            "pnl": round(float(pnl[n]), 2),
+                            "result": "WIN" if pnl[n] > 0 else "LOSS",
+                            "reason": "STOP_LOSS" if sl_hit[n] else "TAKE_PROFIT",
+                        })
+                    side[closing] = 0
+                    qty[closing] = 0.0
+                    notional[closing] = 0.0
+
+            unrealized = (mark[t] - entry) * qty * side
+            eq_now = cash + notional.sum() + np.nansum(unrealized)
+
+            # --- B. Entradas (capital compartido + límite de posiciones) ---
+            slots = self.max_positions - int((side != 0).sum())
+            direction = a["direction"][t]
+            candidates = np.flatnonzero(bar & (side == 0) & (direction != 0) & (a["entry"][t] > 0))
+            if slots > 0 and candidates.size:
+                if candidates.size > slots:
+                    conf = np.nan_to_num(a["confidence"][t][candidates])
+                    candidates = candidates[np.argsort(-conf, kind="stable")[:slots]]
+                alloc = min(eq_now * self.position_size_pct, cash / candidates.size)
+                if alloc > 0:
+                    side[candidates] = direction[candidates]
+                    entry[candidates] = a["entry"][t][candidates]
+                    sl[candidates] = a["sl"][t][candidates]
+                    tp[candidates] = a["tp"][t][candidates]
+                    notional[candidates] = alloc
+                    qty[candidates] = alloc / entry[candidates]
+                    entry_idx[candidates] = t
+                    cash -= alloc * candidates.size
+
+            # --- C. Mark-to-market ---
+            unrealized = np.nan_to_num((mark[t] - entry) * qty * side)
+            gross = notional.sum()
+            equity[t] = cash + gross + unrealized.sum()
+            exposure[t] = gross / equity[t] if equity[t] > 0 else 0.0
+            asset_pnl[t] = realized + unrealized
+
+        return self._report(legs, a["ts"], equity, exposure, asset_pnl, trades)
+
+    # ---------- Métricas ----------
+
+    def _report(self, legs, ts, equity, exposure, asset_pnl, trades) -> Dict[str, Any]:
+        peak = np.maximum.accumulate(np.maximum(equity, self.initial_capital))
+        dd = equity / peak - 1.0
+        trough = int(dd.argmin())
+        peak_idx = int(np.argmax(equity[:trough + 1])) if trough > 0 else 0
+
+        # Contribución de cada activo al max drawdown de cartera
+        contribution = asset_pnl[trough] - asset_pnl[peak_idx]
+
+        # Drawdown "standalone" de cada activo (en $) vs el de cartera
+        standalone = (np.maximum.accumulate(asset_pnl, axis=0) - asset_pnl).max(axis=0)
+        portfolio_dd_abs = float((peak - equity).max())
+        diversification = float(standalone.sum() / portfolio_dd_abs) if portfolio_dd_abs > 0 else None
+
+        # Correlación de PnL por vela entre activos
+        increments = np.diff(asset_pnl, axis=0)
+        active = increments.std(axis=0) > 0 if len(increments) > 1 else np.zeros(len(legs), dtype=bool)
+        ids = [leg["id"] for leg in legs]
+        correlation = {}
+        if active.sum() >= 2:
+            corr = np.corrcoef(increments[:, active], rowvar=False)
+            act_ids = [i for i, ok in zip(ids, active) if ok]
+            correlation = {
+                r: {c: round(float(corr[i, j]), 3) for j, c in enumerate(act_ids)}
+                for i, r in enumerate(act_ids)
+            }
+
+        wins = sum(1 for t in trades if t["pnl"] > 0)
+        final = float(equity[-1])
+
+        return {
+            "metrics": {
+                "initial_capital": round(self.initial_capital, 2),
+                "final_capital": round(final, 2),
+                "total_pnl": round(final - self.initial_capital, 2),
+                "total_trades": len(trades),
+                "win_rate": round(wins / len(trades) * 100, 1) if trades else 0.0,
+                "max_drawdown_pct": round(float(dd.min()) * 100, 2),
+                "avg_exposure_pct": round(float(exposure.mean()) * 100, 2),
+                "max_exposure_pct": round(float(exposure.max()) * 100, 2),
+                "max_positions": self.max_positions,
+                "position_size_pct": self.position_size_pct,
+            },
+            "assets": [
+                {
+                    "id": leg["id"],
+                    "symbol": leg["symbol"],
+                    "timeframe": leg["timeframe"],
+                    "pnl": round(float(asset_pnl[-1, n]), 2),
+                    "trades": sum(1 for t in trades if t["leg"] == leg["id"]),
+                    "standalone_drawdown": round(float(standalone[n]), 2),
+                }
+                for n, leg in enumerate(legs)
+            ],
+            "drawdown": {
+                "max_drawdown_pct": round(float(dd.min()) * 100, 2),
+                "peak_ts": int(ts[peak_idx]),
+                "trough_ts": int(ts[trough]),
+                "contribution": {ids[n]: round(float(contribution[n]), 2) for n in range(len(legs))},
+                "diversification_ratio": round(diversification, 3) if diversification is not None else None,
+            },
+            "correlation": correlation,
+            "trades": trades[-50:],
+            "curve": [
+                {"timestamp": int(ts[i]), "equity": round(float(equity[i]), 2),
+                 "exposure_pct": round(float(exposure[i]) * 100, 2)}
+                for i in range(len(ts))
+            ],
+        }
+
+    # ---------- Personas del marketplace ----------
+
+    def run_personas(self, personas: List[Dict[str, Any]], days: int = 365) -> Dict[str, Any]:
+        """
+        Descarga datos y simula un conjunto de personas (marketplace_config)
+        como una única cartera.
+        """
+        try:
+            t0 = time.perf_counter()
+            legs = []
+            for p in personas:
+                df = load_ohlcv_frame(p["symbol"], p["timeframe"], days)
+                strategy = _resolve_strategy(p["strategy_id"])
+                legs.append(self.build_leg(p["id"], p["symbol"], p["timeframe"], strategy, df))
+            t1 = time.perf_counter()
+
+            start_ts = int((time.time() - days * 86400) * 1000)
+            results = self.run(legs, start_ts=start_ts)
+            t2 = time.perf_counter()
+
+            results["timing"] = {
+                "data_and_signals_s": round(t1 - t0, 4),
+                "simulation_s": round(t2 - t1, 4),
+            }
+            return results
+        except Exception:
+            print("[Portfolio Backtest Critical Error]:")
+            traceback.print_exc()
+            raise
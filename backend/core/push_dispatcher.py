@@ -0,0 +1,313 @@
+# backend/core/push_dispatcher.py
+"""
+Fan-out concurrente de notificaciones Web Push.
+
+send_push_notification cargaba TODAS las PushSubscription y llamaba a
+webpush() (bloqueante) una a una en el hilo del llamante: la latencia de
+cada señal crecía linealmente con el número de suscriptores. Aquí:
+
+- Las suscripciones se leen por shards (keyset por id, PUSH_SHARD_SIZE) y se
+  reparten entre un pool de hilos (PUSH_WORKERS), cada uno con su
+  requests.Session (keep-alive hacia el push service). La cabecera VAPID se
+  firma una vez por origen del push service, no por suscriptor.
+- Reintentos por endpoint con backoff exponencial + jitter para 429/5xx y
+  errores de red (respeta Retry-After); 404/410 = suscripción muerta.
+- Las suscripciones muertas se borran en UN DELETE ... WHERE id IN (...) al
+  final del fan-out, no una a una.
+- PushDispatcher agrupa las señales que llegan dentro de una ventana
+  (PUSH_COALESCE_MS) por destinatario (user_id de la señal; None = pública)
+  y envía un único push resumen por grupo.
+
+Nota: PushSubscription no está ligada a usuarios, así que cada push sigue
+yendo a todos los suscriptores; la agrupación evita ráfagas de N pushes.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", "16"))
+PUSH_SHARD_SIZE = int(os.getenv("PUSH_SHARD_SIZE", "500"))
+PUSH_MAX_RETRIES = int(os.getenv("PUSH_MAX_RETRIES", "3"))
+PUSH_BACKOFF_BASE = float(os.getenv("PUSH_BACKOFF_BASE", "0.5"))
+PUSH_TIMEOUT = float(os.getenv("PUSH_TIMEOUT", "10"))
+PUSH_COALESCE_MS = int(os.getenv("PUSH_COALESCE_MS", "2000"))
+
+MAX_BACKOFF = 30.0
+GONE_STATUS = (404, 410)
+COALESCE_MAX_LINES = 5
+
+_local = threading.local()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=PUSH_WORKERS, thread_name_prefix="push")
+    return _pool
+
+
+def _session():
+    """requests.Session por hilo (reutiliza conexiones TLS)."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+    return session
+
+
+def iter_subscription_shards(shard_size: int = PUSH_SHARD_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Suscripciones en bloques de shard_size (keyset por id)."""
+    from database import SessionLocal
+    from models_db import PushSubscription
+
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(PushSubscription.id, PushSubscription.endpoint,
+                         PushSubscription.p256dh, PushSubscription.auth)
+                .filter(PushSubscription.id > last_id)
+                .order_by(PushSubscription.id)
+                .limit(shard_size)
+                .all()
+            )
+        finally:
+            db.close()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield [
+            {"id": r.id, "subscription_info": {"endpoint": r.endpoint, "keys": {"p256dh": r.p256dh, "auth": r.auth}}}
+            for r in rows
+        ]
+        if len(rows) < shard_size:
+            return
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class VapidHeaders:
+    """
+    Cabeceras VAPID firmadas una vez por origen del push service (aud) en
+    vez de una firma ECDSA por suscriptor. Válidas 12h (exp), como webpush().
+    """
+
+    def __init__(self, vapid_key, claims: Dict[str, Any]):
+        self.vapid_key = vapid_key
+        self.claims = claims
+        self._by_aud: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def for_endpoint(self, endpoint: str) -> Dict[str, str]:
+        from urllib.parse import urlparse
+        url = urlparse(endpoint)
+        aud = f"{url.scheme}://{url.netloc}"
+        with self._lock:
+            headers = self._by_aud.get(aud)
+            if headers is None:
+                claims = dict(self.claims, aud=aud, exp=int(time.time()) + 12 * 60 * 60)
+                headers = self._by_aud[aud] = self.vapid_key.sign(claims)
+        return dict(headers)
+
+
+def send_one(sub: Dict[str, Any], payload: str, vapid: VapidHeaders,
+             max_retries: int = PUSH_MAX_RETRIES) -> Tuple[str, int]:
+    """
+    Envía un push a una suscripción con reintentos.
+    Devuelve (estado, intentos) con estado en "ok" | "gone" | "failed".
+    """
+    from pywebpush import webpush, WebPushException
+
+    headers = vapid.for_endpoint(sub["subscription_info"]["endpoint"])
+
+    attempt = 0
+    while True:
+        attempt += 1
+        delay = None
+        try:
+            webpush(
+                subscription_info=sub["subscription_info"],
+                data=payload,
+                headers=headers,
+                timeout=PUSH_TIMEOUT,
+                requests_session=_session(),
+            )
+            return "ok", attempt
+        except WebPushException as ex:
+            status = ex.response.status_code if ex.response is not None else None
+            if status in GONE_STATUS:
+                return "gone", attempt
+            if status is not None and status != 429 and status < 500:
+                print(f"WebPush Error: {ex}")
+                return "failed", attempt
+            delay = _retry_after(ex.response)
+            error = ex
+        except Exception as e:  # red / timeout
+            error = e
+
+        if attempt > max_retries:
+            print(f"General Push Error (tras {attempt} intentos): {error}")
+            return "failed", attempt
+        backoff = min(MAX_BACKOFF, PUSH_BACKOFF_BASE * (2 ** (attempt - 1)))
+        time.sleep(min(MAX_BACKOFF, delay) if delay else backoff * (0.5 + random.random()))
+
+
+def remove_subscriptions(ids: List[int]) -> int:
+    """Borra en bloque las suscripciones caducadas (410/404)."""
+    if not ids:
+        return 0
+    from database import SessionLocal
+    from models_db import PushSubscription
+
+    db = SessionLocal()
+    try:
+        removed = (
+            db.query(PushSubscription)
+            .filter(PushSubscription.id.in_(ids))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def fan_out(title: str, body: str, data: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Envía un push a todos los suscriptores en paralelo.
+    Devuelve {"success", "failed", "removed", "subscribers", "retries", "elapsed_ms"}.
+    """
+    private_key = os.getenv("VAPID_PRIVATE_KEY")
+    if not private_key:
+        return {"ok": False, "error": "Missing VAPID_PRIVATE_KEY"}
+
+    from py_vapid import Vapid
+    vapid = VapidHeaders(
+        Vapid.from_string(private_key=private_key),  # parsear una vez, no por suscriptor
+        {"sub": os.getenv("VAPID_MAIL", "mailto:admin@tradercopilot.com")},
+    )
+
+    payload = json.dumps({
+        "title": title,
+        "body": body,
+        "icon": "/icon-192.png",
+        "data": data or {}
+    })
+
+    t0 = time.perf_counter()
+    pool = _get_pool()
+    results = {"success": 0, "failed": 0, "removed": 0, "subscribers": 0, "retries": 0}
+    gone: List[int] = []
+
+    for shard in iter_subscription_shards():
+        results["subscribers"] += len(shard)
+        outcomes = pool.map(lambda s: send_one(s, payload, vapid), shard)
+        for sub, (status, attempts) in zip(shard, outcomes):
+            results["retries"] += attempts - 1
+            if status == "ok":
+                results["success"] += 1
+            elif status == "gone":
+                gone.append(sub["id"])
+            else:
+                results["failed"] += 1
+
+    results["removed"] = remove_subscriptions(gone)
+    results["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return results
+
+
+class PushDispatcher:
+    """
+    Agrupa notificaciones por destinatario en una ventana corta y las envía
+    con fan_out() en un hilo propio (nunca en el hilo del llamante).
+    """
+
+    def __init__(self, window_ms: int = PUSH_COALESCE_MS):
+        self.window = window_ms / 1000.0
+        self._pending: Dict[Any, List[Dict[str, Any]]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "pushes": 0, "coalesced": 0, "success": 0,
+                      "failed": 0, "removed": 0, "last_fan_out_ms": 0.0}
+
+    def submit(self, title: str, body: str, data: Optional[dict] = None, key: Any = None) -> None:
+        """Encola un mensaje para el grupo `key` (p.ej. user_id de la señal)."""
+        with self._cond:
+            self.stats["submitted"] += 1
+            self._pending.setdefault(key, []).append({"title": title, "body": body, "data": data or {}})
+            self._ensure_started()
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Envía ya lo pendiente (sin esperar a la ventana). Para el cierre del proceso."""
+        with self._cond:
+            groups, self._pending = self._pending, {}
+        for messages in groups.values():
+            self._dispatch(messages)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="push-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Ventana de agrupación desde el primer mensaje
+            time.sleep(self.window)
+            with self._cond:
+                groups, self._pending = self._pending, {}
+            for messages in groups.values():
+                self._dispatch(messages)
+
+    @staticmethod
+    def merge(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Un solo mensaje resumen para varios pushes del mismo grupo."""
+        if len(messages) == 1:
+            return messages[0]
+        lines = [m["title"].replace("New Signal: ", "") for m in messages[:COALESCE_MAX_LINES]]
+        if len(messages) > COALESCE_MAX_LINES:
+            lines.append(f"+{len(messages) - COALESCE_MAX_LINES} more")
+        return {
+            "title": f"{len(messages)} New Signals",
+            "body": "\n".join(lines),
+            "data": {"type": "signals", "count": len(messages),
+                     "tokens": sorted({m["data"].get("token") for m in messages if m["data"].get("token")})},
+        }
+
+    def _dispatch(self, messages: List[Dict[str, Any]]):
+        msg = self.merge(messages)
+        try:
+            res = fan_out(msg["title"], msg["body"], data=msg["data"])
+        except Exception as e:
+            print(f"[PUSH] ❌ Error enviando push: {e}")
+            return
+        self.stats["pushes"] += 1
+        self.stats["coalesced"] += len(messages) - 1
+        for k in ("success", "failed", "removed"):
+            self.stats[k] += res.get(k, 0)
+        self.stats["last_fan_out_ms"] = res.get("elapsed_ms", 0.0)
+        if res.get("success", 0) > 0:
+            print(f"[PUSH] 🔔 Notificación enviada a {res['success']} dispositivos ({len(messages)} señales, {res['elapsed_ms']}ms).")
+        elif res.get("failed", 0) > 0:
+            print(f"[PUSH] ⚠️ Fallo al enviar notificaciones ({res['failed']} fallidos).")
+
+
+push_dispatcher = PushDispatcher()
@@ -0,0 +1,335 @@
+# backend/core/quota.py
+"""
+Contadores de cuota diaria (daily_usage) para core/entitlements.py.
+
+check_and_increment_quota hacía SELECT ... FOR UPDATE, quizá INSERT +
+commit, otro SELECT con lock y el commit del incremento: de tres a cinco
+round-trips y un lock de fila en cada /analyze/pro y chat del advisor.
+Ahora QuotaService.consume() tiene dos backends:
+
+- DB (por defecto): UN upsert condicional atómico
+      INSERT ... ON CONFLICT (user_id, feature, date)
+      DO UPDATE SET count = count + 1 WHERE count < :limit RETURNING count
+  Sin fila devuelta = cuota agotada. El límite es duro entre workers porque
+  lo decide la propia sentencia (índice único uq_daily_usage_user_feature_date).
+- Redis (si core.cache tiene REDIS_URL): un script Lua hace GET + comprobación
+  + INCR atómicos en Redis, que es el contador compartido entre workers. Si
+  la clave no existe (día nuevo o Redis reiniciado) se siembra desde la DB.
+  Los incrementos se acumulan en memoria y un hilo los vuelca a daily_usage
+  en lote cada QUOTA_FLUSH_MS (count = count + delta).
+
+Delante de ambos, una caché en proceso de contadores ((user, feature, día)
+→ usado), válida QUOTA_CACHE_TTL s: rechaza sin ir a la DB a quien ya agotó
+la cuota (el contador solo sube en el día) y sirve get_user_entitlements.
+
+Otros motores (ni SQLite ni PostgreSQL): el camino anterior con FOR UPDATE.
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+QUOTA_CACHE_TTL = float(os.getenv("QUOTA_CACHE_TTL", "30"))
+QUOTA_FLUSH_INTERVAL = int(os.getenv("QUOTA_FLUSH_MS", "1000")) / 1000.0
+REDIS_KEY_TTL = 2 * 86400  # las claves de un día viven hasta pasado mañana
+
+UsageKey = Tuple[int, str, str]  # (user_id, feature, YYYY-MM-DD)
+
+# KEYS[1] = clave del día; ARGV = limit, seed ('' = no sembrar), ttl
+# Devuelve {1, usado} si consumió, {0, usado} si está agotada, {-1, 0} si falta semilla
+_CONSUME_LUA = """
+local v = redis.call('GET', KEYS[1])
+if not v then
+    if ARGV[2] == '' then return {-1, 0} end
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3], 'NX')
+    v = redis.call('GET', KEYS[1])
+end
+v = tonumber(v)
+if v >= tonumber(ARGV[1]) then return {0, v} end
+return {1, redis.call('INCR', KEYS[1])}
+"""
+
+UNIQUE_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_usage_user_feature_date "
+    "ON daily_usage (user_id, feature, date)"
+)
+# Duplicados creados por la carrera del código anterior: se queda la fila de mayor count
+DEDUPE_DDL = (
+    "DELETE FROM daily_usage WHERE id IN ("
+    " SELECT d.id FROM daily_usage d JOIN daily_usage o"
+    " ON o.user_id = d.user_id AND o.feature = d.feature AND o.date = d.date"
+    " AND (o.count > d.count OR (o.count = d.count AND o.id > d.id)))"
+)
+
+
+def today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _dialect_insert(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+class QuotaService:
+    def __init__(self, redis_client=None, cache_ttl: float = QUOTA_CACHE_TTL,
+                 flush_interval: float = QUOTA_FLUSH_INTERVAL):
+        self.redis = redis_client
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts: Dict[UsageKey, Tuple[int, float]] = {}  # key -> (usado, leído en)
+        self._pending: Dict[UsageKey, int] = {}  # deltas aún no volcados (Redis)
+        self._consume_script = redis_client.register_script(_CONSUME_LUA) if redis_client else None
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._stats = {"consumed": 0, "rejected": 0, "cache_rejects": 0, "flushes": 0}
+
+    # --- Caché en proceso ---
+
+    def _cached(self, key: UsageKey) -> Optional[int]:
+        hit = self._counts.get(key)
+        if hit is None or time.monotonic() - hit[1] > self.cache_ttl:
+            return None
+        return hit[0]
+
+    def _remember(self, key: UsageKey, used: int) -> None:
+        with self._lock:
+            if len(self._counts) > 10_000:  # claves de días anteriores
+                day = key[2]
+                self._counts = {k: v for k, v in self._counts.items() if k[2] == day}
+            self._counts[key] = (used, time.monotonic())
+
+    # --- API ---
+
+    def consume(self, db, user_id: int, feature: str, limit: int) -> Tuple[bool, int]:
+        """
+        Consume una unidad si usado < limit. Devuelve (consumida, usado tras
+        la llamada). Con el backend DB hace commit de `db`.
+        """
+        key = (user_id, feature, today())
+        cached = self._cached(key)
+        if cached is not None and cached >= limit:
+            self._stats["cache_rejects"] += 1
+            self._stats["rejected"] += 1
+            return False, cached
+
+        if self.redis is not None:
+            ok, used = self._consume_redis(db, key, limit)
+        else:
+            ok, used = self._consume_db(db, key, limit)
+        self._remember(key, used)
+        self._stats["consumed" if ok else "rejected"] += 1
+        return ok, used
+
+    def usage(self, db, user_id: int, features: Iterable[str]) -> Dict[str, int]:
+        """{feature: usado hoy}, desde la caché / Redis y la DB solo para lo que falte."""
+        day = today()
+        out: Dict[str, int] = {}
+        missing = []
+        for feature in features:
+            cached = self._cached((user_id, feature, day))
+            if cached is None:
+                missing.append(feature)
+            else:
+                out[feature] = cached
+        if missing and self.redis is not None:
+            try:
+                values = self.redis.mget([self._redis_key((user_id, f, day)) for f in missing])
+                for feature, value in zip(list(missing), values):
+                    if value is not None:
+                        out[feature] = int(value)
+                        self._remember((user_id, feature, day), int(value))
+                        missing.remove(feature)
+            except Exception as e:
+                print(f"[QUOTA] ⚠️ Redis MGET error: {e}")
+        if missing:
+            counts = self._read_db(db, user_id, missing, day)
+            for feature in missing:
+                out[feature] = counts.get(feature, 0) + self._pending.get((user_id, feature, day), 0)
+                self._remember((user_id, feature, day), out[feature])
+        return out
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Olvida los contadores cacheados (de un usuario o todos)."""
+        with self._lock:
+            if user_id is None:
+                self._counts.clear()
+            else:
+                self._counts = {k: v for k, v in self._counts.items() if k[0] != user_id}
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, pending=sum(self._pending.values()),
+                    backend="redis" if self.redis is not None else "db")
+
+    # --- Backend DB ---
+
+    @staticmethod
+    def _read_db(db, user_id: int, features: Iterable[str], day: str) -> Dict[str, int]:
+        from models_db import DailyUsage
+
+        rows = db.query(DailyUsage.feature, DailyUsage.count).filter(
+            DailyUsage.user_id == user_id,
+            DailyUsage.feature.in_(list(features)),
+            DailyUsage.date == day,
+        ).all()
+        return {feature: count or 0 for feature, count in rows}
+
+    def _consume_db(self, db, key: UsageKey, limit: int) -> Tuple[bool, int]:
+        from models_db import DailyUsage
+
+        dialect_insert = _dialect_insert(db)
+        if dialect_insert is None:
+            return _consume_locked(db, key, limit)
+
+        user_id, feature, day = key
+        stmt = dialect_insert(DailyUsage).values(user_id=user_id, feature=feature, date=day, count=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "feature", "date"],
+            set_={"count": DailyUsage.count + 1},
+            where=DailyUsage.count < limit,
+        ).returning(DailyUsage.count)
+        try:
+            used = db.execute(stmt).scalar()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if used is not None:
+            return True, used
+        return False, self._read_db(db, user_id, [feature], day).get(feature, limit)
+
+    # --- Backend Redis ---
+
+    @staticmethod
+    def _redis_key(key: UsageKey) -> str:
+        user_id, feature, day = key
+        return f"quota:{day}:{user_id}:{feature}"
+
+    def _consume_redis(self, db, key: UsageKey, limit: int) -> Tuple[bool, int]:
+        rkey = self._redis_key(key)
+        try:
+            status, used = self._consume_script(keys=[rkey], args=[limit, "", REDIS_KEY_TTL])
+            if status == -1:
+                user_id, feature, day = key
+                seed = self._read_db(db, user_id, [feature], day).get(feature, 0) + self._pending.get(key, 0)
+                status, used = self._consume_script(keys=[rkey], args=[limit, seed, REDIS_KEY_TTL])
+        except Exception as e:
+            # Redis caído: el upsert de la DB mantiene el límite
+            print(f"[QUOTA] ⚠️ Redis error, using DB: {e}")
+            return self._consume_db(db, key, limit)
+
+        if status == 1:
+            with self._lock:
+                self._pending[key] = self._pending.get(key, 0) + 1
+            self._ensure_flusher()
+        return status == 1, int(used)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._flush_loop, name="quota-flusher", daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[QUOTA] ❌ Flush error: {e}")
+
+    def flush(self) -> int:
+        """Vuelca a daily_usage los incrementos pendientes (un upsert por lote)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        from database import SessionLocal
+        from models_db import DailyUsage
+
+        db = SessionLocal()
+        try:
+            values = [{"user_id": u, "feature": f, "date": d, "count": n}
+                      for (u, f, d), n in sorted(pending.items())]
+            dialect_insert = _dialect_insert(db)
+            if dialect_insert is not None:
+                stmt = dialect_insert(DailyUsage).values(values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["user_id", "feature", "date"],
+                    set_={"count": DailyUsage.count + stmt.excluded.count},
+                )
+                db.execute(stmt)
+            else:
+                for v in values:
+                    row = db.query(DailyUsage).filter(
+                        DailyUsage.user_id == v["user_id"], DailyUsage.feature == v["feature"],
+                        DailyUsage.date == v["date"],
+                    ).with_for_update().first()
+                    if row is None:
+                        db.add(DailyUsage(**v))
+                    else:
+                        row.count = (row.count or 0) + v["count"]
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:  # se reintenta en el siguiente ciclo
+                for k, n in pending.items():
+                    self._pending[k] = self._pending.get(k, 0) + n
+            raise
+        finally:
+            db.close()
+        self._stats["flushes"] += 1
+        return sum(pending.values())
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[QUOTA] ❌ Final flush error: {e}")
+
+
+def _consume_locked(db, key: UsageKey, limit: int) -> Tuple[bool, int]:
+    """Camino anterior (SELECT ... FOR UPDATE) para motores sin ON CONFLICT."""
+    from sqlalchemy.exc import IntegrityError
+    from models_db import DailyUsage
+
+    user_id, feature, day = key
+    query = db.query(DailyUsage).filter(
+        DailyUsage.user_id == user_id, DailyUsage.feature == feature, DailyUsage.date == day
+    )
+    usage = query.with_for_update().first()
+    if not usage:
+        try:
+            usage = DailyUsage(user_id=user_id, feature=feature, date=day, count=0)
+            db.add(usage)
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            usage = query.with_for_update().first()
+    if usage.count >= limit:
+        db.rollback()
+        return False, usage.count
+    usage.count += 1
+    db.commit()
+    return True, usage.count
+
+
+def _build() -> QuotaService:
+    from core.cache import cache
+    return QuotaService(redis_client=getattr(cache, "redis_client", None))
+
+
+quota = _build()
+atexit.register(quota.close)
@@ -0,0 +1,208 @@
+# backend/core/rate_limit.py
+"""
+Backend de rate limiting GCRA (Generic Cell Rate Algorithm) para slowapi.
+
+slowapi usaba el MemoryStorage por defecto de `limits` (ventana fija): cada
+worker de uvicorn aplicaba su propio límite (N workers = N veces el límite)
+y cada combinación clave/ventana ocupaba contadores propios. GCRARateLimiter
+sustituye a la estrategia de `limits` dentro del Limiter de core/limiter.py
+(mismo contrato: hit / test / get_window_stats / clear):
+
+- Estado compacto: un único número por clave, el TAT (theoretical arrival
+  time, en ms). Un límite de `amount` cada `period` emite una petición cada
+  period/amount y admite ráfagas de hasta `amount`; equivale a una ventana
+  deslizante sin guardar marcas de tiempo.
+- LocalGCRAStore (un proceso): dict clave → TAT, sin locks. Con el GIL cada
+  lectura/escritura del dict es atómica; en rutas async no hay await entre
+  leer y escribir, y en el threadpool el peor caso es una petición de más.
+  Acotado: al pasar de RATE_LIMIT_MAX_KEYS se barren las claves vencidas
+  (TAT < ahora) y, si no basta, las más antiguas.
+- RedisGCRAStore (varios workers o réplicas): el mismo cálculo en un script
+  Lua atómico con el reloj de Redis (TIME) y PX = TAT - ahora, así que
+  Redis expira solo las claves. Si Redis falla se usa el store local
+  durante RATE_LIMIT_RETRY_S s y se vuelve a intentar.
+
+Métricas (peticiones comprobadas / limitadas por ruta y tipo de clave) en
+GET /system/rate-limit.
+"""
+
+import math
+import os
+import time
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from limits import RateLimitItem, WindowStats
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_RETRY_S = float(os.getenv("RATE_LIMIT_RETRY_S", "30"))
+
+# (permitida, TAT en ms, ahora en ms)
+GCRAResult = Tuple[bool, float, float]
+
+# KEYS[1] = clave; ARGV = period_ms, interval_ms, cost, dry ('1' = solo consultar)
+# Devuelve {permitida, TAT, ahora} (TAT y ahora como texto: Lua trunca los enteros de la respuesta)
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local period = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+if new_tat - period > now then
+    return {0, tostring(tat), tostring(now)}
+end
+if ARGV[4] ~= '1' and cost > 0 then
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+    return {1, tostring(new_tat), tostring(now)}
+end
+return {1, tostring(tat), tostring(now)}
+"""
+
+
+def _now_ms() -> float:
+    return time.time() * 1000.0
+
+
+class LocalGCRAStore:
+    name = "memory"
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tat: Dict[str, float] = {}
+
+    def update(self, key: str, period_ms: float, interval_ms: float, cost: int, dry: bool) -> GCRAResult:
+        now = _now_ms()
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + interval_ms * cost
+        if new_tat - period_ms > now:
+            return False, tat, now
+        if dry or cost <= 0:
+            return True, tat, now
+        self._tat[key] = new_tat
+        if len(self._tat) > self.max_keys:
+            self._sweep(now)
+        return True, new_tat, now
+
+    def _sweep(self, now: float) -> None:
+        live = {k: v for k, v in self._tat.items() if v > now}
+        if len(live) > self.max_keys * 0.9:
+            # Todas vigentes: se quedan las más recientes (orden de inserción)
+            keep = list(live.items())[-(self.max_keys // 2):]
+            live = dict(keep)
+        self._tat = live
+
+    def delete(self, key: str) -> None:
+        self._tat.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+
+class RedisGCRAStore:
+    name = "redis"
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._script = redis_client.register_script(_GCRA_LUA)
+
+    def update(self, key: str, period_ms: float, interval_ms: float, cost: int, dry: bool) -> GCRAResult:
+        allowed, tat, now = self._script(keys=[f"rl:{key}"],
+                                         args=[period_ms, interval_ms, cost, "1" if dry else "0"])
+        return int(allowed) == 1, float(tat), float(now)
+
+    def delete(self, key: str) -> None:
+        self.redis.delete(f"rl:{key}")
+
+
+class GCRARateLimiter:
+    """Estrategia GCRA con la interfaz de limits.strategies.RateLimiter (la que usa slowapi)."""
+
+    def __init__(self, store, fallback: Optional[LocalGCRAStore] = None,
+                 retry_after: float = RATE_LIMIT_RETRY_S):
+        self.store = store
+        self.fallback = fallback or (store if isinstance(store, LocalGCRAStore) else LocalGCRAStore())
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._checked: Counter = Counter()
+        self._throttled: Counter = Counter()
+        self._throttled_by_kind: Counter = Counter()
+        self._store_errors = 0
+
+    # --- GCRA ---
+
+    @staticmethod
+    def _params(item: RateLimitItem) -> Tuple[float, float]:
+        period_ms = item.get_expiry() * 1000.0
+        return period_ms, period_ms / max(item.amount, 1)
+
+    def _update(self, item: RateLimitItem, identifiers: Tuple[str, ...], cost: int, dry: bool) -> GCRAResult:
+        key = item.key_for(*identifiers)
+        period_ms, interval_ms = self._params(item)
+        if item.amount <= 0:
+            return False, _now_ms() + period_ms, _now_ms()
+        store = self.store
+        if store is not self.fallback and time.monotonic() < self._down_until:
+            store = self.fallback
+        try:
+            return store.update(key, period_ms, interval_ms, cost, dry)
+        except Exception as e:
+            if store is self.fallback:
+                raise
+            self._store_errors += 1
+            self._down_until = time.monotonic() + self.retry_after
+            print(f"[RATE LIMIT] ⚠️ {store.name} store error, using memory for {self.retry_after:.0f}s: {e}")
+            return self.fallback.update(key, period_ms, interval_ms, cost, dry)
+
+    # --- Interfaz RateLimiter ---
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        allowed = self._update(item, identifiers, cost, dry=False)[0]
+        scope = identifiers[-1] if identifiers else "-"
+        self._checked[scope] += 1
+        if not allowed:
+            self._throttled[scope] += 1
+            key = identifiers[-2] if len(identifiers) >= 2 else ""
+            self._throttled_by_kind[key.split(":", 1)[0] if ":" in key else "other"] += 1
+        return allowed
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        return self._update(item, identifiers, cost, dry=True)[0]
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        """(epoch s en que se admite la siguiente petición si no quedan / se vacía del todo, restantes)."""
+        _, tat, now = self._update(item, identifiers, 0, dry=True)
+        period_ms, interval_ms = self._params(item)
+        remaining = int(max(0.0, min(item.amount, (period_ms - (tat - now)) // interval_ms)))
+        reset_ms = tat - period_ms + interval_ms if remaining == 0 else tat
+        return WindowStats(math.ceil(max(reset_ms, now) / 1000.0), remaining)
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        key = item.key_for(*identifiers)
+        for store in {id(self.store): self.store, id(self.fallback): self.fallback}.values():
+            try:
+                store.delete(key)
+            except Exception:
+                pass
+
+    # --- Diagnóstico ---
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": self.store.name,
+            "degraded": time.monotonic() < self._down_until,
+            "store_errors": self._store_errors,
+            "local_keys": len(self.fallback),
+            "checked": sum(self._checked.values()),
+            "throttled": sum(self._throttled.values()),
+            "throttled_by_route": dict(self._throttled.most_common()),
+            "throttled_by_key_type": dict(self._throttled_by_kind),
+            "checked_by_route": dict(self._checked.most_common()),
+        }
+
+    def reset_stats(self) -> None:
+        self._checked.clear()
+        self._throttled.clear()
+        self._throttled_by_kind.clear()
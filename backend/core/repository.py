@@ -0,0 +1,229 @@
+# backend/core/repository.py
+"""
+Capa de acceso a datos async para las rutas `async def`.
+
+Varias rutas async (marketplace, historial de personas, admin) recibían una
+Session SÍNCRONA por Depends(get_db): cada consulta bloqueaba el event loop
+y frenaba todas las demás peticiones del proceso mientras tanto. Ahora usan
+database.get_db (AsyncSession sobre el engine async, con pool explícito
+DB_POOL_SIZE / DB_MAX_OVERFLOW) y las funciones de este módulo.
+
+Cada función recibe la sesión como primer argumento y solo hace
+`await session.execute(...)` / `commit()` / `refresh()`.
+
+Código síncrono (scheduler, tools/, rutas def): run_sync(fn, db, ...) ejecuta
+la MISMA función con una Session normal envuelta en SyncSessionAdapter; como
+el adaptador nunca suspende, la corrutina termina en un solo paso sin event
+loop.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from core.cache import cache
+from core.signal_feed import (
+    FEED_COUNT_TTL, NULL_TAIL_CURSOR, feed_statement, in_null_tail, keyset_statement, null_tail_probe,
+    offset_statement, page_result, signal_filters,
+)
+
+
+# === Adaptador síncrono ===
+
+class SyncSessionAdapter:
+    """Expone la interfaz awaitable de AsyncSession sobre una Session síncrona."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, statement, *args, **kwargs):
+        return self.session.execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        return self.session.scalar(statement, *args, **kwargs)
+
+    async def get(self, model, ident):
+        return self.session.get(model, ident)
+
+    def add(self, instance):
+        self.session.add(instance)
+
+    async def flush(self):
+        self.session.flush()
+
+    async def commit(self):
+        self.session.commit()
+
+    async def rollback(self):
+        self.session.rollback()
+
+    async def refresh(self, instance):
+        self.session.refresh(instance)
+
+
+def run_sync(fn, db, *args, **kwargs):
+    """Ejecuta una función de este módulo con una Session síncrona."""
+    coro = fn(SyncSessionAdapter(db), *args, **kwargs)
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError(f"{fn.__name__} suspended on a sync session")
+
+
+# === Paginación y totales ===
+
+async def fetch_page(session, stmt, ts_col, id_col, *, cursor: Optional[str] = None,
+                     page: int = 1, size: int = 50, scalars: bool = True) -> Tuple[List[Any], Optional[str]]:
+    """
+    Keyset si hay cursor (o es la primera página); OFFSET para page > 1 sin
+    cursor (clientes antiguos). Devuelve (filas, next_cursor).
+    ValueError si el cursor no es válido.
+    """
+    keyset = bool(cursor) or page <= 1
+    if keyset:
+        paged = keyset_statement(stmt, ts_col, id_col, cursor, size)
+    else:
+        paged = offset_statement(stmt, ts_col, id_col, page, size)
+    result = await session.execute(paged)
+    rows = result.scalars().all() if scalars else result.all()
+    rows, next_cursor = page_result(rows, size, ts_col, id_col)
+    if keyset and next_cursor is None and not in_null_tail(cursor):
+        # Fin de las filas con ts: seguir con las de ts NULL si las hay
+        if await session.scalar(null_tail_probe(stmt, ts_col)) is not None:
+            next_cursor = NULL_TAIL_CURSOR
+    return rows, next_cursor
+
+
+async def cached_count(session, stmt, key: str, ttl: int = FEED_COUNT_TTL) -> int:
+    """
+    COUNT(*) de `stmt` cacheado `ttl` segundos bajo `key` (total aproximado:
+    puede ir hasta ttl segundos por detrás).
+    """
+    cache_key = f"feed:count:{key}"
+    hit = cache.get(cache_key)
+    if hit is not None:
+        return hit
+    total = await session.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
+    cache.set(cache_key, total, ttl=ttl)
+    return total
+
+
+# === Señales ===
+
+async def signal_feed_page(session, *, cursor: Optional[str] = None, limit: int = 50, page: int = 1,
+                           with_evaluation: bool = True, **filters) -> Tuple[list, Optional[str]]:
+    """
+    Página del feed de señales, más recientes primero (ver core/signal_feed.py).
+    filters: user_id, include_system, mode, token, source, show_hidden.
+    """
+    from models_db import Signal
+
+    stmt = feed_statement(with_evaluation=with_evaluation, **filters)
+    return await fetch_page(session, stmt, Signal.timestamp, Signal.id, cursor=cursor, page=page, size=limit)
+
+
+async def count_signals(session, *, mode: Optional[str] = None, token: Optional[str] = None,
+                        source: Optional[str] = None, show_hidden: bool = True) -> int:
+    """Total aproximado (cacheado) de señales para unos filtros."""
+    from models_db import Signal
+
+    stmt = signal_filters(select(Signal.id), mode=mode, token=token, source=source, show_hidden=show_hidden)
+    return await cached_count(session, stmt, f"signals:{mode}:{token}:{source}:{int(show_hidden)}")
+
+
+async def get_signal(session, signal_id: int):
+    from models_db import Signal
+    return await session.get(Signal, signal_id)
+
+
+# === Usuarios / admin ===
+
+async def users_page(session, *, q: Optional[str] = None, cursor: Optional[str] = None,
+                     page: int = 1, size: int = 20) -> Tuple[list, Optional[str], int]:
+    """(usuarios, next_cursor, total aproximado), más recientes primero."""
+    from models_db import User
+
+    stmt = select(User)
+    if q:
+        stmt = stmt.filter(User.email.contains(q))
+    total = await cached_count(session, stmt, f"users:{q or ''}")
+    users, next_cursor = await fetch_page(session, stmt, User.created_at, User.id,
+                                          cursor=cursor, page=page, size=size)
+    return users, next_cursor, total
+
+
+async def get_user(session, user_id: int):
+    from models_db import User
+    return await session.get(User, user_id)
+
+
+async def admin_kpis(session) -> Dict[str, int]:
+    """KPIs del panel de admin en una sola sentencia."""
+    from sqlalchemy import case
+    from models_db import Signal, User
+
+    def count_where(col, cond=None):
+        expr = func.count(col) if cond is None else func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+        return select(expr).scalar_subquery()
+
+    row = (await session.execute(select(
+        count_where(User.id),
+        count_where(User.id, User.plan.like("%PRO%")),
+        count_where(Signal.id),
+        count_where(Signal.id, Signal.is_hidden == 1),
+    ))).one()
+    total_users, active_pro, total_signals, hidden_signals = row
+    return {
+        "total_users": total_users,
+        "active_plans": active_pro,
+        "hidden_signals": hidden_signals,
+        "total_signals": total_signals,
+    }
+
+
+async def audit_page(session, *, cursor: Optional[str] = None, page: int = 1, size: int = 50):
+    """(entradas del audit log, next_cursor, total aproximado)."""
+    from models_db import AdminAuditLog
+
+    stmt = select(AdminAuditLog)
+    total = await cached_count(session, stmt, "audit")
+    items, next_cursor = await fetch_page(session, stmt, AdminAuditLog.timestamp, AdminAuditLog.id,
+                                          cursor=cursor, page=page, size=size)
+    return items, next_cursor, total
+
+
+async def add_audit_log(session, admin_id: int, action: str, target_id: str, details: str) -> None:
+    from models_db import AdminAuditLog
+
+    session.add(AdminAuditLog(admin_id=admin_id, action=action, target_id=target_id, details=details))
+    await session.commit()
+
+
+# === Estrategias ===
+
+async def get_performance_stats(session, scope: str, keys: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """{key: PerformanceStats} de un scope (una lectura por índice único)."""
+    from models_db import PerformanceStats
+
+    stmt = select(PerformanceStats).filter(PerformanceStats.scope == scope)
+    if keys is not None:
+        if not keys:
+            return {}
+        stmt = stmt.filter(PerformanceStats.key.in_(list(keys)))
+    return {s.key: s for s in (await session.execute(stmt)).scalars()}
+
+
+async def get_strategy_configs(session, strategy_ids: Sequence[str]) -> Dict[str, Any]:
+    """{strategy_id: StrategyConfig} en una consulta."""
+    from models_db import StrategyConfig
+
+    if not strategy_ids:
+        return {}
+    stmt = select(StrategyConfig).filter(StrategyConfig.strategy_id.in_(list(strategy_ids)))
+    return {c.strategy_id: c for c in (await session.execute(stmt)).scalars()}
+
+
+async def get_strategy_config(session, strategy_id: str):
+    return (await get_strategy_configs(session, [strategy_id])).get(strategy_id)
@@ -0,0 +1,312 @@
+# backend/core/response_cache.py
+"""
+GET condicional (ETag / Last-Modified) y caché de respuestas serializadas
+para los endpoints de lectura que el dashboard consulta en bucle:
+/market/summary, /strategies/marketplace, /strategies/, /logs/recent,
+/stats/summary y /backtest/strategies.
+
+Antes cada poll volvía a consultar, construir los modelos y serializar el
+JSON aunque nada hubiera cambiado. Ahora el endpoint pasa a
+ResponseCache.respond():
+
+- una versión barata de lo que lee (contadores de cambio, no el contenido):
+  data_version() = min/max id de signals, max id de signal_evaluations y
+  max(strategy_configs.updated_at) en UNA consulta por índices, memorizada
+  RESPONSE_CACHE_PROBE_MS ms; files_version() = mtimes de los JSON/ficheros;
+  cache_stamp() = sello con el que core.cache guarda el ticker;
+- la clave (ruta, query params, ámbito de usuario). Las rutas con datos del
+  usuario pasan scope=user.id; las públicas comparten la entrada;
+- si la entrada tiene la misma versión (y menos de RESPONSE_CACHE_MAX_AGE s)
+  se devuelven los bytes ya serializados sin tocar la DB ni pydantic; si el
+  cliente manda If-None-Match con ese ETag (o If-Modified-Since posterior),
+  304 sin cuerpo.
+
+El ETag es un hash del cuerpo, no de la versión: distintos workers (cada uno
+con su LRU) generan el mismo ETag para el mismo contenido, así que el 304
+funciona aunque el balanceador cambie de worker, y al recalcular un cuerpo
+idéntico también se responde 304.
+
+LRU en memoria por proceso: RESPONSE_CACHE_SIZE entradas, cuerpos de hasta
+RESPONSE_CACHE_MAX_BODY bytes. Aciertos, 304 y bytes ahorrados por ruta en
+GET /system/response-cache. RESPONSE_CACHE_ENABLED=0 lo desactiva (se sigue
+enviando ETag).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.fast_json import dumps
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+RESPONSE_CACHE_MAX_BODY = int(os.getenv("RESPONSE_CACHE_MAX_BODY", str(1024 * 1024)))
+RESPONSE_CACHE_MAX_AGE = float(os.getenv("RESPONSE_CACHE_MAX_AGE", "300"))
+RESPONSE_CACHE_PROBE_MS = int(os.getenv("RESPONSE_CACHE_PROBE_MS", "1000"))
+
+# build(headers) -> payload; puede añadir cabeceras (p. ej. X-Next-Cursor) al dict
+Builder = Callable[[Dict[str, str]], Any]
+# Versión: valor comparable o callable que la devuelve (None = no cacheable ahora)
+Version = Any
+
+
+# === Versiones (contadores de cambio baratos) ===
+
+_probe_lock = threading.Lock()
+_probe: Tuple[float, Optional[tuple]] = (0.0, None)
+
+
+def _read_data_version() -> tuple:
+    from sqlalchemy import select, func
+    from database import SessionLocal
+    from models_db import Signal, SignalEvaluation, StrategyConfig
+
+    stmt = select(
+        select(func.min(Signal.id)).scalar_subquery(),
+        select(func.max(Signal.id)).scalar_subquery(),
+        select(func.max(SignalEvaluation.id)).scalar_subquery(),
+        select(func.max(StrategyConfig.updated_at)).scalar_subquery(),
+    )
+    db = SessionLocal()
+    try:
+        row = db.execute(stmt).one()
+    finally:
+        db.close()
+    return tuple(str(v) if v is not None else None for v in row)
+
+
+def data_version() -> tuple:
+    """
+    (min señal, max señal, max evaluación, último cambio de strategy_configs).
+    Cambia al insertar señales/evaluaciones (y con ellas performance_stats), al
+    archivar (sube el mínimo) y al editar estrategias. Se consulta como mucho
+    una vez cada RESPONSE_CACHE_PROBE_MS por proceso.
+    """
+    global _probe
+    ts, value = _probe
+    now = time.monotonic()
+    if value is not None and (now - ts) * 1000 < RESPONSE_CACHE_PROBE_MS:
+        return value
+    with _probe_lock:
+        ts, value = _probe
+        if value is not None and (time.monotonic() - ts) * 1000 < RESPONSE_CACHE_PROBE_MS:
+            return value
+        value = _read_data_version()
+        _probe = (time.monotonic(), value)
+        return value
+
+
+def invalidate_data_version() -> None:
+    """Fuerza a releer data_version() (tras escribir en este mismo proceso)."""
+    global _probe
+    _probe = (0.0, None)
+
+
+def files_version(*paths) -> tuple:
+    """mtime (ns) de cada ruta; 0 si no existe."""
+    out = []
+    for p in paths:
+        try:
+            out.append(os.stat(p).st_mtime_ns)
+        except OSError:
+            out.append(0)
+    return tuple(out)
+
+
+def cache_stamp(key: str) -> Optional[Any]:
+    """Sello guardado en core.cache junto a un valor; None si ya expiró."""
+    from core.cache import cache
+    return cache.get(key)
+
+
+# === Caché ===
+
+@dataclass
+class _Entry:
+    version: Any
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+    last_modified: float
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _not_modified(request: Request, entry: _Entry) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        return "*" in tags or entry.etag in tags
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(entry.last_modified) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, max_body: int = RESPONSE_CACHE_MAX_BODY,
+                 max_age: float = RESPONSE_CACHE_MAX_AGE, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.max_body = max_body
+        self.max_age = max_age
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()
+        self._hits: Counter = Counter()
+        self._not_modified: Counter = Counter()
+        self._bytes_served: Counter = Counter()
+        self._bytes_saved: Counter = Counter()
+
+    # --- Claves / entradas ---
+
+    @staticmethod
+    def key(route: str, request: Request, scope: Optional[Hashable] = None) -> Hashable:
+        return route, tuple(sorted(request.query_params.multi_items())), scope
+
+    def _get(self, key: Hashable, version: Any) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or time.monotonic() - entry.stored_at > self.max_age:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: Hashable, version: Any, body: bytes, headers: Dict[str, str]) -> _Entry:
+        etag = _etag(body)
+        with self._lock:
+            old = self._entries.get(key)
+            # Mismo contenido: conserva Last-Modified
+            last_modified = old.last_modified if old is not None and old.etag == etag else time.time()
+            entry = _Entry(version, etag, body, headers, last_modified)
+            if self.enabled and version is not None and len(body) <= self.max_body:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(key, None)
+        return entry
+
+    def invalidate(self, route: Optional[str] = None) -> None:
+        with self._lock:
+            if route is None:
+                self._entries.clear()
+            else:
+                for k in [k for k in self._entries if k[0] == route]:
+                    del self._entries[k]
+
+    # --- Respuesta ---
+
+    def _response(self, request: Request, route: str, entry: _Entry, scope) -> Response:
+        headers = dict(entry.headers)
+        headers["ETag"] = entry.etag
+        headers["Last-Modified"] = formatdate(entry.last_modified, usegmt=True)
+        # no-cache = el navegador guarda la respuesta pero revalida siempre (304)
+        headers["Cache-Control"] = "private, no-cache" if scope is not None else "no-cache"
+        if scope is not None:
+            headers["Vary"] = "Authorization"
+        if _not_modified(request, entry):
+            self._not_modified[route] += 1
+            self._bytes_saved[route] += len(entry.body)
+            return Response(status_code=304, headers=headers)
+        self._bytes_served[route] += len(entry.body)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _version(version: Version) -> Any:
+        return version() if callable(version) else version
+
+    def respond(self, request: Request, route: str, version: Version, build: Builder,
+                scope: Optional[Hashable] = None) -> Response:
+        """
+        Respuesta cacheada de `build` para (route, query params, scope) mientras
+        `version` no cambie. Para endpoints síncronos (threadpool).
+        """
+        self._requests[route] += 1
+        key = self.key(route, request, scope)
+        v = self._version(version)
+        entry = self._get(key, v) if self.enabled and v is not None else None
+        if entry is not None:
+            self._hits[route] += 1
+        else:
+            headers: Dict[str, str] = {}
+            body = dumps(build(headers))
+            if v is None:
+                v = self._version(version)
+            entry = self._put(key, v, body, headers)
+        return self._response(request, route, entry, scope)
+
+    async def respond_async(self, request: Request, route: str, version: Version, build,
+                            scope: Optional[Hashable] = None) -> Response:
+        """Como respond() pero con `build` async; la versión se calcula en el threadpool."""
+        self._requests[route] += 1
+        key = self.key(route, request, scope)
+        v = await run_in_threadpool(self._version, version)
+        entry = self._get(key, v) if self.enabled and v is not None else None
+        if entry is not None:
+            self._hits[route] += 1
+        else:
+            headers: Dict[str, str] = {}
+            body = dumps(await build(headers))
+            if v is None:
+                v = await run_in_threadpool(self._version, version)
+            entry = self._put(key, v, body, headers)
+        return self._response(request, route, entry, scope)
+
+    # --- Diagnóstico ---
+
+    def stats(self) -> Dict[str, Any]:
+        requests = sum(self._requests.values())
+        served_from_cache = sum(self._hits.values())
+        with self._lock:
+            size = len(self._entries)
+            cached_bytes = sum(len(e.body) for e in self._entries.values())
+        routes = {
+            r: {
+                "requests": n,
+                "hits": self._hits[r],
+                "not_modified": self._not_modified[r],
+                "hit_ratio": round(self._hits[r] / n, 3) if n else None,
+                "bytes_served": self._bytes_served[r],
+                "bytes_saved": self._bytes_saved[r],
+            }
+            for r, n in self._requests.most_common()
+        }
+        return {
+            "enabled": self.enabled,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "cached_bytes": cached_bytes,
+            "requests": requests,
+            "hits": served_from_cache,
+            "not_modified": sum(self._not_modified.values()),
+            "hit_ratio": round(served_from_cache / requests, 3) if requests else None,
+            "bytes_served": sum(self._bytes_served.values()),
+            "bytes_saved": sum(self._bytes_saved.values()),
+            "routes": routes,
+        }
+
+    def reset_stats(self) -> None:
+        for c in (self._requests, self._hits, self._not_modified, self._bytes_served, self._bytes_saved):
+            c.clear()
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,586 @@
+# backend/core/signal_archive.py
+"""
+Archivo frío (columnar, comprimido) de señales cerradas.
+
+signals y signal_evaluations crecían sin límite: el feed, los evaluadores y
+los agregados recorrían cada vez más filas que ya nadie modifica. Ahora:
+
+- archive_signals(db) mueve las señales con evaluación cerrada (resultado
+  distinto de "open") y más antiguas que SIGNAL_HOT_DAYS días a ficheros
+  columnares comprimidos y las borra (señal + evaluación) de la DB en la
+  misma transacción. Se lanza a mano (python tools/archive_signals.py) o
+  desde el scheduler una vez al día si SIGNAL_ARCHIVE_AUTO=1.
+- Particiones por mes y token:
+      SIGNAL_ARCHIVE_DIR/month=2025-01/token=BTC/part-<ts>-<uid>.npz
+  Cada part es un .npz (numpy, zip deflate) con una columna por campo:
+  numéricos como int64/float64, fechas como int64 (µs epoch), texto como
+  bytes UTF-8 concatenados + offsets (estilo Arrow) y máscara de nulos solo
+  si la columna los tiene. Se lee con allow_pickle=False.
+- _manifest.json describe cada part (rango de timestamps e ids, sources,
+  strategy_ids, user_ids): las lecturas descartan particiones sin abrirlas.
+
+Lectura combinada (caliente + archivo):
+- combine_page(): continúa una página del feed (core/signal_feed.py) con
+  las filas archivadas y devuelve el mismo cursor keyset; si la página
+  caliente ya es más reciente que todo el archivo, no abre ningún fichero.
+  Las filas archivadas son ArchivedSignal (mismos atributos que Signal, con
+  .evaluation), de solo lectura.
+- history_frame(): DataFrame de pandas con caliente + archivo para análisis.
+- aggregate_deltas(): agregados por source/strategy del archivo, que
+  performance_stats.rebuild() suma a los de la DB.
+
+Consistencia: el part se escribe (tmp + rename) y se registra en el manifest
+como "pending" antes de borrar las filas; tras el commit pasa a
+"committed". Las lecturas ignoran los pending y la siguiente ejecución los
+resuelve (si las filas siguen en la DB, borra el part). Un solo job a la vez
+por proceso.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_DIR = os.getenv("SIGNAL_ARCHIVE_DIR", os.path.join(BASE_DIR, "data", "archive", "signals"))
+# /stats/summary lee 7 días de signal_evaluations en caliente
+MIN_HOT_DAYS = 8
+SIGNAL_HOT_DAYS = max(int(os.getenv("SIGNAL_HOT_DAYS", "90")), MIN_HOT_DAYS)
+SIGNAL_ARCHIVE_BATCH = int(os.getenv("SIGNAL_ARCHIVE_BATCH", "5000"))
+SIGNAL_ARCHIVE_AUTO = os.getenv("SIGNAL_ARCHIVE_AUTO", "0") == "1"
+
+MANIFEST = "_manifest.json"
+# evaluated_logger marca "open" las señales que aún no tocaron TP/SL
+OPEN_RESULTS = ("open",)
+
+# (columna, tipo): tipo ∈ int | float | str | dt
+SIGNAL_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id", "int"), ("timestamp", "dt"), ("token", "str"), ("timeframe", "str"),
+    ("direction", "str"), ("entry", "float"), ("tp", "float"), ("sl", "float"),
+    ("confidence", "float"), ("rationale", "str"), ("source", "str"), ("mode", "str"),
+    ("raw_response", "str"), ("strategy_id", "str"), ("user_id", "int"),
+    ("idempotency_key", "str"), ("is_hidden", "int"),
+)
+EVAL_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("eval_id", "int"), ("evaluated_at", "dt"), ("result", "str"),
+    ("pnl_r", "float"), ("exit_price", "float"),
+)
+COLUMNS = SIGNAL_COLUMNS + EVAL_COLUMNS
+KINDS = dict(COLUMNS)
+# Columnas que necesitan el feed / la historia (sin rationale ni raw_response)
+FEED_COLUMNS = tuple(c for c, _ in COLUMNS if c not in ("rationale", "raw_response"))
+
+_EPOCH = datetime(1970, 1, 1)
+_manifest_lock = threading.Lock()
+_job_lock = threading.Lock()
+_manifest_cache: Dict[str, Any] = {"stamp": None, "parts": []}
+
+
+# === Codificación columnar ===
+
+def _to_us(ts: datetime) -> int:
+    return (ts - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(us))
+
+
+def encode_column(name: str, kind: str, values: Sequence[Any]) -> Dict[str, np.ndarray]:
+    """Arrays del .npz para una columna (claves <name>, <name>__data, ...)."""
+    nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    out: Dict[str, np.ndarray] = {}
+    if kind == "str":
+        blobs = [b"" if v is None else str(v).encode("utf-8") for v in values]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        out[f"{name}__data"] = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        out[f"{name}__offsets"] = offsets
+    elif kind == "float":
+        out[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    elif kind == "dt":
+        out[name] = np.array([0 if v is None else _to_us(v) for v in values], dtype=np.int64)
+    else:
+        out[name] = np.array([0 if v is None else int(v) for v in values], dtype=np.int64)
+    if nulls.any():
+        out[f"{name}__null"] = nulls
+    return out
+
+
+def decode_column(npz, name: str, kind: str, index: Optional[np.ndarray] = None) -> List[Any]:
+    """Valores Python de una columna (solo las filas de `index` si se da)."""
+    nulls = npz[f"{name}__null"] if f"{name}__null" in npz.files else None
+    if kind == "str":
+        data = npz[f"{name}__data"].tobytes()
+        offsets = npz[f"{name}__offsets"].tolist()
+        rows = range(len(offsets) - 1) if index is None else index
+        values = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in rows]
+    else:
+        arr = npz[name] if index is None else npz[name][index]
+        if kind == "dt":
+            values = [_from_us(v) for v in arr.tolist()]
+        else:
+            values = arr.tolist()
+    if nulls is not None:
+        mask = nulls if index is None else nulls[index]
+        values = [None if n else v for v, n in zip(values, mask.tolist())]
+    return values
+
+
+def write_part(path: str, rows: Sequence[Dict[str, Any]]) -> int:
+    """Escribe las filas como .npz comprimido (tmp + rename). Devuelve bytes."""
+    arrays: Dict[str, np.ndarray] = {}
+    for name, kind in COLUMNS:
+        arrays.update(encode_column(name, kind, [r.get(name) for r in rows]))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def read_part(path: str, columns: Optional[Iterable[str]] = None) -> Dict[str, List[Any]]:
+    """{columna: valores} de un part completo."""
+    with np.load(path, allow_pickle=False) as npz:
+        return {c: decode_column(npz, c, KINDS[c]) for c in (columns or KINDS)}
+
+
+# === Manifest ===
+
+def _manifest_path() -> str:
+    return os.path.join(ARCHIVE_DIR, MANIFEST)
+
+
+def _read_manifest() -> List[Dict[str, Any]]:
+    """Entradas del manifest (releído solo si el fichero cambió)."""
+    path = _manifest_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return []
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _manifest_cache["stamp"] != stamp:
+        with open(path, encoding="utf-8") as f:
+            parts = json.load(f).get("parts", [])
+        for p in parts:
+            for k in ("min_ts", "max_ts"):
+                p[f"_{k}"] = datetime.fromisoformat(p[k])
+        _manifest_cache.update(stamp=stamp, parts=parts)
+    return _manifest_cache["parts"]
+
+
+def _write_manifest(parts: List[Dict[str, Any]]) -> None:
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    clean = [{k: v for k, v in p.items() if not k.startswith("_")} for p in parts]
+    tmp = f"{_manifest_path()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "parts": clean}, f, indent=1)
+    os.replace(tmp, _manifest_path())
+    _manifest_cache["stamp"] = None  # fuerza relectura aunque mtime/tamaño coincidan
+
+
+def _update_manifest(fn) -> None:
+    with _manifest_lock:
+        parts = [dict(p) for p in _read_manifest()]
+        _write_manifest(fn(parts))
+
+
+def committed_parts() -> List[Dict[str, Any]]:
+    return [p for p in _read_manifest() if p.get("state") == "committed"]
+
+
+def _safe(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value or "_") or "_"
+
+
+def _part_entry(rows: List[Dict[str, Any]], month: str, token: Optional[str], rel: str, size: int) -> Dict[str, Any]:
+    ts = [r["timestamp"] for r in rows]
+    ids = [r["id"] for r in rows]
+    return {
+        "path": rel, "state": "pending", "month": month, "token": token,
+        "rows": len(rows), "bytes": size,
+        "min_ts": min(ts).isoformat(), "max_ts": max(ts).isoformat(),
+        "min_id": min(ids), "max_id": max(ids),
+        "sources": sorted({r["source"] for r in rows if r.get("source")}),
+        "strategies": sorted({r["strategy_id"] for r in rows if r.get("strategy_id")}),
+        "modes": sorted({r["mode"] for r in rows if r.get("mode")}),
+        "user_ids": sorted({r["user_id"] for r in rows if r.get("user_id") is not None}),
+        "has_system": any(r.get("user_id") is None for r in rows),
+        "has_hidden": any(r.get("is_hidden") for r in rows),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+# === Job de archivado ===
+
+def _archive_statement(cutoff: datetime, after_id: int, limit: int):
+    from sqlalchemy import select
+    from models_db import Signal, SignalEvaluation
+
+    sig_cols = [getattr(Signal, c) for c, _ in SIGNAL_COLUMNS]
+    return (
+        select(*sig_cols, SignalEvaluation.id.label("eval_id"), SignalEvaluation.evaluated_at,
+               SignalEvaluation.result, SignalEvaluation.pnl_r, SignalEvaluation.exit_price)
+        .join(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+        .where(
+            Signal.timestamp < cutoff,
+            Signal.id > after_id,
+            SignalEvaluation.result.isnot(None),
+            SignalEvaluation.result.notin_(OPEN_RESULTS),
+        )
+        .order_by(Signal.id, SignalEvaluation.id)
+        .limit(limit)
+    )
+
+
+def _recover_pending(db) -> None:
+    """Resuelve parts "pending" de una ejecución interrumpida."""
+    from sqlalchemy import select
+    from models_db import Signal
+
+    pending = [p for p in _read_manifest() if p.get("state") == "pending"]
+    if not pending:
+        return
+    resolved: Dict[str, str] = {}
+    for p in pending:
+        full = os.path.join(ARCHIVE_DIR, p["path"])
+        ids = read_part(full, ["id"])["id"] if os.path.exists(full) else []
+        still_hot = ids and db.execute(
+            select(Signal.id).where(Signal.id.in_(ids)).limit(1)
+        ).first() is not None
+        if still_hot or not ids:
+            if os.path.exists(full):
+                os.remove(full)
+            resolved[p["path"]] = "drop"
+        else:
+            resolved[p["path"]] = "committed"
+
+    def _apply(parts):
+        out = []
+        for p in parts:
+            action = resolved.get(p["path"])
+            if action == "drop":
+                continue
+            if action == "committed":
+                p["state"] = "committed"
+            out.append(p)
+        return out
+
+    _update_manifest(_apply)
+    print(f"[ARCHIVE] ♻️ {len(resolved)} parts pendientes resueltos")
+
+
+def archive_signals(db, older_than_days: int = SIGNAL_HOT_DAYS, *, dry_run: bool = False,
+                    batch_size: int = SIGNAL_ARCHIVE_BATCH, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Mueve al archivo las señales cerradas con timestamp anterior a
+    now - older_than_days (mínimo MIN_HOT_DAYS). Commit por lote.
+    Devuelve un resumen {cutoff, signals, parts, bytes, seconds}.
+    """
+    from sqlalchemy import delete
+    from models_db import Signal, SignalEvaluation
+
+    days = max(int(older_than_days), MIN_HOT_DAYS)
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    summary = {"cutoff": cutoff.isoformat(), "dry_run": dry_run, "signals": 0, "parts": 0, "bytes": 0}
+    t0 = time.perf_counter()
+
+    with _job_lock:
+        if not dry_run:
+            _recover_pending(db)
+        after_id = 0
+        while True:
+            result = db.execute(_archive_statement(cutoff, after_id, batch_size)).mappings().all()
+            if not result:
+                break
+            after_id = result[-1]["id"]
+            # Una fila por señal (si hubiera dos evaluaciones, la última)
+            rows = list({r["id"]: dict(r) for r in result}.values())
+            summary["signals"] += len(rows)
+            if dry_run:
+                continue
+
+            groups: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+            for r in rows:
+                groups.setdefault((r["timestamp"].strftime("%Y-%m"), r["token"]), []).append(r)
+
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+            entries = []
+            try:
+                for (month, token), group in sorted(groups.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+                    rel = os.path.join(f"month={month}", f"token={_safe(token)}",
+                                       f"part-{stamp}-{uuid.uuid4().hex[:8]}.npz")
+                    size = write_part(os.path.join(ARCHIVE_DIR, rel), group)
+                    entries.append(_part_entry(group, month, token, rel, size))
+                _update_manifest(lambda parts: parts + entries)
+
+                ids = [r["id"] for r in rows]
+                db.execute(delete(SignalEvaluation).where(SignalEvaluation.signal_id.in_(ids)))
+                db.execute(delete(Signal).where(Signal.id.in_(ids)))
+                db.commit()
+            except Exception:
+                db.rollback()
+                rels = {e["path"] for e in entries}
+                _update_manifest(lambda parts: [p for p in parts if p["path"] not in rels])
+                for rel in rels:
+                    full = os.path.join(ARCHIVE_DIR, rel)
+                    if os.path.exists(full):
+                        os.remove(full)
+                raise
+
+            rels = {e["path"] for e in entries}
+
+            def _commit(parts):
+                for p in parts:
+                    if p["path"] in rels:
+                        p["state"] = "committed"
+                return parts
+
+            _update_manifest(_commit)
+            summary["parts"] += len(entries)
+            summary["bytes"] += sum(e["bytes"] for e in entries)
+
+    summary["seconds"] = round(time.perf_counter() - t0, 2)
+    verb = "a archivar (dry run)" if dry_run else "archivadas"
+    print(f"[ARCHIVE] ✅ {summary['signals']} señales {verb} (< {cutoff:%Y-%m-%d}), "
+          f"{summary['parts']} parts, {summary['bytes'] / 1e6:.1f} MB")
+    return summary
+
+
+# === Lectura ===
+
+class ArchivedSignal:
+    """Señal archivada con la interfaz de lectura de models_db.Signal."""
+
+    archived = True
+
+    def __init__(self, row: Dict[str, Any]):
+        for name, _ in SIGNAL_COLUMNS:
+            setattr(self, name, row.get(name))
+        self.evaluation = ArchivedEvaluation(row) if row.get("eval_id") is not None else None
+
+
+class ArchivedEvaluation:
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row.get("eval_id")
+        self.signal_id = row.get("id")
+        self.evaluated_at = row.get("evaluated_at")
+        self.result = row.get("result")
+        self.pnl_r = row.get("pnl_r")
+        self.exit_price = row.get("exit_price")
+
+
+def _part_matches(p: Dict[str, Any], *, user_id: Optional[int] = None, include_system: bool = True,
+                  mode: Optional[str] = None, token: Optional[str] = None, source: Optional[str] = None,
+                  strategy_id: Optional[str] = None, show_hidden: bool = True,
+                  since: Optional[datetime] = None, before: Optional[datetime] = None) -> bool:
+    if token and p["token"] != token:
+        return False
+    if mode and mode not in p["modes"]:
+        return False
+    if source and source not in p["sources"]:
+        return False
+    if strategy_id and strategy_id not in p["strategies"]:
+        return False
+    if user_id is not None and user_id not in p["user_ids"] and not (include_system and p["has_system"]):
+        return False
+    if since and p["_max_ts"] < since:
+        return False
+    if before and p["_min_ts"] > before:
+        return False
+    return True
+
+
+def _row_mask(npz, n: int, *, user_id=None, include_system=True, mode=None, token=None, source=None,
+              strategy_id=None, show_hidden=True, since=None, before=None, before_id=None) -> np.ndarray:
+    """Máscara de filas del part que cumplen los filtros del feed."""
+    mask = np.ones(n, dtype=bool)
+    ts = npz["timestamp"]
+    if since is not None:
+        mask &= ts >= _to_us(since)
+    if before is not None:
+        b = _to_us(before)
+        mask &= (ts < b) | ((ts == b) & (npz["id"] < before_id)) if before_id is not None else ts < b
+    if not show_hidden:
+        mask &= npz["is_hidden"] == 0
+    if user_id is not None:
+        uid = npz["user_id"]
+        nulls = npz["user_id__null"] if "user_id__null" in npz.files else np.zeros(n, dtype=bool)
+        mask &= ((uid == user_id) & ~nulls) | (nulls if include_system else False)
+    for name, value in (("mode", mode), ("token", token), ("source", source), ("strategy_id", strategy_id)):
+        if value and mask.any():
+            mask &= np.array([v == value for v in decode_column(npz, name, "str")], dtype=bool)
+    return mask
+
+
+def read_archived(*, columns: Sequence[str] = FEED_COLUMNS, newest_first: Optional[Tuple[datetime, int]] = None,
+                  limit: Optional[int] = None, **filters) -> List[Dict[str, Any]]:
+    """
+    Filas archivadas (dicts) que cumplen los filtros del feed (user_id,
+    include_system, mode, token, source, strategy_id, show_hidden, since).
+    Con `newest_first`=(ts, id) devuelve solo filas anteriores a ese punto,
+    en orden (ts, id) descendente, y para de abrir parts cuando ya tiene
+    `limit` filas más recientes que el resto.
+    """
+    before, before_id = newest_first if newest_first else (filters.pop("before", None), None)
+    parts = [p for p in committed_parts() if _part_matches(p, before=before, **filters)]
+    parts.sort(key=lambda p: p["_max_ts"], reverse=True)
+
+    rows: List[Dict[str, Any]] = []
+    for p in parts:
+        if limit is not None and len(rows) >= limit:
+            rows.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+            del rows[limit:]
+            if p["_max_ts"] < rows[-1]["timestamp"]:
+                break
+        full = os.path.join(ARCHIVE_DIR, p["path"])
+        try:
+            with np.load(full, allow_pickle=False) as npz:
+                index = np.flatnonzero(_row_mask(npz, p["rows"], before=before, before_id=before_id, **filters))
+                if not len(index):
+                    continue
+                cols = {c: decode_column(npz, c, KINDS[c], index) for c in columns}
+        except FileNotFoundError:
+            print(f"[ARCHIVE] ⚠️ Falta {p['path']}")
+            continue
+        rows.extend(dict(zip(cols, vals)) for vals in zip(*cols.values()))
+
+    if newest_first is not None or limit is not None:
+        rows.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        if limit is not None:
+            del rows[limit:]
+    return rows
+
+
+def newest_archived(**filters) -> Optional[datetime]:
+    """Timestamp más reciente del archivo para unos filtros (solo manifest)."""
+    stamps = [p["_max_ts"] for p in committed_parts() if _part_matches(p, **filters)]
+    return max(stamps) if stamps else None
+
+
+def combine_page(hot_rows: List[Any], hot_next: Optional[str], *, cursor: Optional[str] = None,
+                 limit: int = 50, **filters) -> Tuple[List[Any], Optional[str]]:
+    """
+    Mezcla una página caliente (core.repository.signal_feed_page con los
+    mismos cursor/limit/filtros) con el archivo. Devuelve (filas, next_cursor)
+    con el mismo formato de cursor; las filas archivadas son ArchivedSignal.
+    """
+    from core.signal_feed import clamp_limit, decode_cursor, encode_cursor, in_null_tail
+
+    # Tramo de señales sin timestamp (al final del feed): el archivo no tiene ninguna
+    if in_null_tail(cursor):
+        return hot_rows, hot_next
+    limit = clamp_limit(limit)
+    filters.pop("with_evaluation", None)
+    filters.pop("page", None)
+    newest = newest_archived(**filters)
+    if newest is None:
+        return hot_rows, hot_next
+    # Página caliente llena y más reciente que todo el archivo: nada que mezclar
+    if hot_next and hot_rows and hot_rows[-1].timestamp > newest:
+        return hot_rows, hot_next
+
+    start = decode_cursor(cursor) if cursor else (datetime.max, 2 ** 62)
+    archived = read_archived(newest_first=start, limit=limit + 1, **filters)
+    if not archived:
+        return hot_rows, hot_next
+
+    hot_ids = {r.id for r in hot_rows}
+    merged = list(hot_rows) + [ArchivedSignal(r) for r in archived if r["id"] not in hot_ids]
+    merged.sort(key=lambda s: (s.timestamp, s.id), reverse=True)
+    more = len(merged) > limit or hot_next is not None
+    page = merged[:limit]
+    next_cursor = encode_cursor(page[-1].timestamp, page[-1].id) if more and page else None
+    return page, next_cursor
+
+
+def history_frame(db, *, since: Optional[datetime] = None, columns: Sequence[str] = FEED_COLUMNS,
+                  **filters):
+    """
+    DataFrame (pandas) con las señales calientes + archivadas que cumplen
+    los filtros, ordenado por timestamp. Las calientes sin evaluación llevan
+    eval_id/result/... a None; columna `archived` (bool).
+    """
+    import pandas as pd
+    from sqlalchemy import select
+    from core.signal_feed import signal_filters
+    from models_db import Signal, SignalEvaluation
+
+    eval_cols = {"eval_id": SignalEvaluation.id, "evaluated_at": SignalEvaluation.evaluated_at,
+                 "result": SignalEvaluation.result, "pnl_r": SignalEvaluation.pnl_r,
+                 "exit_price": SignalEvaluation.exit_price}
+    sel = [eval_cols[c].label(c) if c in eval_cols else getattr(Signal, c) for c in columns]
+    stmt = select(*sel).outerjoin(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+    strategy_id = filters.pop("strategy_id", None)
+    stmt = signal_filters(stmt, **filters)
+    if strategy_id:
+        stmt = stmt.filter(Signal.strategy_id == strategy_id)
+    if since is not None:
+        stmt = stmt.filter(Signal.timestamp >= since)
+
+    hot = pd.DataFrame(db.execute(stmt).mappings().all(), columns=list(columns))
+    hot["archived"] = False
+    cold = pd.DataFrame(read_archived(columns=columns, since=since, strategy_id=strategy_id, **filters),
+                        columns=list(columns))
+    cold["archived"] = True
+    frames = [f for f in (hot, cold) if not f.empty]
+    if not frames:
+        return hot
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset="id", keep="first")
+    return df.sort_values(["timestamp", "id"], kind="stable").reset_index(drop=True)
+
+
+def aggregate_deltas() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Agregados de performance_stats (por source y strategy) de todo el archivo."""
+    from core.performance_stats import evaluation_deltas, signal_deltas
+
+    totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    cols = ("source", "strategy_id", "timestamp", "result", "pnl_r")
+    for p in committed_parts():
+        try:
+            data = read_part(os.path.join(ARCHIVE_DIR, p["path"]), cols)
+        except FileNotFoundError:
+            print(f"[ARCHIVE] ⚠️ Falta {p['path']}")
+            continue
+        rows = [dict(zip(cols, vals)) for vals in zip(*(data[c] for c in cols))]
+        for deltas in (signal_deltas(rows),
+                       evaluation_deltas((r["source"], r["strategy_id"], r["result"], r["pnl_r"]) for r in rows)):
+            for key, d in deltas.items():
+                t = totals.setdefault(key, {})
+                for k, v in d.items():
+                    if k == "last_signal_at":
+                        if v is not None and (t.get(k) is None or v > t[k]):
+                            t[k] = v
+                    else:
+                        t[k] = t.get(k, 0) + v
+    return totals
+
+
+def archive_status() -> Dict[str, Any]:
+    """Resumen del archivo por mes (para /admin/archive y la CLI)."""
+    months: Dict[str, Dict[str, int]] = {}
+    pending = 0
+    for p in _read_manifest():
+        if p.get("state") != "committed":
+            pending += 1
+            continue
+        m = months.setdefault(p["month"], {"parts": 0, "rows": 0, "bytes": 0})
+        m["parts"] += 1
+        m["rows"] += p["rows"]
+        m["bytes"] += p["bytes"]
+    return {
+        "dir": ARCHIVE_DIR,
+        "hot_days": SIGNAL_HOT_DAYS,
+        "rows": sum(m["rows"] for m in months.values()),
+        "bytes": sum(m["bytes"] for m in months.values()),
+        "pending_parts": pending,
+        "months": dict(sorted(months.items())),
+    }
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, and_
 from typing import List, Dict
 
-from models_db import Signal, SignalEvaluation, StrategyConfig
+from models_db import Signal, SignalEvaluation
 from core.market_data_api import get_current_price
+from core.performance_stats import insert_evaluations
 
 # Minimum age to evaluate (avoid instant evaluation on creation)
 MIN_SIGNAL_AGE_MINUTES = 5 
@@ -39,7 +40,8 @@ def evaluate_pending_signals(db: Session) -> int:
             signals_by_token[sig.token] = []
         signals_by_token[sig.token].append(sig)
         
-    new_evaluations_count = 0
+    new_evaluations = []  # filas de signal_evaluations (un insert en bloque al final)
+    sources = {}  # signal_id -> (source, strategy_id) para performance_stats
     
     # 3. Evaluate by Token
     for token, signals in signals_by_token.items():
@@ -100,43 +102,22 @@ def evaluate_pending_signals(db: Session) -> int:
                 else:
                     raw_pnl = sig.entry - exit_price
                     
-                pnl_r = raw_pnl / risk
+                pnl_r = round(raw_pnl / risk, 2)
                 
-                eval_obj = SignalEvaluation(
-                    signal_id=sig.id,
-                    evaluated_at=datetime.utcnow(),
-                    result=result,
-                    pnl_r=round(pnl_r, 2),
-                    exit_price=exit_price
-                )
-                
-                db.add(eval_obj)
-                new_evaluations_count += 1
-                
-                # Update Strategy Stats
-                if sig.strategy_id:
-                     _update_strategy_stats(db, sig.strategy_id)
+                new_evaluations.append({
+                    "signal_id": sig.id,
+                    "evaluated_at": datetime.utcnow(),
+                    "result": result,
+                    "pnl_r": pnl_r,
+                    "exit_price": exit_price,
+                })
+                sources[sig.id] = (sig.source, sig.strategy_id)
 
-    db.commit()
-    return new_evaluations_count
+    if not new_evaluations:
+        return 0
 
-def _update_strategy_stats(db: Session, strategy_id: str):
-    """
-    Recalculates Win Rate for the Strategy.
-    """
-    try:
-        total = db.query(Signal).join(SignalEvaluation).filter(Signal.strategy_id == strategy_id).count()
-        wins = db.query(Signal).join(SignalEvaluation).filter(
-            Signal.strategy_id == strategy_id, 
-            SignalEvaluation.result == "WIN"
-        ).count()
-        
-        if total > 0:
-            win_rate = wins / total
-            # Upsert config?
-            config = db.query(StrategyConfig).filter(StrategyConfig.strategy_id == strategy_id).first()
-            if config:
-                config.win_rate = win_rate
-                config.total_signals = total
-    except Exception as e:
-        print(f"[EVAL] Error updating stats: {e}")
+    # INSERT ... ON CONFLICT DO NOTHING (otro evaluador pudo adelantarse) +
+    # stats de las filas insertadas, en la misma transacción
+    inserted = insert_evaluations(db, new_evaluations, sources)
+    db.commit()
+    return inserted
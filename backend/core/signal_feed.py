@@ -0,0 +1,153 @@
+# backend/core/signal_feed.py
+"""
+Capa de consulta del feed de señales (y listados de admin) con paginación
+por cursor (keyset).
+
+Antes:
+- /logs/recent lanzaba una consulta de SignalEvaluation por cada señal (N+1)
+  y /strategies/marketplace/{id}/history leía sig.evaluation perezosamente.
+- /admin/signals y /admin/users paginaban con OFFSET (coste lineal con la
+  página) y un count() completo en cada petición.
+
+Ahora:
+- feed_statement() trae señal + evaluación en UNA sentencia (joinedload: el
+  LIMIT va en una subconsulta y el LEFT JOIN fuera).
+- keyset_statement() ordena por (timestamp DESC, id DESC) y continúa desde el
+  cursor con WHERE (ts, id) < (cursor_ts, cursor_id), que los índices
+  compuestos (user_id|source|mode+token, timestamp) resuelven sin OFFSET.
+- core.repository.cached_count() da totales aproximados (core.cache,
+  FEED_COUNT_TTL segundos por combinación de filtros).
+
+Aquí solo se construyen sentencias select(); se ejecutan en
+core/repository.py (AsyncSession) o con signal_feed() (Session síncrona).
+El cursor es opaco para el cliente (base64 de "timestamp|id").
+
+Filas con timestamp NULL (datos antiguos): PostgreSQL y SQLite las ordenan
+en extremos distintos con DESC y no se pueden comparar en el keyset. Van en
+un tramo aparte, al final: el keyset normal filtra ts IS NOT NULL (sigue
+usando el índice) y, agotado, fetch_page continúa con el cursor
+NULL_TAIL_CURSOR ("|0"), que recorre las de ts NULL por id DESC.
+"""
+
+import base64
+import os
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+FEED_COUNT_TTL = int(os.getenv("FEED_COUNT_TTL", "60"))
+MAX_PAGE_SIZE = 500
+
+Cursor = Tuple[Optional[datetime], int]
+
+
+def encode_cursor(ts: Optional[datetime], row_id: int) -> str:
+    """ts None = tramo de filas con timestamp NULL (se codifica vacío)."""
+    raw = f"{ts.isoformat() if ts else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Inicio del tramo NULL (id 0: desde la fila de mayor id)
+NULL_TAIL_CURSOR = encode_cursor(None, 0)
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverso de encode_cursor. ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(ts) if ts else None), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def in_null_tail(cursor: Optional[str]) -> bool:
+    return bool(cursor) and decode_cursor(cursor)[0] is None
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_statement(stmt, ts_col, id_col, cursor: Optional[str], limit: int):
+    """
+    Aplica orden (ts DESC, id DESC) + cursor + LIMIT limit+1 (la fila extra
+    indica si hay página siguiente). ValueError si el cursor no es válido.
+    Con un cursor del tramo NULL: solo filas con ts NULL, por id DESC.
+    """
+    if cursor:
+        c_ts, c_id = decode_cursor(cursor)
+        if c_ts is None:
+            stmt = stmt.filter(ts_col.is_(None))
+            if c_id:
+                stmt = stmt.filter(id_col < c_id)
+            return stmt.order_by(id_col.desc()).limit(clamp_limit(limit) + 1)
+        # (ts, id) < (c_ts, c_id), expandido para que use el índice en ambos motores
+        stmt = stmt.filter(and_(ts_col <= c_ts, or_(ts_col < c_ts, id_col < c_id)))
+    stmt = stmt.filter(ts_col.isnot(None))
+    return stmt.order_by(ts_col.desc(), id_col.desc()).limit(clamp_limit(limit) + 1)
+
+
+def null_tail_probe(stmt, ts_col):
+    """SELECT que devuelve fila si hay alguna con ts NULL bajo los mismos filtros."""
+    from sqlalchemy import literal, select
+    return select(literal(1)).select_from(stmt.order_by(None).filter(ts_col.is_(None)).limit(1).subquery())
+
+
+def offset_statement(stmt, ts_col, id_col, page: int, size: int):
+    """Paginación por OFFSET (clientes antiguos que piden ?page=N)."""
+    size = clamp_limit(size)
+    return stmt.order_by(ts_col.desc(), id_col.desc()).offset((page - 1) * size).limit(size + 1)
+
+
+def page_result(rows: List[Any], limit: int, ts_col, id_col) -> Tuple[List[Any], Optional[str]]:
+    """(filas de la página, next_cursor) a partir de las limit+1 filas leídas."""
+    limit = clamp_limit(limit)
+    if len(rows) <= limit:
+        return list(rows), None
+    rows = list(rows[:limit])
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_col.key), getattr(last, id_col.key))
+
+
+def signal_filters(q, user_id: Optional[int] = None, include_system: bool = True,
+                   mode: Optional[str] = None, token: Optional[str] = None,
+                   source: Optional[str] = None, show_hidden: bool = True):
+    """Filtros comunes del feed sobre un select()/query de Signal."""
+    from models_db import Signal
+
+    if user_id is not None:
+        q = q.filter(or_(Signal.user_id == user_id, Signal.user_id.is_(None)) if include_system
+                     else Signal.user_id == user_id)
+    if mode:
+        q = q.filter(Signal.mode == mode)
+    if token:
+        q = q.filter(Signal.token == token)
+    if source:
+        q = q.filter(Signal.source == source)
+    if not show_hidden:
+        q = q.filter(Signal.is_hidden == 0)
+    return q
+
+
+def feed_statement(*, with_evaluation: bool = True, **filters):
+    """select(Signal) con filtros y, opcionalmente, la evaluación en la misma sentencia."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import joinedload
+    from models_db import Signal
+
+    stmt = select(Signal)
+    if with_evaluation:
+        stmt = stmt.options(joinedload(Signal.evaluation))
+    return signal_filters(stmt, **filters)
+
+
+def signal_feed(db, *, cursor: Optional[str] = None, limit: int = 50,
+                **filters) -> Tuple[list, Optional[str]]:
+    """
+    Página del feed con una Session síncrona (rutas def / herramientas).
+    Mismos parámetros que core.repository.signal_feed_page.
+    """
+    from core.repository import run_sync, signal_feed_page
+    return run_sync(signal_feed_page, db, cursor=cursor, limit=limit, **filters)
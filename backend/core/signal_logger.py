@@ -48,7 +48,8 @@ def log_signal(signal: Signal) -> None:
 
     Comportamiento:
     - CSV: logs/{MODE}/{token}.csv (token en minúsculas)
-    - DB: tabla Signal con todos los campos del modelo
+    - DB: tabla Signal con todos los campos del modelo (write-behind por
+      lotes, ver core/signal_writer.py; flush_signals() espera al commit)
     
     Notas:
     - El campo 'extra' (dict libre) se convierte a string JSON para CSV
@@ -116,81 +117,60 @@ def _write_to_csv(signal: Signal, mode: str, token_lower: str) -> None:
         # No relanzamos para que el flujo continúe si al menos DB funciona
 
 
+def signal_row(signal: Signal, mode: str) -> Dict[str, Any]:
+    """
+    Convierte una Signal en el dict de columnas de la tabla signals
+    (incluye la idempotency_key).
+    """
+    ts_iso = signal.timestamp.isoformat()
+    idem_key = f"{signal.strategy_id}|{signal.token.upper()}|{signal.timeframe}|{ts_iso}|{signal.user_id}|{signal.mode}"
+
+    return {
+        "timestamp": signal.timestamp,
+        "token": signal.token.upper(),
+        "timeframe": signal.timeframe,
+        "direction": signal.direction,
+        "entry": signal.entry,
+        "tp": signal.tp if signal.tp else 0.0,
+        "sl": signal.sl if signal.sl else 0.0,
+        "confidence": signal.confidence if signal.confidence is not None else 0.0,
+        "rationale": signal.rationale if signal.rationale else "",
+        "source": signal.source,
+        "mode": mode,
+        "raw_response": str(signal.extra) if signal.extra else None,
+        "strategy_id": signal.strategy_id,
+        "idempotency_key": idem_key,
+        "user_id": signal.user_id,
+        "is_hidden": 0,
+    }
+
+
 def _write_to_db(signal: Signal, mode: str) -> None:
     """
-    Escritura exclusiva de DB para una señal.
+    Escritura de DB para una señal.
     
-    Guarda en la tabla Signal usando el ORM de SQLAlchemy.
+    Delegada en core.signal_writer: la fila se encola y un hilo la inserta
+    por lotes (upsert por idempotency_key) y lanza el push después.
     Si falla, no interrumpe el flujo (ya se guardó en CSV).
     """
     try:
-        from database import SessionLocal
-        from models_db import Signal as SignalModel
-        from sqlalchemy.exc import IntegrityError
-
-        # Compute Idempotency Key
-        ts_iso = signal.timestamp.isoformat()
-        idem_key = f"{signal.strategy_id}|{signal.token.upper()}|{signal.timeframe}|{ts_iso}|{signal.user_id}|{signal.mode}"
-
-        # Preparar datos para el modelo DB
-        db_signal = SignalModel(
-            timestamp=signal.timestamp,
-            token=signal.token.upper(),
-            timeframe=signal.timeframe,
-            direction=signal.direction,
-            entry=signal.entry,
-            tp=signal.tp if signal.tp else 0.0,
-            sl=signal.sl if signal.sl else 0.0,
-            confidence=signal.confidence if signal.confidence is not None else 0.0,
-            rationale=signal.rationale if signal.rationale else "",
-            source=signal.source,
-            mode=mode,
-            raw_response=str(signal.extra) if signal.extra else None,
-            strategy_id=signal.strategy_id,
-            idempotency_key=idem_key,
-            user_id=signal.user_id
-        )
-
-        db = SessionLocal()
-        try:
-            db.add(db_signal)
-            db.commit()
-            ts_str = signal.timestamp.replace(microsecond=0).isoformat() + "Z"
-            print(f"[DB] ✅ Señal guardada en DB: {mode} - {signal.token} - {ts_str}")
-            
-            # --- NOTIFICACIÓN PUSH ---
-            try:
-                from notify import send_push_notification
-                title = f"New Signal: {signal.direction.upper()} {signal.token}"
-                body = f"Entry: {signal.entry} | TP: {signal.tp} | SL: {signal.sl}\nStrategy: {signal.strategy_id or 'Unknown'}"
-                res = send_push_notification(title, body, data={"token": signal.token, "type": "signal"})
-                if res.get("success", 0) > 0:
-                    print(f"[PUSH] 🔔 Notificación enviada a {res['success']} dispositivos.")
-                elif res.get("failed", 0) > 0:
-                    print(f"[PUSH] ⚠️ Fallo al enviar notificaciones ({res['failed']} fallidos).")
-            except Exception as push_err:
-                print(f"[PUSH] ❌ Error enviando push: {push_err}")
-            # -------------------------
-
-        except IntegrityError:
-            db.rollback()
-            print(f"[DB] ℹ️ Signal ignored (Duplicate Idempotency Key): {idem_key}")
-
-        except Exception as db_err:
-            print(f"[DB] ❌ Error CRÍTICO al guardar en DB: {db_err}")
-            db.rollback()
-            # No relanzamos para que al menos CSV esté persistido
-        finally:
-            db.close()
-
-    except ImportError as imp_err:
-        print(f"[DB] ⚠️  No se pudo importar database/models_db: {imp_err}")
+        from .signal_writer import signal_writer
+        signal_writer.submit(signal_row(signal, mode))
     except Exception as e:
         print(f"[DB] ⚠️  Error inesperado en _write_to_db: {e}")
         import traceback
         traceback.print_exc()
 
 
+def flush_signals(timeout: float = 10.0) -> bool:
+    """
+    Espera a que las señales encoladas estén en DB.
+    Útil en scripts/tests que leen la DB justo después de log_signal().
+    """
+    from .signal_writer import signal_writer
+    return signal_writer.flush(timeout)
+
+
 # === Funciones auxiliares para migración/transición ===
 
 def signal_from_dict(data: Dict[str, Any], mode: str, strategy_id: str) -> Signal:
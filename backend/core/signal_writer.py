@@ -0,0 +1,340 @@
+# backend/core/signal_writer.py
+"""
+Write-behind de señales a base de datos.
+
+log_signal() abría una sesión, insertaba UNA fila, hacía commit y enviaba el
+push de forma síncrona antes de volver: el scheduler y los backfills que
+loguean cientos de señales pagaban una transacción + round-trip de push por
+señal. Aquí:
+
+- submit() deja la fila en una cola acotada (SIGNAL_WRITER_QUEUE) y vuelve.
+- Un hilo escritor la drena en lotes (SIGNAL_WRITER_BATCH filas o
+  SIGNAL_WRITER_FLUSH_MS desde la primera) y los inserta en UNA transacción.
+- Los duplicados por idempotency_key se resuelven con un único upsert
+  (ON CONFLICT DO NOTHING ... RETURNING) por lote, sin IntegrityError por fila.
+- Solo las señales realmente insertadas pasan a la etapa de notificación, un
+  segundo hilo con su propia cola (SIGNAL_NOTIFY_QUEUE) que las entrega a
+  core.push_dispatcher (agrupación + fan-out concurrente).
+
+Si un lote falla se reintenta (SIGNAL_WRITER_RETRIES veces, con backoff
+exponencial desde SIGNAL_WRITER_RETRY_MS) y, si sigue fallando, se inserta
+fila a fila: solo se pierde la fila que falla, no el lote entero. Los
+inserts multi-fila se trocean para no pasar del límite de parámetros por
+sentencia del motor (999 en SQLite antiguos).
+
+Si la cola está llena, submit() escribe el lote en el hilo llamante
+(backpressure, sin perder señales). SIGNAL_WRITER=0 desactiva el write-behind
+y cada señal se escribe síncronamente con el mismo código de lote.
+
+El CSV lo sigue escribiendo log_signal() en línea: es el backup durable si el
+proceso muere con filas aún en cola.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+ENABLED = os.getenv("SIGNAL_WRITER", "1") != "0"
+BATCH_SIZE = int(os.getenv("SIGNAL_WRITER_BATCH", "100"))
+FLUSH_INTERVAL = int(os.getenv("SIGNAL_WRITER_FLUSH_MS", "500")) / 1000.0
+QUEUE_SIZE = int(os.getenv("SIGNAL_WRITER_QUEUE", "5000"))
+NOTIFY_QUEUE_SIZE = int(os.getenv("SIGNAL_NOTIFY_QUEUE", "1000"))
+SUBMIT_TIMEOUT = 0.05  # Espera máx. en submit() antes de escribir en línea
+RETRIES = int(os.getenv("SIGNAL_WRITER_RETRIES", "2"))
+RETRY_BASE = int(os.getenv("SIGNAL_WRITER_RETRY_MS", "100")) / 1000.0
+
+# Parámetros enlazados por sentencia: SQLite < 3.32 admite 999, Postgres 65535
+MAX_BIND_PARAMS = {"sqlite": 999, "postgresql": 65535}
+
+
+def _chunks(rows: List[Dict[str, Any]], dialect: str) -> List[List[Dict[str, Any]]]:
+    """Trozos de filas cuyo INSERT multi-fila cabe en el límite de parámetros."""
+    limit = MAX_BIND_PARAMS.get(dialect, 999)
+    ncols = max(len(r) for r in rows)
+    size = max(1, limit // max(1, ncols))
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _dedupe(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Primera aparición de cada idempotency_key dentro del lote."""
+    seen = set()
+    out = []
+    for row in rows:
+        key = row["idempotency_key"]
+        if key not in seen:
+            seen.add(key)
+            out.append(row)
+    return out
+
+
+def persist_batch(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Inserta un lote de filas de signals en una transacción.
+    Devuelve las filas insertadas (las duplicadas se ignoran).
+    """
+    from sqlalchemy import insert, select
+    from database import SessionLocal
+    from models_db import Signal as SignalModel
+    from .performance_stats import record_signals
+
+    rows = _dedupe(rows)
+    if not rows:
+        return []
+
+    db = SessionLocal()
+    try:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            inserted_keys = set()
+            for chunk in _chunks(rows, dialect):
+                stmt = (
+                    dialect_insert(SignalModel)
+                    .values(chunk)
+                    .on_conflict_do_nothing(index_elements=["idempotency_key"])
+                    .returning(SignalModel.idempotency_key)
+                )
+                inserted_keys.update(db.execute(stmt).scalars().all())
+            inserted = [r for r in rows if r["idempotency_key"] in inserted_keys]
+        else:
+            # Otros motores: una consulta de claves existentes + executemany
+            keys = [r["idempotency_key"] for r in rows]
+            existing = set(db.execute(
+                select(SignalModel.idempotency_key).where(SignalModel.idempotency_key.in_(keys))
+            ).scalars().all())
+            inserted = [r for r in rows if r["idempotency_key"] not in existing]
+            if inserted:
+                db.execute(insert(SignalModel), inserted)
+        # Agregados por source/strategy en la misma transacción
+        record_signals(db, inserted)
+        db.commit()
+        return inserted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _notify(row: Dict[str, Any]) -> None:
+    from .push_dispatcher import push_dispatcher
+    title = f"New Signal: {row['direction'].upper()} {row['token']}"
+    body = f"Entry: {row['entry']} | TP: {row['tp']} | SL: {row['sl']}\nStrategy: {row['strategy_id'] or 'Unknown'}"
+    push_dispatcher.submit(title, body, data={"token": row["token"], "type": "signal"}, key=row.get("user_id"))
+
+
+class SignalWriter:
+    """
+    Cola acotada + hilo escritor por lotes + hilo de notificaciones.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 queue_size: int = QUEUE_SIZE, notify_queue_size: int = NOTIFY_QUEUE_SIZE,
+                 enabled: bool = ENABLED):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._notify_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=notify_queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flush_now = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._notifier: Optional[threading.Thread] = None
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "inline_writes": 0,
+            "errors": 0,
+            "retries": 0,
+            "dropped": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "notified": 0,
+            "notify_dropped": 0,
+            "notify_errors": 0,
+        }
+
+    # --- API ---
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Encola una fila de signals (dict de columnas, con idempotency_key)."""
+        self._stats["submitted"] += 1
+        if not self.enabled:
+            self._write([row])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=SUBMIT_TIMEOUT)
+        except queue.Full:
+            # Backpressure: el llamante paga la escritura, pero no se pierde nada
+            self._stats["inline_writes"] += 1
+            self._write([row])
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Espera a que la cola se vacíe y el lote en curso se confirme."""
+        if self._writer is None:
+            return True
+        deadline = time.monotonic() + timeout
+        self._flush_now.set()
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout: float = 10.0) -> None:
+        self.flush(timeout)
+        self._stop.set()
+        for t in (self._writer, self._notifier):
+            if t is not None:
+                t.join(timeout=1.0)
+        if self._notifier is not None:
+            from .push_dispatcher import push_dispatcher
+            push_dispatcher.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "notify_queue_depth": self._notify_queue.qsize(),
+            "notify_queue_max": self._notify_queue.maxsize,
+            **self._stats,
+        }
+
+    # --- Hilos ---
+
+    def _ensure_started(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._stop.clear()
+                self._notifier = threading.Thread(target=self._notify_loop, name="signal-notifier", daemon=True)
+                self._notifier.start()
+                self._writer = threading.Thread(target=self._write_loop, name="signal-writer", daemon=True)
+                self._writer.start()
+                print(f"[SIGNAL WRITER] Started (batch={self.batch_size}, flush={int(self.flush_interval * 1000)}ms)")
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        """Bloquea hasta la primera fila y agrupa hasta batch_size / flush_interval."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._flush_now.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_loop(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                self._flush_now.clear()
+                continue
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        t0 = time.perf_counter()
+        inserted, failed = self._persist(batch)
+        if failed == len(batch):
+            return
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self._stats["batches"] += 1
+        self._stats["written"] += len(inserted)
+        self._stats["duplicates"] += len(batch) - failed - len(inserted)
+        self._stats["last_batch_size"] = len(batch)
+        self._stats["last_flush_ms"] = round(elapsed_ms, 2)
+        if inserted:
+            print(f"[DB] ✅ {len(inserted)} señales guardadas en DB "
+                  f"({len(batch) - failed - len(inserted)} duplicadas, {elapsed_ms:.1f}ms)")
+        elif batch:
+            print(f"[DB] ℹ️ Signal ignored (Duplicate Idempotency Key): {batch[0]['idempotency_key']}"
+                  + (f" (+{len(batch) - 1})" if len(batch) > 1 else ""))
+
+        if inserted:
+            # Suscriptores del stream SSE: no esperar al siguiente sondeo
+            from .live_stream import live_stream
+            live_stream.wake()
+
+        for row in inserted:
+            if self.enabled:
+                try:
+                    self._notify_queue.put_nowait(row)
+                except queue.Full:
+                    self._stats["notify_dropped"] += 1
+            else:
+                self._send(row)
+
+    def _persist(self, batch: List[Dict[str, Any]]):
+        """
+        persist_batch con reintentos y backoff; si el lote sigue fallando,
+        fila a fila para aislar la(s) fila(s) que fallan.
+        Devuelve (filas insertadas, nº de filas perdidas).
+        """
+        error = None
+        for attempt in range(RETRIES + 1):
+            try:
+                return persist_batch(batch), 0
+            except Exception as e:
+                error = e
+                self._stats["errors"] += 1
+                if attempt < RETRIES:
+                    self._stats["retries"] += 1
+                    time.sleep(RETRY_BASE * (2 ** attempt))
+        if len(batch) == 1:
+            self._stats["dropped"] += 1
+            print(f"[DB] ❌ Error CRÍTICO al guardar señal {batch[0].get('idempotency_key')}: {error}")
+            return [], 1
+
+        print(f"[DB] ⚠️ Lote de {len(batch)} señales falló ({error}); reintentando fila a fila")
+        inserted: List[Dict[str, Any]] = []
+        failed = 0
+        for row in batch:
+            try:
+                inserted.extend(persist_batch([row]))
+            except Exception as e:
+                failed += 1
+                self._stats["dropped"] += 1
+                print(f"[DB] ❌ Error CRÍTICO al guardar señal {row.get('idempotency_key')}: {e}")
+        return inserted, failed
+
+    def _notify_loop(self):
+        while not (self._stop.is_set() and self._notify_queue.empty()):
+            try:
+                row = self._notify_queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._send(row)
+
+    def _send(self, row: Dict[str, Any]) -> None:
+        try:
+            _notify(row)
+            self._stats["notified"] += 1
+        except Exception as push_err:
+            self._stats["notify_errors"] += 1
+            print(f"[PUSH] ❌ Error enviando push: {push_err}")
+
+
+signal_writer = SignalWriter()
+atexit.register(signal_writer.close)
@@ -0,0 +1,118 @@
+# backend/core/stats_summary.py
+"""
+Métricas del dashboard (/stats/summary) en una sola pasada.
+
+Antes eran seis consultas agregadas (evaluadas 24h, total evaluadas, wins
+24h, losses 24h, LITE 24h, PnL 7d), cada una re-uniendo signals y filtrando
+source NOT IN (...). Ahora es UNA sentencia:
+
+- ventana 7d sobre signal_evaluations ⨝ signals con agregación condicional
+  (CASE WHEN evaluated_at >= day_ago ...) para evaluadas/wins/losses 24h y
+  PnL 7d (usa el índice de signal_evaluations.evaluated_at);
+- subconsulta escalar de señales LITE 24h (índice de signals.timestamp);
+- subconsulta escalar del total histórico de evaluadas desde
+  performance_stats (mantenida en escritura), sin recorrer todo el histórico.
+
+SQL portable (CASE/COALESCE/SUM): SQLite y PostgreSQL. El resultado se
+guarda en core.cache durante STATS_SUMMARY_TTL segundos y solo un hilo lo
+recalcula a la vez (el dashboard hace polling en cada carga).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from core.cache import cache
+
+STATS_SUMMARY_TTL = int(os.getenv("STATS_SUMMARY_TTL", "15"))
+CACHE_KEY = "stats:summary"
+
+# Fuentes de prueba que no cuentan en el dashboard
+TEST_SOURCES = ("audit_script", "verification")
+
+_compute_lock = threading.Lock()
+
+
+def summary_statement(now: Optional[datetime] = None):
+    """SELECT único (SQLAlchemy Core) con todas las métricas."""
+    from sqlalchemy import select, func, case, literal
+    from models_db import Signal, SignalEvaluation, PerformanceStats
+
+    now = now or datetime.utcnow()
+    day_ago = now - timedelta(hours=24)
+    week_ago = now - timedelta(days=7)
+
+    in_24h = SignalEvaluation.evaluated_at >= day_ago
+
+    def count_if(cond):
+        return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+    lite_24h = (
+        select(func.count(Signal.id))
+        .where(Signal.timestamp >= day_ago, Signal.mode == "LITE", Signal.source.notin_(TEST_SOURCES))
+        .scalar_subquery()
+    )
+    total_eval = (
+        select(func.coalesce(func.sum(PerformanceStats.evaluated), 0))
+        .where(PerformanceStats.scope == "source", PerformanceStats.key.notin_(TEST_SOURCES))
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            count_if(in_24h).label("eval_24h"),
+            count_if(in_24h & (SignalEvaluation.result == "WIN")).label("tp_24h"),
+            count_if(in_24h & (SignalEvaluation.result == "LOSS")).label("sl_24h"),
+            func.coalesce(func.sum(SignalEvaluation.pnl_r), 0.0).label("pnl_7d"),
+            lite_24h.label("lite_24h"),
+            total_eval.label("total_eval"),
+        )
+        .select_from(SignalEvaluation)
+        .join(Signal, Signal.id == SignalEvaluation.signal_id)
+        .where(SignalEvaluation.evaluated_at >= week_ago, Signal.source.notin_(TEST_SOURCES))
+    )
+
+
+def compute_summary(db, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Ejecuta la sentencia y da forma a la respuesta de /stats/summary."""
+    row = db.execute(summary_statement(now)).one()
+    eval_24h = int(row.eval_24h or 0)
+    tp_24h = int(row.tp_24h or 0)
+    sl_24h = int(row.sl_24h or 0)
+    lite_24h = int(row.lite_24h or 0)
+
+    decided = tp_24h + sl_24h
+    return {
+        "win_rate_24h": tp_24h / decided if decided > 0 else None,
+        "signals_evaluated_24h": eval_24h,
+        "signals_total_evaluated": int(row.total_eval or 0),
+        "signals_lite_24h": lite_24h,
+        # Señales LITE de las últimas 24h aún sin evaluar (estimación)
+        "open_signals": max(lite_24h - eval_24h, 0),
+        "pnl_7d": round(float(row.pnl_7d or 0.0), 2),
+    }
+
+
+def cached_summary(ttl: int = STATS_SUMMARY_TTL) -> Dict[str, Any]:
+    """compute_summary con caché corta y un solo cálculo concurrente."""
+    hit = cache.get(CACHE_KEY)
+    if hit is not None:
+        return hit
+
+    with _compute_lock:
+        hit = cache.get(CACHE_KEY)  # otro hilo pudo calcularlo mientras esperábamos
+        if hit is not None:
+            return hit
+
+        from database import SessionLocal
+        db = SessionLocal()
+        try:
+            t0 = time.perf_counter()
+            summary = compute_summary(db)
+            summary["computed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        finally:
+            db.close()
+        cache.set(CACHE_KEY, summary, ttl=ttl)
+        return summary
@@ -0,0 +1,232 @@
+# backend/core/user_cache.py
+"""
+Caché de usuarios autenticados para routers.auth.get_current_user.
+
+get_current_user decodificaba el JWT y hacía SELECT users WHERE email = ...
+en cada petición autenticada (/logs/recent cada 15 s, /analyze/*,
+/auth/me/entitlements...). Ahora el usuario se guarda como AuthUser
+(id, email, name, role, plan, plan_status, plan_expires_at; inmutable y sin
+sesión de SQLAlchemy) en una caché LRU acotada por el `sub` del token:
+
+- USER_CACHE_TTL s de validez (red de seguridad) y USER_CACHE_SIZE entradas.
+- invalidate(user_id) la llaman routers/admin.update_user_plan y las
+  herramientas de línea de comandos que cambian plan o rol. Se propaga al
+  resto de workers por un canal compartido:
+    * con Redis (REDIS_URL): pub/sub en el canal user-cache:invalidate;
+    * sin Redis: el fichero USER_CACHE_BUS_FILE (una línea por id), que cada
+      worker consulta (un stat) como mucho cada USER_CACHE_POLL_MS.
+- Un contador de generación evita que una lectura de la DB en vuelo
+  vuelva a guardar el plan anterior justo después de invalidar.
+
+Los usuarios que no existen no se cachean.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_POLL = int(os.getenv("USER_CACHE_POLL_MS", "1000")) / 1000.0
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUS_FILE = os.getenv("USER_CACHE_BUS_FILE", os.path.join(BASE_DIR, "data", "user_cache.bus"))
+REDIS_CHANNEL = "user-cache:invalidate"
+ALL = "*"  # mensaje de invalidación total
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Lo que las rutas leen de current_user (mismos nombres que models_db.User)."""
+    id: int
+    email: str
+    name: Optional[str]
+    role: Optional[str]
+    plan: Optional[str]
+    plan_status: Optional[str]
+    plan_expires_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user) -> "AuthUser":
+        return cls(id=user.id, email=user.email, name=user.name, role=user.role, plan=user.plan,
+                   plan_status=user.plan_status, plan_expires_at=user.plan_expires_at)
+
+
+class UserCache:
+    def __init__(self, redis_client=None, ttl: float = USER_CACHE_TTL, size: int = USER_CACHE_SIZE,
+                 bus_file: str = BUS_FILE, poll_interval: float = USER_CACHE_POLL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.size = size
+        self.bus_file = bus_file
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[AuthUser, float]]" = OrderedDict()
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "remote_invalidations": 0}
+        # Canal sin Redis: posición leída del fichero y último stat
+        self._bus_offset: Optional[int] = None
+        self._bus_checked = 0.0
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- Lectura ---
+
+    def get(self, subject: str) -> Optional[AuthUser]:
+        self._poll_bus()
+        with self._lock:
+            hit = self._entries.get(subject)
+            if hit is not None and time.monotonic() - hit[1] <= self.ttl:
+                self._entries.move_to_end(subject)
+                self._stats["hits"] += 1
+                return hit[0]
+            if hit is not None:
+                del self._entries[subject]
+            self._stats["misses"] += 1
+            return None
+
+    def generation(self) -> int:
+        """Tómala antes de leer de la DB y pásala a put()."""
+        return self._generation
+
+    def put(self, subject: str, user: AuthUser, generation: int) -> None:
+        self._ensure_listener()
+        with self._lock:
+            if generation != self._generation:
+                return  # hubo una invalidación mientras se leía: no guardar lo leído
+            self._entries[subject] = (user, time.monotonic())
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    # --- Invalidación ---
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Olvida un usuario (o todos) aquí y en el resto de workers."""
+        self._invalidate_local(user_id)
+        self._stats["invalidations"] += 1
+        self._publish(ALL if user_id is None else str(user_id))
+
+    def _invalidate_local(self, user_id: Optional[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                for subject in [s for s, (u, _) in self._entries.items() if u.id == user_id]:
+                    del self._entries[subject]
+
+    def _apply_message(self, message: str) -> None:
+        message = message.strip()
+        if not message:
+            return
+        self._stats["remote_invalidations"] += 1
+        if message == ALL:
+            self._invalidate_local(None)
+        elif message.isdigit():
+            self._invalidate_local(int(message))
+
+    def _publish(self, message: str) -> None:
+        if self.redis is not None:
+            try:
+                self.redis.publish(REDIS_CHANNEL, message)
+                return
+            except Exception as e:
+                print(f"[USER CACHE] ⚠️ Redis publish error, using bus file: {e}")
+        try:
+            os.makedirs(os.path.dirname(self.bus_file), exist_ok=True)
+            with open(self.bus_file, "a", encoding="utf-8") as f:
+                f.write(message + "\n")
+        except OSError as e:
+            print(f"[USER CACHE] ⚠️ Could not write invalidation bus: {e}")
+
+    # --- Canal: Redis pub/sub ---
+
+    def _ensure_listener(self) -> None:
+        if self.redis is None or (self._listener is not None and self._listener.is_alive()):
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen_loop, name="user-cache-listener",
+                                                  daemon=True)
+                self._listener.start()
+
+    def _listen_loop(self) -> None:
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                # Lo cacheado antes de suscribirse pudo perder mensajes
+                self._invalidate_local(None)
+                while not self._stop.is_set():
+                    msg = pubsub.get_message(timeout=1.0)
+                    if msg and msg.get("type") == "message":
+                        data = msg["data"]
+                        self._apply_message(data.decode() if isinstance(data, bytes) else str(data))
+            except Exception as e:
+                print(f"[USER CACHE] ⚠️ Redis listener error: {e}")
+                # Sin canal no se puede confiar en lo cacheado
+                self._invalidate_local(None)
+                self._stop.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    # --- Canal: fichero compartido ---
+
+    def _poll_bus(self) -> None:
+        if self.redis is not None:
+            return
+        now = time.monotonic()
+        if now - self._bus_checked < self.poll_interval:
+            return
+        self._bus_checked = now
+        try:
+            size = os.stat(self.bus_file).st_size
+        except OSError:
+            size = 0
+        if self._bus_offset is None:  # primer vistazo: lo anterior no nos afecta
+            self._bus_offset = size
+            return
+        if size == self._bus_offset:
+            return
+        if size < self._bus_offset:  # truncado o recreado
+            self._bus_offset = 0
+        try:
+            with open(self.bus_file, "r", encoding="utf-8") as f:
+                f.seek(self._bus_offset)
+                chunk = f.read()
+        except OSError:
+            return
+        # Solo líneas completas; una escritura a medias se lee en el siguiente vistazo
+        complete = chunk[:chunk.rfind("\n") + 1]
+        self._bus_offset += len(complete.encode("utf-8"))
+        for line in complete.splitlines():
+            self._apply_message(line)
+
+    # --- Diagnóstico ---
+
+    def stats(self) -> Dict[str, object]:
+        total = self._stats["hits"] + self._stats["misses"]
+        return dict(self._stats, size=len(self._entries), ttl=self.ttl,
+                    hit_ratio=round(self._stats["hits"] / total, 3) if total else 0.0,
+                    channel="redis" if self.redis is not None else "file")
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+def _build() -> UserCache:
+    from core.cache import cache
+    return UserCache(redis_client=getattr(cache, "redis_client", None))
+
+
+user_cache = _build()
@@ -72,11 +72,30 @@ if "sqlite" in DATABASE_URL:
         print(f"[DB WARNING] Could not ensure DB directory exists: {e}")
 
 # == ASYNC ==
+# Pool explícito: las rutas async comparten este engine (core/repository.py).
+# pool_size + max_overflow = conexiones máximas por proceso; pool_timeout =
+# segundos que espera una petición por una conexión libre antes de fallar.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+pool_args = {}
+if ":memory:" not in DATABASE_URL:
+    pool_args = dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     future=True,
-    connect_args=async_connect_args if "postgresql" in DATABASE_URL else {}
+    connect_args=async_connect_args if "postgresql" in DATABASE_URL else {},
+    **pool_args
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -95,6 +114,11 @@ engine_sync = create_engine(
 )
 SessionLocal = sessionmaker_sync(autocommit=False, autoflush=False, bind=engine_sync)
 
+# Perfilado de consultas / pool (core/db_profiler.py, DB_PROFILING=0 lo desactiva)
+from core.db_profiler import instrument
+instrument(engine.sync_engine, "async")
+instrument(engine_sync, "sync")
+
 
 Base = declarative_base()
 
@@ -4,7 +4,9 @@ from __future__ import annotations
 import csv
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
 
 from indicators.market import get_market_data, EXCHANGE_ID
 
@@ -52,32 +54,119 @@ def _parse_iso_ts(ts_str: str) -> datetime:
     return dt
 
 
-def _load_evaluated_signal_ts(token: str) -> Set[str]:
+def _evaluated_index(token: str):
     """
-    Devuelve el conjunto de timestamps (signal_ts) ya evaluados para un token.
+    Índice (core/csv_index.py) de EVALUATED/{token}.evaluated.csv por
+    signal_ts: "¿ya evaluada?" sin releer el CSV en cada ciclo.
     """
+    from core.csv_index import get_index
+
     EVAL_DIR.mkdir(parents=True, exist_ok=True)
-    path = EVAL_DIR / f"{token}.evaluated.csv"
-    if not path.exists():
+    return get_index(EVAL_DIR / f"{token}.evaluated.csv", keys=("signal_ts", "evaluated_at"))
+
+
+def _load_evaluated_signal_ts(token: str) -> Set[int]:
+    """
+    Devuelve el conjunto de timestamps (signal_ts, en µs epoch; ver
+    core.csv_index.ts_key) ya evaluados para un token.
+    """
+    idx = _evaluated_index(token)
+    if not idx.refresh():
         return set()
+    return idx.key_set("signal_ts")
+
+
+class SignalRef(NamedTuple):
+    """Señal de la DB a la que corresponde una fila del CSV LITE."""
+    id: int
+    source: Optional[str]
+    strategy_id: Optional[str]
+    evaluated: bool  # ya tiene SignalEvaluation en DB
+
+
+def _resolve_signal_refs(rows_by_token: Dict[str, List[Dict[str, str]]]) -> None:
+    """
+    Asocia cada fila pendiente del CSV con su Signal de la DB en UNA consulta
+    por ciclo (para cada token, sus señales en el rango de timestamps de sus
+    filas + su evaluación por LEFT JOIN) y guarda la referencia en
+    row["_signal"] (None si no está en DB). El CSV guarda el timestamp sin
+    microsegundos: se empareja por segundo exacto y, si no, por la más
+    cercana a ±1s, como antes.
+    """
+    stamps: Dict[str, List[Tuple[datetime, Dict[str, str]]]] = {}
+    for token, rows in rows_by_token.items():
+        for row in rows:
+            row["_signal"] = None
+        token_stamps = [(_parse_iso_ts(r["timestamp"]), r) for r in rows if r.get("timestamp")]
+        if token_stamps:
+            stamps.setdefault(token.upper(), []).extend(token_stamps)
+    if not stamps:
+        return
 
-    ts_set: Set[str] = set()
-    with path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            ts = row.get("signal_ts")
-            if ts:
-                ts_set.add(ts)
-    return ts_set
+    try:
+        from sqlalchemy import and_, or_
+
+        from database import SessionLocal
+        from models_db import Signal, SignalEvaluation
+
+        ranges = [
+            and_(
+                Signal.token == token,
+                Signal.timestamp >= min(ts for ts, _ in token_stamps) - timedelta(seconds=1),
+                Signal.timestamp < max(ts for ts, _ in token_stamps) + timedelta(seconds=2),
+            )
+            for token, token_stamps in stamps.items()
+        ]
+        db = SessionLocal()
+        try:
+            found = (
+                db.query(Signal.id, Signal.token, Signal.timestamp, Signal.source, Signal.strategy_id,
+                         SignalEvaluation.id)
+                .outerjoin(SignalEvaluation, SignalEvaluation.signal_id == Signal.id)
+                .filter(Signal.mode == "LITE", or_(*ranges))
+                .all()
+            )
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"[DB WARNING] No se pudieron resolver señales: {e}")
+        return
+
+    by_second: Dict[Tuple[str, datetime], List[Tuple[datetime, SignalRef]]] = {}
+    for sig_id, sig_token, sig_ts, source, strategy_id, eval_id in found:
+        ref = SignalRef(sig_id, source, strategy_id, eval_id is not None)
+        by_second.setdefault((sig_token, sig_ts.replace(microsecond=0)), []).append((sig_ts, ref))
+
+    for token, token_stamps in stamps.items():
+        _match_refs(token, token_stamps, by_second)
+
+
+def _match_refs(
+    token: str,
+    stamps: List[Tuple[datetime, Dict[str, str]]],
+    by_second: Dict[Tuple[str, datetime], List[Tuple[datetime, SignalRef]]],
+) -> None:
+    for ts, row in stamps:
+        exact = by_second.get((token, ts))
+        if exact:
+            row["_signal"] = exact[0][1]
+            continue
+        near = [
+            (abs((sig_ts - ts).total_seconds()), ref)
+            for sec in (ts - timedelta(seconds=1), ts + timedelta(seconds=1))
+            for sig_ts, ref in by_second.get((token, sec), [])
+            if abs((sig_ts - ts).total_seconds()) <= 1
+        ]
+        if near:
+            row["_signal"] = min(near, key=lambda x: x[0])[1]
 
 
 def _append_evaluations(token: str, rows: List[Dict[str, str]]) -> int:
     """
     Añade las evaluaciones al CSV de EVALUATED/{token}.evaluated.csv.
-    Y TAMBIÉN guarda en la base de datos (SignalEvaluation).
+    La DB se escribe aparte, una vez por ciclo (_insert_evaluations).
     Devuelve el número de filas nuevas escritas.
     """
-    # 1. CSV
     EVAL_DIR.mkdir(parents=True, exist_ok=True)
     path = EVAL_DIR / f"{token}.evaluated.csv"
     file_exists = path.exists()
@@ -86,75 +175,57 @@ def _append_evaluations(token: str, rows: List[Dict[str, str]]) -> int:
         return 0
 
     with path.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=EVAL_HEADERS)
+        writer = csv.DictWriter(f, fieldnames=EVAL_HEADERS, extrasaction="ignore")
         if not file_exists:
             writer.writeheader()
         for row in rows:
             writer.writerow(row)
+    return len(rows)
+
+
+def _collect_db_evaluations(
+    rows: List[Dict[str, str]],
+    new_evals: List[Dict],
+    sources: Dict[int, Tuple[Optional[str], Optional[str]]],
+    now: datetime,
+) -> None:
+    """
+    Añade a new_evals / sources (signal_id -> (source, strategy_id)) las
+    filas cuya señal está en DB (row["_signal"]) y aún no tiene evaluación.
+    """
+    for row in rows:
+        ref = row.get("_signal")
+        if ref is None or ref.evaluated or ref.id in sources:
+            continue
+        sources[ref.id] = (ref.source, ref.strategy_id)
+        new_evals.append({
+            "signal_id": ref.id,
+            "evaluated_at": now,
+            "result": row.get("result"),
+            "pnl_r": 0.0,
+            "exit_price": float(row.get("price_at_eval", 0) or 0),
+        })
+
+
+def _insert_evaluations(new_evals: List[Dict], sources: Dict[int, Tuple[Optional[str], Optional[str]]]) -> int:
+    """
+    Guarda en SignalEvaluation las evaluaciones de todo el ciclo con un
+    único insert en bloque y un único commit. Devuelve las insertadas.
+    """
+    if not new_evals:
+        return 0
 
-    # 2. DB
     try:
         from database import SessionLocal
-        from models_db import Signal, SignalEvaluation, StrategyConfig
-        from sqlalchemy import select, func
+        from core.performance_stats import insert_evaluations
 
         db = SessionLocal()
-        strategies_to_update = set()
-
         try:
-            for row in rows:
-                # Buscar la señal original
-                ts_str = row.get("signal_ts")
-                if not ts_str:
-                    continue
-                
-                # Parse timestamp to match DB format
-                try:
-                    ts_dt = _parse_iso_ts(ts_str)
-                except:
-                    continue
-
-                # Buscar Signal por token y timestamp
-                stmt = select(Signal).where(
-                    Signal.token == token.upper(),
-                    Signal.timestamp == ts_dt
-                )
-                signal_obj = db.execute(stmt).scalars().first()
-                
-                if not signal_obj:
-                    # Fallback: buscar por rango de 1 segundo
-                    stmt = select(Signal).where(
-                        Signal.token == token.upper(),
-                        Signal.timestamp >= ts_dt - timedelta(seconds=1),
-                        Signal.timestamp <= ts_dt + timedelta(seconds=1)
-                    )
-                    signal_obj = db.execute(stmt).scalars().first()
-
-                if signal_obj:
-                    # Verificar si ya tiene evaluación
-                    if signal_obj.evaluation:
-                        continue
-
-                    # Crear evaluación
-                    eval_obj = SignalEvaluation(
-                        signal_id=signal_obj.id,
-                        evaluated_at=datetime.utcnow(),
-                        result=row.get("result"),
-                        pnl_r=0.0, 
-                        exit_price=float(row.get("price_at_eval", 0)),
-                    )
-                    db.add(eval_obj)
-
-                    # Mark strategy for stats update if present
-                    if signal_obj.strategy_id:
-                        strategies_to_update.add(signal_obj.strategy_id)
-            
+            # ON CONFLICT DO NOTHING (el evaluador del scheduler pudo
+            # adelantarse) + stats solo de las insertadas, misma transacción
+            inserted = insert_evaluations(db, new_evals, sources)
             db.commit()
-            
-            # 3. Update Strategy Stats
-            for strat_id in strategies_to_update:
-                _update_strategy_stats(strat_id, db)
-
+            return inserted
         except Exception as e:
             print(f"[DB ERROR] Error guardando evaluaciones en DB: {e}")
             db.rollback()
@@ -165,35 +236,7 @@ def _append_evaluations(token: str, rows: List[Dict[str, str]]) -> int:
         print("[DB WARNING] No se pudieron importar modelos DB. Solo se guardó CSV.")
     except Exception as e:
         print(f"[DB ERROR] Fallo general DB: {e}")
-
-    return len(rows)
-
-
-def _update_strategy_stats(strategy_id: str, db) -> None:
-    """Recalculate and update stats for a given strategy."""
-    from models_db import Signal, SignalEvaluation, StrategyConfig
-    from sqlalchemy import func
-
-    # Count total evaluated for this strategy
-    total_eval = db.query(func.count(SignalEvaluation.id))\
-        .join(Signal, Signal.id == SignalEvaluation.signal_id)\
-        .filter(Signal.strategy_id == strategy_id).scalar() or 0
-
-    # Count wins (hit-tp)
-    total_wins = db.query(func.count(SignalEvaluation.id))\
-        .join(Signal, Signal.id == SignalEvaluation.signal_id)\
-        .filter(Signal.strategy_id == strategy_id)\
-        .filter(SignalEvaluation.result == "hit-tp").scalar() or 0
-
-    # Calculate Rate
-    win_rate = (total_wins / total_eval) if total_eval > 0 else 0.0
-
-    # Update Config
-    strat_config = db.query(StrategyConfig).filter(StrategyConfig.strategy_id == strategy_id).first()
-    if strat_config:
-        strat_config.win_rate = win_rate
-        db.commit()
-        print(f"[STATS] Updated {strategy_id}: WinRate={win_rate:.2%} ({total_wins}/{total_eval})")
+    return 0
 
 
 def _evaluate_signal_row(row: Dict[str, str]) -> Dict[str, str]:
@@ -223,6 +266,7 @@ def _evaluate_signal_row(row: Dict[str, str]) -> Dict[str, str]:
     # Si entry no tiene sentido, devolvemos neutral
     if entry <= 0:
         return {
+            "_signal": row.get("_signal"),
             "signal_ts": signal_ts_str,
             "evaluated_at": evaluated_at_dt.replace(microsecond=0).isoformat() + "Z",
             "token": token,
@@ -271,6 +315,7 @@ def _evaluate_signal_row(row: Dict[str, str]) -> Dict[str, str]:
             result = "neutral"
 
     eval_row = {
+        "_signal": row.get("_signal"),  # SignalRef resuelta al cargar pendientes
         "signal_ts": signal_ts_str,
         "evaluated_at": evaluated_at_dt.replace(microsecond=0).isoformat() + "Z",
         "token": token,
@@ -294,39 +339,40 @@ def _eligible_signals_for_token(token: str) -> List[Dict[str, str]]:
 
     - tengan al menos EVAL_DELAY_MIN minutos de antigüedad
     - aún no estén en logs/EVALUATED/{token}.evaluated.csv
+
+    La SignalRef de cada fila ("_signal") la resuelve evaluate_all_tokens
+    para todos los tokens a la vez (_resolve_signal_refs).
     """
+    from core.csv_index import MISSING, get_index, ts_key
+
     lite_path = LITE_DIR / f"{token}.csv"
     if not lite_path.exists():
         return []
 
-    already_eval = _load_evaluated_signal_ts(token)
+    eval_idx = _evaluated_index(token)
+    already_eval = eval_idx.column("signal_ts") if eval_idx.refresh() else None
 
     now = datetime.utcnow()
     min_age = timedelta(minutes=EVAL_DELAY_MIN)
 
-    candidates: List[Dict[str, str]] = []
-
-    with lite_path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            ts_str = row.get("timestamp", "")
-            if not ts_str:
-                continue
-
-            if ts_str in already_eval:
-                continue
-
-            ts = _parse_iso_ts(ts_str)
-            if now - ts >= min_age:
-                candidates.append(row)
-
-    return candidates
+    # Filtro sobre el índice (timestamps en µs) y lectura solo de las filas
+    # candidatas, en vez de parsear el CSV entero en cada ciclo
+    lite_idx = get_index(lite_path, keys=("timestamp",))
+    ts_col = lite_idx.column("timestamp")
+    pending = (ts_col != MISSING) & (ts_col <= ts_key(now - min_age))
+    if already_eval is not None and len(already_eval):
+        pending &= ~np.isin(ts_col, already_eval)
+    return [
+        row for row in lite_idx.rows_at(np.flatnonzero(pending).tolist())
+        if row.get("timestamp")
+    ]
 
 
 def evaluate_all_tokens() -> Tuple[int, int]:
     """
     Recorre todos los CSV en logs/LITE/ y evalúa las señales pendientes
-    para cada token.
+    para cada token. Los CSV se escriben por token; la DB se consulta una
+    vez (señales de todas las pendientes) y se escribe una vez por ciclo.
 
     Devuelve (num_tokens_procesados, num_evaluaciones_nuevas).
     """
@@ -335,16 +381,19 @@ def evaluate_all_tokens() -> Tuple[int, int]:
         return 0, 0
 
     tokens = sorted(p.stem for p in LITE_DIR.glob("*.csv"))
-    total_tokens = 0
+    total_tokens = len(tokens)
     total_evals = 0
 
-    for token in tokens:
-        total_tokens += 1
-        pending_rows = _eligible_signals_for_token(token)
-        if not pending_rows:
-            # print(f"[EVAL] {token}: sin señales elegibles.") # Less verbose
-            continue
+    pending_by_token = {token: _eligible_signals_for_token(token) for token in tokens}
+    pending_by_token = {token: rows for token, rows in pending_by_token.items() if rows}
+    # Señal de DB de cada candidata: una consulta por ciclo
+    _resolve_signal_refs(pending_by_token)
 
+    now = datetime.utcnow()
+    new_evals: List[Dict] = []
+    sources: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    for token, pending_rows in pending_by_token.items():
         eval_rows_to_save: List[Dict[str, str]] = []
         for row in pending_rows:
             eval_result = _evaluate_signal_row(row)
@@ -359,9 +408,13 @@ def evaluate_all_tokens() -> Tuple[int, int]:
 
         if eval_rows_to_save:
             written = _append_evaluations(token, eval_rows_to_save)
+            _collect_db_evaluations(eval_rows_to_save, new_evals, sources, now)
             total_evals += written
             print(f"[EVAL] {token}: {written} señales finalizadas (TP/SL/Neutral).")
 
+    # Un insert en bloque y un commit para todo el ciclo
+    _insert_evaluations(new_evals, sources)
+
     if total_evals > 0:
         print(f"[EVAL] Resumen → tokens: {total_tokens}, evaluaciones nuevas: {total_evals}")
     return total_tokens, total_evals
@@ -1,5 +1,3 @@
-import pandas as pd
-import ta
 # Importar desde el módulo core
 try:
     from core.market_data_api import get_ohlcv_data
@@ -9,6 +7,11 @@ except ImportError:
     import os
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
     from core.market_data_api import get_ohlcv_data
+from core.lazy_imports import lazy_module
+
+# pandas + ta solo al calcular indicadores (no al importar main)
+pd = lazy_module("pandas")
+ta = lazy_module("ta")
 
 # Exchange ID for data source (used by evaluator)
 EXCHANGE_ID = "binance"
@@ -2,6 +2,9 @@ import sys
 import os
 import asyncio
 import csv
+import time
+
+_T_IMPORT = time.perf_counter()  # perfil de arranque (core/lazy_imports.py)
 from sqlalchemy import text  # Added for schema fix
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, Any, Tuple
@@ -19,7 +22,7 @@ sys.path.append(current_dir)
 load_dotenv(os.path.join(current_dir, ".env"))
 
 # ==== 2. Imports locales ====
-from indicators.market import get_market_data  # Capa Quant
+from core.indicator_snapshots import indicator_snapshots  # Capa Quant (snapshots de indicadores)
 from models import LiteReq, LiteSignal, ProReq, AdvisorReq  # Modelos oficiales LITE/PRO
 from pydantic import BaseModel
 
@@ -47,6 +50,14 @@ app.state.limiter = limiter
 app.add_exception_handler(429, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware) # Must be added after other middlewares if order matters, but here is fine.
 
+# Compresión gzip de respuestas grandes (curvas de backtest, OHLCV, listados).
+# No se aplica a text/event-stream (stream SSE). Ver core/fast_json.py.
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+if GZIP_MIN_BYTES > 0:
+    from starlette.middleware.gzip import GZipMiddleware
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_LEVEL)
+
 # Payload Size Limit Middleware (64KB)
 @app.middleware("http")
 async def limit_upload_size(request: Request, call_next):
@@ -105,10 +116,15 @@ def ready_check():
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     import time
+    from core import db_profiler
     start_time = time.time()
-    response = await call_next(request)
+    # Consultas y tiempo de DB de esta petición (ver core/db_profiler.py)
+    with db_profiler.request_scope(f"{request.method} {request.url.path}") as db_stats:
+        response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    if db_profiler.DB_PROFILE_HEADERS:
+        response.headers.update(db_profiler.response_headers(db_stats))
     
     # Simple Request Logging
     # print(f"[REQ] {request.method} {request.url.path} - {process_time:.4f}s")
@@ -139,6 +155,8 @@ from models_db import Signal as SignalDB, SignalEvaluation, User, StrategyConfig
 
 @app.on_event("startup")
 async def startup():
+    from core.lazy_imports import mark_phase
+    t_startup = time.perf_counter()
     # Diagnóstico de DB
     db_url = os.getenv("DATABASE_URL", "")
     if "sqlite" in db_url or not db_url:
@@ -164,21 +182,89 @@ async def startup():
         except Exception as e:
             # It might fail if table doesn't exist yet or other reasons, but safe to ignore
             print(f"⚠️ [DB FIX] Schema update skipped: {e}")
+
+    # Índices nuevos sobre tablas ya existentes (create_all no los añade)
+    try:
+        async with engine.begin() as conn:
+            for ddl in (
+                "CREATE INDEX IF NOT EXISTS ix_signal_evaluations_evaluated_at ON signal_evaluations (evaluated_at)",
+                "CREATE INDEX IF NOT EXISTS ix_signals_user_id_timestamp ON signals (user_id, timestamp)",
+                "CREATE INDEX IF NOT EXISTS ix_signals_mode_token_timestamp ON signals (mode, token, timestamp)",
+                "CREATE INDEX IF NOT EXISTS ix_signals_source_timestamp ON signals (source, timestamp)",
+                "CREATE INDEX IF NOT EXISTS ix_users_created_at ON users (created_at)",
+            ):
+                await conn.execute(text(ddl))
+    except Exception as e:
+        print(f"⚠️ [DB FIX] Index creation skipped: {e}")
+
+    # Cuotas: índice único de daily_usage para el upsert atómico (core/quota.py).
+    # Si falla por duplicados (carrera del código anterior), se deduplica y se reintenta.
+    from core.quota import DEDUPE_DDL, UNIQUE_INDEX_DDL
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(UNIQUE_INDEX_DDL))
+    except Exception:
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(DEDUPE_DDL))
+                await conn.execute(text(UNIQUE_INDEX_DDL))
+            print("[QUOTA] ✅ daily_usage deduplicada, índice único creado")
+        except Exception as e:
+            print(f"⚠️ [DB FIX] daily_usage unique index skipped: {e}")
     
-    # Registrar estrategias built-in
-    print("\n📦 Registering strategies...")
+    # Una evaluación por señal: índice único para el ON CONFLICT de los evaluadores
+    # (sustituye al índice simple). Con duplicados previos se deduplica, y las
+    # estadísticas, que los contaron dos veces, se reconstruyen.
+    from core.performance_stats import EVAL_DEDUPE_DDL, EVAL_UNIQUE_INDEX_DDL
+    rebuild_stats = False
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(EVAL_UNIQUE_INDEX_DDL))
+    except Exception:
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(EVAL_DEDUPE_DDL))
+                await conn.execute(text(EVAL_UNIQUE_INDEX_DDL))
+            rebuild_stats = True
+            print("[STATS] ✅ signal_evaluations deduplicada, índice único creado")
+        except Exception as e:
+            print(f"⚠️ [DB FIX] signal_evaluations unique index skipped: {e}")
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX IF EXISTS ix_signal_evaluations_signal_id"))
+    except Exception as e:
+        print(f"⚠️ [DB FIX] Old signal_evaluations index kept: {e}")
+
+    # Agregados de rendimiento: primera construcción si la tabla es nueva
+    try:
+        from database import SessionLocal
+        from core.performance_stats import ensure_built, rebuild
+        stats_db = SessionLocal()
+        try:
+            if rebuild_stats:
+                rebuild(stats_db)
+            else:
+                ensure_built(stats_db)
+        finally:
+            stats_db.close()
+    except Exception as e:
+        print(f"⚠️ [STATS] performance_stats rebuild skipped: {e}")
+
+    mark_phase("startup: db", t_startup)
+
+    # Descubrimiento de estrategias en segundo plano (índice de metadatos
+    # cacheado: sin importar módulos salvo los que hayan cambiado)
     from strategies.registry import get_registry
-    from strategies.example_rsi_macd import RSIMACDDivergenceStrategy
-    from strategies.ma_cross import MACrossStrategy
-    from strategies.DonchianBreakoutV2 import DonchianBreakoutV2
-    from strategies.bb_mean_reversion import BBMeanReversionStrategy
-    
-    registry = get_registry()
-    registry.register(RSIMACDDivergenceStrategy)
-    registry.register(MACrossStrategy)
-    registry.register(DonchianBreakoutV2)
-    registry.register(BBMeanReversionStrategy)
-    print("✅ Strategies registered\n")
+
+    def warm_strategy_registry():
+        t_strategies = time.perf_counter()
+        try:
+            get_registry().discover()
+        except Exception as e:
+            print(f"⚠️ [STRATEGIES] Discovery failed: {e}")
+        mark_phase("startup: strategies", t_strategies)
+
+    asyncio.get_running_loop().run_in_executor(None, warm_strategy_registry)
 
     # [NEW] Background Task: Automatic Signal Evaluation (every 5 mins)
     async def run_evaluator_loop():
@@ -193,12 +279,32 @@ async def startup():
                 count, new_evals = await run_in_threadpool(evaluate_all_tokens)
                 if new_evals > 0:
                     print(f"[BACKGROUND] ✅ Evaluated {new_evals} signals.")
+                    from core.live_stream import live_stream
+                    live_stream.wake()
             except Exception as e:
                 print(f"[BACKGROUND] ⚠️ Evaluator loop error: {e}")
                 await asyncio.sleep(60) # Retry sooner on error
 
     asyncio.create_task(run_evaluator_loop())
 
+    # Snapshots de indicadores: refresco en cada cierre de vela (LITE/PRO/advisor)
+    from core.indicator_snapshots import SNAPSHOT_ENABLED
+    if SNAPSHOT_ENABLED:
+        asyncio.create_task(indicator_snapshots.run_refresh_loop())
+    mark_phase("startup", t_startup)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    # Vacía las señales pendientes del write-behind antes de salir
+    from core.signal_writer import signal_writer
+    signal_writer.close()
+    # Incrementos de cuota aún en memoria (backend Redis)
+    from core.quota import quota
+    quota.close()
+    from core.user_cache import user_cache
+    user_cache.close()
+
 
 # ==== Routers ====
 from routers.strategies import router as strategies_router
@@ -211,6 +317,7 @@ from routers.analysis import router as analysis_router
 from routers.backtest import router as backtest_router
 from routers.auth import router as auth_router
 from routers.admin import router as admin_router # M5: Admin Panel
+from routers.stream import router as stream_router
 
 app.include_router(strategies_router, prefix="/strategies", tags=["Strategies"])
 app.include_router(logs_router, prefix="/logs", tags=["Logs"])
@@ -222,6 +329,7 @@ app.include_router(system_router, prefix="/system", tags=["System"])
 app.include_router(backtest_router)
 app.include_router(auth_router) # [NEW] Register Auth Router
 app.include_router(admin_router, prefix="/admin", tags=["Admin"]) # M5: Admin Panel
+app.include_router(stream_router)  # SSE: señales, evaluaciones y precios en vivo
 
 
 # ==== 4. Configuración global ====
@@ -293,7 +401,9 @@ def save_strict_log(mode: str, data: Dict[str, Any]) -> None:
         # Save to database
         db = SessionLocal()
         try:
+            from core.performance_stats import record_signals
             db.add(signal)
+            record_signals(db, [{"source": signal.source, "strategy_id": None, "timestamp": timestamp}])
             db.commit()
             print(f"[DB] ✅ Señal guardada en DB: {mode} - {signal.token} - {ts_str}")
         except Exception as db_err:
@@ -308,13 +418,18 @@ def save_strict_log(mode: str, data: Dict[str, Any]) -> None:
         # Continue even if DB save fails (CSV is saved)
 
 
-def read_logs_by_token_and_mode(mode: str, token: str) -> List[dict]:
+def read_logs_by_token_and_mode(mode: str, token: str, limit: Optional[int] = None) -> List[dict]:
     """
     Lee los logs de un token y modo específico.
 
     - Para LITE, PRO, ADVISOR → backend/logs/{MODE}/{token}.csv
     - Para EVALUATED          → backend/logs/EVALUATED/{token}.evaluated.csv
+
+    Con `limit`, solo las últimas `limit` filas (índice de core/csv_index.py,
+    sin parsear el fichero entero).
     """
+    from core.csv_index import get_index
+
     mode_up = mode.upper()
     token_low = token.lower()
 
@@ -328,9 +443,13 @@ def read_logs_by_token_and_mode(mode: str, token: str) -> List[dict]:
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail=f"No logs found for {mode}/{token}")
 
-    with open(filepath, mode="r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+    idx = get_index(filepath, keys=_csv_index_keys(mode_up))
+    return idx.tail(limit) if limit is not None else idx.rows()
+
+
+def _csv_index_keys(mode_up: str) -> tuple:
+    """Columnas de timestamp indexadas en los CSV de cada modo."""
+    return ("signal_ts", "evaluated_at") if mode_up == "EVALUATED" else ("timestamp",)
 
 
 
@@ -415,19 +534,21 @@ async def get_logs(mode: str, token: str):
         # 2. Fallback: Leer de CSV solo si DB falla completamente
         mode_dir = os.path.join(LOGS_DIR, mode_upper)
         if os.path.exists(mode_dir):
+            from core.csv_index import get_index
+
             csv_logs = []
+            keys = _csv_index_keys(mode_upper)
+            # Solo las 100 filas más recientes de cada CSV (índice, sin parsear el fichero)
             # Si token es 'all', leemos TODOS los CSVs
             if token_lower == "all":
                 try:
                     for filename in os.listdir(mode_dir):
                         if filename.endswith(".csv"):
                             filepath = os.path.join(mode_dir, filename)
-                            with open(filepath, newline="", encoding="utf-8") as f:
-                                reader = csv.DictReader(f)
-                                for row in reader:
-                                    if "token" not in row:
-                                        row["token"] = filename.replace(".csv", "").replace(".evaluated", "").upper()
-                                    csv_logs.append(row)
+                            for row in get_index(filepath, keys=keys).latest(100):
+                                if "token" not in row:
+                                    row["token"] = filename.replace(".csv", "").replace(".evaluated", "").upper()
+                                csv_logs.append(row)
                 except Exception as e:
                     print(f"[LOGS] Error reading CSVs for ALL: {e}")
             else:
@@ -436,10 +557,7 @@ async def get_logs(mode: str, token: str):
                 csv_path = os.path.join(mode_dir, filename)
                 if os.path.exists(csv_path):
                     try:
-                        with open(csv_path, newline="", encoding="utf-8") as f:
-                            reader = csv.DictReader(f)
-                            for row in reader:
-                                csv_logs.append(row)
+                        csv_logs.extend(get_index(csv_path, keys=keys).latest(100))
                     except Exception as e:
                         print(f"[LOGS] Error reading CSV {filename}: {e}")
 
@@ -538,8 +656,8 @@ def _analyze_lite_unsafe(req: LiteReq):
     token = req.token.lower()
     tf = req.timeframe
 
-    # 1) Capa Quant
-    df, market = get_market_data(token, tf, limit=300)
+    # 1) Capa Quant (snapshot precalculado; bajo demanda si está caducado)
+    market = indicator_snapshots.latest(token, tf)
     if not market:
         raise HTTPException(status_code=502, detail="Error fetching market data")
 
@@ -661,7 +779,7 @@ def analyze_pro(
     tf = req.timeframe
 
     # 1) Capa Quant
-    df, market = get_market_data(token, tf, limit=200)
+    market = indicator_snapshots.latest(token, tf)
     if not market:
         raise HTTPException(status_code=502, detail="Error fetching market data")
 
@@ -726,7 +844,7 @@ def analyze_advisor_chat(
             target_tf = req.context.get("timeframe", "1h")
             
             # Fetch real-time data
-            _, market_data = get_market_data(target_token, target_tf, limit=50)
+            market_data = indicator_snapshots.latest(target_token, target_tf)
             
             if market_data:
                 price = market_data.get('price', 'N/A')
@@ -768,9 +886,19 @@ GUIDELINES:
     # 3. Preparar historial
     messages = [{"role": m.role, "content": m.content} for m in req.history]
     
-    # 4. Llamar al servicio
-    service = get_ai_service()
-    response_text = service.chat(messages, system_instruction=SYSTEM_PROMPT)
+    # 4. Llamar al servicio (caché por vela + coalescing, core/llm_cache.py).
+    # La hora del prompt no entra en la clave: solo contexto de mercado e historial.
+    from core.llm_cache import AnalysisKey, last_closed_ts, llm_cache, snapshot_hash
+    ctx_token = req.context.get("token") if req.context else None
+    ctx_tf = req.context.get("timeframe", "1h") if ctx_token else None
+    key = AnalysisKey(
+        kind="advisor", token=ctx_token or "*", timeframe=ctx_tf or "-", candle_ts=last_closed_ts(ctx_tf),
+        template_version="advisor-chat-v1",
+        snapshot_hash=snapshot_hash(market_context_str, messages),
+    )
+    response_text = llm_cache.get_or_generate(
+        key, lambda: get_ai_service().chat(messages, system_instruction=SYSTEM_PROMPT)
+    )
     
     return {
         "role": "assistant",
@@ -832,83 +960,13 @@ def _parse_iso_ts(value: Optional[str]):
 
 def compute_stats_summary() -> Dict[str, Any]:
     """
-    Calcula métricas agregadas desde la base de datos.
+    Calcula métricas agregadas desde la base de datos
+    (una sola consulta + caché corta, ver core/stats_summary.py).
     Fallback a CSV si la DB falla.
     """
     try:
-        from typing import Dict, Any
-        from sqlalchemy import func
-        from models_db import Signal, SignalEvaluation
-        from database import SessionLocal
-        
-        db = SessionLocal()
-        try:
-            day_ago = datetime.utcnow() - timedelta(hours=24)
-            
-            # Filter out test sources
-            test_sources = ['audit_script', 'verification']
-            
-            # Signals evaluated in last 24h (Real signals only)
-            eval_24h_count = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
-                SignalEvaluation.evaluated_at >= day_ago,
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0
-            
-            # Total evaluations (Real only)
-            total_eval = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0
-            
-            # Win/Loss counts in last 24h (Real only)
-            tp_24h = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
-                SignalEvaluation.evaluated_at >= day_ago,
-                SignalEvaluation.result == 'WIN',
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0
-            
-            sl_24h = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
-                SignalEvaluation.evaluated_at >= day_ago,
-                SignalEvaluation.result == 'LOSS',
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0
-            
-            # LITE signals in last 24h (Real only)
-            lite_24h = db.query(func.count(Signal.id)).filter(
-                Signal.timestamp >= day_ago,
-                Signal.mode == 'LITE',
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0
-            
-            # Calculate win rate
-            decided = tp_24h + sl_24h
-            win_rate_24h = tp_24h / decided if decided > 0 else None
-            
-            # Open signals (LITE signals not yet evaluated)
-            open_signals_est = max(lite_24h - eval_24h_count, 0)
-            
-            # [NEW] Calculate PnL (7d) (Real only)
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            pnl_7d_total = db.query(func.sum(SignalEvaluation.pnl_r)).join(Signal).filter(
-                SignalEvaluation.evaluated_at >= week_ago,
-                Signal.source.notin_(test_sources)
-            ).scalar() or 0.0
-
-            # [NEW] Active Agents Count (Requires StrategyConfig check)
-            # Assuming marketplace_config.py loads into StrategyConfig or we just count enabled strategies via API
-            # For now, we return 0 here and let frontend fetch /strategies to count enabled ones.
-            # actually better to let frontend count active agents from /strategies endpoint.
-            
-            return {
-                "win_rate_24h": win_rate_24h,
-                "signals_evaluated_24h": eval_24h_count,
-                "signals_total_evaluated": total_eval,
-                "signals_lite_24h": lite_24h,
-                "open_signals": open_signals_est,
-                "pnl_7d": round(pnl_7d_total, 2)
-            }
-        finally:
-            db.close()
-            
+        from core.stats_summary import cached_summary
+        return cached_summary()
     except Exception as e:
         print(f"Database query failed, falling back to CSV: {e}")
         # Fallback to CSV-based computation
@@ -929,6 +987,13 @@ def compute_stats_summary_from_csv() -> Dict[str, Any]:
     tp_24h = 0
     sl_24h = 0
 
+    from core.csv_index import MISSING, get_index, ts_key
+    import numpy as np
+
+    # Índices de core/csv_index.py: conteos sobre arrays de timestamps y
+    # solo se leen las filas de las últimas 24h
+    day_ago_key = ts_key(day_ago)
+
     if os.path.isdir(evaluated_dir):
         for name in os.listdir(evaluated_dir):
             lower = name.lower()
@@ -937,20 +1002,18 @@ def compute_stats_summary_from_csv() -> Dict[str, Any]:
 
             path = os.path.join(evaluated_dir, name)
             try:
-                with open(path, newline="", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        total_eval += 1
-                        ts = _parse_iso_ts(
-                            row.get("evaluated_at") or row.get("signal_ts")
-                        )
-                        if ts and ts >= day_ago:
-                            eval_24h += 1
-                            result = (row.get("result") or "").strip()
-                            if result == "hit-tp":
-                                tp_24h += 1
-                            elif result == "hit-sl":
-                                sl_24h += 1
+                idx = get_index(path, keys=("signal_ts", "evaluated_at"))
+                total_eval += len(idx)
+                evaluated_at = idx.column("evaluated_at")
+                ts = np.where(evaluated_at != MISSING, evaluated_at, idx.column("signal_ts"))
+                recent = np.flatnonzero(ts >= day_ago_key)
+                eval_24h += len(recent)
+                for row in idx.rows_at(recent.tolist()):
+                    result = (row.get("result") or "").strip()
+                    if result == "hit-tp":
+                        tp_24h += 1
+                    elif result == "hit-sl":
+                        sl_24h += 1
             except Exception:
                 # No queremos que un CSV roto tumbe todo el endpoint
                 continue
@@ -966,12 +1029,7 @@ def compute_stats_summary_from_csv() -> Dict[str, Any]:
 
             path = os.path.join(lite_dir, name)
             try:
-                with open(path, newline="", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        ts = _parse_iso_ts(row.get("timestamp"))
-                        if ts and ts >= day_ago:
-                            lite_24h += 1
+                lite_24h += get_index(path, keys=("timestamp",)).count_since(day_ago)
             except Exception:
                 continue
 
@@ -991,14 +1049,30 @@ def compute_stats_summary_from_csv() -> Dict[str, Any]:
 
 
 @app.get("/stats/summary")
-def stats_summary():
+def stats_summary(request: Request):
     """
     Métricas agregadas simples para el dashboard de TraderCopilot.
+    ETag / 304 mientras no haya señales/evaluaciones nuevas dentro de la
+    misma ventana STATS_SUMMARY_TTL (las ventanas 24h/7d se deslizan).
     """
-    try:
-        return compute_stats_summary()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    from core.response_cache import response_cache, data_version
+    from core.stats_summary import STATS_SUMMARY_TTL
+
+    def build(headers):
+        try:
+            summary = dict(compute_stats_summary())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        summary.pop("computed_ms", None)  # diagnóstico: cambiaría el ETag en cada cálculo
+        return summary
+
+    def version():
+        try:
+            return data_version(), int(time.time() // max(STATS_SUMMARY_TTL, 1))
+        except Exception:
+            return None  # DB caída: fallback CSV sin cachear
+
+    return response_cache.respond(request, "stats.summary", version=version, build=build)
 
 # ==== 11. Fallback global ====
 
@@ -1122,6 +1196,9 @@ async def factory_reset(request: Request):
         print(f"[SYSTEM] Reset Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+from core.lazy_imports import mark_phase as _mark_phase
+_mark_phase("import main", _T_IMPORT)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -33,19 +33,32 @@ class Signal(Base):
     # Soft Delete / Admin Visibility
     is_hidden = Column(Integer, default=0) # 0=Visible, 1=Hidden (Boolean as Integer for SQLite/Postgres compatibility)
 
+    # Índices compuestos del feed (core/signal_feed.py): filtro + orden por timestamp
+    __table_args__ = (
+        Index("ix_signals_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_signals_mode_token_timestamp", "mode", "token", "timestamp"),
+        Index("ix_signals_source_timestamp", "source", "timestamp"),
+    )
+
 
 class SignalEvaluation(Base):
     __tablename__ = "signal_evaluations"
 
     id = Column(Integer, primary_key=True, index=True)
     signal_id = Column(Integer, ForeignKey("signals.id"))
-    evaluated_at = Column(DateTime, default=datetime.utcnow)
+    evaluated_at = Column(DateTime, default=datetime.utcnow, index=True)
     result = Column(String) # WIN, LOSS, BE
     pnl_r = Column(Float)
     exit_price = Column(Float)
     
     signal = relationship("Signal", back_populates="evaluation")
 
+    # Una evaluación por señal: los evaluadores insertan con ON CONFLICT DO NOTHING
+    # (core/performance_stats.insert_evaluations)
+    __table_args__ = (
+        Index("uq_signal_evaluations_signal_id", "signal_id", unique=True),
+    )
+
 class User(Base):
     __tablename__ = "users"
 
@@ -60,7 +73,7 @@ class User(Base):
     plan_status = Column(String, default="active") # active, inactive
     plan_expires_at = Column(DateTime, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class StrategyConfig(Base):
@@ -152,10 +165,54 @@ class DailyUsage(Base):
     date = Column(String, index=True)     # YYYY-MM-DD
     count = Column(Integer, default=0)
 
-    # Unique constraint to prevent race conditions (handled by DB logic usually, 
-    # but index helps). In Postgres we'd use a UniqueConstraint.
-    # For now, we rely on the application logic 'check_and_increment' doing a localized lock
-    # or atomic update.
+    # Único (user_id, feature, date): destino del upsert atómico de core/quota.py
+    # (INSERT ... ON CONFLICT DO UPDATE ... RETURNING). En tablas existentes
+    # lo crea el startup de main.py (tras quitar duplicados).
+    __table_args__ = (
+        Index("uq_daily_usage_user_feature_date", "user_id", "feature", "date", unique=True),
+    )
+
+
+class PerformanceStats(Base):
+    """
+    Agregados de rendimiento mantenidos incrementalmente
+    (core/performance_stats.py), en la misma transacción que escribe la
+    señal o la evaluación.
+
+    scope = "source"   -> key = Signal.source (p.ej. "Marketplace:{persona_id}")
+    scope = "strategy" -> key = Signal.strategy_id
+    """
+    __tablename__ = "performance_stats"
+    __table_args__ = (UniqueConstraint("scope", "key", name="uq_performance_stats_scope_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+
+    total_signals = Column(Integer, default=0, nullable=False)
+    evaluated = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    breakeven = Column(Integer, default=0, nullable=False)
+    pnl_r_sum = Column(Float, default=0.0, nullable=False)
+
+    last_signal_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class IndicatorSnapshot(Base):
+    """
+    Últimos indicadores por (token, timeframe) y su estado incremental
+    (core/indicator_snapshots.py). Espejo de la caché en memoria: lo leen
+    otros workers y permite retomar tras un reinicio.
+    """
+    __tablename__ = "indicator_snapshots"
+    __table_args__ = (UniqueConstraint("token", "timeframe", name="uq_indicator_snapshots_token_tf"),)
 
+    id = Column(Integer, primary_key=True, index=True)
+    token = Column(String, nullable=False)
+    timeframe = Column(String, nullable=False)
+    candle_ts = Column(BigInteger, nullable=False)  # apertura de la última vela (ms)
+    values_json = Column(Text, nullable=False)  # price, rsi, ema21, ema50, macd, macd_hist, atr, trend
+    state_json = Column(Text, nullable=False)   # IndicatorState
+    updated_at = Column(DateTime, default=datetime.utcnow)
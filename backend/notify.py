@@ -1,8 +1,5 @@
 from __future__ import annotations
 import os, json, requests
-from pywebpush import webpush, WebPushException
-from database import SessionLocal
-from models_db import PushSubscription
 
 def send_telegram(text: str) -> dict:
     token = os.getenv("TRADERCOPILOT_BOT_TOKEN","").strip()
@@ -21,55 +18,9 @@ def send_telegram(text: str) -> dict:
 def send_push_notification(title: str, body: str, data: dict = None) -> dict:
     """
     Send Web Push notification to all subscribers.
+    Fan-out concurrente con reintentos (core/push_dispatcher.py); bloquea
+    hasta terminar. Para señales usar push_dispatcher.submit (agrupa y no
+    bloquea al llamante).
     """
-    private_key = os.getenv("VAPID_PRIVATE_KEY")
-    if not private_key:
-        return {"ok": False, "error": "Missing VAPID_PRIVATE_KEY"}
-
-    # Claims for VAPID
-    claims = {
-        "sub": os.getenv("VAPID_MAIL", "mailto:admin@tradercopilot.com")
-    }
-
-    db = SessionLocal()
-    subs = db.query(PushSubscription).all()
-    
-    results = {"success": 0, "failed": 0, "removed": 0}
-    
-    payload = json.dumps({
-        "title": title,
-        "body": body,
-        "icon": "/icon-192.png",
-        "data": data or {}
-    })
-
-    for sub in subs:
-        try:
-            webpush(
-                subscription_info={
-                    "endpoint": sub.endpoint,
-                    "keys": {
-                        "p256dh": sub.p256dh,
-                        "auth": sub.auth
-                    }
-                },
-                data=payload,
-                vapid_private_key=private_key,
-                vapid_claims=claims
-            )
-            results["success"] += 1
-        except WebPushException as ex:
-            # If 410 Gone, remove subscription
-            if ex.response and ex.response.status_code == 410:
-                db.delete(sub)
-                results["removed"] += 1
-            else:
-                results["failed"] += 1
-                print(f"WebPush Error: {ex}")
-        except Exception as e:
-            results["failed"] += 1
-            print(f"General Push Error: {e}")
-            
-    db.commit()
-    db.close()
-    return results
+    from core.push_dispatcher import fan_out
+    return fan_out(title, body, data=data)
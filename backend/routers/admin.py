@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Any
 from datetime import datetime
 
-from database import SessionLocal
+from database import get_db
 from models_db import User, Signal, AdminAuditLog, StrategyConfig
 from dependencies import require_owner
+from core import repository as repo
+from core.user_cache import user_cache
+from core.fast_json import json_list_response
 from pydantic import BaseModel
 
 router = APIRouter(
@@ -14,23 +17,9 @@ router = APIRouter(
     dependencies=[Depends(require_owner)]
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # --- Helpers ---
-def log_admin_action(db: Session, admin_id: int, action: str, target_id: str, details: str):
-    audit = AdminAuditLog(
-        admin_id=admin_id,
-        action=action,
-        target_id=target_id,
-        details=details
-    )
-    db.add(audit)
-    db.commit()
+async def log_admin_action(db: AsyncSession, admin_id: int, action: str, target_id: str, details: str):
+    await repo.add_audit_log(db, admin_id, action, target_id, details)
 
 # --- Schemas ---
 class UserPlanUpdate(BaseModel):
@@ -48,74 +37,66 @@ class PaginatedResponse(BaseModel):
 # --- Endpoints ---
 
 @router.get("/stats")
-async def get_admin_stats(db: Session = Depends(get_db)):
+async def get_admin_stats(db: AsyncSession = Depends(get_db)):
     """KPIs for Admin Dashboard."""
-    total_users = db.query(func.count(User.id)).scalar()
-    active_pro = db.query(func.count(User.id)).filter(User.plan.like("%PRO%")).scalar() # PRO or OWNER likely
-    hidden_signals = db.query(func.count(Signal.id)).filter(Signal.is_hidden == 1).scalar()
-    total_signals = db.query(func.count(Signal.id)).scalar()
-    
-    return {
-        "total_users": total_users,
-        "active_plans": active_pro,
-        "hidden_signals": hidden_signals,
-        "total_signals": total_signals
-    }
+    return await repo.admin_kpis(db)
 
 @router.get("/users")
 async def list_users(
     page: int = 1,
     size: int = 20,
     q: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * size
-    query = db.query(User)
-    
-    if q:
-        query = query.filter(User.email.contains(q))
-        
-    total = query.count()
-    users = query.order_by(desc(User.created_at)).offset(offset).limit(size).all()
-    
-    return {
-        "items": [
-            {
-                "id": u.id,
-                "email": u.email,
-                "role": u.role,
-                "plan": u.plan,
-                "created_at": u.created_at
-            } for u in users
-        ],
-        "total": total,
-        "page": page,
-        "size": size
-    }
+    """
+    Usuarios más recientes primero. Con `cursor` (next_cursor de la respuesta
+    anterior) pagina por keyset; `page` > 1 sin cursor sigue usando OFFSET.
+    `total` es aproximado (cacheado FEED_COUNT_TTL s).
+    """
+    try:
+        users, next_cursor, total = await repo.users_page(db, q=q, cursor=cursor, page=page, size=size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = [
+        {
+            "id": u.id,
+            "email": u.email,
+            "role": u.role,
+            "plan": u.plan,
+            "created_at": u.created_at
+        } for u in users
+    ]
+    return json_list_response(
+        items, envelope={"total": total, "page": page, "size": size, "next_cursor": next_cursor}
+    )
 
 @router.patch("/users/{user_id}/plan")
 async def update_user_plan(
     user_id: int,
     update: UserPlanUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_owner)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await repo.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
     old_plan = user.plan
     user.plan = update.plan.upper()
-    db.commit()
-    
-    log_admin_action(
-        db, 
-        current_user.id, 
-        "UPDATE_PLAN", 
-        str(user_id), 
+    await db.commit()
+    # Principal cacheado de get_current_user: aquí y en el resto de workers
+    user_cache.invalidate(user_id)
+
+    await log_admin_action(
+        db,
+        current_user.id,
+        "UPDATE_PLAN",
+        str(user_id),
         f"Changed plan from {old_plan} to {user.plan}"
     )
-    
+
     return {"status": "success", "new_plan": user.plan}
 
 @router.get("/signals")
@@ -125,68 +106,86 @@ async def list_signals(
     token: Optional[str] = None,
     mode: Optional[str] = None,
     show_hidden: bool = True,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * size
-    query = db.query(Signal)
-    
-    if token:
-        query = query.filter(Signal.token == token.upper())
-    if mode:
-        query = query.filter(Signal.mode == mode.upper())
-    if not show_hidden:
-        query = query.filter(Signal.is_hidden == 0)
-        
-    total = query.count()
-    signals = query.order_by(desc(Signal.timestamp)).offset(offset).limit(size).all()
-    
-    # Simple serialization
-    return {
-        "items": signals,
-        "total": total,
-        "page": page,
-        "size": size
-    }
+    """Misma paginación que /admin/users (cursor o page)."""
+    token = token.upper() if token else None
+    mode = mode.upper() if mode else None
+    try:
+        signals, next_cursor = await repo.signal_feed_page(
+            db, mode=mode, token=token, show_hidden=show_hidden,
+            cursor=cursor, page=page, limit=size, with_evaluation=False
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Objetos ORM serializados directamente por core/fast_json.py
+    total = await repo.count_signals(db, mode=mode, token=token, show_hidden=show_hidden)
+    return json_list_response(
+        signals, envelope={"total": total, "page": page, "size": size, "next_cursor": next_cursor}
+    )
 
 @router.patch("/signals/{signal_id}")
 async def toggle_signal_visibility(
     signal_id: int,
     update: SignalUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_owner)
 ):
-    sig = db.query(Signal).filter(Signal.id == signal_id).first()
+    sig = await repo.get_signal(db, signal_id)
     if not sig:
         raise HTTPException(status_code=404, detail="Signal not found")
-    
+
     sig.is_hidden = 1 if update.is_hidden else 0
-    db.commit()
-    
+    await db.commit()
+
     action = "HIDE_SIGNAL" if update.is_hidden else "UNHIDE_SIGNAL"
-    log_admin_action(
+    await log_admin_action(
         db,
         current_user.id,
         action,
         str(signal_id),
         f"Set is_hidden to {sig.is_hidden}"
     )
-    
+
     return {"status": "success", "is_hidden": sig.is_hidden}
 
 @router.get("/audit")
 async def get_audit_logs(
     page: int = 1,
     size: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    offset = (page - 1) * size
-    query = db.query(AdminAuditLog)
-    total = query.count()
-    logs = query.order_by(desc(AdminAuditLog.timestamp)).offset(offset).limit(size).all()
-    
+    try:
+        logs, next_cursor, total = await repo.audit_page(db, cursor=cursor, page=page, size=size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return {
         "items": logs,
         "total": total,
         "page": page,
-        "size": size
+        "size": size,
+        "next_cursor": next_cursor
     }
+
+@router.get("/diagnostics/db")
+async def get_db_diagnostics(top: int = 20):
+    """Consultas por huella, slow-query log, N+1 y espera del pool (core/db_profiler.py)."""
+    from core import db_profiler
+    return db_profiler.snapshot(top=top)
+
+@router.delete("/diagnostics/db")
+async def reset_db_diagnostics():
+    from core import db_profiler
+    db_profiler.reset()
+    return {"status": "ok"}
+
+@router.get("/archive")
+async def get_signal_archive():
+    """Resumen del archivo frío de señales por mes (core/signal_archive.py)."""
+    from core import signal_archive
+    # Lectura del manifest en disco: fuera del event loop
+    return await run_in_threadpool(signal_archive.archive_status)
@@ -5,9 +5,14 @@ from typing import List, Optional, Dict, Any
 from core.ai_service import get_ai_service
 from rag_context import build_token_context
 from core.market_data_api import get_ohlcv_data
+from core.indicator_snapshots import indicator_snapshots
+from core.llm_cache import AnalysisKey, last_closed_ts, llm_cache, snapshot_hash
 
 router = APIRouter(tags=["advisor"])
 
+# Versión de la plantilla del chat: parte de la clave de la caché LLM
+ADVISOR_PROMPT_VERSION = "advisor-v1"
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -35,10 +40,15 @@ def advisor_chat(req: ChatRequest):
         token = req.context.token
         tf = req.context.timeframe or "1h"
         
-        # A. Fetch Market Data Snapshot
+        # A. Market Data Snapshot (indicadores precalculados, O(1) si está fresco)
+        rsi, trend = "N/A", "N/A"
         try:
-            ohlcv = get_ohlcv_data(token, tf, limit=1)
-            price = ohlcv[0]["close"] if ohlcv else "Unknown"
+            market = indicator_snapshots.latest(token, tf)
+            if market:
+                price, rsi, trend = market["price"], market["rsi"], market["trend"]
+            else:
+                ohlcv = get_ohlcv_data(token, tf, limit=1)
+                price = ohlcv[0]["close"] if ohlcv else "Unknown"
         except:
             price = "Unavailable"
             
@@ -50,6 +60,7 @@ def advisor_chat(req: ChatRequest):
 [CURRENT MARKET CONTEXT for {token.upper()}]
 - Price: {price}
 - Timeframe: {tf}
+- RSI(14): {rsi} | Trend: {trend}
 - Sentiment: {rag.get('sentiment', 'Neutral')}
 - News/Narrative: {rag.get('news', 'No major news')}
 """
@@ -74,9 +85,6 @@ def advisor_chat(req: ChatRequest):
         "Responde SIEMPRE en ESPAÑOL (Castellano)."
     )
 
-    # 3. Call AI Service
-    ai_service = get_ai_service()
-    
     # Preparar mensajes
     user_api_messages = [m.dict() for m in req.messages]
     
@@ -86,7 +94,17 @@ def advisor_chat(req: ChatRequest):
         if last_msg["role"] == "user":
             last_msg["content"] = f"{system_context_block}\n\nPregunta del Usuario: {last_msg['content']}"
 
-    response_text = ai_service.chat(user_api_messages, system_instruction=system_instruction)
+    # 3. Call AI Service (caché por vela + coalescing, core/llm_cache.py)
+    token = req.context.token if req.context and req.context.token else None
+    tf = (req.context.timeframe or "1h") if token else None
+    key = AnalysisKey(
+        kind="advisor", token=token or "*", timeframe=tf or "-", candle_ts=last_closed_ts(tf),
+        template_version=ADVISOR_PROMPT_VERSION,
+        snapshot_hash=snapshot_hash(system_instruction, user_api_messages),
+    )
+    response_text = llm_cache.get_or_generate(
+        key, lambda: get_ai_service().chat(user_api_messages, system_instruction=system_instruction)
+    )
     
     return {"reply": response_text}
 
@@ -5,7 +5,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 
 # Imports internos
-from indicators.market import get_market_data
+from core.indicator_snapshots import indicator_snapshots
 from models import LiteReq, ProReq
 from core.schemas import Signal
 from core.signal_logger import log_signal
@@ -24,7 +24,7 @@ router = APIRouter()
 # Auth Dependency
 from routers.auth import get_current_user
 from models_db import User
-from core.limiter import limiter
+from core.limiter import limiter, plan_limit
 from fastapi import Request
 from dependencies import require_pro
 
@@ -58,10 +58,8 @@ def _analyze_lite_unsafe(req: LiteReq, user: User):
     Lógica real de Lite Analysis (Refactored to logic module).
     """
     try:
-        # 1. Market Data
-        # Call market_data_api directly or use helper?
-        # In main it used: from indicators.market import get_market_data
-        df, market = get_market_data(req.token, req.timeframe, limit=300)
+        # 1. Market Data: snapshot precalculado (core/indicator_snapshots.py)
+        market = indicator_snapshots.latest(req.token, req.timeframe)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Market data error: {e}")
 
@@ -111,24 +109,31 @@ def _analyze_lite_unsafe(req: LiteReq, user: User):
 # ==== 10. Endpoint PRO ====
 
 @router.post("/pro")
-@limiter.limit("2/minute")
+@limiter.limit(plan_limit("2/minute", {"OWNER": "30/minute"}))
 async def analyze_pro(request: Request, req: ProReq, current_user: User = Depends(require_pro)):
     """
     Generates a deep AI analysis using Gemini/DeepSeek.
     """
     # 1. Get LITE foundation
-    # We re-run lite logic to get the technical base
+    # Sobre la última vela CERRADA: misma base (y misma clave de caché LLM)
+    # durante toda la vela; sin snapshot, el mercado en vivo como antes.
+    from fastapi.concurrency import run_in_threadpool
     try:
-        df, market = get_market_data(req.token, req.timeframe, limit=300)
+        closed = await run_in_threadpool(indicator_snapshots.closed, req.token, req.timeframe)
+        if closed is not None:
+            candle_ts, market = closed
+        else:
+            candle_ts, market = None, await run_in_threadpool(indicator_snapshots.latest, req.token, req.timeframe)
         lite_signal, indicators = _build_lite_from_market(req.token, req.timeframe, market)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to build base technicals: {e}")
 
-    # 2. Load Deep Context (RAG)
-    brain_context = _load_brain_context(req.token, market_data=market)
+    # 2. Deep Context (RAG): se carga solo si la caché LLM no tiene el análisis
+    def brain_context():
+        return _load_brain_context(req.token, market_data=market)
 
-    # 3. Generate Analysis
-    markdown_report = await _build_pro_markdown(req, lite_signal, indicators, brain_context)
+    # 3. Generate Analysis (caché por vela + coalescing, core/llm_cache.py)
+    markdown_report = await _build_pro_markdown(req, lite_signal, indicators, brain_context, candle_ts=candle_ts)
 
     # 4. Log (Optional, maybe we only log LITE signals?)
     # PRO requests are expensive, usually we check if we want to log them.
@@ -9,6 +9,7 @@ from sqlalchemy.exc import IntegrityError
 from database import get_db
 from models_db import User
 from core.security import verify_password, create_access_token, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from core.user_cache import AuthUser, user_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -37,15 +38,22 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: As
         print(f"[AUTH] JWT Decode Error: {e}")
         raise credentials_exception
         
-    # Get User from DB
+    # Get User (caché de principales; la DB solo en fallo o tras invalidar)
+    cached = user_cache.get(email)
+    if cached is not None:
+        return cached
+
+    generation = user_cache.generation()
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalars().first()
-    
+
     if user is None:
         print(f"[AUTH] User {email} not found in DB")
         raise credentials_exception
-        
-    return user
+
+    principal = AuthUser.from_model(user)
+    user_cache.put(email, principal, generation)
+    return principal
 
 from core.limiter import limiter
 
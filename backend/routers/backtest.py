@@ -1,8 +1,16 @@
 
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from core.backtest_engine import BacktestEngine
+from core.monte_carlo import METHODS
+from core.curve_downsample import shape_curve, CURVE_FORMATS, METHODS as DOWNSAMPLE_METHODS
+from core.backtest_jobs import job_manager, JobQueueFull
+from core.response_cache import response_cache, files_version
+from core.fast_json import FastJSONResponse
 import traceback
 
 router = APIRouter(prefix="/backtest", tags=["backtest"])
@@ -13,12 +21,44 @@ class BacktestRequest(BaseModel):
     timeframe: str = "1h"
     days: int = 30
     initial_capital: float = 1000.0
+    # Monte Carlo opcional sobre el log de trades
+    monte_carlo: bool = False
+    mc_simulations: int = 1000
+    mc_method: str = "bootstrap"  # bootstrap | shuffle
+    mc_seed: Optional[int] = None
+    # Curva de equity: downsampling en servidor, opt-in (None/0 = un punto por
+    # vela, la respuesta de siempre; p. ej. 1000 para gráficos)
+    max_points: Optional[int] = None
+    downsample: str = "lttb"      # lttb | minmax
+    curve_format: str = "rows"    # rows | columns (arrays por campo)
+
+def _curve_options(max_points: Optional[int], downsample: str, curve_format: str) -> Dict[str, Any]:
+    if downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"Invalid downsample: {downsample}")
+    if curve_format not in CURVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid curve_format: {curve_format}")
+    return {"max_points": max_points, "method": downsample, "curve_format": curve_format}
+
+def _mc_options(req: BacktestRequest) -> Optional[Dict[str, Any]]:
+    if req.monte_carlo and req.mc_method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Invalid mc_method: {req.mc_method}")
+    if not req.monte_carlo:
+        return None
+    return {
+        "simulations": req.mc_simulations,
+        "method": req.mc_method,
+        "seed": req.mc_seed,
+    }
 
 @router.post("/run")
 def run_backtest(req: BacktestRequest):
     """
     Ejecuta una simulación histórica de una estrategia.
+    (Síncrono; para runs largos usar POST /backtest/jobs)
     """
+    mc_options = _mc_options(req)
+    curve_options = _curve_options(req.max_points, req.downsample, req.curve_format)
+
     try:
         engine = BacktestEngine(initial_capital=req.initial_capital)
         
@@ -33,10 +73,13 @@ def run_backtest(req: BacktestRequest):
             strategy_id=strat_id,
             symbol=req.token.lower(), # Engine/API expects lowercase usually? Market API handles both
             timeframe=req.timeframe,
-            days=req.days
+            days=req.days,
+            monte_carlo=mc_options,
+            curve_options=curve_options
         )
         
-        return results
+        # Curva + trades: orjson directo, sin jsonable_encoder (core/fast_json.py)
+        return FastJSONResponse(results)
         
     except Exception as e:
         import traceback
@@ -52,19 +95,145 @@ def run_backtest(req: BacktestRequest):
 
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==== Jobs asíncronos ====
+
+@router.post("/jobs", status_code=202)
+def submit_backtest_job(req: BacktestRequest):
+    """
+    Encola un backtest y devuelve su job_id al instante.
+    Submissions idénticas a un job en cola o en curso devuelven ese job (deduplicated=true).
+    """
+    params = {
+        "strategy_id": req.strategy_id.replace(".py", ""),
+        "token": req.token.lower(),
+        "timeframe": req.timeframe,
+        "days": req.days,
+        "initial_capital": req.initial_capital,
+        "monte_carlo": _mc_options(req),
+        "curve": _curve_options(req.max_points, req.downsample, req.curve_format),
+    }
+    try:
+        job, deduplicated = job_manager.submit(params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    job.pop("result", None)
+    job["deduplicated"] = deduplicated
+    return job
+
+@router.get("/jobs/{job_id}")
+def get_backtest_job(job_id: str):
+    """Estado, progreso y (si terminó) resultado de un job."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(job)
+
+@router.delete("/jobs/{job_id}")
+def cancel_backtest_job(job_id: str):
+    """Cancela un job en cola o en curso."""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_backtest_job(job_id: str):
+    """
+    Server-Sent Events con el progreso del job.
+    Eventos: progress (cada cambio) y end (estado final, sin resultado:
+    el cliente lo pide a GET /backtest/jobs/{job_id}).
+    """
+    if not job_manager.get(job_id, include_result=False):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last = None
+        while True:
+            job = job_manager.get(job_id, include_result=False)
+            if not job:
+                break
+            payload = json.dumps({"status": job["status"], "progress": job["progress"]})
+            if payload != last:
+                last = payload
+                yield f"event: progress\ndata: {payload}\n\n"
+            if job["status"] in ("done", "failed", "cancelled"):
+                yield f"event: end\ndata: {json.dumps({'status': job['status'], 'error': job.get('error')})}\n\n"
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+class PortfolioBacktestRequest(BaseModel):
+    persona_ids: Optional[List[str]] = None  # None = todas las personas activas
+    days: int = 365
+    initial_capital: float = 10000.0
+    max_positions: int = 3
+    position_size_pct: float = 0.25
+    max_points: Optional[int] = None  # opt-in, como en BacktestRequest
+    downsample: str = "lttb"
+    curve_format: str = "rows"
+
+@router.post("/portfolio")
+def run_portfolio_backtest(req: PortfolioBacktestRequest):
+    """
+    Backtest de varias personas del marketplace como una única cartera
+    con capital compartido.
+    """
+    from marketplace_config import get_active_strategies
+    from core.portfolio_engine import PortfolioBacktestEngine
+
+    personas = get_active_strategies()
+    if req.persona_ids:
+        personas = [p for p in personas if p["id"] in req.persona_ids]
+    if not personas:
+        raise HTTPException(status_code=404, detail="No personas found")
+    curve_options = _curve_options(req.max_points, req.downsample, req.curve_format)
+
+    try:
+        engine = PortfolioBacktestEngine(
+            initial_capital=req.initial_capital,
+            max_positions=req.max_positions,
+            position_size_pct=req.position_size_pct,
+        )
+        report = engine.run_personas(personas, days=req.days)
+        report["curve_points"] = len(report["curve"])
+        report["curve"] = shape_curve(report["curve"], y_key="equity", **curve_options)
+        return FastJSONResponse(report)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"❌ [API CRITICAL PORTFOLIO BACKTEST ERROR]: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache")
+def backtest_cache_stats():
+    """Estadísticas de la caché de resultados (hits, prefijos, evictions)."""
+    from core.backtest_cache import result_cache
+    return {"enabled": result_cache.enabled, "max_bytes": result_cache.max_bytes, **result_cache.stats}
+
 @router.get("/strategies")
-def list_backtestable_strategies():
+def list_backtestable_strategies(request: Request):
     """
     Devuelve lista de estrategias disponibles para backtest
     (Simulado escaneando directorio de estrategias)
+    ETag / 304 mientras no cambie el directorio.
     """
     import os
-    strategies = []
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     strat_dir = os.path.join(base_dir, "strategies")
-    
-    for f in os.listdir(strat_dir):
-        if f.endswith(".py") and f != "__init__.py" and f != "base.py" and f != "registry.py":
-            strategies.append(f.replace(".py", ""))
-            
-    return {"strategies": strategies}
+
+    def build(headers):
+        strategies = []
+        for f in os.listdir(strat_dir):
+            if f.endswith(".py") and f != "__init__.py" and f != "base.py" and f != "registry.py":
+                strategies.append(f.replace(".py", ""))
+        return {"strategies": strategies}
+
+    return response_cache.respond(
+        request, "backtest.strategies", version=lambda: files_version(strat_dir), build=build,
+    )
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from database import SessionLocal
-from models_db import Signal, SignalEvaluation
+from core.signal_feed import signal_feed
+from core.signal_archive import combine_page
+from core.response_cache import response_cache, data_version
+from core.fast_json import json_list_response
 from pydantic import BaseModel
 from datetime import datetime
 from routers.auth import get_current_user
@@ -38,40 +40,39 @@ def get_db():
 
 @router.get("/recent", response_model=List[LogEntry])
 def get_recent_logs(
+    request: Request,
     limit: int = 20, 
     mode: Optional[str] = None, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene las señales más recientes (User + System).
+    Paginación: pasar la cabecera X-Next-Cursor de la respuesta como ?cursor=.
+    Al acabarse las señales en caliente sigue con las archivadas.
+    ETag / 304 por usuario mientras no haya señales ni evaluaciones nuevas.
     """
-    try:
-        from sqlalchemy import or_
-        query = db.query(Signal).filter(
-            or_(Signal.user_id == current_user.id, Signal.user_id == None)
-        ).order_by(desc(Signal.timestamp))
-        
-        if mode:
-            query = query.filter(Signal.mode == mode)
-            
-        signals = query.limit(limit).all()
-        
-        # Enriquecer con evaluación si existe
+    def build(headers):
+        try:
+            signals, next_cursor = signal_feed(
+                db, user_id=current_user.id, mode=mode, cursor=cursor, limit=limit
+            )
+            signals, next_cursor = combine_page(
+                signals, next_cursor, cursor=cursor, limit=limit, user_id=current_user.id, mode=mode
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
+
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+
         results = []
         for sig in signals:
-            # Buscar evaluación
-            eval_entry = db.query(SignalEvaluation).filter(
-                SignalEvaluation.signal_id == sig.id
-            ).first()
-            
-            status = "OPEN"
-            pnl = None
-            
-            if eval_entry:
-                status = eval_entry.result  # WIN, LOSS, BE
-                pnl = eval_entry.pnl_r
-            
+            # Evaluación ya cargada en la misma consulta (joinedload)
+            eval_entry = sig.evaluation
             results.append(LogEntry(
                 id=sig.id,
                 timestamp=sig.timestamp,
@@ -84,40 +85,42 @@ def get_recent_logs(
                 confidence=sig.confidence or 0.0,
                 source=sig.source or sig.strategy_id or "System",
                 mode=sig.mode or "LITE",
-                status=status,
-                pnl=pnl
+                status=eval_entry.result if eval_entry else "OPEN",  # WIN, LOSS, BE
+                pnl=eval_entry.pnl_r if eval_entry else None
             ))
-            
         return results
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
+
+    return response_cache.respond(
+        request, "logs.recent", version=data_version, build=build, scope=current_user.id,
+    )
 
 @router.get("/{mode}/{token}")
 def get_logs_by_token(
     mode: str, 
     token: str, 
     limit: int = 50, 
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Endpoint de compatibilidad para fetchLogs.
-    Devuelve logs filtrados por modo y token (User + System).
+    Devuelve logs filtrados por modo y token (User + System), incluidas
+    las señales archivadas.
     """
     try:
-        from sqlalchemy import or_
-        query = db.query(Signal).filter(
-            Signal.mode == mode.upper(),
-            or_(Signal.user_id == current_user.id, Signal.user_id == None)
+        filters = dict(
+            user_id=current_user.id,
+            mode=mode.upper(),
+            token=None if token.lower() == "all" else token.upper(),
         )
-        
-        if token.lower() != "all":
-            query = query.filter(Signal.token == token.upper())
-            
-        signals = query.order_by(desc(Signal.timestamp)).limit(limit).all()
+        signals, next_cursor = signal_feed(
+            db, cursor=cursor, limit=limit, with_evaluation=False, **filters
+        )
+        signals, next_cursor = combine_page(signals, next_cursor, cursor=cursor, limit=limit, **filters)
         
         # Mapear a formato simple
-        return [
+        items = [
             {
                 "timestamp": s.timestamp.isoformat(),
                 "token": s.token,
@@ -131,5 +134,8 @@ def get_logs_by_token(
             }
             for s in signals
         ]
+        return json_list_response(items, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from typing import List, Optional
-from core.market_data_api import get_market_summary, get_ohlcv_data
+from core.market_data_api import get_market_summary, get_ohlcv_data, summary_stamp_key, DEFAULT_WATCHLIST
+from core.response_cache import response_cache, cache_stamp
+from core.fast_json import json_list_response
 
 router = APIRouter()
 
 @router.get("/summary")
-def market_summary_endpoint(symbols: Optional[List[str]] = Query(None)):
+def market_summary_endpoint(request: Request, symbols: Optional[List[str]] = Query(None)):
     """
     Returns price and 24h change for the default watchlist.
+    ETag / 304 mientras no se descargue un ticker nuevo (core/response_cache.py).
     """
     if not symbols:
         # Default watchlist if none provided
-        symbols = ["BTC", "ETH", "SOL", "XRP", "BNB", "DOGE", "ADA", "AVAX", "DOT", "LINK"]
-    
-    return get_market_summary(symbols)
+        symbols = DEFAULT_WATCHLIST
+
+    return response_cache.respond(
+        request, "market.summary",
+        version=lambda: cache_stamp(summary_stamp_key(symbols)),
+        build=lambda headers: get_market_summary(symbols),
+    )
 
 
 @router.get("/ohlcv/{token}")
@@ -40,4 +47,4 @@ def get_market_ohlcv(
     if not data:
         # 404? Or just empty list? Front needs list.
         return []
-    return data
+    return json_list_response(data)
@@ -9,27 +9,23 @@ Permite al dashboard:
 - Ejecutar estrategias manualmente (testing)
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
 
-from database import SessionLocal
+from database import get_db
 from models_db import StrategyConfig
 from strategies.registry import get_registry
 from core.signal_logger import log_signal
+from core import repository as repo
+from core import signal_archive
+from core.response_cache import response_cache, data_version, files_version, invalidate_data_version
 from pydantic import BaseModel
 from marketplace_config import MARKETPLACE_PERSONAS, get_active_strategies
 
-# === Dependency ===
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 router = APIRouter(tags=["strategies"])
 
 router = APIRouter(tags=["strategies"])
@@ -38,63 +34,55 @@ from routers.auth import get_current_user
 from models_db import User
 
 @router.get("/marketplace", response_model=List[Dict[str, Any]])
-async def get_marketplace(db: Session = Depends(get_db)):
-    """Retorna la configuración de 'Personas' del Marketplace."""
-    from marketplace_config import refresh_personas, MARKETPLACE_PERSONAS
-    from models_db import Signal, SignalEvaluation
-    from sqlalchemy import func
-
-    # 1. Get Base Config (from JSON/System)
-    personas = refresh_personas()
-    
-    # 2. Enrich with DB Stats
-    # We need to query Signal + SignalEvaluation for each persona
-    # source = "Marketplace:{id}"
-    
-    # Optimización: Hacer una sola query de agregación? 
-    # Select source, count(*), count_wins
-    # Pero el source es string.
-    
-    for p in personas:
-        target_source = f"Marketplace:{p['id']}"
-        
-        # Total Signals for this persona
-        total = db.query(func.count(Signal.id)).filter(Signal.source == target_source).scalar() or 0
-        
-        # Total Wins
-        wins = db.query(func.count(Signal.id)).join(SignalEvaluation).filter(
-            Signal.source == target_source,
-            SignalEvaluation.result == "WIN"
-        ).scalar() or 0
-        
-        # Calculate Win Rate
-        wr = 0.0
-        if total > 0:
-            wr = (wins / total) * 100
-            
-        # Inject into response (Override JSON defaults)
-        # Only override if we have data (or always? Let's show real data even if 0)
-        if total > 0:
-            p["win_rate"] = f"{int(wr)}%"
-            # Optional: Add badge or text for total trades
-            # p["frequency"] = f"{total} trades (Real)" 
-        else:
-            # Keep manual/marketing "win_rate" if no real data yet?
-            # Or show "Pending"?
-            # User wants "Professional". "Pending" or N/A is professional if no data.
-            # But let's fallback to the "Marketing" number if 0 real trades, 
-            # to keep the "Wow" factor during demo/setup.
-            pass
-
-    return personas
+async def get_marketplace(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Retorna la configuración de 'Personas' del Marketplace.
+    ETag / 304 mientras no cambien los JSON ni las señales (core/response_cache.py).
+    """
+    from marketplace_config import refresh_personas, USER_STRATEGIES_FILE, SYSTEM_OVERRIDES_FILE
+
+    async def build(headers):
+        # 1. Get Base Config (from JSON/System)
+        personas = refresh_personas()
+
+        # 2. Enrich with DB Stats (performance_stats, una sola lectura por índice)
+        # source = "Marketplace:{id}"
+        stats = await repo.get_performance_stats(db, "source", [f"Marketplace:{p['id']}" for p in personas])
+
+        for p in personas:
+            s = stats.get(f"Marketplace:{p['id']}")
+            total = s.total_signals if s else 0
+
+            # Inject into response (Override JSON defaults)
+            # Only override if we have data; otherwise keep the JSON "marketing"
+            # win_rate during demo/setup.
+            if total > 0:
+                wr = (s.wins / total) * 100
+                p["win_rate"] = f"{int(wr)}%"
+
+        return personas
+
+    return await response_cache.respond_async(
+        request, "strategies.marketplace",
+        version=lambda: (files_version(USER_STRATEGIES_FILE, SYSTEM_OVERRIDES_FILE), data_version()),
+        build=build,
+    )
 
 from models_db import Signal, SignalEvaluation
 
 @router.get("/marketplace/{persona_id}/history")
-async def get_persona_history(persona_id: str, db: Session = Depends(get_db)):
+async def get_persona_history(
+    persona_id: str,
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
     """
     Obtiene el historial de señales generadas por una Persona específica.
-    Filtra por source="Marketplace:{persona_id}"
+    Filtra por source="Marketplace:{persona_id}".
+    Página siguiente: ?cursor=<cabecera X-Next-Cursor>. Incluye las señales
+    ya movidas al archivo frío (core/signal_archive.py).
     """
     # Validar persona
     valid_ids = [p["id"] for p in MARKETPLACE_PERSONAS]
@@ -105,10 +93,17 @@ async def get_persona_history(persona_id: str, db: Session = Depends(get_db)):
 
     target_source = f"Marketplace:{persona_id}"
     
-    # Query Signals sorted by time desc
-    signals = db.query(Signal).filter(
-        Signal.source == target_source
-    ).order_by(Signal.timestamp.desc()).limit(100).all()
+    # Señales + evaluación en una sola consulta (índice source, timestamp)
+    try:
+        signals, next_cursor = await repo.signal_feed_page(db, source=target_source, cursor=cursor, limit=limit)
+        signals, next_cursor = await run_in_threadpool(
+            signal_archive.combine_page, signals, next_cursor,
+            cursor=cursor, limit=limit, source=target_source
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     # Enriquecer con evaluación si existe
     history = []
@@ -177,53 +172,71 @@ class ExecuteStrategyRequest(BaseModel):
 
 
 
+def _win_rate(stats) -> float:
+    """Wins / evaluadas (0.0–1.0), como calculaban los evaluadores."""
+    if not stats or not stats.evaluated:
+        return 0.0
+    return stats.wins / stats.evaluated
+
+
 # === Endpoints ===
 
 @router.get("/", response_model=List[StrategyMetadataResponse])
-async def list_strategies(db: Session = Depends(get_db)):
+async def list_strategies(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Lista todas las estrategias disponibles.
     
     Combina:
     - Estrategias registradas en el registry (código)
     - Configuración de DB (si existe)
+
+    ETag / 304 mientras no cambien strategy_configs ni las señales.
     """
-    registry = get_registry()
-    all_metas = registry.list_all()
-    
-    results = []
-    
-    for meta in all_metas:
-        # Buscar config en DB
-        db_config = db.query(StrategyConfig).filter(
-            StrategyConfig.strategy_id == meta.id
-        ).first()
-        
-        result = StrategyMetadataResponse(
-            id=meta.id,
-            name=meta.name,
-            description=meta.description,
-            version=meta.version,
-            default_timeframe=meta.default_timeframe,
-            universe=meta.universe,
-            risk_profile=meta.risk_profile,
-            mode=meta.mode,
-            source_type=meta.source_type,
-            enabled=db_config.enabled == 1 if db_config else meta.enabled,
-            total_signals=db_config.total_signals if db_config else 0,
-            win_rate=db_config.win_rate if db_config else 0.0,
-            last_execution=db_config.last_execution if db_config else None,
-        )
-        results.append(result)
-    
-    return results
+    async def build(headers):
+        registry = get_registry()
+        all_metas = await run_in_threadpool(registry.list_all)  # discover() si aún no se hizo
+        ids = [meta.id for meta in all_metas]
+
+        # Config + stats de todas las estrategias de una vez (no una query por estrategia)
+        configs = await repo.get_strategy_configs(db, ids)
+        stats = await repo.get_performance_stats(db, "strategy", ids)
+
+        results = []
+
+        for meta in all_metas:
+            db_config = configs.get(meta.id)
+            s = stats.get(meta.id)
+
+            result = StrategyMetadataResponse(
+                id=meta.id,
+                name=meta.name,
+                description=meta.description,
+                version=meta.version,
+                default_timeframe=meta.default_timeframe,
+                universe=meta.universe,
+                risk_profile=meta.risk_profile,
+                mode=meta.mode,
+                source_type=meta.source_type,
+                enabled=db_config.enabled == 1 if db_config else meta.enabled,
+                total_signals=s.total_signals if s else 0,
+                win_rate=_win_rate(s),
+                last_execution=db_config.last_execution if db_config else None,
+            )
+            results.append(result)
+
+        return results
+
+    return await response_cache.respond_async(
+        request, "strategies.list", version=data_version, build=build,
+    )
 
 
 @router.get("/{strategy_id}")
-async def get_strategy(strategy_id: str, db: Session = Depends(get_db)):
+async def get_strategy(strategy_id: str, db: AsyncSession = Depends(get_db)):
     """Obtiene detalles de una estrategia específica."""
     registry = get_registry()
-    strategy = registry.get(strategy_id)
+    # Puede importar el módulo (primer uso o índice desfasado): fuera del event loop
+    strategy = await run_in_threadpool(registry.get, strategy_id)
     
     if not strategy:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy_id}' not found")
@@ -231,16 +244,20 @@ async def get_strategy(strategy_id: str, db: Session = Depends(get_db)):
     meta = strategy.metadata()
     
     # Buscar config en DB
-    db_config = db.query(StrategyConfig).filter(
-        StrategyConfig.strategy_id == strategy_id
-    ).first()
+    db_config = await repo.get_strategy_config(db, strategy_id)
+    s = (await repo.get_performance_stats(db, "strategy", [strategy_id])).get(strategy_id)
     
     return {
         "metadata": meta.dict(),
         "config": json.loads(db_config.config_json) if db_config and db_config.config_json else {},
         "stats": {
-            "total_signals": db_config.total_signals if db_config else 0,
-            "win_rate": db_config.win_rate if db_config else 0.0,
+            "total_signals": s.total_signals if s else 0,
+            "evaluated": s.evaluated if s else 0,
+            "wins": s.wins if s else 0,
+            "losses": s.losses if s else 0,
+            "pnl_r_sum": round(s.pnl_r_sum, 2) if s else 0.0,
+            "last_signal_at": s.last_signal_at.isoformat() + "Z" if s and s.last_signal_at else None,
+            "win_rate": _win_rate(s),
             "avg_confidence": db_config.avg_confidence if db_config else 0.0,
             "last_execution": db_config.last_execution.isoformat() + "Z" if db_config and db_config.last_execution else None,
         }
@@ -251,7 +268,7 @@ async def get_strategy(strategy_id: str, db: Session = Depends(get_db)):
 async def update_strategy_config(
     strategy_id: str,
     update: StrategyConfigUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -265,15 +282,13 @@ async def update_strategy_config(
     """
     # Verificar que la estrategia existe en registry
     registry = get_registry()
-    strategy = registry.get(strategy_id)
+    strategy = await run_in_threadpool(registry.get, strategy_id)
     
     if not strategy:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy_id}' not found in registry")
     
     # Buscar o crear config en DB
-    db_config = db.query(StrategyConfig).filter(
-        StrategyConfig.strategy_id == strategy_id
-    ).first()
+    db_config = await repo.get_strategy_config(db, strategy_id)
     
     if not db_config:
         # Crear nuevo
@@ -311,11 +326,12 @@ async def update_strategy_config(
     db_config.updated_at = datetime.utcnow()
     
     try:
-        db.commit()
-        db.refresh(db_config)
+        await db.commit()
+        await db.refresh(db_config)
+        invalidate_data_version()  # el próximo GET /strategies/ ya ve el cambio
         return {"status": "ok", "strategy_id": strategy_id}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating strategy: {str(e)}")
 
 
@@ -323,7 +339,7 @@ async def update_strategy_config(
 async def execute_strategy_manual(
     strategy_id: str,
     req: ExecuteStrategyRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -334,22 +350,20 @@ async def execute_strategy_manual(
     registry = get_registry()
     
     # Obtener config de DB si existe
-    db_config = db.query(StrategyConfig).filter(
-        StrategyConfig.strategy_id == strategy_id
-    ).first()
+    db_config = await repo.get_strategy_config(db, strategy_id)
     
     config_dict = {}
     if db_config and db_config.config_json:
         config_dict = json.loads(db_config.config_json)
     
-    # Instanciar estrategia
-    strategy = registry.get(strategy_id, config=config_dict)
+    # Instancia nueva: las del pool pertenecen al scheduler y no son thread-safe
+    strategy = await run_in_threadpool(registry.create, strategy_id, config_dict)
     
     if not strategy:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy_id}' not found")
     
-    # Ejecutar
-    try:
+    # Ejecutar (market data + logging bloqueantes: fuera del event loop)
+    def _run():
         signals = strategy.generate_signals(
             tokens=req.tokens,
             timeframe=req.timeframe,
@@ -359,6 +373,10 @@ async def execute_strategy_manual(
         # Loguear señales
         for signal in signals:
             log_signal(signal)
+        return signals
+
+    try:
+        signals = await run_in_threadpool(_run)
         
         return {
             "status": "ok",
@@ -381,7 +399,6 @@ async def execute_strategy_manual(
 
 
 from models_db import StrategyConfig, User
-from scheduler import scheduler_instance
 from dependencies import require_pro, require_owner
 
 # --- 1. CRUD de Personas (StrategyConfig) ---
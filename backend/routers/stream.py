@@ -0,0 +1,110 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models_db import User
+from routers.auth import get_current_user
+from core.user_cache import AuthUser, user_cache
+from core.live_stream import live_stream, stream_tickets, format_cursor, STREAM_HEARTBEAT
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+
+@router.post("/ticket")
+async def create_stream_ticket(current_user=Depends(get_current_user)):
+    """
+    Ticket de un solo uso para abrir /stream/events?ticket=... (EventSource no
+    puede enviar Authorization y el JWT no debe viajar en la URL).
+    """
+    return {"ticket": stream_tickets.issue(current_user.email), "expires_in": stream_tickets.ttl}
+
+
+async def get_stream_user(request: Request, ticket: Optional[str] = Query(None)):
+    """
+    Usuario del stream: Authorization: Bearer (clientes que pueden enviar
+    cabeceras) o ?ticket= de POST /stream/ticket (navegador).
+    La sesión de DB se abre solo si hace falta y se cierra aquí mismo: no
+    queda retenida mientras dure el StreamingResponse.
+    """
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    auth = request.headers.get("authorization", "")
+    if auth[:7].lower() == "bearer ":
+        async with AsyncSessionLocal() as db:
+            return await get_current_user(auth[7:].strip(), db)
+
+    email = stream_tickets.redeem(ticket)
+    if not email:
+        raise unauthorized
+    cached = user_cache.get(email)
+    if cached is not None:
+        return cached
+    generation = user_cache.generation()
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if user is None:
+        raise unauthorized
+    principal = AuthUser.from_model(user)
+    user_cache.put(email, principal, generation)
+    return principal
+
+
+def _csv_set(value: Optional[str]):
+    items = {v.strip().upper() for v in (value or "").split(",") if v.strip()}
+    return items or None
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    mode: Optional[str] = None,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = Query(None, alias="lastEventId"),
+    current_user=Depends(get_stream_user),
+):
+    """
+    Server-Sent Events con las señales nuevas, sus evaluaciones y los precios
+    de la watchlist (ver core/live_stream.py).
+    Eventos: hello (cursor actual), signal, evaluation, ticker y resync (hay
+    que recargar por REST). Filtros opcionales: mode y token (lista con comas).
+    Reanudación: cabecera Last-Event-ID (la envía el navegador al reconectar)
+    o ?lastEventId=.
+    """
+    resume = request.headers.get("last-event-id") or last_event_id
+    sub, backlog, cursor = await live_stream.subscribe(
+        current_user.id, modes=_csv_set(mode), tokens=_csv_set(token), last_event_id=resume
+    )
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if not resume:
+                yield f"id: {format_cursor(cursor)}\nevent: hello\ndata: {json.dumps({'cursor': format_cursor(cursor)})}\n\n"
+            for ev in backlog:
+                yield ev.encode()
+            while not sub.dropped:
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield ev.encode()
+        finally:
+            live_stream.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
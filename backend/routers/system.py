@@ -35,3 +35,69 @@ def system_reset():
 @router.get("/health")
 def health_check():
     return {"status": "ok", "db": "connected"}
+
+@router.get("/signal-writer")
+def signal_writer_stats():
+    """Profundidad de cola, lotes y latencia del writer de señales (y del push)."""
+    from core.signal_writer import signal_writer
+    from core.push_dispatcher import push_dispatcher
+    return {**signal_writer.stats(), "push": push_dispatcher.stats}
+
+@router.get("/quota")
+def quota_stats():
+    """Contadores del servicio de cuotas (core/quota.py)."""
+    from core.quota import quota
+    return quota.stats()
+
+@router.get("/user-cache")
+def user_cache_stats():
+    """Aciertos e invalidaciones de la caché de usuarios autenticados (core/user_cache.py)."""
+    from core.user_cache import user_cache
+    return user_cache.stats()
+
+@router.get("/rate-limit")
+def rate_limit_stats():
+    """Peticiones comprobadas y limitadas (429) por ruta, y estado del store GCRA."""
+    from core.limiter import limiter
+    return limiter.gcra.stats()
+
+@router.get("/stream")
+def stream_stats():
+    """Suscriptores, eventos emitidos y estado del productor del stream SSE (core/live_stream.py)."""
+    from core.live_stream import live_stream
+    return live_stream.stats()
+
+
+@router.get("/response-cache")
+def response_cache_stats():
+    """Aciertos, 304 y bytes ahorrados de la caché de respuestas (core/response_cache.py)."""
+    from core.response_cache import response_cache
+    return response_cache.stats()
+
+
+@router.get("/startup")
+def startup_profile():
+    """Fases de arranque, módulos pesados cargados y cargas diferidas (core/lazy_imports.py)."""
+    from core.lazy_imports import startup_report
+    return startup_report()
+
+
+@router.get("/strategy-registry")
+def strategy_registry_stats():
+    """Estrategias descubiertas, aciertos del índice de metadatos e instancias en pool (strategies/registry.py)."""
+    from strategies.registry import get_registry
+    return get_registry().stats()
+
+
+@router.get("/indicator-snapshots")
+def indicator_snapshot_stats():
+    """Pares vigilados, edad de cada snapshot y aciertos/recálculos (core/indicator_snapshots.py)."""
+    from core.indicator_snapshots import indicator_snapshots
+    return indicator_snapshots.stats()
+
+
+@router.get("/llm-cache")
+def llm_cache_stats():
+    """Aciertos, llamadas coalescidas y segundos de proveedor ahorrados de la caché LLM (core/llm_cache.py)."""
+    from core.llm_cache import llm_cache
+    return llm_cache.stats()
@@ -23,7 +23,7 @@ sys.path.insert(0, str(current_dir))
 
 from database import SessionLocal
 from strategies.registry import get_registry
-from core.signal_logger import log_signal
+from core.signal_logger import log_signal, flush_signals
 from marketplace_config import get_active_strategies
 
 class StrategyScheduler:
@@ -41,29 +41,14 @@ class StrategyScheduler:
         print("🚀 TraderCopilot - Marketplace Scheduler")
         print("="*60)
         
-        # Registrar estrategias built-in
-        print("\n📦 Registering strategies...")
-        from strategies.example_rsi_macd import RSIMACDDivergenceStrategy
-        from strategies.ma_cross import MACrossStrategy
-        from strategies.DonchianBreakoutV2 import DonchianBreakoutV2 as DonchianStrategy
-        from strategies.bb_mean_reversion import BBMeanReversionStrategy
-        from strategies.rsi_divergence import RSIDivergenceStrategy
-        from strategies.TrendFollowingNative import TrendFollowingNative
-        from strategies.DonchianBreakoutV2 import DonchianBreakoutV2
-        
-        self.registry.register(RSIMACDDivergenceStrategy)
-        self.registry.register(MACrossStrategy)
-        self.registry.register(DonchianStrategy)
-        self.registry.register(BBMeanReversionStrategy)
-        self.registry.register(RSIDivergenceStrategy)
-        self.registry.register(TrendFollowingNative)
-        self.registry.register(DonchianBreakoutV2)
-        print("✅ Strategies registered")
+        # Estrategias: descubrimiento perezoso del registry (strategies/ + entry points)
+        self.registry.discover()
         
         # State tracking for intervals
         self.last_run = {} # {persona_id: timestamp}
         self.processed_signals = {} # {signal_key: timestamp}
         self.last_signal_direction = {} # {persona_id_token: direction} (For alternation enforcement)
+        self.last_archive = None # Último archivado de señales (SIGNAL_ARCHIVE_AUTO)
 
         # Lock Config
         self.lock_id = str(uuid.uuid4())
@@ -143,9 +128,11 @@ class StrategyScheduler:
                     
                     print(f"  🔄 Running Persona: {persona['name']} ({persona['symbol']}/{persona['timeframe']})")
                     
-                    # Instanciar estrategia técnica
+                    # Instancia propia de la persona (estado incremental sin compartir)
                     strategy_id = persona["strategy_id"]
-                    strategy = self.registry.get(strategy_id)
+                    strategy = self.registry.get(
+                        strategy_id, scope=f"{p_id}:{persona['symbol']}:{persona['timeframe']}"
+                    )
                     
                     if not strategy:
                         print(f"  ⚠️  Strategy class '{strategy_id}' not found!")
@@ -197,6 +184,8 @@ class StrategyScheduler:
                 # 3. Evaluador PnL (Critico para mostrar profit real)
                 # print("  ⚖️  Evaluating Pending Signals...") # Less verbose
                 try:
+                    # Las señales nuevas van por el write-behind: que estén en DB antes de evaluar
+                    flush_signals()
                     from core.signal_evaluator import evaluate_pending_signals
                     # Pass the DB session used for locking? No, create new one or pass valid one.
                     # evaluate_pending_signals(db) -> wait, DB is closed in finally block above!
@@ -213,15 +202,39 @@ class StrategyScheduler:
                 except Exception as e:
                     print(f"  ❌ Eval Error: {e}")
 
+                # 4. Archivo frío de señales cerradas (una vez al día, solo con el lock)
+                from core.signal_archive import SIGNAL_ARCHIVE_AUTO, archive_signals
+                if SIGNAL_ARCHIVE_AUTO and (self.last_archive is None or now - self.last_archive >= timedelta(days=1)):
+                    archive_db = SessionLocal()
+                    try:
+                        archive_signals(archive_db)
+                        self.last_archive = now
+                    except Exception as e:
+                        print(f"  ❌ Archive Error: {e}")
+                    finally:
+                        archive_db.close()
+
                 print(f"  😴 Sleeping {self.loop_interval}s...")
                 time.sleep(self.loop_interval)
                 
         except KeyboardInterrupt:
             print("\n🛑 Stopped.")
 
-# Expose instance for imports
-scheduler_instance = StrategyScheduler(loop_interval=60)
+_scheduler_instance = None
+
+
+def get_scheduler() -> StrategyScheduler:
+    """
+    Instancia compartida, creada al pedirla. Antes se creaba al importar el
+    módulo (registrando e importando todas las estrategias) y la API lo
+    importaba sin usarlo.
+    """
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = StrategyScheduler(loop_interval=60)
+    return _scheduler_instance
+
 
 if __name__ == "__main__":
-    scheduler_instance.run()
+    get_scheduler().run()
 
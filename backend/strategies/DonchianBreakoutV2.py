@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from datetime import datetime
@@ -18,6 +19,9 @@ class DonchianBreakoutV2(Strategy):
     - Trailing Stop at Donchian Middle Band
     """
     
+    # generate_signals descarga datos en vivo (ignora context["data"])
+    causal = False
+
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         
@@ -47,6 +51,45 @@ class DonchianBreakoutV2(Strategy):
             }
         )
 
+    def _indicators(self, df: pd.DataFrame):
+        high = df["high"]
+        low = df["low"]
+        close = df["close"]
+
+        # Donchian Channels (manual calculation for clarity)
+        dc_upper = high.rolling(window=self.period).max().shift(1)
+        dc_lower = low.rolling(window=self.period).min().shift(1)
+        dc_mid = (dc_upper + dc_lower) / 2
+
+        # ATR & ATR MA
+        atr_series = ta.atr(high, low, close, length=self.atr_period)
+        atr_ma = atr_series.rolling(window=self.atr_ma_period).mean()
+
+        # EMA 200 Trend Filter
+        ema_trend = ta.ema(close, length=self.ema_trend_period)
+
+        return dc_upper, dc_lower, dc_mid, atr_series, atr_ma, ema_trend
+
+    def signal_frame(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Same entry rules as generate_signals, evaluated on every candle."""
+        close = df["close"]
+        dc_upper, dc_lower, dc_mid, atr_series, atr_ma, ema_trend = self._indicators(df)
+
+        valid = dc_upper.notna() & atr_series.notna() & ema_trend.notna()
+        vol_ok = atr_series > atr_ma
+        is_long = valid & (close > dc_upper) & vol_ok & (close > ema_trend)
+        is_short = valid & ~is_long & (close < dc_lower) & vol_ok & (close < ema_trend)
+
+        # SL at Donchian mid, TP at 2R
+        risk = (close - dc_mid).abs()
+        return pd.DataFrame({
+            "direction": np.where(is_long, 1, np.where(is_short, -1, 0)),
+            "entry": close,
+            "tp": np.where(is_long, close + risk * 2.0, close - risk * 2.0),
+            "sl": dc_mid,
+            "confidence": 0.85,
+        }, index=df.index)
+
     def generate_signals(self, tokens: List[str], timeframe: str, context: Optional[Dict[str, Any]] = None) -> List[Signal]:
         signals = []
         
@@ -68,18 +111,7 @@ class DonchianBreakoutV2(Strategy):
                 high = df["high"]
                 low = df["low"]
                 close = df["close"]
-                
-                # Donchian Channels (manual calculation for clarity)
-                dc_upper = high.rolling(window=self.period).max().shift(1)
-                dc_lower = low.rolling(window=self.period).min().shift(1)
-                dc_mid = (dc_upper + dc_lower) / 2
-                
-                # ATR & ATR MA
-                atr_series = ta.atr(high, low, close, length=self.atr_period)
-                atr_ma = atr_series.rolling(window=self.atr_ma_period).mean()
-                
-                # EMA 200 Trend Filter
-                ema_trend = ta.ema(close, length=self.ema_trend_period)
+                dc_upper, dc_lower, dc_mid, atr_series, atr_ma, ema_trend = self._indicators(df)
                 
                 # 3. Logic (on the last closed candle)
                 curr_idx = -1
@@ -55,10 +55,7 @@ class TrendFollowingNative(Strategy):
             }
         )
 
-    def analyze(self, df: pd.DataFrame, token: str, timeframe: str) -> List[Signal]:
-        if df.empty or len(df) < self.ema_slow_len + 5:
-            return []
-        
+    def _indicators(self, df: pd.DataFrame):
         d = df.copy()
         
         # 1. Calculate Indicators
@@ -79,6 +76,40 @@ class TrendFollowingNative(Strategy):
              # Sometimes it's just ADX_14
              cols = [c for c in d.columns if c.startswith("ADX")]
              if cols: adx_col = cols[0]
+
+        return d, fast_col, slow_col, adx_col, atr_col
+
+    def signal_frame(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Vectorized version of analyze(): crossover + ADX filter on every candle."""
+        if df.empty or len(df) < self.ema_slow_len + 5:
+            return None
+
+        d, fast_col, slow_col, adx_col, atr_col = self._indicators(df)
+        valid = d[[fast_col, slow_col, adx_col, atr_col]].notna().all(axis=1)
+        valid &= valid.shift(1, fill_value=False)
+
+        fast, slow = d[fast_col], d[slow_col]
+        prev_fast, prev_slow = fast.shift(1), slow.shift(1)
+        adx, atr, close = d[adx_col], d[atr_col], d["close"]
+        trending = valid & (adx > self.adx_threshold)
+
+        is_long = trending & (prev_fast <= prev_slow) & (fast > slow)
+        is_short = trending & ~is_long & (prev_fast >= prev_slow) & (fast < slow)
+        side = np.where(is_long, 1, np.where(is_short, -1, 0))
+
+        return pd.DataFrame({
+            "direction": side,
+            "entry": close,
+            "tp": close + side * 4 * atr,
+            "sl": close - side * 2 * atr,
+            "confidence": np.minimum(0.95, 0.6 + ((adx - 25) / 100)),
+        }, index=df.index)
+
+    def analyze(self, df: pd.DataFrame, token: str, timeframe: str) -> List[Signal]:
+        if df.empty or len(df) < self.ema_slow_len + 5:
+            return []
+        
+        d, fast_col, slow_col, adx_col, atr_col = self._indicators(df)
         
         d = d.dropna()
         if len(d) < 2: return []
@@ -1,18 +1,35 @@
 # backend/strategies/__init__.py
 """
 Strategy Base Module for TraderCopilot Signal Hub.
+
+Las implementaciones se importan al pedirlas (`from strategies import
+MACrossStrategy`): importar el paquete (p. ej. strategies.registry desde
+main) ya no carga pandas/pandas_ta.
 """
 
+import importlib
+
 from .base import Strategy, StrategyMetadata
 
-# Import Strategy Implementations
-from .DonchianBreakoutV2 import DonchianBreakoutV2
-from .ma_cross import MACrossStrategy
-from .supertrend_flow import SuperTrendFlowStrategy
-from .bb_mean_reversion import BBMeanReversionStrategy
-from .rsi_divergence import RSIDivergenceStrategy
-from .vwap_intraday import VWAPIntradayStrategy
-from .TrendFollowingNative import TrendFollowingNative
+# Import Strategy Implementations (lazy: nombre -> submódulo)
+_IMPLEMENTATIONS = {
+    "DonchianBreakoutV2": "DonchianBreakoutV2",
+    "MACrossStrategy": "ma_cross",
+    "SuperTrendFlowStrategy": "supertrend_flow",
+    "BBMeanReversionStrategy": "bb_mean_reversion",
+    "RSIDivergenceStrategy": "rsi_divergence",
+    "VWAPIntradayStrategy": "vwap_intraday",
+    "TrendFollowingNative": "TrendFollowingNative",
+}
+
+
+def __getattr__(name):
+    module = _IMPLEMENTATIONS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
 
 __all__ = [
@@ -165,6 +165,11 @@ class Strategy(ABC):
     ```
     """
     
+    # True si la señal en la vela t depende solo de las velas [0..t] recibidas
+    # en context["data"] (sin estado interno ni datos en vivo). Permite a
+    # BacktestEngine reanudar desde un prefijo cacheado (core.backtest_cache).
+    causal: bool = True
+
     @abstractmethod
     def metadata(self) -> StrategyMetadata:
         """
@@ -205,6 +210,20 @@ class Strategy(ABC):
         """
         raise NotImplementedError("generate_signals() must be implemented by strategy class")
     
+    def signal_frame(self, df: "pd.DataFrame") -> Optional["pd.DataFrame"]:
+        """
+        Versión vectorizada OPCIONAL de la estrategia para backtests.
+
+        Evalúa la lógica de entrada sobre TODAS las velas de df de una vez
+        (sin walk-forward vela a vela). Lo usa core.portfolio_engine.
+
+        Returns:
+            DataFrame con el mismo índice que df y columnas
+            direction (+1 long, -1 short, 0 nada), entry, tp, sl, confidence;
+            o None si la estrategia no soporta modo vectorizado.
+        """
+        return None
+
     # === Helper methods opcionales para estrategias ===
     
     def validate_tokens(self, tokens: List[str]) -> List[str]:
@@ -3,90 +3,432 @@
 Strategy Registry - Catálogo de estrategias disponibles.
 
 Este módulo mantiene el registro de todas las estrategias que pueden
-ejecutarse en el backend, tanto built-in como de trading_lab.
+ejecutarse en el backend, tanto built-in como de trading_lab / plugins.
+
+Antes cada punto de entrada registraba a mano su propia lista de clases
+(main.py, scheduler.py, portfolio_engine) y BacktestEngine.load_strategy
+hacía importlib.reload del módulo en cada backtest; register() creaba una
+instancia de usar y tirar para leer metadata(), list_all() volvía a
+instanciar todas las clases en cada GET /strategies/ y get() creaba una
+instancia nueva en cada tick del scheduler. Ahora hay un único registro:
+
+- Descubrimiento perezoso (discover(), al primer uso): módulos del paquete
+  strategies/ (escaneo de ficheros, sin importarlos) y entry points del
+  grupo STRATEGY_ENTRY_POINT_GROUP para plugins instalados. Un módulo solo
+  se importa cuando se pide una de sus estrategias.
+- Metadatos cacheados: la primera vez que se importa un módulo se guardan
+  clase y metadata() de sus estrategias en STRATEGY_INDEX_FILE (con el
+  mtime del fichero / versión del plugin). Con el índice al día,
+  list_all() y la resolución id → módulo no importan nada.
+- Pool de instancias: get(id, config, scope) reutiliza la instancia por
+  (id, hash de config, scope), así que las estrategias con estado
+  incremental lo conservan entre ticks del scheduler (LRU de
+  STRATEGY_POOL_SIZE). El scheduler usa un scope por persona/símbolo/
+  timeframe: dos personas con la misma estrategia no comparten estado.
+  create() da una instancia nueva y aislada (backtests, ejecución manual).
+- Recarga solo explícita: reload(id) en desarrollo, o automáticamente en
+  BacktestEngine si STRATEGY_DEV_RELOAD=1.
+
+Concurrencia: las instancias del pool NO son thread-safe. Cada scope tiene
+un único dueño que las usa secuencialmente (el bucle del scheduler); quien
+vaya a ejecutar generate_signals desde otro hilo (p. ej. el threadpool de
+POST /strategies/{id}/execute) debe usar create(). get() sin scope solo
+debe usarse para leer metadata().
+
+Catálogo público: todo lo descubierto se puede resolver por id (scheduler,
+backtests), pero list_all() / GET /strategies/ solo enseña las estrategias
+de los módulos de STRATEGY_CATALOG (las cuatro que main.py registraba a
+mano), las de plugins (entry points) y las registradas con register().
+STRATEGY_CATALOG=* publica todos los módulos del paquete.
+
+Los ids se resuelven por metadata().id ("ma_cross_v1"), nombre de módulo
+("ma_cross", lo que usa /backtest) o nombre de clase.
 """
 
-from typing import Dict, List, Optional, Type
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
 from .base import Strategy, StrategyMetadata
 
+STRATEGY_ENTRY_POINT_GROUP = os.getenv("STRATEGY_ENTRY_POINT_GROUP", "tradercopilot.strategies")
+STRATEGY_INDEX_FILE = os.getenv(
+    "STRATEGY_INDEX_FILE",
+    str(Path(__file__).resolve().parent.parent / "data" / "strategy_index.json"),
+)
+STRATEGY_POOL_SIZE = int(os.getenv("STRATEGY_POOL_SIZE", "256"))
+STRATEGY_DEV_RELOAD = os.getenv("STRATEGY_DEV_RELOAD", "0") == "1"
+STRATEGY_CATALOG = os.getenv("STRATEGY_CATALOG", "example_rsi_macd,ma_cross,DonchianBreakoutV2,bb_mean_reversion")
+
+INDEX_VERSION = 1
+# Módulos del paquete que no contienen estrategias
+_SKIP_MODULES = {"base", "registry"}
+
+# (id, hash de config, scope del dueño)
+PoolKey = Tuple[str, str, Optional[str]]
+
+
+def _meta_dict(meta: StrategyMetadata) -> Dict[str, Any]:
+    return meta.model_dump() if hasattr(meta, "model_dump") else meta.dict()
+
+
+def config_key(config: Optional[dict]) -> str:
+    """Hash estable de una config ('' = config por defecto)."""
+    if not config:
+        return ""
+    raw = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class StrategySpec:
+    """Una estrategia conocida; cls se rellena al importar su módulo."""
+    id: str
+    module: str
+    class_name: str
+    meta: StrategyMetadata
+    source: str = "scan"  # scan | entry_point | manual
+    listed: bool = True   # aparece en list_all() (catálogo público)
+    cls: Optional[Type[Strategy]] = field(default=None, repr=False)
+
+
+def _strategy_classes(module) -> List[Type[Strategy]]:
+    """Estrategias concretas definidas en el módulo (no las importadas)."""
+    return [
+        obj for _, obj in inspect.getmembers(module, inspect.isclass)
+        if obj.__module__ == module.__name__
+        and issubclass(obj, Strategy) and obj is not Strategy and not inspect.isabstract(obj)
+    ]
+
+
+def _instantiate(strategy_class: Type[Strategy], config: Optional[dict] = None) -> Strategy:
+    # Instanciar con config si aplica
+    if config:
+        try:
+            return strategy_class(config=config)
+        except TypeError:
+            pass  # La estrategia no acepta config
+    return strategy_class()
+
 
 class StrategyRegistry:
     """
     Registro centralizado de estrategias disponibles.
-    
+
     Permite:
-    - Descubrir qué estrategias están disponibles
-    - Instanciar estrategias by ID
+    - Descubrir qué estrategias están disponibles (sin importarlas)
+    - Instanciar estrategias by ID (instancias reutilizadas por config)
     - Listar estrategias activas
     """
-    
-    def __init__(self):
-        self._strategies: Dict[str, Type[Strategy]] = {}
-    
+
+    def __init__(self, package: str = "strategies", index_file: Optional[str] = STRATEGY_INDEX_FILE,
+                 entry_point_group: Optional[str] = STRATEGY_ENTRY_POINT_GROUP,
+                 pool_size: int = STRATEGY_POOL_SIZE, catalog: Optional[str] = STRATEGY_CATALOG):
+        self.package = package
+        # Módulos del paquete publicados en list_all() (None / "*" = todos)
+        self.catalog = None if catalog in (None, "*") else {m.strip() for m in catalog.split(",") if m.strip()}
+        self.index_file = index_file
+        self.entry_point_group = entry_point_group
+        self.pool_size = pool_size
+        self._specs: Dict[str, StrategySpec] = {}
+        self._aliases: Dict[str, str] = {}  # módulo / clase -> id
+        self._pool: "OrderedDict[PoolKey, Strategy]" = OrderedDict()
+        self._index: Dict[str, Any] = {}
+        self._discovered = False
+        self._lock = threading.RLock()
+        self._errors: Dict[str, str] = {}
+        self._stats = {"index_hits": 0, "modules_imported": 0, "instances_created": 0,
+                       "pool_hits": 0, "reloads": 0}
+
+    # --- Descubrimiento ---
+
+    def discover(self, force: bool = False) -> None:
+        """Escanea el paquete y los entry points (idempotente)."""
+        with self._lock:
+            if self._discovered and not force:
+                return
+            self._index = self._load_index() if not force else {}
+            changed = False
+            for module_name, stamp in self._scan_package():
+                changed |= self._discover_module(module_name, stamp, source="scan")
+            for module_name, class_name, stamp in self._scan_entry_points():
+                changed |= self._discover_module(module_name, stamp, source="entry_point", only=class_name)
+            self._discovered = True
+            if changed:
+                self._save_index()
+            print(f"[STRATEGIES] ✅ {len(self._specs)} strategies discovered "
+                  f"({self._stats['index_hits']} from index, {self._stats['modules_imported']} modules imported)")
+
+    def _scan_package(self):
+        package = importlib.import_module(self.package)
+        for info in pkgutil.iter_modules(package.__path__):
+            if info.ispkg or info.name in _SKIP_MODULES or info.name.startswith("_"):
+                continue
+            path = os.path.join(info.module_finder.path, f"{info.name}.py")
+            try:
+                stamp = str(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamp = None
+            yield f"{self.package}.{info.name}", stamp
+
+    def _scan_entry_points(self):
+        if not self.entry_point_group:
+            return
+        try:
+            from importlib.metadata import entry_points
+            eps = entry_points()
+            group = eps.select(group=self.entry_point_group) if hasattr(eps, "select") \
+                else eps.get(self.entry_point_group, [])
+        except Exception as e:
+            print(f"[STRATEGIES] ⚠️ Entry points unavailable: {e}")
+            return
+        for ep in group:
+            module_name, _, class_name = ep.value.partition(":")
+            version = getattr(getattr(ep, "dist", None), "version", None)
+            yield module_name.strip(), class_name.strip() or None, f"ep:{version}"
+
+    def _discover_module(self, module_name: str, stamp: Optional[str], source: str,
+                         only: Optional[str] = None) -> bool:
+        """Registra las estrategias del módulo; True si hubo que importarlo."""
+        entry = self._index.get(module_name)
+        if entry and stamp is not None and entry.get("stamp") == stamp:
+            for item in entry["classes"]:
+                if only and item["class"] != only:
+                    continue
+                self._add_spec(StrategySpec(
+                    id=item["meta"]["id"], module=module_name, class_name=item["class"],
+                    meta=StrategyMetadata(**item["meta"]), source=source,
+                ))
+            self._stats["index_hits"] += 1
+            return False
+
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as e:
+            self._errors[module_name] = str(e)
+            print(f"[STRATEGIES] ⚠️ Could not import {module_name}: {e}")
+            return False
+        self._stats["modules_imported"] += 1
+        classes = [c for c in _strategy_classes(module) if not only or c.__name__ == only]
+        self._index_classes(module_name, stamp, classes, source)
+        return True
+
+    def _index_classes(self, module_name: str, stamp: Optional[str], classes, source: str) -> None:
+        items = []
+        for cls in classes:
+            try:
+                # La primera instancia no se tira: queda en el pool (config por defecto)
+                instance = _instantiate(cls)
+                meta = instance.metadata()
+            except Exception as e:
+                self._errors[f"{module_name}.{cls.__name__}"] = str(e)
+                print(f"[STRATEGIES] ⚠️ {cls.__name__}.metadata() failed: {e}")
+                continue
+            self._stats["instances_created"] += 1
+            spec = StrategySpec(id=meta.id, module=module_name, class_name=cls.__name__,
+                                meta=meta, source=source, cls=cls)
+            self._add_spec(spec)
+            self._pool_put((meta.id, "", None), instance)
+            items.append({"class": cls.__name__, "meta": _meta_dict(meta)})
+        if stamp is not None:
+            self._index[module_name] = {"stamp": stamp, "classes": items}
+
+    def _add_spec(self, spec: StrategySpec) -> None:
+        spec.listed = (spec.source != "scan" or self.catalog is None
+                       or spec.module.rsplit(".", 1)[-1] in self.catalog)
+        old = self._specs.get(spec.id)
+        if old is not None and (old.module, old.class_name) != (spec.module, spec.class_name):
+            print(f"⚠️  Warning: Overwriting strategy '{spec.id}'")
+        self._specs[spec.id] = spec
+        self._aliases[spec.module.rsplit(".", 1)[-1]] = spec.id
+        self._aliases[spec.class_name] = spec.id
+
+    # --- Índice en disco ---
+
+    def _load_index(self) -> Dict[str, Any]:
+        if not self.index_file:
+            return {}
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data.get("modules", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_index(self) -> None:
+        if not self.index_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "modules": self._index}, f, default=str)
+            os.replace(tmp, self.index_file)
+        except OSError as e:
+            print(f"[STRATEGIES] ⚠️ Could not write index {self.index_file}: {e}")
+
+    # --- Registro manual ---
+
     def register(self, strategy_class: Type[Strategy]) -> None:
         """
         Registra una clase de estrategia.
-        
+
         Args:
             strategy_class: Clase que hereda de Strategy
         """
-        # Instanciar temporalmente para obtener metadata
-        temp_instance = strategy_class()
-        meta = temp_instance.metadata()
-        
-        if meta.id in self._strategies:
-            print(f"⚠️  Warning: Overwriting strategy '{meta.id}'")
-        
-        self._strategies[meta.id] = strategy_class
-        print(f"✅ Registered strategy: {meta.id} - {meta.name}")
-    
-    def get(self, strategy_id: str, config: Optional[dict] = None) -> Optional[Strategy]:
+        with self._lock:
+            self.discover()
+            for spec in self._specs.values():
+                if spec.module == strategy_class.__module__ and spec.class_name == strategy_class.__name__:
+                    spec.cls = strategy_class  # ya descubierta: metadatos del índice
+                    spec.listed = True  # registro explícito: entra en el catálogo
+                    return
+            self._index_classes(strategy_class.__module__, None, [strategy_class], source="manual")
+            print(f"✅ Registered strategy: {strategy_class.__name__}")
+
+    # --- Resolución / instancias ---
+
+    def resolve(self, strategy_id: str) -> Optional[StrategySpec]:
+        """Spec por id de metadata, nombre de módulo o nombre de clase."""
+        self.discover()
+        spec = self._specs.get(strategy_id)
+        if spec is None and strategy_id in self._aliases:
+            spec = self._specs.get(self._aliases[strategy_id])
+        return spec
+
+    def load_class(self, strategy_id: str) -> Optional[Type[Strategy]]:
+        """Importa (una vez) el módulo de la estrategia y devuelve su clase."""
+        with self._lock:
+            spec = self.resolve(strategy_id)
+            if spec is None:
+                return None
+            if spec.cls is None:
+                module = importlib.import_module(spec.module)
+                self._stats["modules_imported"] += 1
+                spec.cls = getattr(module, spec.class_name, None)
+                if spec.cls is None:
+                    # Índice desfasado (clase renombrada): se vuelve a indexar el módulo
+                    self._index.pop(spec.module, None)
+                    self._specs.pop(spec.id, None)
+                    self._index_classes(spec.module, None, _strategy_classes(module), spec.source)
+                    spec = self.resolve(strategy_id)
+                    return spec.cls if spec else None
+            return spec.cls
+
+    def get(self, strategy_id: str, config: Optional[dict] = None,
+            scope: Optional[str] = None) -> Optional[Strategy]:
         """
-        Obtiene una instancia de estrategia por ID.
-        
+        Obtiene una instancia de estrategia por ID (reutilizada por config y scope).
+
         Args:
             strategy_id: ID de la estrategia
             config: Configuración opcional
-            
+            scope: Dueño de la instancia (p. ej. "persona:símbolo:timeframe");
+                instancias con estado no se comparten entre scopes
+
         Returns:
             Instancia de la estrategia o None si no existe
         """
-        strategy_class = self._strategies.get(strategy_id)
-        if not strategy_class:
+        with self._lock:
+            spec = self.resolve(strategy_id)
+            if spec is None:
+                return None
+            key = (spec.id, config_key(config), scope)
+            instance = self._pool.get(key)
+            if instance is not None:
+                self._pool.move_to_end(key)
+                self._stats["pool_hits"] += 1
+                return instance
+            instance = self.create(spec.id, config)
+            if instance is not None:
+                self._pool_put(key, instance)
+            return instance
+
+    def create(self, strategy_id: str, config: Optional[dict] = None) -> Optional[Strategy]:
+        """Instancia nueva, fuera del pool (backtests: sin estado compartido)."""
+        strategy_class = self.load_class(strategy_id)
+        if strategy_class is None:
             return None
-        
-        # Instanciar con config si aplica
+        self._stats["instances_created"] += 1
+        return _instantiate(strategy_class, config)
+
+    def _pool_put(self, key: "PoolKey", instance: Strategy) -> None:
+        self._pool[key] = instance
+        self._pool.move_to_end(key)
+        while len(self._pool) > self.pool_size:
+            self._pool.popitem(last=False)
+
+    def reload(self, strategy_id: Optional[str] = None) -> None:
+        """
+        Recarga explícita (desarrollo): reimporta el módulo de la estrategia
+        (o todos) y descarta sus instancias y metadatos cacheados.
+        """
+        with self._lock:
+            specs = list(self._specs.values()) if strategy_id is None else [self.resolve(strategy_id)]
+            for module_name in {s.module for s in specs if s is not None}:
+                module = importlib.reload(importlib.import_module(module_name))
+                stale = [sid for sid, s in self._specs.items() if s.module == module_name]
+                for sid in stale:
+                    self._specs.pop(sid)
+                    for key in [k for k in self._pool if k[0] == sid]:
+                        del self._pool[key]
+                self._index.pop(module_name, None)
+                source = specs[0].source if specs and specs[0] else "scan"
+                self._index_classes(module_name, self._module_stamp(module), _strategy_classes(module), source)
+                self._stats["reloads"] += 1
+            self._save_index()
+
+    @staticmethod
+    def _module_stamp(module) -> Optional[str]:
         try:
-            if config:
-                return strategy_class(config=config)
-            else:
-                return strategy_class()
-        except TypeError:
-            # La estrategia no acepta config
-            return strategy_class()
-    
+            return str(os.stat(module.__file__).st_mtime_ns)
+        except (OSError, TypeError):
+            return None
+
+    # --- Catálogo ---
+
     def list_all(self) -> List[StrategyMetadata]:
         """
-        Lista metadatos de todas las estrategias registradas.
-        
+        Lista metadatos de las estrategias del catálogo público.
+
         Returns:
-            Lista de StrategyMetadata
+            Lista de StrategyMetadata (cacheados, sin instanciar)
         """
-        metadatas = []
-        for strategy_class in self._strategies.values():
-            instance = strategy_class()
-            metadatas.append(instance.metadata())
-        return metadatas
-    
+        self.discover()
+        return [spec.meta for spec in self._specs.values() if spec.listed]
+
     def list_enabled(self) -> List[StrategyMetadata]:
         """
         Lista solo estrategias habilitadas.
-        
+
         Returns:
             Lista de StrategyMetadata de estrategias enabled=True
         """
         return [m for m in self.list_all() if m.enabled]
 
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "discovered": self._discovered,
+                "strategies": {sid: {"module": s.module, "class": s.class_name, "source": s.source,
+                                     "listed": s.listed, "loaded": s.cls is not None}
+                               for sid, s in self._specs.items()},
+                "pooled_instances": len(self._pool),
+                "errors": dict(self._errors),
+                "index_file": self.index_file,
+                **self._stats,
+            }
+
 
 # Instancia global del registry
 registry = StrategyRegistry()
@@ -0,0 +1,132 @@
+# backend/test_backtest_cache.py
+"""
+Reutilización de prefijos de la caché de backtests (core/backtest_cache.py)
+con una ventana que se desplaza, como en producción ("últimas N velas"):
+
+- run 1 con la última vela aún en curso
+- run 2 tres velas después: la ventana se ha movido, el inicio alineado es
+  el mismo y se reanuda desde el checkpoint (solo se simulan las velas nuevas)
+- el resultado del run 2 es idéntico al de un run sin caché previa
+
+Velas y estrategia sintéticas, reloj simulado (sin red ni DB).
+Ejecutar: python test_backtest_cache.py   (o con pytest)
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from core import backtest_engine as be
+from core.backtest_cache import BacktestResultCache, last_closed_index
+
+H = 3_600_000
+DAY = 24 * H
+BASE = 1_700_000_000_000 // DAY * DAY  # medianoche UTC
+N1 = 1226  # vela en curso del run 1 (la ventana de ambos runs empieza en el mismo día)
+
+
+def _market(n: int, seed: int = 3):
+    random.seed(seed)
+    out, price = [], 100.0
+    for k in range(n):
+        o = price
+        c = price * (1 + random.gauss(0, 0.01))
+        price = c
+        out.append({"timestamp": BASE + k * H, "time": str(BASE + k * H), "open": o,
+                    "high": max(o, c) * 1.01, "low": min(o, c) * 0.99, "close": c, "volume": 1.0})
+    return out
+
+
+class EveryTenBars:
+    """Estrategia causal: entra long cada 10 velas."""
+    causal = True
+    config = {"n": 10}
+
+    def generate_signals(self, tokens, timeframe, context):
+        df = context["data"][tokens[0]]
+        if len(df) % 10:
+            return []
+        last = df.iloc[-1]
+        entry = float(last["close"])
+        return [SimpleNamespace(timestamp=last["timestamp_dt"], entry=entry, sl=entry * 0.98,
+                                tp=entry * 1.02, direction="long")]
+
+
+class Clock:
+    now_ms = 0
+
+
+def _run(engine):
+    """Ejecuta el backtest y devuelve (resultado, velas simuladas)."""
+    bars = []
+    result = engine.run("every_ten", "BTC", "1h", days=30, progress=lambda done, total, n: bars.append(done))
+    return result, len(bars) - 1  # el último aviso es el de fin, no una vela
+
+
+def _engine(cache, market, current, forming=None):
+    """Motor cuyo feed devuelve las últimas `limit` velas hasta `current` (en curso)."""
+    strategy = EveryTenBars()
+    engine = be.BacktestEngine(cache=cache)
+    engine.load_strategy = lambda sid: engine.strategies.__setitem__(sid, strategy)
+
+    def feed(symbol, timeframe, limit):
+        rows = [dict(c) for c in market[current - limit + 1:current + 1]]
+        if forming is not None:
+            rows[-1]["close"] = forming  # vela en curso: su cierre aún no es el definitivo
+        return rows
+
+    be.get_ohlcv_data = feed
+    Clock.now_ms = BASE + current * H + H // 2
+    return engine
+
+
+def check():
+    errors = []
+    market = _market(N1 + 10)
+    # _engine sustituye el feed; los tres globals se restauran siempre
+    saved = (be.get_ohlcv_data, be.last_closed_index, be.PROGRESS_EVERY_BARS)
+    be.last_closed_index = lambda ts, tf_ms: last_closed_index(ts, tf_ms, now_ms=Clock.now_ms)
+    be.PROGRESS_EVERY_BARS = 1  # un aviso por vela simulada
+    try:
+        cache = BacktestResultCache(directory=tempfile.mkdtemp(), max_bytes=50 * 1024 * 1024)
+        _run(_engine(cache, market, N1, forming=market[N1]["open"] * 1.05))
+
+        # Tres velas después: la ventana "últimas N velas" se ha desplazado.
+        # Nuevas: la que estaba en curso (ya cerrada) + 3
+        result, resumed_bars = _run(_engine(cache, market, N1 + 3))
+        if cache.stats["prefix_hits"] != 1:
+            errors.append(f"shifted window did not reuse the cached prefix: {cache.stats}")
+        if resumed_bars != 4:
+            errors.append(f"run 2 simulated {resumed_bars} bars (expected the 4 new ones)")
+
+        # Mismo run sin caché previa: resultado idéntico
+        fresh = BacktestResultCache(directory=tempfile.mkdtemp())
+        expected, full_bars = _run(_engine(fresh, market, N1 + 3))
+        if result["metrics"] != expected["metrics"] or result["curve"] != expected["curve"]:
+            errors.append("resumed run differs from a full run over the same window")
+    finally:
+        be.get_ohlcv_data, be.last_closed_index, be.PROGRESS_EVERY_BARS = saved
+    return errors, {"stats": cache.stats, "resumed_bars": resumed_bars, "full_bars": full_bars}
+
+
+def test_backtest_cache_prefix():
+    errors, _ = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Backtest cache - prefix reuse with a shifted window")
+    print("=" * 60)
+    errors, info = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Shifted window resumed from the cached prefix, same result as a full run")
+    print(f"Info: {info}")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,142 @@
+# backend/test_backtest_jobs.py
+"""
+Cola de jobs de backtest (core/backtest_jobs.py + routers/backtest.py), con
+un pool de hilos y un run falso controlado por el test (sin red ni procesos):
+
+- una submission idéntica a un job en cola o en curso se une a ese job
+- una submission idéntica después de que el job termine o se cancele crea
+  un job nuevo (DEDUPE_STATES)
+- DELETE /backtest/jobs/{id} cancela un job en curso
+
+Ejecutar: python test_backtest_jobs.py   (o con pytest)
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core import backtest_jobs
+from core.backtest_engine import BacktestCancelled
+from core.backtest_jobs import BacktestJobManager
+from routers import backtest as backtest_router
+
+BODY = {"strategy_id": "ma_cross", "token": "BTC", "timeframe": "1h", "days": 30}
+
+
+class FakeRuns:
+    """Sustituye _run_job: avisa al empezar y espera a release (o a la cancelación)."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, job_id, params, progress_store, cancel_store):
+        self.started.set()
+        done = 0
+        while not self.release.is_set():
+            done += 1
+            progress_store[job_id] = {"bars_done": done, "bars_total": None, "trades": 0}
+            if cancel_store.get(job_id):
+                raise BacktestCancelled()
+            time.sleep(0.01)
+        return {"metrics": {"bars": done}}
+
+
+class ThreadJobManager(BacktestJobManager):
+    """Mismo gestor, con hilos y dicts locales en vez de procesos y Manager."""
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._progress, self._cancel = {}, {}
+            self._pool = ThreadPoolExecutor(max_workers=1)
+
+
+def _wait(client, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/backtest/jobs/{job_id}").json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    return client.get(f"/backtest/jobs/{job_id}").json()
+
+
+def check():
+    errors = []
+    runs = FakeRuns()
+    manager = ThreadJobManager(max_workers=1)
+    app = FastAPI()
+    app.include_router(backtest_router.router)
+    client = TestClient(app)
+
+    saved = (backtest_jobs._run_job, backtest_router.job_manager)
+    backtest_jobs._run_job, backtest_router.job_manager = runs, manager
+    try:
+        # 1. Duplicado de un job en curso: se une a él
+        first = client.post("/backtest/jobs", json=BODY).json()
+        runs.started.wait(5)
+        running = _wait(client, first["job_id"], ("running",))
+        dup = client.post("/backtest/jobs", json=BODY).json()
+        if running["status"] != "running" or dup["job_id"] != first["job_id"] or not dup["deduplicated"]:
+            errors.append(f"duplicate of a running job: {dup['job_id'] == first['job_id']}, "
+                          f"deduplicated={dup['deduplicated']}, status={running['status']}")
+
+        # 2. Duplicado de un job en cola (el único worker está ocupado)
+        queued_body = {**BODY, "days": 60}
+        queued = client.post("/backtest/jobs", json=queued_body).json()
+        dup_queued = client.post("/backtest/jobs", json=queued_body).json()
+        if queued["status"] != "queued" or dup_queued["job_id"] != queued["job_id"] or not dup_queued["deduplicated"]:
+            errors.append(f"duplicate of a queued job not joined: {queued['status']}, {dup_queued}")
+
+        # 3. DELETE cancela el job en curso
+        resp = client.delete(f"/backtest/jobs/{first['job_id']}")
+        cancelled = _wait(client, first["job_id"], ("cancelled",))
+        if resp.status_code != 200 or cancelled["status"] != "cancelled":
+            errors.append(f"DELETE on a running job: HTTP {resp.status_code}, status {cancelled['status']}")
+
+        # 4. Después de cancelado: job nuevo
+        again = client.post("/backtest/jobs", json=BODY).json()
+        if again["job_id"] == first["job_id"] or again["deduplicated"]:
+            errors.append("submission after cancellation reused the cancelled job")
+
+        # 5. Después de terminado: job nuevo
+        runs.release.set()
+        done = _wait(client, queued["job_id"], ("done",))
+        after_done = client.post("/backtest/jobs", json=queued_body).json()
+        if done["status"] != "done":
+            errors.append(f"queued job ended as {done['status']} (expected done)")
+        elif after_done["job_id"] == queued["job_id"] or after_done["deduplicated"]:
+            errors.append("submission after completion reused the finished job")
+        _wait(client, after_done["job_id"], ("done",))
+        _wait(client, again["job_id"], ("done",))
+    finally:
+        runs.release.set()
+        backtest_jobs._run_job, backtest_router.job_manager = saved
+        if manager._pool is not None:
+            manager._pool.shutdown(wait=True)
+    return errors
+
+
+def test_backtest_jobs():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Backtest jobs - dedupe onto queued/running jobs, cancel via DELETE")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Duplicates join active jobs, finished/cancelled jobs are not reused, DELETE cancels")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,67 @@
+# backend/test_curve_downsample.py
+"""
+Downsampling de curvas de equity (core/curve_downsample.py):
+
+- lttb y minmax nunca devuelven más de max_points, también con max_points
+  menor que 2 + 2·series (minmax cae a LTTB)
+- primer y último punto siempre presentes
+- minmax conserva el mínimo y el máximo de cada serie
+
+Ejecutar: python test_curve_downsample.py   (o con pytest)
+"""
+
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import numpy as np
+
+from core.curve_downsample import downsample_curve
+
+KEYS = ("strategy_equity", "buy_hold_equity", "price")
+
+
+def _curve(n: int = 2000, seed: int = 5):
+    walk = np.random.default_rng(seed).normal(size=(n, len(KEYS))).cumsum(axis=0) + 100
+    return [{"timestamp": i * 60_000, **{k: float(v) for k, v in zip(KEYS, row)}} for i, row in enumerate(walk)]
+
+
+def check():
+    errors = []
+    curve = _curve()
+    for method in ("lttb", "minmax"):
+        for max_points in (3, 5, 7, 8, 9, 50, 1000, 1999):
+            out = downsample_curve(curve, max_points, method)
+            if len(out) > max_points:
+                errors.append(f"{method} max_points={max_points}: returned {len(out)} points")
+            if out[0] is not curve[0] or out[-1] is not curve[-1]:
+                errors.append(f"{method} max_points={max_points}: first/last point dropped")
+        if downsample_curve(curve, None, method) is not curve:
+            errors.append(f"{method}: max_points=None should return the full curve")
+
+    out = downsample_curve(curve, 200, "minmax")
+    for k in KEYS:
+        values = [p[k] for p in out]
+        full = [p[k] for p in curve]
+        if min(values) != min(full) or max(values) != max(full):
+            errors.append(f"minmax lost the extreme of {k}")
+    return errors
+
+
+def test_curve_downsample():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Curve downsampling - point budget and extremes")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Never more than max_points, endpoints and extremes kept")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,70 @@
+# backend/test_db_profiler.py
+"""
+Espera de pool del profiler SQL (core/db_profiler.py) contra una SQLite temporal:
+
+- cada checkout del pool suma una muestra a pool_wait
+- después de engine.dispose() (pool nuevo) se sigue midiendo
+- instrumentar dos veces el mismo pool no duplica las muestras
+
+Ejecutar: python test_db_profiler.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, text
+
+from core import db_profiler
+
+
+def _checkout(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _waits(name: str) -> int:
+    return db_profiler._pool_wait[name]["count"]
+
+
+def check():
+    errors = []
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "profiler_test.db"))
+    db_profiler.instrument(engine, "profiler_test")
+
+    _checkout(engine)
+    if _waits("profiler_test") != 1:
+        errors.append(f"checkout recorded {_waits('profiler_test')} waits (expected 1)")
+
+    engine.dispose()
+    _checkout(engine)
+    _checkout(engine)
+    if _waits("profiler_test") != 3:
+        errors.append(f"after dispose(): {_waits('profiler_test')} waits (expected 3)")
+
+    db_profiler._instrument_pool(engine.pool, "profiler_test")
+    _checkout(engine)
+    if _waits("profiler_test") != 4:
+        errors.append(f"re-instrumented pool counted twice: {_waits('profiler_test')} (expected 4)")
+    return errors
+
+
+def test_db_profiler_pool_wait():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 DB profiler - pool wait survives engine.dispose()")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Pool checkouts measured before and after dispose, no double counting")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,140 @@
+# backend/test_evaluated_logger.py
+"""
+Ciclo de evaluated_logger.evaluate_all_tokens contra una SQLite temporal y
+CSVs LITE de varios tokens (sin red: la evaluación de cada fila se sustituye):
+
+- cada fila terminal queda en EVALUATED/{token}.evaluated.csv y en
+  signal_evaluations, emparejada con su Signal
+- el coste en DB no crece con los tokens: una consulta de señales, un
+  insert en signal_evaluations y un commit por ciclo
+- un segundo ciclo no vuelve a evaluar nada
+
+Ejecutar: python test_evaluated_logger.py   (o con pytest)
+"""
+
+import csv
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+tmp = Path(tempfile.mkdtemp())
+os.environ["DATABASE_URL"] = str(tmp / "evaluated_logger_test.db")
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import event
+
+from database import Base, SessionLocal, engine_sync
+import models_db  # noqa: F401  (registra las tablas)
+from models_db import Signal, SignalEvaluation
+import evaluated_logger as el
+
+Base.metadata.create_all(engine_sync)
+
+TOKENS = ("aaa", "bbb", "ccc", "ddd")
+PER_TOKEN = 3
+T0 = datetime(2026, 1, 1)
+
+
+def _seed():
+    db = SessionLocal()
+    try:
+        for n, token in enumerate(TOKENS):
+            path = tmp / "LITE" / f"{token}.csv"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=["timestamp", "token", "timeframe", "direction",
+                                                       "entry", "tp", "sl", "source"])
+                writer.writeheader()
+                for i in range(PER_TOKEN):
+                    ts = T0 + timedelta(hours=n * PER_TOKEN + i, microseconds=250_000)
+                    db.add(Signal(timestamp=ts, token=token.upper(), timeframe="1h", direction="long",
+                                  entry=100.0, tp=110.0, sl=95.0, source="eval_test", strategy_id="strat_x",
+                                  mode="LITE", idempotency_key=f"{token}-{i}"))
+                    writer.writerow({"timestamp": ts.replace(microsecond=0).isoformat() + "Z",
+                                     "token": token.upper(), "timeframe": "1h", "direction": "long",
+                                     "entry": 100.0, "tp": 110.0, "sl": 95.0, "source": "eval_test"})
+        db.commit()
+    finally:
+        db.close()
+
+
+def _fake_evaluate(row):
+    return {"signal_ts": row["timestamp"], "evaluated_at": datetime.utcnow().isoformat() + "Z",
+            "token": row["token"], "timeframe": row["timeframe"], "entry": row["entry"], "tp": row["tp"],
+            "sl": row["sl"], "price_at_eval": 110.0, "result": "hit-tp", "move_pct": 10.0, "notes": "",
+            "source": row["source"], "_signal": row.get("_signal")}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.signal_selects = self.eval_inserts = self.commits = 0
+
+    def before_cursor_execute(self, conn, cursor, statement, *args):
+        sql = statement.lstrip().upper()
+        if sql.startswith("SELECT") and "FROM SIGNALS" in sql:
+            self.signal_selects += 1
+        elif sql.startswith("INSERT INTO SIGNAL_EVALUATIONS"):
+            self.eval_inserts += 1
+
+    def commit(self, conn):
+        self.commits += 1
+
+
+def check():
+    errors = []
+    _seed()
+    counter = StatementCounter()
+    saved = (el.LITE_DIR, el.EVAL_DIR, el._evaluate_signal_row)
+    el.LITE_DIR, el.EVAL_DIR, el._evaluate_signal_row = tmp / "LITE", tmp / "EVALUATED", _fake_evaluate
+    event.listen(engine_sync, "before_cursor_execute", counter.before_cursor_execute)
+    event.listen(engine_sync, "commit", counter.commit)
+    try:
+        tokens, evals = el.evaluate_all_tokens()
+        stats = (counter.signal_selects, counter.eval_inserts, counter.commits)
+        if (tokens, evals) != (len(TOKENS), len(TOKENS) * PER_TOKEN):
+            errors.append(f"first cycle returned {(tokens, evals)}")
+        if stats != (1, 1, 1):
+            errors.append(f"{len(TOKENS)} tokens cost (signal selects, eval inserts, commits) = {stats}, "
+                          "expected (1, 1, 1)")
+        second = el.evaluate_all_tokens()
+        if second != (len(TOKENS), 0):
+            errors.append(f"second cycle re-evaluated: {second}")
+    finally:
+        event.remove(engine_sync, "before_cursor_execute", counter.before_cursor_execute)
+        event.remove(engine_sync, "commit", counter.commit)
+        el.LITE_DIR, el.EVAL_DIR, el._evaluate_signal_row = saved
+
+    db = SessionLocal()
+    try:
+        matched = (db.query(SignalEvaluation).join(Signal, Signal.id == SignalEvaluation.signal_id)
+                   .filter(Signal.source == "eval_test").count())
+    finally:
+        db.close()
+    if matched != len(TOKENS) * PER_TOKEN:
+        errors.append(f"{matched} evaluations in DB, expected {len(TOKENS) * PER_TOKEN}")
+    for token in TOKENS:
+        with (tmp / "EVALUATED" / f"{token}.evaluated.csv").open(encoding="utf-8") as f:
+            if len(list(csv.DictReader(f))) != PER_TOKEN:
+                errors.append(f"{token}: evaluated CSV does not have {PER_TOKEN} rows")
+    return errors
+
+
+def test_evaluated_logger_cycle():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Evaluated logger - one query, one insert, one commit per cycle")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print(f"✅ {len(TOKENS)} tokens evaluated with 1 signal query, 1 insert and 1 commit")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,96 @@
+# backend/test_indicator_snapshots.py
+"""
+Paridad de los snapshots incrementales (core/indicator_snapshots.py) con
+get_market_data (pandas + ta) sobre las mismas velas, y consolidación de una
+vela nueva pidiendo solo las últimas al exchange.
+
+Usa velas sintéticas (sin red ni DB). Ejecutar: python test_indicator_snapshots.py
+(o con pytest)
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+import indicators.market as market_mod
+from core import indicator_snapshots as snapshots
+
+TF_MS = 3_600_000
+KEYS = ("price", "rsi", "ema21", "ema50", "macd", "macd_hist", "atr")
+
+
+def _candles(n: int, seed: int = 7):
+    random.seed(seed)
+    now = int(time.time() * 1000)
+    last_open = now - now % TF_MS  # la última vela es la que está en curso
+    out, price = [], 100.0
+    for i in range(n):
+        o = price
+        c = price * (1 + random.gauss(0, 0.01))
+        price = c
+        out.append({"timestamp": last_open - (n - 1 - i) * TF_MS, "open": o,
+                    "high": max(o, c) * 1.004, "low": min(o, c) * 0.996, "close": c, "volume": 1.0})
+    return out
+
+
+def _same(a, b) -> bool:
+    return abs(float(a) - float(b)) <= 1e-9 * max(1.0, abs(float(b)))
+
+
+def check_parity():
+    candles = _candles(400)
+    requested = []
+
+    def fake_ohlcv(symbol, timeframe="1h", limit=100):
+        requested.append(limit)
+        return [dict(c) for c in candles[-limit:]]
+
+    market_mod.get_ohlcv_data = fake_ohlcv
+    import core.market_data_api as api
+    api.get_ohlcv_data = fake_ohlcv
+
+    store = snapshots.IndicatorSnapshots(mirror=False)
+    _, ref = market_mod.get_market_data("BTC", "1h", limit=store.warmup)
+    snap = store.refresh("BTC", "1h")
+    errors = [k for k in KEYS if not _same(ref[k], snap[k])]
+    if ref["trend"] != snap["trend"]:
+        errors.append("trend")
+
+    # Cierra la vela en curso y se abre otra: refresh incremental
+    nxt = dict(candles[-1], timestamp=candles[-1]["timestamp"] + TF_MS, close=candles[-1]["close"] * 1.01)
+    candles.append(nxt)
+    real_time = time.time
+    snapshots.time.time = lambda: real_time() + TF_MS / 1000
+    try:
+        snap = store.refresh("BTC", "1h")
+        incremental_limit = requested[-1]
+    finally:
+        snapshots.time.time = real_time
+    _, ref = market_mod.get_market_data("BTC", "1h", limit=store.warmup + 1)
+    errors += [f"{k} (incremental)" for k in KEYS if not _same(ref[k], snap[k])]
+    return errors, incremental_limit
+
+
+def test_snapshot_parity():
+    errors, limit = check_parity()
+    assert not errors, f"snapshot differs from get_market_data: {errors}"
+    assert limit < 10, f"incremental refresh fetched {limit} candles"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Indicator snapshots - parity with get_market_data")
+    print("=" * 60)
+    errors, limit = check_parity()
+    ok = not errors and limit < 10
+    if errors:
+        print(f"❌ Snapshot differs: {', '.join(errors)}")
+    else:
+        print("✅ Snapshot matches get_market_data (bootstrap + incremental)")
+    print(f"{'✅' if limit < 10 else '❌'} Incremental refresh fetched {limit} candles "
+          f"(bootstrap {snapshots.SNAPSHOT_WARMUP})")
+    sys.exit(0 if ok else 1)
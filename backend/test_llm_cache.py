@@ -0,0 +1,118 @@
+# backend/test_llm_cache.py
+"""
+Caché de respuestas LLM (core/llm_cache.py) con el proveedor local fake:
+
+- peticiones idénticas simultáneas (async y threads) -> UNA llamada al proveedor
+- la misma petición después -> acierto, sin llamada
+- otro snapshot / otra versión de plantilla -> llamada nueva
+- los errores del proveedor no se cachean
+- TTL hasta el cierre de la siguiente vela
+
+Sin red ni claves. Ejecutar: python test_llm_cache.py   (o con pytest)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+os.environ["AI_PROVIDER"] = "fake"
+os.environ["AI_FAKE_LATENCY_MS"] = "200"
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from core.ai_service import FakeProvider, get_ai_service
+from core.llm_cache import AnalysisKey, LLMResponseCache, last_closed_ts, snapshot_hash
+
+HOUR_MS = 3_600_000
+
+
+def _key(snapshot="s1", version="pro-v1", tf="1h"):
+    return AnalysisKey(kind="pro", token="BTC", timeframe=tf, candle_ts=last_closed_ts(tf),
+                       template_version=version, snapshot_hash=snapshot_hash(snapshot))
+
+
+def _generate(prompt="prompt"):
+    return lambda: get_ai_service().generate_analysis(prompt)
+
+
+def check():
+    errors = []
+    cache = LLMResponseCache(max_entries=100, enabled=True)
+
+    # 1. Async: 10 idénticas a la vez -> 1 llamada
+    FakeProvider.calls = 0
+
+    async def burst():
+        return await asyncio.gather(*(cache.get_or_generate_async(_key(), _generate()) for _ in range(10)))
+
+    results = asyncio.run(burst())
+    if FakeProvider.calls != 1 or len(set(results)) != 1:
+        errors.append(f"async coalescing: {FakeProvider.calls} upstream calls")
+
+    # 2. Acierto posterior
+    asyncio.run(cache.get_or_generate_async(_key(), _generate()))
+    if FakeProvider.calls != 1:
+        errors.append("second request was not served from cache")
+
+    # 3. Threads (endpoints síncronos): 8 idénticas -> 1 llamada
+    FakeProvider.calls = 0
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get_or_generate(_key("s2"), _generate("p2"))))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if FakeProvider.calls != 1 or len(set(out)) != 1:
+        errors.append(f"sync coalescing: {FakeProvider.calls} upstream calls")
+
+    # 4. Otro snapshot u otra versión de plantilla -> nueva llamada
+    FakeProvider.calls = 0
+    cache.get_or_generate(_key("s3"), _generate("p3"))
+    cache.get_or_generate(_key(version="pro-v2"), _generate())
+    if FakeProvider.calls != 2:
+        errors.append("different snapshot/template version should miss")
+
+    # 5. Errores del proveedor: no se guardan
+    calls = []
+
+    def failing():
+        calls.append(1)
+        return "DeepSeek Error: 503 - unavailable"
+
+    cache.get_or_generate(_key("err"), failing)
+    cache.get_or_generate(_key("err"), failing)
+    if len(calls) != 2:
+        errors.append("provider error was cached")
+
+    # 6. TTL: hasta el cierre de la vela en curso
+    now = 10 * HOUR_MS / 1000 + 600  # 10 min dentro de la vela de las 10:00
+    key = AnalysisKey("pro", "BTC", "1h", last_closed_ts("1h", now=now), "pro-v1", "x")
+    if key.ttl(now=now) != 3000:
+        errors.append(f"ttl {key.ttl(now=now)} != 3000")
+
+    stats = cache.stats()["kinds"]["pro"]
+    if not stats["hits"] or not stats["coalesced"]:
+        errors.append(f"stats missing hits/coalesced: {stats}")
+    return errors, stats
+
+
+def test_llm_cache():
+    errors, _ = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 LLM response cache - fake provider")
+    print("=" * 60)
+    errors, stats = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Coalescing, hits, misses, error handling and TTL OK")
+    print(f"Stats (pro): {stats}")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,178 @@
+# backend/test_quota.py
+"""
+Cuotas diarias (core/quota.py) contra una SQLite temporal y Redis falso
+(fakeredis + lupa para el script Lua):
+
+- backend DB: se consume exactamente hasta el límite y la siguiente se rechaza
+- consumo concurrente (hilos, DB y Redis): nunca se supera el límite
+- Redis sin clave (día nuevo / Redis reiniciado): se siembra desde
+  daily_usage + los deltas aún no volcados
+- un volcado fallido devuelve los deltas a pendientes y el siguiente los escribe
+
+Los casos de Redis necesitan fakeredis y lupa (dependencias de test); sin
+ellas se omiten. Ejecutar: python test_quota.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "quota_test.db")
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import Base, SessionLocal, engine_sync
+import models_db  # noqa: F401  (registra las tablas)
+from models_db import DailyUsage
+from core import quota as quota_mod
+from core.quota import QuotaService, today
+
+Base.metadata.create_all(engine_sync)
+
+
+def _db_count(user_id: int, feature: str) -> int:
+    db = SessionLocal()
+    try:
+        row = db.query(DailyUsage).filter_by(user_id=user_id, feature=feature, date=today()).first()
+        return row.count if row else 0
+    finally:
+        db.close()
+
+
+def _consume(service, user_id, feature, limit):
+    db = SessionLocal()
+    try:
+        return service.consume(db, user_id, feature, limit)
+    finally:
+        db.close()
+
+
+def _concurrent(service, user_id, feature, limit, threads=8, per_thread=5):
+    results, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(per_thread):
+            ok, _ = _consume(service, user_id, feature, limit)
+            with lock:
+                results.append(ok)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(results)
+
+
+def _has_fake_redis() -> bool:
+    """fakeredis para el servidor y lupa para ejecutar el script Lua."""
+    try:
+        import fakeredis  # noqa: F401
+        import lupa  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def check_db(errors):
+    # 1. Límite exacto (DB)
+    service = QuotaService(redis_client=None)
+    got = [_consume(service, 1, "ai_analysis", 3) for _ in range(4)]
+    if got != [(True, 1), (True, 2), (True, 3), (False, 3)]:
+        errors.append(f"db exact limit: {got}")
+    if _db_count(1, "ai_analysis") != 3:
+        errors.append(f"db count {_db_count(1, 'ai_analysis')} != 3")
+
+    # 2. Concurrencia: nunca por encima del límite
+    allowed = _concurrent(QuotaService(redis_client=None), 2, "ai_analysis", 10)
+    if allowed != 10 or _db_count(2, "ai_analysis") != 10:
+        errors.append(f"db concurrent: {allowed} allowed, count {_db_count(2, 'ai_analysis')} (limit 10)")
+
+
+def check_redis(errors):
+    import fakeredis
+
+    redis_service = QuotaService(redis_client=fakeredis.FakeRedis(), flush_interval=3600)
+    allowed = _concurrent(redis_service, 3, "advisor_chat", 10)
+    if allowed != 10:
+        errors.append(f"redis concurrent: {allowed} allowed (limit 10)")
+    redis_service.flush()
+    if _db_count(3, "advisor_chat") != 10:
+        errors.append(f"redis flush wrote {_db_count(3, 'advisor_chat')} (expected 10)")
+
+    # 3. Siembra de Redis desde daily_usage + deltas pendientes
+    db = SessionLocal()
+    db.add(DailyUsage(user_id=4, feature="ai_analysis", date=today(), count=2))
+    db.commit()
+    db.close()
+    client = fakeredis.FakeRedis()
+    seeded = QuotaService(redis_client=client, flush_interval=3600)
+    seeded._pending[(4, "ai_analysis", today())] = 1  # consumido en otro ciclo, sin volcar
+    got = [_consume(seeded, 4, "ai_analysis", 5) for _ in range(3)]
+    if got != [(True, 4), (True, 5), (False, 5)]:
+        errors.append(f"redis seed from db + pending: {got}")
+    if int(client.get(seeded._redis_key((4, "ai_analysis", today())))) != 5:
+        errors.append("redis counter not seeded correctly")
+
+    # 4. Volcado fallido: los deltas vuelven a pendientes
+    real_insert = quota_mod._dialect_insert
+
+    def failing_insert(db):
+        raise RuntimeError("db down")
+
+    quota_mod._dialect_insert = failing_insert
+    try:
+        seeded.flush()
+        errors.append("flush should raise when the DB fails")
+    except RuntimeError:
+        pass
+    finally:
+        quota_mod._dialect_insert = real_insert
+    if seeded.stats()["pending"] != 3:
+        errors.append(f"pending after failed flush: {seeded.stats()['pending']} (expected 3)")
+    seeded.flush()
+    if seeded.stats()["pending"] != 0 or _db_count(4, "ai_analysis") != 5:
+        errors.append(f"retry flush: pending {seeded.stats()['pending']}, db count {_db_count(4, 'ai_analysis')}")
+
+
+def check(with_redis: bool = True):
+    errors = []
+    check_db(errors)
+    if with_redis:
+        check_redis(errors)
+    return errors
+
+
+def test_quota():
+    errors = []
+    check_db(errors)
+    assert not errors, errors
+
+
+def test_quota_redis():
+    import pytest
+
+    pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    errors = []
+    check_redis(errors)
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Quota - exact limit, concurrency, Redis seeding, flush retry")
+    print("=" * 60)
+    with_redis = _has_fake_redis()
+    if not with_redis:
+        print("⏭️  fakeredis/lupa not installed: skipping the Redis backend cases")
+    errors = check(with_redis)
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        redis_part = ", Redis seeded, failed flush re-queued" if with_redis else ""
+        print(f"✅ Limits exact under concurrency{redis_part}")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,177 @@
+# backend/test_rate_limit.py
+"""
+Rate limiting GCRA (core/rate_limit.py, core/limiter.py):
+
+- store local: 5/minute admite exactamente 5, test() no consume, la
+  recarga devuelve una petición tras period/amount y el barrido respeta
+  RATE_LIMIT_MAX_KEYS
+- store Redis (script Lua sobre fakeredis): el mismo límite y dos
+  limitadores (dos workers) contra el mismo servidor comparten el cupo
+- si Redis falla se usa el store local
+- plan_limit: ráfaga por plan leída de user_cache, FREE sin principal
+
+Sin red (fakeredis + lupa). Sin esas dos dependencias de test se omiten los
+casos de Redis. Ejecutar: python test_rate_limit.py   (o con pytest)
+"""
+
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from limits import parse
+
+from core import rate_limit
+from core.rate_limit import GCRARateLimiter, LocalGCRAStore, RedisGCRAStore
+
+FIVE_PER_MINUTE = parse("5/minute")
+
+
+def _has_fake_redis() -> bool:
+    """fakeredis para el servidor y lupa para ejecutar el script Lua."""
+    try:
+        import fakeredis  # noqa: F401
+        import lupa  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FakeClock:
+    """Sustituye rate_limit._now_ms (store local) para probar la recarga sin esperar."""
+    ms = 1_000_000.0
+
+    def __call__(self):
+        return self.ms
+
+
+def _hits(limiter, n, key="user:a@x.io", route="route"):
+    return [limiter.hit(FIVE_PER_MINUTE, key, route) for _ in range(n)]
+
+
+def check_local(errors):
+    clock = FakeClock()
+    real_now = rate_limit._now_ms
+    rate_limit._now_ms = clock
+    try:
+        limiter = GCRARateLimiter(LocalGCRAStore())
+        if not limiter.test(FIVE_PER_MINUTE, "user:a@x.io", "route"):
+            errors.append("local: test() rejected an empty bucket")
+        if _hits(limiter, 7) != [True] * 5 + [False] * 2:
+            errors.append("local: 5/minute did not allow exactly 5")
+        if limiter.stats()["throttled"] != 2:
+            errors.append(f"local: throttled stat {limiter.stats()['throttled']} != 2")
+        if limiter.get_window_stats(FIVE_PER_MINUTE, "user:a@x.io", "route").remaining != 0:
+            errors.append("local: remaining should be 0 after the burst")
+
+        clock.ms += 12_000  # period/amount: una petición más
+        if _hits(limiter, 2) != [True, False]:
+            errors.append("local: refill after 12 s should allow exactly one request")
+
+        store = LocalGCRAStore(max_keys=10)
+        small = GCRARateLimiter(store)
+        for i in range(25):
+            small.hit(FIVE_PER_MINUTE, f"ip:{i}", "route")
+        if len(store) > 10:
+            errors.append(f"local: store grew to {len(store)} keys (max 10)")
+    finally:
+        rate_limit._now_ms = real_now
+
+
+def check_redis(errors):
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    worker_a = GCRARateLimiter(RedisGCRAStore(fakeredis.FakeRedis(server=server)))
+    worker_b = GCRARateLimiter(RedisGCRAStore(fakeredis.FakeRedis(server=server)))
+
+    if _hits(worker_a, 6) != [True] * 5 + [False]:
+        errors.append("redis: 5/minute did not allow exactly 5")
+
+    allowed = sum(_hits(worker_a, 3, key="user:b@x.io") + _hits(worker_b, 3, key="user:b@x.io"))
+    if allowed != 5:
+        errors.append(f"redis: two workers sharing a server allowed {allowed} (expected 5)")
+
+    client = fakeredis.FakeRedis(server=server)
+    ttl = client.pttl("rl:" + FIVE_PER_MINUTE.key_for("user:b@x.io", "route"))
+    if not 0 < ttl <= 60_000:
+        errors.append(f"redis: key expiry {ttl} ms not set by the script")
+
+    worker_a.clear(FIVE_PER_MINUTE, "user:a@x.io", "route")
+    if not worker_a.hit(FIVE_PER_MINUTE, "user:a@x.io", "route"):
+        errors.append("redis: clear() did not reset the key")
+
+
+def check_fallback(errors):
+    class Broken:
+        name = "redis"
+
+        def update(self, *args):
+            raise ConnectionError("redis down")
+
+        def delete(self, key):
+            raise ConnectionError("redis down")
+
+    limiter = GCRARateLimiter(Broken(), retry_after=60)
+    if _hits(limiter, 6) != [True] * 5 + [False]:
+        errors.append("fallback: local store did not enforce the limit")
+    stats = limiter.stats()
+    if not stats["degraded"] or stats["store_errors"] != 1:
+        errors.append(f"fallback: unexpected stats {stats}")
+
+
+def check_plan_limit(errors):
+    from core.limiter import plan_limit
+    from core.user_cache import AuthUser, user_cache
+
+    provider = plan_limit("2/minute", {"OWNER": "30/minute"})
+    user_cache.put("owner@x.io", AuthUser(id=1, email="owner@x.io", name=None, role=None, plan="owner",
+                                          plan_status=None, plan_expires_at=None), user_cache.generation())
+    if provider("user:owner@x.io") != "30/minute":
+        errors.append("plan_limit: cached OWNER principal should get its burst")
+    if provider("user:unknown@x.io") != "2/minute" or provider("ip:1.2.3.4") != "2/minute":
+        errors.append("plan_limit: unknown user / IP should fall back to the default burst")
+    if ";" in provider("user:owner@x.io"):
+        errors.append("plan_limit: daily caps belong to core/quota.py")
+
+
+def check(with_redis: bool = True):
+    errors = []
+    check_local(errors)
+    if with_redis:
+        check_redis(errors)
+    check_fallback(errors)
+    check_plan_limit(errors)
+    return errors
+
+
+def test_rate_limit():
+    errors = check(with_redis=False)
+    assert not errors, errors
+
+
+def test_rate_limit_redis():
+    import pytest
+
+    pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    errors = []
+    check_redis(errors)
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Rate limit - GCRA local store, Redis Lua store, fallback, plans")
+    print("=" * 60)
+    with_redis = _has_fake_redis()
+    if not with_redis:
+        print("⏭️  fakeredis/lupa not installed: skipping the Redis store cases")
+    errors = check(with_redis)
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        redis_part = "shared Redis quota, " if with_redis else ""
+        print(f"✅ Exact limits, refill, {redis_part}fallback and plan bursts OK")
+    sys.exit(0 if not errors else 1)
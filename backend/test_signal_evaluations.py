@@ -0,0 +1,110 @@
+# backend/test_signal_evaluations.py
+"""
+Una evaluación por señal (core/performance_stats.insert_evaluations) contra
+una SQLite temporal:
+
+- dos evaluadores que evalúan la misma señal: una sola fila en
+  signal_evaluations y una sola suma en performance_stats
+- en un lote mezclado solo cuentan las filas realmente insertadas
+- EVAL_DEDUPE_DDL deja la primera evaluación de cada señal (tablas de antes
+  del índice único)
+
+Ejecutar: python test_signal_evaluations.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "signal_evaluations_test.db")
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import text
+
+from database import Base, SessionLocal, engine_sync
+import models_db  # noqa: F401  (registra las tablas)
+from models_db import PerformanceStats, Signal, SignalEvaluation
+from core.performance_stats import EVAL_DEDUPE_DDL, EVAL_UNIQUE_INDEX_DDL, insert_evaluations
+
+Base.metadata.create_all(engine_sync)
+
+
+def _signal(db, i: int) -> int:
+    sig = Signal(timestamp=datetime(2026, 1, 1, i), token="BTC", timeframe="1h", direction="long",
+                 entry=100.0, tp=110.0, sl=95.0, source="test_eval", strategy_id="strat_eval",
+                 mode="LITE", idempotency_key=f"eval-{i}")
+    db.add(sig)
+    db.flush()
+    return sig.id
+
+
+def _eval(signal_id: int, result: str):
+    return {"signal_id": signal_id, "evaluated_at": datetime.utcnow(), "result": result,
+            "pnl_r": 1.0 if result == "WIN" else -1.0, "exit_price": 100.0}
+
+
+def _stats(db):
+    row = db.query(PerformanceStats).filter_by(scope="strategy", key="strat_eval").first()
+    return (row.evaluated, row.wins, row.losses) if row else (0, 0, 0)
+
+
+def check():
+    errors = []
+    db = SessionLocal()
+    try:
+        ids = [_signal(db, i) for i in range(3)]
+        db.commit()
+        sources = {i: ("test_eval", "strat_eval") for i in ids}
+
+        # 1. Dos evaluadores, misma señal
+        first = insert_evaluations(db, [_eval(ids[0], "WIN")], sources)
+        second = insert_evaluations(db, [_eval(ids[0], "LOSS")], sources)
+        db.commit()
+        rows = db.query(SignalEvaluation).filter_by(signal_id=ids[0]).all()
+        if (first, second) != (1, 0) or len(rows) != 1 or rows[0].result != "WIN":
+            errors.append(f"duplicate evaluation: inserted {first}/{second}, rows {len(rows)}")
+        if _stats(db) != (1, 1, 0):
+            errors.append(f"stats after duplicate: {_stats(db)} != (1, 1, 0)")
+
+        # 2. Lote mezclado: una ya evaluada + dos nuevas
+        n = insert_evaluations(db, [_eval(ids[0], "LOSS"), _eval(ids[1], "LOSS"), _eval(ids[2], "WIN")], sources)
+        db.commit()
+        if n != 2 or _stats(db) != (3, 2, 1):
+            errors.append(f"mixed batch: inserted {n}, stats {_stats(db)} != (3, 2, 1)")
+    finally:
+        db.close()
+
+    # 3. Deduplicación de una tabla sin índice único
+    with engine_sync.begin() as conn:
+        conn.execute(text("CREATE TABLE signal_evaluations_old AS SELECT * FROM signal_evaluations"))
+        conn.execute(text("INSERT INTO signal_evaluations_old (id, signal_id, result) VALUES (1000, :s, 'LOSS')"),
+                     {"s": ids[0]})
+        for ddl in (EVAL_DEDUPE_DDL, EVAL_UNIQUE_INDEX_DDL):
+            conn.execute(text(ddl.replace("signal_evaluations", "signal_evaluations_old")
+                              .replace("uq_signal_evaluations_old", "uq_signal_evaluations_old_tmp")))
+        kept = conn.execute(text("SELECT result FROM signal_evaluations_old WHERE signal_id = :s"),
+                            {"s": ids[0]}).scalars().all()
+    if kept != ["WIN"]:
+        errors.append(f"dedupe kept {kept} (expected the first evaluation)")
+    return errors
+
+
+def test_signal_evaluations():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Signal evaluations - one per signal, stats only for inserted rows")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Duplicate evaluations skipped, stats counted once, dedupe keeps the first")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,92 @@
+# backend/test_signal_feed.py
+"""
+Paginación por cursor del feed (core/signal_feed.py + core/repository.py)
+con señales antiguas sin timestamp, contra una SQLite temporal:
+
+- recorrer el feed página a página devuelve TODAS las señales una sola vez
+  (primero las de timestamp, más recientes primero; después las NULL)
+- ningún cursor devuelto es rechazado por decode_cursor (antes: 400)
+
+Ejecutar: python test_signal_feed.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "signal_feed_test.db")
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import text
+
+from database import Base, SessionLocal, engine_sync
+import models_db  # noqa: F401  (registra las tablas)
+from models_db import Signal
+from core.signal_feed import decode_cursor, signal_feed
+
+Base.metadata.create_all(engine_sync)
+
+T0 = datetime(2026, 1, 1)
+
+
+def _seed(db, n_dated: int, n_null: int):
+    for i in range(n_dated + n_null):
+        db.add(Signal(timestamp=T0 + timedelta(hours=i % 4), token="BTC", timeframe="1h", direction="long",
+                      entry=1.0, tp=2.0, sl=0.5, source="feed_test", mode="LITE", idempotency_key=f"feed-{i}"))
+    db.commit()
+    null_ids = [s.id for s in db.query(Signal.id).order_by(Signal.id.desc()).limit(n_null)]
+    db.execute(text("UPDATE signals SET timestamp = NULL WHERE id IN (%s)" % ",".join(map(str, null_ids))))
+    db.commit()
+    return null_ids
+
+
+def check():
+    errors = []
+    db = SessionLocal()
+    try:
+        null_ids = _seed(db, n_dated=7, n_null=4)
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = signal_feed(db, cursor=cursor, limit=3, with_evaluation=False, source="feed_test")
+            seen.extend(rows)
+            pages += 1
+            if cursor is None or pages > 10:
+                break
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                errors.append(f"cursor {cursor!r} rejected")
+                break
+
+        ids = [s.id for s in seen]
+        if len(ids) != 11 or len(set(ids)) != 11:
+            errors.append(f"feed returned {len(ids)} rows ({len(set(ids))} distinct), expected 11")
+        dated = [s for s in seen if s.timestamp is not None]
+        if [(s.timestamp, s.id) for s in dated] != sorted(((s.timestamp, s.id) for s in dated), reverse=True):
+            errors.append("dated signals not in (timestamp, id) DESC order")
+        if [s.id for s in seen[len(dated):]] != sorted(null_ids, reverse=True):
+            errors.append("NULL-timestamp signals should come last, by id DESC")
+    finally:
+        db.close()
+    return errors, pages
+
+
+def test_signal_feed_null_timestamps():
+    errors, _ = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Signal feed - cursor pagination with NULL timestamps")
+    print("=" * 60)
+    errors, pages = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print(f"✅ All signals paged exactly once in {pages} pages, NULL timestamps last")
+    sys.exit(0 if not errors else 1)
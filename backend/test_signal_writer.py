@@ -0,0 +1,95 @@
+# backend/test_signal_writer.py
+"""
+Write-behind de señales (core/signal_writer.py) contra una SQLite temporal:
+
+- un lote de 300 filas (más parámetros que el límite de 999 de SQLite) se
+  inserta troceado y completo
+- un lote con UNA fila que la DB rechaza: tras los reintentos se inserta fila
+  a fila y solo se pierde esa fila
+
+Ejecutar: python test_signal_writer.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "signal_writer_test.db")
+os.environ["SIGNAL_WRITER_RETRY_MS"] = "1"
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import Base, SessionLocal, engine_sync
+import models_db  # noqa: F401  (registra las tablas)
+from models_db import Signal as SignalModel
+from core import signal_writer as sw
+
+Base.metadata.create_all(engine_sync)
+sw._notify = lambda row: None  # sin push en los tests
+
+T0 = datetime(2026, 1, 1)
+
+
+def _row(i: int, prefix: str):
+    return {
+        "timestamp": T0 + timedelta(minutes=i), "token": "BTC", "timeframe": "1h", "direction": "long",
+        "entry": 100.0, "tp": 110.0, "sl": 95.0, "confidence": 0.5, "rationale": "", "source": "test",
+        "mode": "LITE", "raw_response": None, "strategy_id": "test_writer", "user_id": None, "is_hidden": 0,
+        "idempotency_key": f"{prefix}-{i}",
+    }
+
+
+def _count(prefix: str) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(SignalModel).filter(SignalModel.idempotency_key.like(f"{prefix}-%")).count()
+    finally:
+        db.close()
+
+
+def check():
+    errors = []
+    writer = sw.SignalWriter(enabled=False)
+
+    # 1. Lote grande: troceado bajo el límite de parámetros
+    big = [_row(i, "big") for i in range(300)]
+    if len(sw._chunks(big, "sqlite")) < 2:
+        errors.append("300-row batch was not chunked")
+    writer._write(big)
+    if _count("big") != 300:
+        errors.append(f"big batch: {_count('big')}/300 rows written")
+
+    # 2. Una fila inválida (timestamp no es datetime: la DB rechaza el lote)
+    batch = [_row(i, "mixed") for i in range(20)]
+    batch[7]["timestamp"] = "not-a-datetime"
+    writer._write(batch)
+    written = _count("mixed")
+    if written != 19:
+        errors.append(f"mixed batch: {written}/19 valid rows written")
+    stats = writer.stats()
+    if stats["dropped"] != 1 or stats["retries"] != sw.RETRIES:
+        errors.append(f"unexpected stats: dropped={stats['dropped']} retries={stats['retries']}")
+    if stats["written"] != 319:
+        errors.append(f"written stat {stats['written']} != 319")
+    return errors, stats
+
+
+def test_signal_writer():
+    errors, _ = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Signal writer - chunking, retries and per-row fallback")
+    print("=" * 60)
+    errors, stats = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Chunked insert OK, failing row isolated, rest of the batch written")
+    print(f"Stats: {stats}")
+    sys.exit(0 if not errors else 1)
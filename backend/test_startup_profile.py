@@ -0,0 +1,102 @@
+# backend/test_startup_profile.py
+"""
+Presupuesto de arranque: perfil de `import main` en un proceso limpio.
+
+Falla (exit 1 / assert en pytest) si:
+- al importar main se carga alguna dependencia pesada de
+  core.lazy_imports.HEAVY_MODULES (pandas, ccxt, ta, pandas_ta,
+  google.generativeai, pywebpush): deben cargarse al usarse;
+- el mejor de IMPORT_RUNS imports tarda más de IMPORT_BUDGET_MS.
+
+Imprime los módulos más caros (python -X importtime) para ver qué ha
+crecido.
+
+Ejecutar: python test_startup_profile.py   (o con pytest)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from core.lazy_imports import HEAVY_MODULES
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "2000"))
+IMPORT_RUNS = int(os.getenv("IMPORT_RUNS", "3"))
+TOP = 15
+
+_PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import main\n"
+    "ms = (time.perf_counter() - t0) * 1000\n"
+    "print('@@' + json.dumps({'ms': ms, 'heavy': [m for m in %r if m in sys.modules]}))\n"
+) % (HEAVY_MODULES,)
+
+
+def _run_import(importtime: bool = False):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "startup_profile.db")
+    env.pop("REDIS_URL", None)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _PROBE]
+    proc = subprocess.run(cmd, cwd=backend_dir, env=env, capture_output=True, text=True, timeout=120)
+    line = next((l for l in proc.stdout.splitlines() if l.startswith("@@")), None)
+    if line is None:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    return json.loads(line[2:]), proc.stderr
+
+
+def _top_modules(stderr: str, top: int = TOP):
+    """Módulos de primer nivel importados por main, por tiempo acumulado."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def profile():
+    result, stderr = _run_import(importtime=True)
+    best = min(_run_import()[0]["ms"] for _ in range(IMPORT_RUNS))
+    return {"best_ms": best, "heavy": result["heavy"], "top": _top_modules(stderr)}
+
+
+def test_import_budget():
+    report = profile()
+    assert not report["heavy"], f"import main loads heavy modules: {report['heavy']}"
+    assert report["best_ms"] <= IMPORT_BUDGET_MS, (
+        f"import main took {report['best_ms']:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Startup profile - import main")
+    print("=" * 60)
+    report = profile()
+    print(f"\nSlowest imports under main (cumulative, -X importtime):")
+    for ms, name in report["top"]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print(f"\nimport main: {report['best_ms']:.0f} ms (best of {IMPORT_RUNS}, budget {IMPORT_BUDGET_MS:.0f} ms)")
+
+    ok = True
+    if report["heavy"]:
+        print(f"❌ Heavy modules loaded at import: {', '.join(report['heavy'])}")
+        ok = False
+    else:
+        print(f"✅ No heavy modules at import ({', '.join(HEAVY_MODULES)})")
+    if report["best_ms"] > IMPORT_BUDGET_MS:
+        print("❌ Import time over budget")
+        ok = False
+    else:
+        print("✅ Import time within budget")
+    sys.exit(0 if ok else 1)
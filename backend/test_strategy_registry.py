@@ -0,0 +1,130 @@
+# backend/test_strategy_registry.py
+"""
+Registro de estrategias (strategies/registry.py) sobre un paquete temporal
+con un índice de metadatos propio:
+
+- get(id, config, scope): misma instancia para el mismo scope, instancias
+  distintas para scopes distintos (dos personas no comparten estado)
+- create() nunca devuelve una instancia del pool
+- con el índice al día no se importa nada; un mtime distinto al del índice
+  obliga a redescubrir el módulo (y sus metadatos nuevos)
+- list_all() solo enseña los módulos de STRATEGY_CATALOG; el resto se
+  resuelve por id igualmente
+
+Ejecutar: python test_strategy_registry.py   (o con pytest)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from strategies.registry import StrategyRegistry
+
+tmp = Path(tempfile.mkdtemp())
+PACKAGE = "tmp_registry_strategies"
+INDEX_FILE = str(tmp / "strategy_index.json")
+
+STRATEGY_SRC = '''
+from strategies.base import Strategy, StrategyMetadata
+
+
+class {cls}(Strategy):
+    def __init__(self, config=None):
+        self.config = config or {{}}
+        self.state = []
+
+    def metadata(self):
+        return StrategyMetadata(id="{sid}", name="{name}", description="test", version="1.0.0",
+                                default_timeframe="1h", universe=["*"], risk_profile="low",
+                                mode="CUSTOM", source_type="ENGINE", enabled=True)
+
+    def generate_signals(self, tokens, timeframe, context=None):
+        return []
+'''
+
+
+def _write_module(module: str, cls: str, sid: str, name: str, mtime_ns: int) -> None:
+    path = tmp / PACKAGE / f"{module}.py"
+    path.write_text(STRATEGY_SRC.format(cls=cls, sid=sid, name=name), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _fresh_registry(catalog="public_one") -> StrategyRegistry:
+    """Registry nuevo, como el de otro proceso: sin módulos importados en memoria."""
+    for name in [m for m in sys.modules if m.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+    return StrategyRegistry(package=PACKAGE, index_file=INDEX_FILE, entry_point_group=None, catalog=catalog)
+
+
+def check():
+    errors = []
+    (tmp / PACKAGE).mkdir()
+    (tmp / PACKAGE / "__init__.py").write_text("", encoding="utf-8")
+    _write_module("public_one", "PublicOne", "public_one_v1", "Public One", 1_000_000_000_000_000_000)
+    _write_module("hidden_two", "HiddenTwo", "hidden_two_v1", "Hidden Two", 1_000_000_000_000_000_000)
+    sys.path.insert(0, str(tmp))
+
+    # 1. Pool por scope / create() fuera del pool
+    registry = _fresh_registry()
+    cfg = {"period": 14}
+    a1 = registry.get("public_one_v1", cfg, scope="persona_a:BTC:1h")
+    a2 = registry.get("public_one_v1", cfg, scope="persona_a:BTC:1h")
+    b = registry.get("public_one_v1", cfg, scope="persona_b:BTC:1h")
+    if a1 is None or a1 is not a2:
+        errors.append("get(): same scope should return the pooled instance")
+    if b is a1:
+        errors.append("get(): different scopes must not share an instance")
+    created = [registry.create("public_one_v1", cfg) for _ in range(2)]
+    pooled = {id(i) for i in registry._pool.values()}
+    if created[0] is created[1] or any(id(c) in pooled for c in created):
+        errors.append("create() returned a pooled or shared instance")
+
+    # 2. Catálogo: hidden_two no se lista, pero se resuelve
+    listed = {m.id for m in registry.list_all()}
+    if listed != {"public_one_v1"}:
+        errors.append(f"list_all() = {sorted(listed)}, expected only the catalog module")
+    if registry.get("hidden_two_v1") is None:
+        errors.append("modules outside the catalog should still resolve by id")
+    if {m.id for m in _fresh_registry(catalog="*").list_all()} != {"public_one_v1", "hidden_two_v1"}:
+        errors.append("STRATEGY_CATALOG=* should list every module")
+
+    # 3. Índice al día: nada que importar
+    cached = _fresh_registry()
+    cached.discover()
+    if cached.stats()["modules_imported"] != 0 or cached.stats()["index_hits"] != 2:
+        errors.append(f"fresh index still imported modules: {cached.stats()}")
+
+    # 4. mtime distinto: se redescubre el módulo y se actualizan metadatos
+    _write_module("public_one", "PublicOne", "public_one_v1", "Public One (edited)", 1_000_000_000_000_000_001)
+    stale = _fresh_registry()
+    stale.discover()
+    if stale.stats()["modules_imported"] != 1:
+        errors.append(f"stale mtime: imported {stale.stats()['modules_imported']} modules (expected 1)")
+    if [m.name for m in stale.list_all()] != ["Public One (edited)"]:
+        errors.append("stale mtime: metadata not refreshed from the module")
+    again = _fresh_registry()
+    again.discover()
+    if again.stats()["modules_imported"] != 0:
+        errors.append("index was not rewritten after re-discovery")
+    return errors
+
+
+def test_strategy_registry():
+    errors = check()
+    assert not errors, errors
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 Strategy registry - scoped pool, create(), stale index, catalog")
+    print("=" * 60)
+    errors = check()
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Pool scoped per owner, create() isolated, stale index re-discovered")
+    sys.exit(0 if not errors else 1)
@@ -0,0 +1,46 @@
+import argparse
+import json
+import os
+import sys
+
+# Ensure backend root is in sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir) # points to .../backend
+sys.path.append(backend_root)
+
+from database import SessionLocal
+import models_db  # registra las tablas
+from core.signal_archive import SIGNAL_HOT_DAYS, archive_signals, archive_status
+
+
+def main():
+    """
+    Mueve al archivo frío (core/signal_archive.py) las señales cerradas más
+    antiguas que --days días. --dry-run solo cuenta; --status muestra el
+    archivo por mes.
+    """
+    p = argparse.ArgumentParser()
+    p.add_argument("--days", type=int, default=SIGNAL_HOT_DAYS)
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--status", action="store_true")
+    args = p.parse_args()
+
+    if args.status:
+        print(json.dumps(archive_status(), indent=2))
+        return
+
+    print(f"🧊 Archiving closed signals older than {args.days} days...")
+    db = SessionLocal()
+    try:
+        summary = archive_signals(db, args.days, dry_run=args.dry_run)
+        print(f"✅ {json.dumps(summary)}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Archive failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -104,6 +104,10 @@ def migrate_signals():
                 print(f"❌ Error: {e}")
                 db.rollback()
     
+    # Agregados de rendimiento (los inserts directos no los actualizan)
+    from core.performance_stats import rebuild
+    rebuild(db)
+
     db.close()
     return migrated, skipped
 
@@ -0,0 +1,34 @@
+import sys
+import os
+
+# Ensure backend root is in sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir) # points to .../backend
+sys.path.append(backend_root)
+
+from database import SessionLocal, engine_sync, Base
+import models_db  # registra las tablas
+from core.performance_stats import rebuild
+
+
+def main():
+    """
+    Recalcula performance_stats desde signals + signal_evaluations.
+    Usar tras backfills, seeds o borrados manuales de señales.
+    """
+    print("📊 Rebuilding performance_stats...")
+    Base.metadata.create_all(bind=engine_sync, tables=[models_db.PerformanceStats.__table__])
+    db = SessionLocal()
+    try:
+        n = rebuild(db)
+        print(f"✅ performance_stats rebuilt ({n} rows)")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Rebuild failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,7 @@ def reset_system():
         
         print("   Resetting Strategy Stats...")
         session.execute(text("UPDATE strategy_configs SET total_signals=0, win_rate=0.0, avg_confidence=0.0, last_execution=NULL"))
+        session.execute(text("DELETE FROM performance_stats"))
         
         session.commit()
         print("✅ Database tables cleared and stats reset.")
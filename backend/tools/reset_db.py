@@ -22,6 +22,10 @@ async def reset_db():
             print("   - Deleting Signals...")
             await session.execute(text("DELETE FROM signals"))
             
+            # 3. Aggregates
+            print("   - Deleting Performance Stats...")
+            await session.execute(text("DELETE FROM performance_stats"))
+            
             await session.commit()
             print("✅ DB Reset Complete. Clean slate.")
             
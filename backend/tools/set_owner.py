@@ -24,6 +24,8 @@ def set_owner(email: str):
         user.plan = "OWNER"
         user.role = "admin"
         db.commit()
+        from core.user_cache import user_cache
+        user_cache.invalidate(user.id)
         print(f"✅ Success! {user.email} is now an OWNER.")
         print("   -> Access Admin Panel via sidebar or /admin")
         print("   -> Full API access granted.")
@@ -12,7 +12,7 @@ from strategies.registry import get_registry
 from strategies.ma_cross import MACrossStrategy
 from strategies.bb_mean_reversion import BBMeanReversionStrategy
 from core.schemas import Signal
-from core.signal_logger import log_signal
+from core.signal_logger import log_signal, flush_signals
 from evaluated_logger import evaluate_all_tokens
 from models_db import StrategyConfig
 from sqlalchemy.orm import Session
@@ -59,6 +59,7 @@ def verify_signal_logging():
     
     try:
         log_signal(sig)
+        flush_signals()
         print("✅ Signal Logged to CSV and DB.")
     except Exception as e:
         print(f"❌ Signal Logging Failed: {e}")
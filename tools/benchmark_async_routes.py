@@ -0,0 +1,176 @@
+"""
+Prueba de carga de las rutas async con acceso a DB (core/repository.py).
+
+Levanta el backend con uvicorn sobre una SQLite temporal con N señales y
+lanza, a la vez:
+- `--concurrency` clientes contra rutas con DB (/admin/stats, /admin/signals,
+  /strategies/marketplace, /strategies/), y
+- una sonda secuencial contra /health (sin DB).
+
+Si las consultas bloquean el event loop, la latencia de /health sube con la
+de las rutas con DB; con la capa async se mantiene plana. Imprime p50/p99 de
+ambas. Para comparar con otra versión, apuntar --backend-dir a su backend/
+(p.ej. un `git worktree` del commit anterior).
+
+Uso:
+    python tools/benchmark_async_routes.py [--signals 200000] [--concurrency 20] [--duration 15]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+ROUTES = ["/admin/stats", "/admin/signals?size=50", "/strategies/marketplace", "/strategies/"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed(backend_dir: str, db_path: str, n: int) -> str:
+    """Crea el esquema con los modelos del backend, inserta N señales y devuelve un JWT de OWNER."""
+    env = dict(os.environ, DATABASE_URL=db_path)
+    code = (
+        "from database import Base, engine_sync\n"
+        "import models_db\n"
+        "Base.metadata.create_all(engine_sync)\n"
+        "from core.security import create_access_token\n"
+        "print(create_access_token({'sub': 'owner@bench.local'}, None).strip())\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, env=env,
+                         capture_output=True, text=True, check=True)
+    token = out.stdout.strip().splitlines()[-1]
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    con = sqlite3.connect(db_path)
+    con.execute("INSERT INTO users (email, name, hashed_password, role, plan, created_at) VALUES (?,?,?,?,?,?)",
+                ("owner@bench.local", "owner", "x", "admin", "OWNER", now.isoformat(sep=" ")))
+    sources = [f"Marketplace:p{i}" for i in range(8)] + ["LITE-Rule", "PRO"]
+    batch = []
+    for i in range(n):
+        ts = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        batch.append((ts.isoformat(sep=" "), rng.choice(["BTC", "ETH", "SOL"]), "1h", "long", 100.0, 110.0, 95.0,
+                      0.6, rng.choice(sources), rng.choice(["LITE", "PRO"]), f"bench|{i}", int(i % 50 == 0)))
+        if len(batch) == 50_000:
+            con.executemany("INSERT INTO signals (timestamp, token, timeframe, direction, entry, tp, sl, confidence,"
+                            " source, mode, idempotency_key, is_hidden) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", batch)
+            batch = []
+    if batch:
+        con.executemany("INSERT INTO signals (timestamp, token, timeframe, direction, entry, tp, sl, confidence,"
+                        " source, mode, idempotency_key, is_hidden) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", batch)
+    con.commit()
+    con.close()
+    return token
+
+
+def pct(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000
+
+
+async def worker(client, headers, stop, latencies, errors):
+    i = 0
+    while time.perf_counter() < stop:
+        route = ROUTES[i % len(ROUTES)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(route, headers=headers)
+            if r.status_code != 200:
+                errors.append(f"{route} {r.status_code}")
+        except httpx.HTTPError as e:
+            errors.append(f"{route} {type(e).__name__}")
+        latencies.append(time.perf_counter() - t0)
+
+
+async def probe(client, stop, latencies, errors):
+    while time.perf_counter() < stop:
+        t0 = time.perf_counter()
+        try:
+            await client.get("/health")
+        except httpx.HTTPError as e:
+            errors.append(f"/health {type(e).__name__}")
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.02)
+
+
+async def run_load(base_url: str, token: str, concurrency: int, duration: float):
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency + 5)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        # calentamiento (caches de totales, pool)
+        for route in ROUTES:
+            await client.get(route, headers=headers)
+        stop = time.perf_counter() + duration
+        db_lat, health_lat, errors = [], [], []
+        await asyncio.gather(
+            probe(client, stop, health_lat, errors),
+            *[worker(client, headers, stop, db_lat, errors) for _ in range(concurrency)],
+        )
+    return db_lat, health_lat, errors
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    p = argparse.ArgumentParser()
+    p.add_argument("--backend-dir", default=os.path.join(root, "backend"))
+    p.add_argument("--signals", type=int, default=200_000)
+    p.add_argument("--concurrency", type=int, default=20)
+    p.add_argument("--duration", type=float, default=15)
+    args = p.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "async_bench.db")
+    t0 = time.perf_counter()
+    token = seed(args.backend_dir, db_path, args.signals)
+    print(f"Seeded {args.signals:,} signals in {time.perf_counter() - t0:.1f}s ({args.backend_dir})")
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=db_path, PYTHONUNBUFFERED="1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=args.backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(120):
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        else:
+            raise SystemExit("backend did not start")
+
+        db_lat, health_lat, errors = asyncio.run(run_load(base_url, token, args.concurrency, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"concurrency={args.concurrency} duration={args.duration:.0f}s")
+    print(f"DB routes : {len(db_lat):6d} req ({len(db_lat) / args.duration:6.1f}/s) "
+          f"p50 {pct(db_lat, 50):8.1f} ms  p99 {pct(db_lat, 99):8.1f} ms  errors {len(errors)}")
+    print(f"/health   : {len(health_lat):6d} req              "
+          f"p50 {pct(health_lat, 50):8.1f} ms  p99 {pct(health_lat, 99):8.1f} ms  "
+          f"max {max(health_lat) * 1000 if health_lat else float('nan'):8.1f} ms")
+    if errors:
+        print("errors:", sorted(set(errors))[:10])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark del índice de los CSV legacy (core/csv_index.py) frente al
+parseo completo con csv.DictReader.
+
+Genera logs/LITE/{token}.csv con N señales y su EVALUATED con todas menos
+`--pending` evaluadas (en un directorio temporal) y mide:
+- eligible: evaluated_logger._eligible_signals_for_token, antes (dos
+  DictReader completos) y ahora (primera vez: construye el índice; ciclo:
+  con el índice ya construido);
+- tail: últimas 100 filas (fallback de /logs/{mode}/{token});
+- append: indexar 50 filas nuevas.
+
+Uso:
+    python tools/benchmark_csv_index.py [--rows 200000] [--pending 50]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", os.path.join(tempfile.mkdtemp(), "csv_bench.db"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import evaluated_logger as el
+from core.csv_index import CSVIndex
+
+LITE_HEADERS = ["timestamp", "token", "timeframe", "direction", "entry", "tp", "sl",
+                "confidence", "rationale", "source"]
+
+
+def _ts(now: datetime, minutes_ago: int) -> str:
+    return (now - timedelta(minutes=minutes_ago)).replace(microsecond=0).isoformat() + "Z"
+
+
+def seed(root: Path, rows: int, pending: int, now: datetime) -> None:
+    (root / "LITE").mkdir(parents=True)
+    (root / "EVALUATED").mkdir()
+    with open(root / "LITE" / "btc.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=LITE_HEADERS)
+        w.writeheader()
+        for i in range(rows):
+            w.writerow({"timestamp": _ts(now, rows - i), "token": "BTC", "timeframe": "1h",
+                        "direction": "long", "entry": 100, "tp": 110, "sl": 95, "confidence": 0.6,
+                        "rationale": "EMA cross\nRSI < 30" if i % 10 == 0 else "EMA cross", "source": "LITE-Rule"})
+    with open(root / "EVALUATED" / "btc.evaluated.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=el.EVAL_HEADERS)
+        w.writeheader()
+        for i in range(rows - pending):
+            w.writerow({"signal_ts": _ts(now, rows - i), "evaluated_at": now.isoformat() + "Z",
+                        "token": "BTC", "result": "hit-tp"})
+
+
+def legacy_eligible(root: Path):
+    with open(root / "EVALUATED" / "btc.evaluated.csv", encoding="utf-8") as f:
+        done = {r["signal_ts"] for r in csv.DictReader(f)}
+    now = datetime.utcnow()
+    out = []
+    with open(root / "LITE" / "btc.csv", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            ts = r.get("timestamp", "")
+            if ts and ts not in done and now - el._parse_iso_ts(ts) >= timedelta(minutes=el.EVAL_DELAY_MIN):
+                out.append(r)
+    return out
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=200_000)
+    p.add_argument("--pending", type=int, default=50)
+    args = p.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    now = datetime.utcnow()
+    seed(root, args.rows, args.pending, now)
+    el.LITE_DIR, el.EVAL_DIR = root / "LITE", root / "EVALUATED"
+    el._resolve_signal_refs = lambda token, rows: None  # sin DB: solo lectura de CSV
+    size_mb = os.path.getsize(root / "LITE" / "btc.csv") / 1e6
+    print(f"{args.rows:,} LITE rows ({size_mb:.1f} MB), {args.pending} pending")
+
+    old, t_old = timed(lambda: legacy_eligible(root))
+    first, t_first = timed(lambda: el._eligible_signals_for_token("btc"))
+    cycle, t_cycle = timed(lambda: el._eligible_signals_for_token("btc"))
+    same = [{k: v for k, v in r.items() if k != "_signal"} for r in cycle] == old
+    print(f"eligible  legacy {t_old:8.1f} ms | index first {t_first:8.1f} ms | cycle {t_cycle:6.1f} ms "
+          f"| {len(cycle)} rows, same={same and len(first) == len(old)}")
+
+    lite = str(root / "LITE" / "btc.csv")
+    _, t_full = timed(lambda: list(csv.DictReader(open(lite, encoding="utf-8")))[-100:])
+    _, t_tail = timed(lambda: CSVIndex(lite).tail(100))
+    print(f"tail 100  legacy {t_full:8.1f} ms | index (sidecar) {t_tail:6.1f} ms")
+
+    idx = CSVIndex(lite)
+    idx.refresh()
+    with open(lite, "a", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=LITE_HEADERS)
+        for i in range(50):
+            w.writerow({"timestamp": _ts(now, -i), "token": "BTC", "source": "LITE-Rule"})
+    _, t_app = timed(idx.refresh)
+    print(f"append 50 rows: incremental index {t_app:6.1f} ms ({len(idx):,} rows)")
+
+
+if __name__ == "__main__":
+    main()
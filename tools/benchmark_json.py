@@ -0,0 +1,162 @@
+"""
+Benchmark de la serialización de respuestas grandes (core/fast_json.py).
+
+Para cada payload representativo mide la CPU por petición (time.process_time)
+del camino anterior (jsonable_encoder + json.dumps, lo que hacía FastAPI con
+JSONResponse) frente a fast_json.dumps y al array en streaming, y el coste
+y tamaño con gzip:
+- backtest: /backtest/run con curva de --bars puntos y 50 trades;
+- ohlcv: /market/ohlcv con 1000 velas;
+- logs: /logs/{mode}/{token} con 500 señales;
+- admin: /admin/signals con 500 objetos ORM;
+- safe_float: BacktestEngine._safe_float (4 llamadas por vela).
+
+Uso:
+    python tools/benchmark_json.py [--bars 5000] [--repeat 50]
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", os.path.join(tempfile.mkdtemp(), "json_bench.db"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from fastapi.encoders import jsonable_encoder
+
+from core import fast_json
+from core.backtest_engine import BacktestEngine
+from models_db import Signal
+
+
+def backtest_payload(bars: int):
+    t0 = datetime(2024, 1, 1)
+    curve = [
+        {
+            "time": str(t0 + timedelta(hours=i)),
+            "timestamp": float(1704067200000 + i * 3600000),
+            "strategy_equity": round(10000 + math.sin(i / 50) * 300, 2),
+            "buy_hold_equity": round(10000 + i * 0.4, 2),
+            "price": round(42000 + math.cos(i / 30) * 800, 2),
+        }
+        for i in range(bars)
+    ]
+    trades = [
+        {"entry_time": str(t0), "exit_time": str(t0), "exit_ts": 1.7e12, "symbol": "BTC",
+         "type": "LONG", "entry": np.float64(42000.5), "exit": np.float64(42500.25),
+         "pnl": 12.5, "result": "WIN", "reason": "TP"}
+        for _ in range(50)
+    ]
+    return {
+        "metrics": {"initial_capital": 10000.0, "final_capital": 10350.2, "total_pnl": 350.2,
+                    "win_rate": 55.0, "total_trades": 120},
+        "trades": trades,
+        "curve": curve,
+        "curve_points": bars,
+    }
+
+
+def ohlcv_payload():
+    return [
+        {"timestamp": 1704067200000 + i * 1800000, "time": "2024-01-01 00:00",
+         "open": 42000.1, "high": 42100.2, "low": 41900.3, "close": 42050.4, "volume": 123.456}
+        for i in range(1000)
+    ]
+
+
+def logs_payload():
+    now = datetime.utcnow()
+    return [
+        {"timestamp": (now - timedelta(minutes=i)).isoformat(), "token": "BTC", "timeframe": "1h",
+         "direction": "long", "entry": 42000.0, "tp": 43000.0, "sl": 41500.0, "confidence": 0.72,
+         "source": "Marketplace:trend_king"}
+        for i in range(500)
+    ]
+
+
+def admin_payload():
+    now = datetime.utcnow()
+    items = [
+        Signal(id=i, timestamp=now, token="ETH", timeframe="30m", direction="short", entry=2500.0,
+               tp=2400.0, sl=2550.0, confidence=0.6, source="RSI_MACD", mode="LITE", is_hidden=0)
+        for i in range(500)
+    ]
+    return {"total": 12000, "page": 1, "size": 500, "next_cursor": "abc", "items": items}
+
+
+def legacy_render(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def stream_render(payload) -> bytes:
+    if isinstance(payload, dict):
+        items = payload["items"]
+        return b"".join(fast_json.iter_json_array(items, envelope=payload))
+    return b"".join(fast_json.iter_json_array(payload))
+
+
+def cpu_ms(fn, payload, repeat: int) -> float:
+    fn(payload)  # warm-up
+    t0 = time.process_time()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.process_time() - t0) * 1000 / repeat
+
+
+def legacy_safe_float(val):
+    try:
+        f = float(val)
+        if math.isnan(f) or math.isinf(f):
+            return 0.0
+        return f
+    except:
+        return 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bars", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"orjson: {'yes' if fast_json.orjson is not None else 'no (stdlib json)'}\n")
+    payloads = {
+        f"backtest ({args.bars} bars)": backtest_payload(args.bars),
+        "ohlcv (1000 candles)": ohlcv_payload(),
+        "logs (500 signals)": logs_payload(),
+        "admin (500 ORM rows)": admin_payload(),
+    }
+    print(f"{'payload':<24}{'bytes':>10}{'legacy ms':>11}{'fast ms':>9}{'speedup':>9}"
+          f"{'stream ms':>11}{'gzip ms':>9}{'gzip bytes':>12}")
+    for name, payload in payloads.items():
+        body = fast_json.dumps(payload)
+        legacy = cpu_ms(legacy_render, payload, args.repeat)
+        fast = cpu_ms(fast_json.dumps, payload, args.repeat)
+        stream = cpu_ms(stream_render, payload, args.repeat) if "backtest" not in name else float("nan")
+        gz = cpu_ms(lambda b: gzip.compress(b, compresslevel=5), body, args.repeat)
+        print(f"{name:<24}{len(body):>10}{legacy:>11.2f}{fast:>9.2f}{legacy / fast:>8.1f}x"
+              f"{stream:>11.2f}{gz:>9.2f}{len(gzip.compress(body, compresslevel=5)):>12}")
+
+    values = [np.float64(42000.123)] * 20000 + [float("nan")] * 100
+    t0 = time.process_time()
+    for v in values:
+        legacy_safe_float(v)
+    old = time.process_time() - t0
+    t0 = time.process_time()
+    for v in values:
+        BacktestEngine._safe_float(v)
+    new = time.process_time() - t0
+    print(f"\n_safe_float x{len(values)}: legacy {old * 1000:.2f} ms, now {new * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark del fan-out de Web Push (core/push_dispatcher.py).
+
+Levanta un push service local de pega (HTTP, latencia configurable) y una
+SQLite temporal con N suscripciones de claves reales (el cifrado es el de
+producción). Compara el envío secuencial de antes con fan_out() para varios
+tamaños. Una parte de los endpoints responde 410 (deben borrarse en bloque)
+y otra 503 la primera vez (deben reintentarse).
+
+Uso:
+    python tools/benchmark_push.py [--subs 10,100,500] [--latency-ms 30]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# DB temporal ANTES de importar database
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "push_bench.db")
+os.environ["PUSH_BACKOFF_BASE"] = "0.05"
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from database import Base, SessionLocal, engine_sync
+from models_db import PushSubscription
+import core.push_dispatcher as pd
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # el backlog por defecto (5) añade reintentos SYN de 1s
+
+
+class StandInPushService(BaseHTTPRequestHandler):
+    latency = 0.03
+    seen = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        path = self.path
+        if path.startswith("/gone/"):
+            status = 410
+        elif path.startswith("/flaky/"):
+            with self.lock:
+                first = path not in self.seen
+                self.seen.add(path)
+            status = 503 if first else 201
+        else:
+            status = 201
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def seed_subscriptions(n: int, base_url: str):
+    db = SessionLocal()
+    try:
+        db.query(PushSubscription).delete()
+        for i in range(n):
+            key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+                serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+            kind = "gone" if i % 20 == 0 else "flaky" if i % 25 == 1 else "ok"
+            db.add(PushSubscription(endpoint=f"{base_url}/{kind}/{n}-{i}",
+                                    p256dh=_b64(key), auth=_b64(os.urandom(16))))
+        db.commit()
+    finally:
+        db.close()
+
+
+def sequential_baseline(payload: str, private_key: str, claims: dict) -> float:
+    """El bucle anterior: un webpush() tras otro, sin sesión ni reintentos."""
+    from pywebpush import webpush, WebPushException
+    db = SessionLocal()
+    subs = db.query(PushSubscription).all()
+    t0 = time.perf_counter()
+    for sub in subs:
+        try:
+            webpush(subscription_info={"endpoint": sub.endpoint, "keys": {"p256dh": sub.p256dh, "auth": sub.auth}},
+                    data=payload, vapid_private_key=private_key, vapid_claims=dict(claims))
+        except WebPushException:
+            pass
+    db.close()
+    return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--subs", type=str, default="10,100,500")
+    p.add_argument("--latency-ms", type=int, default=30)
+    args = p.parse_args()
+
+    from py_vapid import Vapid
+    vapid = Vapid()
+    vapid.generate_keys()
+    private_key = _b64(vapid.private_key.private_numbers().private_value.to_bytes(32, "big"))
+    os.environ["VAPID_PRIVATE_KEY"] = private_key
+    claims = {"sub": "mailto:bench@example.com"}
+
+    StandInPushService.latency = args.latency_ms / 1000.0
+    server = StandInServer(("127.0.0.1", 0), StandInPushService)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    Base.metadata.create_all(engine_sync)
+
+    print(f"Stand-in push service: {base_url} (latency {args.latency_ms} ms) | workers: {pd.PUSH_WORKERS}")
+    for n in [int(x) for x in args.subs.split(",")]:
+        seed_subscriptions(n, base_url)
+        StandInPushService.seen.clear()
+        seq_s = sequential_baseline('{"title": "bench"}', private_key, claims)
+
+        seed_subscriptions(n, base_url)
+        StandInPushService.seen.clear()
+        res = pd.fan_out("bench", "fan-out benchmark", data={"type": "bench"})
+        fan_s = res["elapsed_ms"] / 1000.0
+        print(f"subs={n:5d} | sequential {seq_s:7.2f}s ({n / seq_s:7.1f}/s) | "
+              f"fan_out {fan_s:6.2f}s ({n / fan_s:7.1f}/s) x{seq_s / fan_s:5.1f} | "
+              f"ok={res['success']} removed={res['removed']} failed={res['failed']} retries={res['retries']}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
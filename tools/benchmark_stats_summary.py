@@ -0,0 +1,151 @@
+"""
+Benchmark de /stats/summary (core/stats_summary.py) frente a las seis
+consultas anteriores de main.compute_stats_summary.
+
+Crea una SQLite temporal con N señales (por defecto 1M, repartidas en 180
+días) y ~70% evaluadas, construye performance_stats y mide:
+- legacy: las 6 consultas agregadas separadas
+- single: la sentencia única con agregación condicional
+- cached: cached_summary() con la caché caliente
+
+--show-sql imprime la sentencia compilada para SQLite y PostgreSQL.
+
+Uso:
+    python tools/benchmark_stats_summary.py [--signals 1000000] [--repeat 5] [--show-sql]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# DB temporal ANTES de importar database
+os.environ["DATABASE_URL"] = os.path.join(tempfile.mkdtemp(), "stats_bench.db")
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import Base, SessionLocal, engine_sync
+from models_db import Signal, SignalEvaluation
+from core.performance_stats import rebuild
+from core.stats_summary import compute_summary, cached_summary, summary_statement, TEST_SOURCES
+
+SOURCES = ["Marketplace:scalper", "Marketplace:swing", "LITE-Rule", "PRO", "ADVISOR", "audit_script"]
+MODES = ["LITE", "LITE", "PRO", "CUSTOM"]
+RESULTS = ["WIN", "LOSS", "BE", "hit-tp", "neutral"]
+CHUNK = 50_000
+
+
+def populate(n: int, now: datetime):
+    rng = random.Random(42)
+    raw = engine_sync.raw_connection()
+    try:
+        cur = raw.cursor()
+        for start in range(0, n, CHUNK):
+            sig_rows, eval_rows = [], []
+            for i in range(start, min(start + CHUNK, n)):
+                ts = now - timedelta(seconds=rng.randint(0, 180 * 86400))
+                sig_rows.append((i + 1, ts.isoformat(sep=" "), "BTC", "1h", "long", 100.0, 110.0, 95.0, 0.7,
+                                 "", rng.choice(SOURCES), rng.choice(MODES), f"bench|{i}", 0))
+                if rng.random() < 0.7:
+                    ev = ts + timedelta(hours=rng.randint(1, 24))
+                    eval_rows.append((i + 1, min(ev, now).isoformat(sep=" "), rng.choice(RESULTS),
+                                      round(rng.uniform(-1, 2), 2), 100.0))
+            cur.executemany(
+                "INSERT INTO signals (id, timestamp, token, timeframe, direction, entry, tp, sl, confidence, "
+                "rationale, source, mode, idempotency_key, is_hidden) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                sig_rows)
+            cur.executemany(
+                "INSERT INTO signal_evaluations (signal_id, evaluated_at, result, pnl_r, exit_price) VALUES (?,?,?,?,?)",
+                eval_rows)
+            raw.commit()
+        cur.execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def legacy_summary(db, now: datetime):
+    """Las seis consultas de la versión anterior de main.compute_stats_summary."""
+    day_ago = now - timedelta(hours=24)
+    test_sources = list(TEST_SOURCES)
+    eval_24h = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
+        SignalEvaluation.evaluated_at >= day_ago, Signal.source.notin_(test_sources)).scalar() or 0
+    total_eval = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
+        Signal.source.notin_(test_sources)).scalar() or 0
+    tp_24h = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
+        SignalEvaluation.evaluated_at >= day_ago, SignalEvaluation.result == 'WIN',
+        Signal.source.notin_(test_sources)).scalar() or 0
+    sl_24h = db.query(func.count(SignalEvaluation.id)).join(Signal).filter(
+        SignalEvaluation.evaluated_at >= day_ago, SignalEvaluation.result == 'LOSS',
+        Signal.source.notin_(test_sources)).scalar() or 0
+    lite_24h = db.query(func.count(Signal.id)).filter(
+        Signal.timestamp >= day_ago, Signal.mode == 'LITE', Signal.source.notin_(test_sources)).scalar() or 0
+    pnl_7d = db.query(func.sum(SignalEvaluation.pnl_r)).join(Signal).filter(
+        SignalEvaluation.evaluated_at >= now - timedelta(days=7), Signal.source.notin_(test_sources)).scalar() or 0.0
+    decided = tp_24h + sl_24h
+    return {
+        "win_rate_24h": tp_24h / decided if decided > 0 else None,
+        "signals_evaluated_24h": eval_24h,
+        "signals_total_evaluated": total_eval,
+        "signals_lite_24h": lite_24h,
+        "open_signals": max(lite_24h - eval_24h, 0),
+        "pnl_7d": round(pnl_7d, 2),
+    }
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--signals", type=int, default=1_000_000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--show-sql", action="store_true")
+    args = p.parse_args()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    Base.metadata.create_all(engine_sync)
+
+    t0 = time.perf_counter()
+    populate(args.signals, now)
+    t1 = time.perf_counter()
+    db = SessionLocal()
+    rebuild(db)
+    t2 = time.perf_counter()
+    print(f"Signals: {args.signals:,} | populate {t1 - t0:.1f}s | performance_stats rebuild {t2 - t1:.1f}s")
+
+    legacy = legacy_summary(db, now)
+    single = compute_summary(db, now)
+    same = all(legacy[k] == single[k] for k in legacy if k != "signals_total_evaluated")
+    print(f"Results match: {same} | total evaluated legacy={legacy['signals_total_evaluated']:,} "
+          f"single={single['signals_total_evaluated']:,}")
+
+    legacy_s = best_of(lambda: legacy_summary(db, now), args.repeat)
+    single_s = best_of(lambda: compute_summary(db, now), args.repeat)
+    cached_summary()  # calienta la caché
+    cached_s = best_of(cached_summary, args.repeat)
+    print(f"legacy (6 queries): {legacy_s * 1000:8.1f} ms")
+    print(f"single statement:   {single_s * 1000:8.1f} ms  (x{legacy_s / single_s:.1f})")
+    print(f"cached:             {cached_s * 1000:8.3f} ms")
+
+    if args.show_sql:
+        stmt = summary_statement(now)
+        for name, dialect in (("SQLite", sqlite.dialect()), ("PostgreSQL", postgresql.dialect())):
+            print(f"\n-- {name}\n{stmt.compile(dialect=dialect, compile_kwargs={'literal_binds': True})}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
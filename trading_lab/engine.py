@@ -21,6 +21,7 @@ from strategies.ma_cross import MACrossStrategy
 from strategies.donchian import DonchianStrategy
 from strategies.bb_mean_reversion import BBMeanReversionStrategy
 from core.schemas import Signal
+from core.monte_carlo import run_monte_carlo
 
 # ==== CONFIG ====
 DATASETS_DIR = "datasets"
@@ -42,6 +43,10 @@ FAST_TAIL = 5000
 # Scoring opcional
 GENERATE_SCORED_SIGNALS = True
 
+# Monte Carlo opcional (0 = desactivado). Añade mc_* al summary.
+MONTE_CARLO_SIMS = 0
+MONTE_CARLO_METHOD = "bootstrap"  # bootstrap | shuffle
+
 # Estrategias (Instancias de clases)
 STRATEGIES = [
     MACrossStrategy(config={"fast_period": 10, "slow_period": 50, "tp_atr_mult": 1.5, "sl_atr_mult": 1.0, "bars_timeout": 48}),
@@ -345,6 +350,16 @@ def run_strategy_simulation(df: pd.DataFrame, symbol: str, timeframe: str, strat
 
     metrics = compute_metrics(log_df, df_len=len(df))
     metrics.update({"symbol": symbol, "timeframe": timeframe, "strategy": name, "kind": kind})
+
+    if MONTE_CARLO_SIMS > 0:
+        mc = run_monte_carlo(log_df["return_pct_net"].fillna(0.0) / 100.0,
+                             simulations=MONTE_CARLO_SIMS, method=MONTE_CARLO_METHOD)
+        metrics.update({
+            "mc_final_equity_p5": mc["final_equity"]["p5"],
+            "mc_final_equity_p50": mc["final_equity"]["p50"],
+            "mc_max_dd_pct_p5": mc["max_drawdown_pct"]["p5"],
+            "mc_risk_of_ruin": mc["risk_of_ruin"],
+        })
     return log_df, metrics
 
 def append_summary(rows: List[Dict]):
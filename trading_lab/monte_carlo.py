@@ -0,0 +1,90 @@
+# monte_carlo.py
+# Robustez Monte Carlo sobre los logs de trades generados por engine.py
+# (logs/{SYMBOL}_{kind}_{tf}.csv, columna return_pct_net en %).
+#
+# Uso:
+#   python monte_carlo.py --log logs/ETHUSDT_ma_cross_v1_4h.csv --sims 5000 --method shuffle
+#   python monte_carlo.py --all --sims 2000          # todos los logs de logs/
+#
+# El cálculo vive en backend/core/monte_carlo.py (compartido con /backtest/run).
+
+import os, sys, glob, argparse
+from pathlib import Path
+
+import pandas as pd
+
+current_dir = Path(__file__).parent
+backend_dir = current_dir.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from core.monte_carlo import run_monte_carlo, METHODS, DEFAULT_RUIN_DRAWDOWN, DEFAULT_MAX_BYTES
+
+LOGS_DIR = "logs"
+RESULTS_DIR = "results"
+
+
+def load_trade_returns(path: str):
+    df = pd.read_csv(path)
+    if "return_pct_net" not in df.columns:
+        raise ValueError(f"{path} no tiene columna return_pct_net")
+    return (df["return_pct_net"].fillna(0.0) / 100.0).to_numpy()
+
+
+def analyze_log(path: str, sims: int, method: str, ruin: float, seed, max_bytes: int) -> dict:
+    mc = run_monte_carlo(
+        load_trade_returns(path),
+        simulations=sims,
+        method=method,
+        ruin_drawdown=ruin,
+        seed=seed,
+        max_bytes=max_bytes,
+    )
+    row = {"log": os.path.basename(path), "method": mc["method"],
+           "simulations": mc["simulations"], "trades": mc["trades"],
+           "risk_of_ruin": mc["risk_of_ruin"], "prob_loss": mc["prob_loss"]}
+    for k, v in mc["final_equity"].items():
+        row[f"final_equity_{k}"] = v
+    for k, v in mc["max_drawdown_pct"].items():
+        row[f"max_dd_pct_{k}"] = v
+    return row
+
+
+def main():
+    p = argparse.ArgumentParser(description="Monte Carlo (bootstrap/shuffle) sobre logs de trades de engine.py")
+    p.add_argument("--log", type=str, help="CSV de trades (logs/...)")
+    p.add_argument("--all", action="store_true", help="Analiza todos los CSV de logs/")
+    p.add_argument("--sims", type=int, default=1000, help="Número de simulaciones")
+    p.add_argument("--method", type=str, default="bootstrap", choices=METHODS)
+    p.add_argument("--ruin", type=float, default=DEFAULT_RUIN_DRAWDOWN, help="Drawdown de ruina (0.5 = 50%%)")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Memoria máx. por chunk (MB)")
+    p.add_argument("--out", type=str, default=os.path.join(RESULTS_DIR, "monte_carlo.csv"))
+    args = p.parse_args()
+
+    if args.all:
+        paths = sorted(glob.glob(os.path.join(LOGS_DIR, "*.csv")))
+    elif args.log:
+        paths = [args.log]
+    else:
+        p.error("Indica --log <csv> o --all")
+
+    rows = []
+    for path in paths:
+        try:
+            row = analyze_log(path, args.sims, args.method, args.ruin, args.seed, args.max_mb * 1024 * 1024)
+        except Exception as e:
+            print(f"[mc] WARN: {path} → {e}")
+            continue
+        rows.append(row)
+        print(f"  - {row['log']}: trades={row['trades']} "
+              f"Eq p5/p50/p95={row.get('final_equity_p5', 0):.2f}/{row.get('final_equity_p50', 0):.2f}/{row.get('final_equity_p95', 0):.2f} "
+              f"DD p50={row.get('max_dd_pct_p50', 0):.1f}% RoR={row['risk_of_ruin']:.2%}")
+
+    if rows:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        pd.DataFrame(rows).to_csv(args.out, index=False)
+        print(f"[mc] Guardado: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import { Bell, CheckCircle, AlertTriangle, Info, BellRing } from 'lucide-react';
 import { Notification as AppNotification } from '../types';
 import { API_BASE_URL } from '../constants';
 import { api } from '../services/api';
+import { subscribeLive } from '../services/liveStream';
 
 // Helper to convert VAPID key
 function urlBase64ToUint8Array(base64String: string) {
@@ -36,20 +37,21 @@ export const NotificationCenter: React.FC = () => {
     }
 
     // 2. Fetch Recent Signals as Notifications
+    const toNotification = (log: any): AppNotification => ({
+      id: log.id.toString(),
+      title: `${log.direction} ${log.token}`,
+      message: `Entry: ${log.entry} | Source: ${log.source}`,
+      time: new Date(log.timestamp).toLocaleTimeString(),
+      type: log.status === 'WIN' ? 'success' : log.status === 'LOSS' ? 'alert' : 'info',
+      read: false
+    });
+
     const fetchNotifications = async () => {
       try {
         // We use logs as the source of truth for "notifications" for now
         const data = await api.get('/logs/recent?limit=10');
         if (data) {
-          const mapped: AppNotification[] = data.map((log: any) => ({
-            id: log.id.toString(),
-            title: `${log.direction} ${log.token}`,
-            message: `Entry: ${log.entry} | Source: ${log.source}`,
-            time: new Date(log.timestamp).toLocaleTimeString(),
-            type: log.status === 'WIN' ? 'success' : log.status === 'LOSS' ? 'alert' : 'info',
-            read: false
-          }));
-          setNotifications(mapped);
+          setNotifications(data.map(toNotification));
         }
       } catch (e) {
         console.error("Failed to fetch notifications", e);
@@ -57,8 +59,19 @@ export const NotificationCenter: React.FC = () => {
     };
 
     fetchNotifications();
-    const interval = setInterval(fetchNotifications, 15000); // Poll every 15s
-    return () => clearInterval(interval);
+    // New signals / results arrive over the live stream (no 15s polling)
+    const unsubscribers = [
+      subscribeLive('signal', (log) => setNotifications(prev =>
+        prev.some(n => n.id === log.id.toString()) ? prev : [toNotification(log), ...prev].slice(0, 10)
+      )),
+      subscribeLive('evaluation', (ev) => setNotifications(prev => prev.map((n): AppNotification =>
+        n.id === ev.signal_id.toString()
+          ? { ...n, type: ev.status === 'WIN' ? 'success' : ev.status === 'LOSS' ? 'alert' : 'info' }
+          : n
+      ))),
+      subscribeLive('resync', () => fetchNotifications()),
+    ];
+    return () => unsubscribers.forEach(unsubscribe => unsubscribe());
 
   }, []);
 
@@ -6,6 +6,7 @@ import { Activity, DollarSign, Zap, RefreshCw, Target, Bot } from 'lucide-react'
 import { api } from '../../services/api';
 import { useAuth } from '../../context/AuthContext';
 import { API_BASE_URL } from '../../constants';
+import { subscribeLive, applyLiveEvent } from '../../services/liveStream';
 
 import { MetricCard } from './MetricCard';
 
@@ -45,8 +46,32 @@ export const DashboardHome: React.FC = () => {
 
     useEffect(() => {
         fetchData();
-        const interval = setInterval(fetchData, 30000);
-        return () => clearInterval(interval);
+        // Live stream instead of re-fetching everything every 30s. Results change
+        // the stats, which are reloaded once per burst of evaluations.
+        let statsTimer: ReturnType<typeof setTimeout> | null = null;
+        const refreshStats = () => {
+            if (statsTimer) return;
+            statsTimer = setTimeout(async () => {
+                statsTimer = null;
+                try {
+                    setStats(await api.get('/stats/summary'));
+                } catch (error) {
+                    console.error("Error refreshing stats:", error);
+                }
+            }, 5000);
+        };
+        const unsubscribers = [
+            subscribeLive('signal', (data) => setRecentSignals(prev => applyLiveEvent(prev || [], 'signal', data, 20))),
+            subscribeLive('evaluation', (data) => {
+                setRecentSignals(prev => applyLiveEvent(prev || [], 'evaluation', data));
+                refreshStats();
+            }),
+            subscribeLive('resync', () => fetchData()),
+        ];
+        return () => {
+            unsubscribers.forEach(unsubscribe => unsubscribe());
+            if (statsTimer) clearTimeout(statsTimer);
+        };
     }, []);
 
     const handleRefresh = () => {
@@ -16,6 +16,7 @@ import {
 import { useAuth } from '../../context/AuthContext';
 import { NotificationCenter } from '../NotificationCenter';
 import { API_BASE_URL } from '../../constants';
+import { subscribeLive } from '../../services/liveStream';
 import { AdvisorChat } from '../AdvisorChat';
 
 interface MainLayoutProps {
@@ -47,8 +48,12 @@ export const MainLayout: React.FC<MainLayoutProps> = ({ children }) => {
         };
 
         fetchPrices();
-        const interval = setInterval(fetchPrices, 60000); // Update every 1m
-        return () => clearInterval(interval);
+        // Later updates arrive as "ticker" events from the live stream (no 1m polling)
+        return subscribeLive('ticker', (data) => {
+            if (data.prices) {
+                setPrices(data.prices);
+            }
+        });
     }, []);
 
     const navItems = [
@@ -6,6 +6,10 @@ import { API_BASE_URL } from '../constants';
 import { api } from '../services/api';
 import { toast } from 'react-hot-toast';
 
+// Point budget for the equity chart: the backend downsamples the curve
+// (minmax keeps each series' peaks and troughs) instead of sending every bar
+const CURVE_MAX_POINTS = 1000;
+
 export const BacktestPage: React.FC = () => {
     const [loading, setLoading] = useState(false);
     const [params, setParams] = useState({
@@ -18,6 +22,7 @@ export const BacktestPage: React.FC = () => {
 
     const [results, setResults] = useState<any>(null);
     const [error, setError] = useState('');
+    const [progress, setProgress] = useState<{ bars_done: number; bars_total: number | null; trades: number } | null>(null);
 
     // Persona Modal State
     const [isPersonaModalOpen, setIsPersonaModalOpen] = useState(false);
@@ -25,13 +30,32 @@ export const BacktestPage: React.FC = () => {
     const [personaDesc, setPersonaDesc] = useState('');
     const navigate = useNavigate();
 
+    // Progress via Server-Sent Events; resolves with the final job status
+    const waitForJob = (jobId: string) => new Promise<string>((resolve, reject) => {
+        const source = new EventSource(`${API_BASE_URL}/backtest/jobs/${jobId}/stream`);
+        source.addEventListener('progress', (ev: MessageEvent) => {
+            const data = JSON.parse(ev.data);
+            setProgress(data.progress);
+        });
+        source.addEventListener('end', (ev: MessageEvent) => {
+            source.close();
+            const data = JSON.parse(ev.data);
+            data.status === 'done' ? resolve(data.status) : reject(new Error(data.error || `Backtest ${data.status}`));
+        });
+        source.onerror = () => {
+            source.close();
+            reject(new Error('Lost connection to backtest progress stream'));
+        };
+    });
+
     const runBacktest = async () => {
         setLoading(true);
         setError('');
         setResults(null);
+        setProgress(null);
 
         try {
-            const res = await fetch(`${API_BASE_URL}/backtest/run`, {
+            const res = await fetch(`${API_BASE_URL}/backtest/jobs`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -39,7 +63,9 @@ export const BacktestPage: React.FC = () => {
                     token: params.token,
                     timeframe: params.timeframe,
                     days: Number(params.days),
-                    initial_capital: Number(params.capital)
+                    initial_capital: Number(params.capital),
+                    max_points: CURVE_MAX_POINTS,
+                    downsample: 'minmax'
                 })
             });
 
@@ -48,8 +74,17 @@ export const BacktestPage: React.FC = () => {
                 throw new Error(`Error ${res.status}: ${text}`);
             }
 
-            const data = await res.json();
-            setResults(data);
+            const job = await res.json();
+            if (job.status !== 'done') {
+                await waitForJob(job.job_id);
+            }
+
+            const jobRes = await fetch(`${API_BASE_URL}/backtest/jobs/${job.job_id}`);
+            if (!jobRes.ok) {
+                throw new Error(`Error ${jobRes.status}: ${await jobRes.text()}`);
+            }
+            const data = await jobRes.json();
+            setResults(data.result);
             toast.success("Backtest simulation complete!");
         } catch (err: any) {
             console.error(err);
@@ -57,6 +92,7 @@ export const BacktestPage: React.FC = () => {
             toast.error("Backtest failed");
         } finally {
             setLoading(false);
+            setProgress(null);
         }
     };
 
@@ -205,7 +241,11 @@ export const BacktestPage: React.FC = () => {
                         ) : (
                             <Play className="h-5 w-5" />
                         )}
-                        {loading ? 'Simulating...' : 'Run Experiment'}
+                        {loading
+                            ? (progress?.bars_total
+                                ? `Simulating ${Math.round((progress.bars_done / progress.bars_total) * 100)}% · ${progress.trades} trades`
+                                : 'Simulating...')
+                            : 'Run Experiment'}
                     </button>
                 </div>
                 {error && <p className="text-rose-400 mt-4 text-sm bg-rose-950/30 p-3 rounded-lg border border-rose-900 flex items-center gap-2"><Info className="w-4 h-4" />{error}</p>}
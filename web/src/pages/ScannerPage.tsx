@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { api } from '../services/api';
 import { useAuth } from '../context/AuthContext';
@@ -6,6 +6,7 @@ import { RefreshCw, Zap, TrendingUp, TrendingDown, Radio, Radar } from 'lucide-r
 import { API_BASE_URL } from '../constants';
 import { ScannerSignalCard } from '../components/scanner/ScannerSignalCard';
 import { TacticalAnalysisDrawer } from '../components/scanner/TacticalAnalysisDrawer';
+import { subscribeLive, applyLiveEvent } from '../services/liveStream';
 
 // Reusing StatusBadge logic inside cards
 
@@ -28,59 +29,67 @@ export const ScannerPage: React.FC = () => {
         return 60 * 60 * 1000; // Default 1h
     };
 
+    // Latest /logs/recent rows (kept up to date by the live stream)
+    const rawSignalsRef = useRef<any[]>([]);
+
+    const processSignals = (input: any[]) => {
+        let rawSignals = input;
+
+        // --- MEMBERSHIP LOCKING LOGIC ---
+        const plan = userProfile?.user.subscription_status || 'free';
+
+        rawSignals = rawSignals.map((s: any) => {
+            let locked = false;
+
+            if (plan === 'free') {
+                // Rookie: BTC, ETH, SOL only + 4h/Daily
+                const allowedTokens = ['BTC', 'ETH', 'SOL'];
+                const isAllowedToken = allowedTokens.includes(s.token.toUpperCase());
+                const isAllowedTf = s.timeframe.includes('4h') || s.timeframe.includes('1d');
+
+                if (!isAllowedToken || !isAllowedTf) {
+                    locked = true;
+                }
+            } else if (plan === 'trader') {
+                // Trader: Lock scalping signals (1m, 5m)
+                if (['1m', '5m'].includes(s.timeframe)) {
+                    locked = true;
+                }
+            }
+            return { ...s, locked };
+        });
+        // Whale sees everything.
+
+        // Deduplicate: Keep only the latest signal per Token+Timeframe
+        // AND Filter State Signals (> 2x timeframe duration)
+        const uniqueMap = new Map();
+        const now = Date.now();
+
+        rawSignals.forEach((sig: any) => {
+            // 1. Freshness Check
+            const sigTime = new Date(sig.timestamp).getTime();
+            const age = now - sigTime;
+            const duration = getDurationMs(sig.timeframe || '1h');
+
+            // If signal is older than 2 candles, it's stale (history)
+            if (age > duration * 2) return;
+
+            // 2. Uniqueness Check
+            const key = `${sig.token}-${sig.timeframe}`;
+            if (!uniqueMap.has(key)) {
+                uniqueMap.set(key, sig);
+            }
+        });
+
+        setSignals(Array.from(uniqueMap.values()));
+    };
+
     const fetchSignals = async () => {
         try {
             const res = await fetch(`${API_BASE_URL}/logs/recent?limit=100`);
             if (res.ok) {
-                let rawSignals = await res.json();
-
-                // --- MEMBERSHIP LOCKING LOGIC ---
-                const plan = userProfile?.user.subscription_status || 'free';
-
-                rawSignals = rawSignals.map((s: any) => {
-                    let locked = false;
-
-                    if (plan === 'free') {
-                        // Rookie: BTC, ETH, SOL only + 4h/Daily
-                        const allowedTokens = ['BTC', 'ETH', 'SOL'];
-                        const isAllowedToken = allowedTokens.includes(s.token.toUpperCase());
-                        const isAllowedTf = s.timeframe.includes('4h') || s.timeframe.includes('1d');
-
-                        if (!isAllowedToken || !isAllowedTf) {
-                            locked = true;
-                        }
-                    } else if (plan === 'trader') {
-                        // Trader: Lock scalping signals (1m, 5m)
-                        if (['1m', '5m'].includes(s.timeframe)) {
-                            locked = true;
-                        }
-                    }
-                    return { ...s, locked };
-                });
-                // Whale sees everything.
-
-                // Deduplicate: Keep only the latest signal per Token+Timeframe
-                // AND Filter State Signals (> 2x timeframe duration)
-                const uniqueMap = new Map();
-                const now = Date.now();
-
-                rawSignals.forEach((sig: any) => {
-                    // 1. Freshness Check
-                    const sigTime = new Date(sig.timestamp).getTime();
-                    const age = now - sigTime;
-                    const duration = getDurationMs(sig.timeframe || '1h');
-
-                    // If signal is older than 2 candles, it's stale (history)
-                    if (age > duration * 2) return;
-
-                    // 2. Uniqueness Check
-                    const key = `${sig.token}-${sig.timeframe}`;
-                    if (!uniqueMap.has(key)) {
-                        uniqueMap.set(key, sig);
-                    }
-                });
-
-                setSignals(Array.from(uniqueMap.values()));
+                rawSignalsRef.current = await res.json();
+                processSignals(rawSignalsRef.current);
             }
         } catch (error) {
             console.error("Error fetching signals:", error);
@@ -92,8 +101,22 @@ export const ScannerPage: React.FC = () => {
 
     useEffect(() => {
         fetchSignals();
-        const interval = setInterval(fetchSignals, 15000); // 15s refresh for scanner
-        return () => clearInterval(interval);
+        // New signals and results arrive over the live stream (no 15s polling)
+        const onLive = (type: 'signal' | 'evaluation') => (data: any) => {
+            rawSignalsRef.current = applyLiveEvent(rawSignalsRef.current, type, data, 100);
+            processSignals(rawSignalsRef.current);
+        };
+        const unsubscribers = [
+            subscribeLive('signal', onLive('signal')),
+            subscribeLive('evaluation', onLive('evaluation')),
+            subscribeLive('resync', () => fetchSignals()),
+        ];
+        // Freshness filter only (local, no request): drop signals that went stale
+        const interval = setInterval(() => processSignals(rawSignalsRef.current), 60000);
+        return () => {
+            unsubscribers.forEach(unsubscribe => unsubscribe());
+            clearInterval(interval);
+        };
     }, []);
 
     const handleRefresh = async () => {
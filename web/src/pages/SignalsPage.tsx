@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { API_BASE_URL } from '../constants';
 import { RefreshCw } from 'lucide-react';
 import { SignalCard } from '../components/SignalCard';
+import { subscribeLive, applyLiveEvent } from '../services/liveStream';
 
 export const SignalsPage: React.FC = () => {
     const [signals, setSignals] = useState<any[]>([]);
@@ -24,8 +25,13 @@ export const SignalsPage: React.FC = () => {
 
     useEffect(() => {
         fetchSignals();
-        const interval = setInterval(fetchSignals, 15000);
-        return () => clearInterval(interval);
+        // Live updates over SSE instead of polling every 15s
+        const unsubscribers = [
+            subscribeLive('signal', (data) => setSignals(prev => applyLiveEvent(prev, 'signal', data, 50))),
+            subscribeLive('evaluation', (data) => setSignals(prev => applyLiveEvent(prev, 'evaluation', data))),
+            subscribeLive('resync', () => fetchSignals()),
+        ];
+        return () => unsubscribers.forEach(unsubscribe => unsubscribe());
     }, []);
 
     const filteredSignals = signals.filter(s => {
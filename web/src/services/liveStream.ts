@@ -0,0 +1,137 @@
+import { API_BASE_URL } from "../constants";
+
+// =========================
+// Live stream (SSE /stream/events)
+// =========================
+//
+// One EventSource per tab shared by every component (signals, evaluations,
+// ticker) instead of each one polling on its own interval. It
+// reconnects with a fresh stream ticket and the last event id, so the backend
+// replays what was missed. "resync" means the gap was too large: reload over REST.
+
+export type LiveEventType = "hello" | "signal" | "evaluation" | "ticker" | "resync";
+type Handler = (data: any) => void;
+
+const EVENT_TYPES: LiveEventType[] = ["hello", "signal", "evaluation", "ticker", "resync"];
+
+const handlers: Record<LiveEventType, Set<Handler>> = {
+  hello: new Set(),
+  signal: new Set(),
+  evaluation: new Set(),
+  ticker: new Set(),
+  resync: new Set(),
+};
+
+let source: EventSource | null = null;
+let connecting = false;
+let lastTicker: any = null;
+let lastEventId: string | null = null;
+let retryTimer: ReturnType<typeof setTimeout> | null = null;
+
+const RETRY_MS = 3000;
+
+function listenerCount(): number {
+  return EVENT_TYPES.reduce((n, t) => n + handlers[t].size, 0);
+}
+
+// The JWT never goes in the URL (access logs, history, Referer): a short-lived,
+// single-use ticket is requested with the Authorization header first.
+// Returns "denied" on 401/403 (no retry until someone subscribes again).
+async function fetchTicket(token: string): Promise<string | "denied" | null> {
+  try {
+    const res = await fetch(`${API_BASE_URL}/stream/ticket`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (res.status === 401 || res.status === 403) return "denied";
+    if (!res.ok) return null;
+    const data = await res.json();
+    return data.ticket || null;
+  } catch {
+    return null;
+  }
+}
+
+function scheduleReconnect() {
+  if (retryTimer || listenerCount() === 0) return;
+  retryTimer = setTimeout(() => {
+    retryTimer = null;
+    void connect();
+  }, RETRY_MS);
+}
+
+async function connect() {
+  const token = localStorage.getItem("auth_token");
+  if (!token || source || connecting) return;
+
+  connecting = true;
+  const ticket = await fetchTicket(token);
+  connecting = false;
+  if (ticket === "denied") return;
+  if (!ticket) {
+    scheduleReconnect();
+    return;
+  }
+  if (source || listenerCount() === 0) return;
+
+  // Tickets are single-use, so the browser's own reconnect (same URL) would be
+  // rejected: reconnect here with a new ticket and resume from lastEventId.
+  const params = new URLSearchParams({ ticket });
+  if (lastEventId) params.set("lastEventId", lastEventId);
+  source = new EventSource(`${API_BASE_URL}/stream/events?${params.toString()}`);
+  EVENT_TYPES.forEach((type) => {
+    source!.addEventListener(type, (ev: MessageEvent) => {
+      if (ev.lastEventId) lastEventId = ev.lastEventId;
+      let data: any = null;
+      try {
+        data = JSON.parse(ev.data);
+      } catch {
+        return;
+      }
+      if (type === "ticker") lastTicker = data;
+      handlers[type].forEach((h) => h(data));
+    });
+  });
+  source.onerror = () => {
+    if (source) {
+      source.close();
+      source = null;
+    }
+    scheduleReconnect();
+  };
+}
+
+function disconnect() {
+  if (retryTimer) {
+    clearTimeout(retryTimer);
+    retryTimer = null;
+  }
+  if (source) {
+    source.close();
+    source = null;
+  }
+}
+
+/**
+ * Subscribe to a live event type. Returns the unsubscribe function (use it
+ * as the useEffect cleanup). The connection opens with the first listener
+ * and closes with the last one.
+ */
+export function subscribeLive(type: LiveEventType, handler: Handler): () => void {
+  handlers[type].add(handler);
+  void connect();
+  if (type === "ticker" && lastTicker) handler(lastTicker);
+  return () => {
+    handlers[type].delete(handler);
+    if (listenerCount() === 0) disconnect();
+  };
+}
+
+/** Applies signal/evaluation events to a /logs/recent list (newest first). */
+export function applyLiveEvent(list: any[], type: "signal" | "evaluation", data: any, max = 100): any[] {
+  if (type === "signal") {
+    if (list.some((s) => s.id === data.id)) return list;
+    return [data, ...list].slice(0, max);
+  }
+  return list.map((s) => (s.id === data.signal_id ? { ...s, status: data.status, pnl: data.pnl } : s));
+}